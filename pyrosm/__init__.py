@@ -15,6 +15,7 @@ __all__ = [
     "get_data_by_bbox",
     "get_data_by_geocoding",
     "get_path",
+    "instrument",
 ]
 
 
@@ -35,4 +36,8 @@ def __getattr__(name):
         from pyrosm.data import geocode, get_data_by_geocoding
 
         return geocode if name == "geocode" else get_data_by_geocoding
+    if name == "instrument":
+        from importlib import import_module
+
+        return import_module("pyrosm.instrument")
     raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
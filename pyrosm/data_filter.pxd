@@ -1,3 +1,6 @@
+from pyrosm.way_store cimport WayStore
+
+cdef way_candidate_indices(WayStore ways, osm_data_type, relation_way_ids, bint keep_all=*)
 cdef filter_osm_records(data_records, data_filter, osm_data_type, relation_way_ids, filter_type, bint keep_all=*)
 cdef filter_array_dict_by_indices_or_mask(array_dict, indices)
 cdef get_lookup_khash_for_int64(int64_id_array)
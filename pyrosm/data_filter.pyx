@@ -3,6 +3,7 @@ import pandas as pd
 from cykhash.khashsets cimport any_int64_from_iter, isin_int64, Int64Set_from_buffer
 from cpython cimport array
 from pyrosm.filter_compiler import CompiledFilter
+from pyrosm.way_store cimport WayStore
 
 
 # Structural fields the parser attaches to every (flattened) way record; any other
@@ -12,6 +13,9 @@ WAY_STRUCTURAL_KEYS = frozenset(
     {"id", "version", "timestamp", "visible", "nodes", "changeset"}
 )
 
+# The fields present on every way record a WayStore rebuilds, besides its tags.
+WAY_RECORD_FIELDS = frozenset({"id", "version", "timestamp", "visible", "nodes"})
+
 
 class Solver:
     """Solver is used to toggle between exclude / keep checks applied in data filter."""
@@ -57,6 +61,33 @@ cdef way_is_part_of_relation(way_record, lookup_dict):
         raise e
 
 
+cdef way_candidate_indices(WayStore ways, osm_data_type, relation_way_ids,
+                           bint keep_all=False):
+    """
+    Indices of the ways in a WayStore that can pass filter_osm_records: relation
+    member ways, and ways carrying one of the OSM keys (any non-structural tag under
+    keep_all). Evaluated on the store's tag-key arrays, so only these candidates are
+    rebuilt as records for the per-record filtering.
+    """
+    if keep_all:
+        key_flags = [k not in WAY_STRUCTURAL_KEYS for k in ways.key_names]
+    else:
+        # A structural field used as an OSM key is present on every record.
+        if any(k in WAY_RECORD_FIELDS for k in osm_data_type):
+            return np.arange(len(ways))
+        osm_keys = set(osm_data_type)
+        key_flags = [k in osm_keys for k in ways.key_names]
+
+    hits = np.array(key_flags, dtype=bool)[ways.tag_keys]
+    hit_count = np.zeros(len(hits) + 1, dtype=np.int64)
+    np.cumsum(hits, out=hit_count[1:])
+    tags_off = ways.tags_off
+    mask = (hit_count[tags_off[1:]] - hit_count[tags_off[:-1]]) > 0
+    if relation_way_ids is not None:
+        mask |= np.isin(ways.id, np.asarray(relation_way_ids, dtype=np.int64))
+    return np.flatnonzero(mask)
+
+
 cdef filter_osm_records(data_records,
                         data_filter,
                         osm_data_type,
@@ -68,8 +99,9 @@ cdef filter_osm_records(data_records,
     
     Parameters
     ----------
-    data_records : list:
-        A list of OSM data records. 
+    data_records : list | WayStore
+        A list of OSM data records, or a WayStore whose candidate ways are rebuilt
+        as records.
         A single record is a dictionary with OSM data, such as: 
            - {"highway": "primary", "maxspeed": 80, "name": "Highway-name-foo", 
               "nodes": [1111,2222,3333,4444]}
@@ -95,7 +127,7 @@ cdef filter_osm_records(data_records,
         where given tag:value pair is present in the record.  
     """
     cdef str rec_value
-    cdef int i, N = len(data_records)
+    cdef int i, N
 
     solver = Solver(filter_type)
     filtered_data = []
@@ -107,6 +139,12 @@ cdef filter_osm_records(data_records,
     if not isinstance(osm_data_type, list):
         osm_data_type = [osm_data_type]
 
+    if isinstance(data_records, WayStore):
+        data_records = data_records.records(
+            way_candidate_indices(data_records, osm_data_type, relation_way_ids, keep_all)
+        )
+    N = len(data_records)
+
     if data_filter is not None and not use_predicate:
         if len(data_filter) == 0:
             data_filter = None
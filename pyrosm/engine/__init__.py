@@ -8,7 +8,8 @@ features reference and assembles the geometries. Peak memory is bounded by the w
 set rather than the whole file.
 
 The public ``get_*`` readers re-exported here mirror the in-memory reader's output
-column-for-column.
+column-for-column; ``get_layers`` reads several of their layers from a single decode, and
+``iter_layer`` streams a layer chunk by chunk.
 
 Parallel reading and the ``__main__`` guard: the engine reads on a single core by default.
 Pass ``workers="auto"`` to choose the count automatically (a single core for small files,
@@ -29,6 +30,8 @@ from pyrosm.engine.readers import (
     get_boundaries,
     get_data_by_custom_criteria,
     get_network,
+    get_layers,
+    iter_layer,
 )
 
 __all__ = [
@@ -39,4 +42,6 @@ __all__ = [
     "get_boundaries",
     "get_data_by_custom_criteria",
     "get_network",
+    "get_layers",
+    "iter_layer",
 ]
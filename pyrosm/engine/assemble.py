@@ -4,14 +4,22 @@ tag and geometry pipeline, so the output matches the in-memory reader column-for
 
 import numpy as np
 
+from pyrosm import instrument
+from pyrosm.engine import stats
 from pyrosm.engine.bounding_box import _in_box_nodes
 from pyrosm.engine.collect import (
     _ways_arrays,
     _collect_layer,
     _collect_kept_ways,
+    _dropped_record,
+    _filter_keys,
     _node_lookup,
     _gather_node_records,
     _needed_node_ids,
+    _num_ways,
+    _relation_batches,
+    _slice_relations,
+    _slice_way_columns,
 )
 
 
@@ -33,29 +41,33 @@ def _assemble_chunk(
     result matches the in-memory reader exactly."""
     from pyrosm.frames import prepare_geodataframe
 
-    ways = (
-        _ways_arrays(way_records, tags_as_columns, keep_metadata, keep_other_tags)
-        if way_records
-        else None
-    )
-    gdf = prepare_geodataframe(
-        nodes,
-        node_coordinates,
-        ways,
-        relations,
-        relation_ways,
-        list(tags_as_columns),
-        bounding_box,
-        keep_metadata=keep_metadata,
-        complete_relations=complete_relations,
-    )
-    if gdf is not None and "nodes" in gdf.columns:
-        gdf = gdf.drop(columns=["nodes"])
-    # keep_other_tags=False (minimal-tags mode): drop the JSON 'tags' column of leftover tags
-    # so the result holds only the requested tags_as_columns. _ways_arrays already skips
-    # building it for ways; this also covers a 'tags' column that a relation chunk produced.
-    if not keep_other_tags and gdf is not None and "tags" in gdf.columns:
-        gdf = gdf.drop(columns=["tags"])
+    with instrument.span("assemble_chunk") as chunk:
+        ways = (
+            _ways_arrays(way_records, tags_as_columns, keep_metadata, keep_other_tags)
+            if way_records
+            else None
+        )
+        gdf = prepare_geodataframe(
+            nodes,
+            node_coordinates,
+            ways,
+            relations,
+            relation_ways,
+            list(tags_as_columns),
+            bounding_box,
+            keep_metadata=keep_metadata,
+            complete_relations=complete_relations,
+        )
+        if gdf is not None and "nodes" in gdf.columns:
+            gdf = gdf.drop(columns=["nodes"])
+        # keep_other_tags=False (minimal-tags mode): drop the JSON 'tags' column of leftover
+        # tags so the result holds only the requested tags_as_columns. _ways_arrays already
+        # skips building it for ways; this also covers a 'tags' column that a relation chunk
+        # produced.
+        if not keep_other_tags and gdf is not None and "tags" in gdf.columns:
+            gdf = gdf.drop(columns=["tags"])
+        chunk["ways"] = _num_ways(way_records) if way_records else 0
+        chunk["rows"] = 0 if gdf is None else len(gdf)
     return gdf
 
 
@@ -70,9 +82,143 @@ def _assemble_layer(
     complete_relations=False,
     keep_other_tags=True,
     workers=1,
+    keep_nodes=True,
 ):
-    """Assemble all matching nodes, ways and relations into one in-memory GeoDataFrame.
-    ``workers > 1`` runs the collect phase across a process pool."""
+    """Assemble all matching nodes, ways and relations into one in-memory GeoDataFrame: the
+    chunks of :func:`_iter_layer_chunks` concatenated in order -- a single chunk of the
+    standalone ways, or with ``workers > 1`` chunks spread across a process pool, as is the
+    collect phase. ``None`` if there is nothing to assemble."""
+    import sys
+    import geopandas as gpd
+    import pandas as pd
+
+    chunks = list(
+        _iter_layer_chunks(
+            shard_paths,
+            sys.maxsize,
+            tags_as_columns,
+            keep_metadata,
+            filter_spec,
+            keep_ways,
+            keep_relations,
+            bounding_box,
+            complete_relations,
+            keep_other_tags=keep_other_tags,
+            workers=workers,
+            keep_nodes=keep_nodes,
+        )
+    )
+    if len(chunks) <= 1:
+        return chunks[0] if chunks else None
+    gdf = pd.concat(chunks, ignore_index=True)
+    return gpd.GeoDataFrame(gdf, geometry="geometry", crs=chunks[0].crs)
+
+
+# With ``workers > 1``, split the standalone ways into at least this many ways per chunk (and
+# at most ``chunk_size``), so even a layer below one ``chunk_size`` spreads across the pool
+# without the per-task overhead outweighing the assembly.
+_MIN_PARALLEL_CHUNK = 10_000
+
+
+def _to_arrow(gdf):
+    """``gdf`` as an arrow table with WKB geometry and the GeoParquet ``geo`` metadata."""
+    from geopandas.io.arrow import _geopandas_to_arrow
+
+    return _geopandas_to_arrow(gdf, index=False, geometry_encoding="WKB")
+
+
+def _chunk_coordinates(node_coordinates, node_refs):
+    """The ``(id, lon, lat)`` arrays of the nodes in ``node_refs`` (a sequence of node-id
+    arrays) that ``node_coordinates`` holds -- all a worker needs to assemble those ways.
+    """
+    import pandas as pd
+
+    if len(node_refs) == 0:
+        return np.empty(0, np.int64), np.empty(0), np.empty(0)
+    ids = pd.unique(np.concatenate(list(node_refs)))
+    idx, lon, lat = node_coordinates.gather(ids)
+    found = idx >= 0
+    return ids[found], lon[found], lat[found]
+
+
+# Worker-side state for the parallel assembly: the arguments of _assemble_chunk shared by
+# every chunk, whether to return the chunk as an arrow table, and whether to capture its
+# instrumentation span for the main process (``instrument.enabled()`` there).
+_ASSEMBLE_STATE = None
+
+
+def _init_assemble(assemble_kwargs, as_table, instrumented=False):
+    global _ASSEMBLE_STATE
+    _ASSEMBLE_STATE = (assemble_kwargs, as_table, instrumented)
+
+
+def _assemble_worker(task):
+    """Assemble one chunk ``(elements, coordinates)`` -- ``elements`` holding the
+    ``_assemble_chunk`` keyword arguments of its node, way or relation records -- returning
+    the chunk (``None`` when empty), and the warnings raised and the instrumentation events
+    captured, to be re-emitted by the caller."""
+    import warnings
+
+    from pyrosm.node_lookup import NodeLocations
+
+    assemble_kwargs, as_table, instrumented = _ASSEMBLE_STATE
+    elements, (ids, lon, lat) = task
+    node_coordinates = NodeLocations.from_coordinates(ids, lon, lat)
+    with instrument.capturing(instrumented) as events:
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            gdf = _assemble_chunk(
+                node_coordinates,
+                elements.get("way_records"),
+                elements.get("relations"),
+                elements.get("relation_ways"),
+                nodes=elements.get("nodes"),
+                **assemble_kwargs,
+            )
+    if gdf is None or len(gdf) == 0:
+        gdf = None
+    elif as_table:
+        gdf = _to_arrow(gdf)
+    return gdf, [(str(w.message), w.category) for w in caught], events or []
+
+
+def _iter_layer_chunks(
+    shard_paths,
+    chunk_size,
+    tags_as_columns,
+    keep_metadata,
+    filter_spec,
+    keep_ways=True,
+    keep_relations=True,
+    bounding_box=None,
+    complete_relations=False,
+    keep_other_tags=True,
+    workers=1,
+    keep_nodes=True,
+    as_table=False,
+    unheld=None,
+):
+    """Assemble the layer chunk by chunk -- the point nodes, then the standalone ways
+    ``chunk_size`` at a time, then the relations in batches of ``chunk_size`` member ways --
+    yielding each non-empty chunk's GeoDataFrame (an arrow table with ``as_table``) as soon as
+    it is built, so only one chunk's frame is in memory at a time. Together the chunks hold
+    the rows of :func:`_assemble_layer`, but a chunk only carries the tag columns occurring in
+    it.
+
+    With ``workers > 1`` the chunks are assembled across a process pool (in chunks of at most
+    ``chunk_size`` ways, smaller ones when that spreads the ways over more workers): each
+    worker is sent a chunk's records with only the node coordinates they reference, and
+    returns the assembled chunk -- as arrow buffers with ``as_table`` -- in chunk order.
+
+    A dict ``unheld`` is filled with the record of the elements passing the filter that the
+    layer holds no row of: the ways its relations absorbed (see
+    :func:`pyrosm.engine.collect._absorbed_record`) once it is collected, and as ``"dropped"``
+    the ways without a geometry (see
+    :func:`pyrosm.engine.collect._dropped_record`) once the last chunk is consumed."""
+    import warnings
+
+    from pyrosm.frames import warn_straddling_relations
+
     collected = _collect_layer(
         shard_paths,
         tags_as_columns,
@@ -83,22 +229,111 @@ def _assemble_layer(
         bounding_box,
         complete_relations,
         workers=workers,
+        keep_nodes=keep_nodes,
+        unheld=unheld,
     )
     if collected is None:
-        return None
+        return
     node_features, kept, relations, relation_ways, node_coordinates = collected
-    return _assemble_chunk(
-        node_coordinates,
-        kept,
-        relations,
-        relation_ways,
-        tags_as_columns,
-        keep_metadata,
-        nodes=node_features,
-        bounding_box=bounding_box,
-        complete_relations=complete_relations,
-        keep_other_tags=keep_other_tags,
-    )
+    assemble_kwargs = {
+        "tags_as_columns": tags_as_columns,
+        "keep_metadata": keep_metadata,
+        "bounding_box": bounding_box,
+        "complete_relations": complete_relations,
+        "keep_other_tags": keep_other_tags,
+    }
+    if workers > 1 and kept is not None:
+        per_worker = -(-_num_ways(kept) // workers)
+        chunk_size = min(chunk_size, max(_MIN_PARALLEL_CHUNK, per_worker))
+    if relations is not None and bounding_box is not None and not complete_relations:
+        # Each batch of relations would warn of the relations the box cut among its own; warn
+        # once of them all instead (complete_relations only decides that warning here).
+        warn_straddling_relations(relations, relation_ways)
+        assemble_kwargs["complete_relations"] = True
+    held = None if unheld is None else []
+
+    def chunk_elements():
+        if node_features is not None:
+            yield {"nodes": node_features}
+        if kept is not None:
+            for start in range(0, _num_ways(kept), chunk_size):
+                yield {
+                    "way_records": _slice_way_columns(kept, start, start + chunk_size)
+                }
+        if relations is not None:
+            # In batches of member ways, like the ways, each with only its own member ways
+            # (and so only their nodes' coordinates).
+            for start, stop in _relation_batches(relations, chunk_size):
+                batch, batch_ways = _slice_relations(
+                    relations, relation_ways, start, stop
+                )
+                if batch_ways is not None:
+                    yield {"relations": batch, "relation_ways": batch_ways}
+
+    if workers > 1:
+        from pyrosm.engine.pool import _ASSEMBLE_FALLBACK_WARNING, _imap_pool
+
+        def tasks():
+            for elements in chunk_elements():
+                ways = elements.get("way_records") or elements.get("relation_ways")
+                refs = () if ways is None else ways["nodes"]
+                yield elements, _chunk_coordinates(node_coordinates, refs)
+
+        results = _imap_pool(
+            _assemble_worker,
+            tasks(),
+            workers,
+            _init_assemble,
+            (assemble_kwargs, as_table, instrument.enabled()),
+            _ASSEMBLE_FALLBACK_WARNING,
+        )
+        while True:
+            # Timed per chunk: the consumer's work between chunks is not the assembly's.
+            with stats.phase("assemble"):
+                result, caught, events = next(results, (None, None, None))
+                instrument.replay(events)
+            if caught is None:
+                break
+            for message, category in caught:
+                warnings.warn(message, category, stacklevel=2)
+            if result is not None:
+                stats.count_rows(result)
+                _note_held(held, result)
+                yield result
+    else:
+        for elements in chunk_elements():
+            with stats.phase("assemble"):
+                gdf = _assemble_chunk(
+                    node_coordinates,
+                    elements.get("way_records"),
+                    elements.get("relations"),
+                    elements.get("relation_ways"),
+                    nodes=elements.get("nodes"),
+                    **assemble_kwargs,
+                )
+                if gdf is not None and len(gdf) > 0:
+                    gdf = _to_arrow(gdf) if as_table else gdf
+                else:
+                    gdf = None
+            if gdf is not None:
+                stats.count_rows(gdf)
+                _note_held(held, gdf)
+                yield gdf
+    if unheld is not None:
+        unheld["dropped"] = _dropped_record(
+            kept,
+            np.concatenate(held) if held else np.empty(0, np.int64),
+            _filter_keys(filter_spec),
+            node_coordinates,
+        )
+
+
+def _note_held(held, chunk):
+    """Add the ids of an assembled ``chunk``'s (a frame or an arrow table) way rows to the
+    list ``held`` (``None`` to skip)."""
+    if held is not None:
+        ways = chunk["osm_type"].to_numpy() == "way"
+        held.append(chunk["id"].to_numpy()[ways])
 
 
 def _assemble_network(
@@ -124,15 +359,17 @@ def _assemble_network(
 
     keep = _keep_fn(filter_spec)
 
-    in_box = _in_box_nodes(shard_paths) if bounding_box is not None else None
-    kept = _collect_kept_ways(
-        shard_paths,
-        np.empty(0, np.int64),
-        keep,
-        in_box,
-        workers=workers,
-        filter_spec=filter_spec,
-    )
+    with stats.phase("collect"):
+        in_box = _in_box_nodes(shard_paths) if bounding_box is not None else None
+        kept = _collect_kept_ways(
+            shard_paths,
+            np.empty(0, np.int64),
+            keep,
+            in_box,
+            workers=workers,
+            filter_spec=filter_spec,
+        )
+        stats.count("collect", ways=0 if kept is None else _num_ways(kept))
     if kept is None:
         return None, None
     needed = _needed_node_ids(kept, None)
@@ -140,21 +377,23 @@ def _assemble_network(
         node_coordinates = _gather_node_records(filepath, needed, keep_metadata)
     else:
         node_coordinates = _node_lookup(shard_paths, needed, workers)
-    ways = _ways_arrays(kept, tags_as_columns, keep_metadata)
-    edges, node_gdf = prepare_geodataframe(
-        None,
-        node_coordinates,
-        ways,
-        None,
-        None,
-        list(tags_as_columns),
-        bounding_box,
-        parse_network=True,
-        calculate_seg_lengths=segments,
-        keep_metadata=keep_metadata,
-    )
-    # The per-way 'nodes' list is dropped by default (it breaks file export), matching
-    # OSM.get_network with the default keep_node_info=False.
-    if edges is not None and "nodes" in edges.columns:
-        edges = edges.drop(columns=["nodes"])
+    with stats.phase("assemble"):
+        ways = _ways_arrays(kept, tags_as_columns, keep_metadata)
+        edges, node_gdf = prepare_geodataframe(
+            None,
+            node_coordinates,
+            ways,
+            None,
+            None,
+            list(tags_as_columns),
+            bounding_box,
+            parse_network=True,
+            calculate_seg_lengths=segments,
+            keep_metadata=keep_metadata,
+        )
+        # The per-way 'nodes' list is dropped by default (it breaks file export), matching
+        # OSM.get_network with the default keep_node_info=False.
+        if edges is not None and "nodes" in edges.columns:
+            edges = edges.drop(columns=["nodes"])
+    stats.count_rows(edges)
     return edges, node_gdf
@@ -0,0 +1,330 @@
+"""Persistent per-blob index of a PBF file (the ``.pbfidx`` sidecar).
+
+Indexing a file's blobs (:func:`pyrosm.engine.blobs._index_blobs`) re-reads every
+``BlobHeader`` and says nothing about what a blob holds, so every read decodes every blob. The
+first full read of a file therefore also summarises each decoded block -- which element kinds
+it holds, the min/max node, way and relation ids, the bounding box of its nodes, and a bitset
+of the tag keys its elements use -- and saves the summaries under the result-cache directory
+(see :mod:`pyrosm.engine.cache`), as ``index_<source>.pbfidx``. With
+``cache.configure(index_beside_source=True)`` they are saved next to the source file instead,
+as ``<file>.pbfidx`` (still in the cache directory when that directory is not writable), so
+they travel with it. Later reads load the index instead of re-scanning the headers and skip the blobs that cannot
+contribute: e.g. node-only blobs outside a bounding box, or relation-only blobs carrying none of
+a layer's filter keys.
+
+The index is keyed on the source file's size and modification time; a stale or unreadable index
+is ignored (and rebuilt by the next full read).
+"""
+
+import os
+import tempfile
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+from pyrosm.engine import cache
+
+INDEX_SUFFIX = ".pbfidx"
+
+# Bumped whenever the stored arrays change meaning, so an older index is rebuilt.
+_FORMAT_VERSION = 1
+
+# Element kinds held by a blob (bit flags in ``kinds``).
+KIND_NODES = 1
+KIND_WAYS = 2
+KIND_RELATIONS = 4
+
+# Width of the per-blob tag-key bitset. A block uses a few hundred distinct keys at most, so
+# 2048 bits keep a key lookup's false-positive rate low at 256 bytes per blob.
+_KEY_BITS = 2048
+_KEY_WORDS = _KEY_BITS // 64
+
+# Id range of a blob without that element kind (min > max, so no id falls in it).
+_EMPTY_RANGE = (1, 0)
+
+
+def _key_bit(key):
+    """Bit position of a tag key (``str`` or utf-8 ``bytes``) in the key bitset."""
+    if isinstance(key, str):
+        key = key.encode("utf-8")
+    return zlib.crc32(key) % _KEY_BITS
+
+
+def _dense_keys(keys_vals):
+    """The key indices of a dense-node ``keys_vals`` stream (``k v k v ... 0`` per node):
+    the non-zero entries at even positions within each node's run."""
+    n = len(keys_vals)
+    if n == 0:
+        return keys_vals
+    positions = np.arange(n)
+    is_end = keys_vals == 0
+    run_start = np.maximum.accumulate(np.where(is_end, positions + 1, 0))
+    return keys_vals[~is_end & ((positions - run_start) % 2 == 0)]
+
+
+def _id_range(elements):
+    if elements is None or len(elements["id"]) == 0:
+        return _EMPTY_RANGE
+    return int(elements["id"].min()), int(elements["id"].max())
+
+
+def summarize_block(string_table, header, nodes, ways, relations):
+    """Summary of one decoded ``PrimitiveBlock`` (as returned by ``decode_primitive_block``;
+    the string table may hold ``bytes`` or ``str``): a dict with the element ``kinds``, the
+    node/way/relation id ranges, the nodes' ``bbox`` ``(xmin, ymin, xmax, ymax)`` (NaN without
+    nodes) and the ``key_bits`` bitset of the tag keys used."""
+    kinds = 0
+    bbox = (np.nan, np.nan, np.nan, np.nan)
+    key_indices = []
+    if nodes is not None and len(nodes["id"]) > 0:
+        kinds |= KIND_NODES
+        # The same scaling as the readers, so a bounding-box test against it is exact.
+        lats = (
+            nodes["lat"] * header["granularity"] + header["lat_offset"]
+        ) / 1000000000
+        lons = (
+            nodes["lon"] * header["granularity"] + header["lon_offset"]
+        ) / 1000000000
+        bbox = (lons.min(), lats.min(), lons.max(), lats.max())
+        key_indices.append(_dense_keys(nodes["keys_vals"]))
+    if ways is not None and len(ways["id"]) > 0:
+        kinds |= KIND_WAYS
+        key_indices.append(ways["keys"])
+    if relations is not None and len(relations["id"]) > 0:
+        kinds |= KIND_RELATIONS
+        key_indices.append(relations["keys"])
+
+    key_bits = np.zeros(_KEY_BITS, dtype=bool)
+    if key_indices:
+        for k in np.unique(np.concatenate(key_indices)).tolist():
+            key_bits[_key_bit(string_table[k])] = True
+    return {
+        "kinds": kinds,
+        "node_range": _id_range(nodes),
+        "way_range": _id_range(ways),
+        "relation_range": _id_range(relations),
+        "bbox": bbox,
+        "key_bits": np.packbits(key_bits).view(np.uint64),
+    }
+
+
+# Summary of a blob that holds no elements (e.g. the ``OSMHeader``).
+_EMPTY_SUMMARY = {
+    "kinds": 0,
+    "node_range": _EMPTY_RANGE,
+    "way_range": _EMPTY_RANGE,
+    "relation_range": _EMPTY_RANGE,
+    "bbox": (np.nan, np.nan, np.nan, np.nan),
+    "key_bits": np.zeros(_KEY_WORDS, dtype=np.uint64),
+}
+
+
+class BlobIndex:
+    """The per-blob summaries of one PBF file, as parallel arrays (one row per blob, in file
+    order, the ``OSMHeader`` included)."""
+
+    def __init__(
+        self,
+        blob_type,
+        offset,
+        size,
+        kinds,
+        node_range,
+        way_range,
+        relation_range,
+        bbox,
+        key_bits,
+    ):
+        self.blob_type = blob_type
+        self.offset = offset
+        self.size = size
+        self.kinds = kinds
+        self.node_range = node_range
+        self.way_range = way_range
+        self.relation_range = relation_range
+        self.bbox = bbox
+        self.key_bits = key_bits
+
+    @classmethod
+    def from_summaries(cls, blobs, summaries):
+        """Build the index from ``_index_blobs`` rows and one summary per data blob (in file
+        order; non-data blobs get an empty summary)."""
+        summaries = iter(summaries)
+        rows = [
+            next(summaries) if blob_type == "OSMData" else _EMPTY_SUMMARY
+            for blob_type, _, _ in blobs
+        ]
+        return cls(
+            np.array([b[0] for b in blobs], dtype=str),
+            np.array([b[1] for b in blobs], dtype=np.int64),
+            np.array([b[2] for b in blobs], dtype=np.int64),
+            np.array([r["kinds"] for r in rows], dtype=np.uint8),
+            np.array([r["node_range"] for r in rows], dtype=np.int64).reshape(-1, 2),
+            np.array([r["way_range"] for r in rows], dtype=np.int64).reshape(-1, 2),
+            np.array([r["relation_range"] for r in rows], dtype=np.int64).reshape(
+                -1, 2
+            ),
+            np.array([r["bbox"] for r in rows], dtype=np.float64).reshape(-1, 4),
+            np.array([r["key_bits"] for r in rows], dtype=np.uint64).reshape(
+                -1, _KEY_WORDS
+            ),
+        )
+
+    def __len__(self):
+        return len(self.offset)
+
+    def blobs(self, mask=None):
+        """``(type, data_offset, data_size)`` per blob, like ``_index_blobs`` -- restricted to
+        the blobs where ``mask`` is True (and every non-data blob) when a mask is given.
+        """
+        keep = np.ones(len(self), dtype=bool) if mask is None else mask
+        keep = keep | (self.blob_type != "OSMData")
+        return [
+            (t, o, s)
+            for t, o, s in zip(
+                self.blob_type[keep].tolist(),
+                self.offset[keep].tolist(),
+                self.size[keep].tolist(),
+            )
+        ]
+
+    def only(self, kinds):
+        """Mask of the blobs whose elements are all of ``kinds`` (a ``KIND_*`` combination)
+        -- e.g. ``only(KIND_NODES)`` for the node-only blobs."""
+        return (self.kinds != 0) & ((self.kinds & ~np.uint8(kinds)) == 0)
+
+    def outside_bbox(self, bounds):
+        """Mask of the blobs with nodes that all lie strictly outside ``bounds``
+        ``(xmin, ymin, xmax, ymax)``."""
+        xmin, ymin, xmax, ymax = bounds
+        bb = self.bbox
+        with np.errstate(invalid="ignore"):
+            return (
+                (bb[:, 2] < xmin)
+                | (bb[:, 0] > xmax)
+                | (bb[:, 3] < ymin)
+                | (bb[:, 1] > ymax)
+            )
+
+    def may_contain_ids(self, kind, ids):
+        """Mask of the blobs whose ``kind`` (``KIND_NODES`` / ``KIND_WAYS`` /
+        ``KIND_RELATIONS``) id range contains any of ``ids``. PBF files are sorted by id, so
+        the blobs holding a set of wanted elements are usually a small run of the file.
+        """
+        ranges = {
+            KIND_NODES: self.node_range,
+            KIND_WAYS: self.way_range,
+            KIND_RELATIONS: self.relation_range,
+        }[kind]
+        ids = np.unique(np.asarray(ids, dtype=np.int64))
+        if len(ids) == 0:
+            return np.zeros(len(self), dtype=bool)
+        # The first wanted id at/after each blob's min id must not exceed its max id.
+        first = np.searchsorted(ids, ranges[:, 0])
+        found = first < len(ids)
+        found[found] = ids[first[found]] <= ranges[found, 1]
+        return found
+
+    def may_contain_keys(self, keys):
+        """Mask of the blobs whose elements may use any of the tag ``keys`` (``str`` or utf-8
+        ``bytes``). A bitset, so False is certain and True may be a false positive."""
+        wanted = np.zeros(_KEY_BITS, dtype=bool)
+        for key in keys:
+            wanted[_key_bit(key)] = True
+        wanted = np.packbits(wanted).view(np.uint64)
+        return np.any(self.key_bits & wanted, axis=1)
+
+
+def _sidecar_path(filepath):
+    return Path(str(filepath) + INDEX_SUFFIX)
+
+
+def _cache_path(filepath):
+    return cache.cache_dir() / (
+        "index_%s%s" % (cache._source_digest(filepath), INDEX_SUFFIX)
+    )
+
+
+def _index_paths(filepath):
+    """Where ``filepath``'s index is saved, in order of preference (see
+    :func:`pyrosm.engine.cache.configure`)."""
+    if cache.index_beside_source():
+        return [_sidecar_path(filepath), _cache_path(filepath)]
+    return [_cache_path(filepath)]
+
+
+def _source_stamp(filepath):
+    st = Path(filepath).stat()
+    return np.array([_FORMAT_VERSION, st.st_size, st.st_mtime_ns], dtype=np.int64)
+
+
+def _read_index(path, stamp):
+    try:
+        with np.load(path, allow_pickle=False) as z:
+            if not np.array_equal(z["stamp"], stamp):
+                return None
+            return BlobIndex(
+                z["blob_type"],
+                z["offset"],
+                z["size"],
+                z["kinds"],
+                z["node_range"],
+                z["way_range"],
+                z["relation_range"],
+                z["bbox"],
+                z["key_bits"],
+            )
+    except (OSError, ValueError, KeyError, EOFError, zlib.error):
+        return None
+
+
+def load_index(filepath):
+    """The saved :class:`BlobIndex` of ``filepath`` -- from the cache directory or a
+    ``.pbfidx`` sidecar next to the file, the configured location first -- or ``None`` when
+    there is none or it is stale."""
+    stamp = _source_stamp(filepath)
+    for path in dict.fromkeys(_index_paths(filepath) + [_sidecar_path(filepath)]):
+        if path.exists():
+            index = _read_index(path, stamp)
+            if index is not None:
+                return index
+    return None
+
+
+def save_index(filepath, index):
+    """Save ``index`` as ``filepath``'s index in the cache directory -- or, with
+    ``index_beside_source``, as its ``.pbfidx`` sidecar, falling back to the cache directory
+    when the source directory is not writable. The file is written to a temp file and
+    atomically moved into place. Returns the path written, or ``None`` if no location is
+    writable."""
+    arrays = {
+        "stamp": _source_stamp(filepath),
+        "blob_type": index.blob_type,
+        "offset": index.offset,
+        "size": index.size,
+        "kinds": index.kinds,
+        "node_range": index.node_range,
+        "way_range": index.way_range,
+        "relation_range": index.relation_range,
+        "bbox": index.bbox,
+        "key_bits": index.key_bits,
+    }
+    for path in _index_paths(filepath):
+        try:
+            fd, tmp_path = tempfile.mkstemp(
+                dir=path.parent, prefix=path.name + ".", suffix=".tmp"
+            )
+        except OSError:
+            continue
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, path)
+            return path
+        except OSError:
+            continue
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+    return None
@@ -28,8 +28,15 @@ def _index_blobs(filepath):
 def _read_block(f, offset, size):
     """Read and decompress one ``Blob`` payload into the raw ``PrimitiveBlock`` bytes."""
     f.seek(offset)
+    return _inflate_blob(f.read(size), f.name)
+
+
+def _inflate_blob(payload, name):
+    """Decompress a serialized ``Blob`` (read from ``name``) into the raw ``PrimitiveBlock``
+    bytes. Split from the file read so threads can inflate blobs concurrently: ``zlib`` /
+    ``lzma`` release the GIL while decompressing."""
     blob = Blob()
-    blob.ParseFromString(f.read(size))
+    blob.ParseFromString(payload)
     if blob.HasField("zlib_data"):
         return zlib.decompress(blob.zlib_data)
     if blob.HasField("raw"):
@@ -38,4 +45,4 @@ def _read_block(f, offset, size):
         import lzma
 
         return lzma.decompress(blob.lzma_data)
-    raise ValueError("Unsupported Blob compression in '%s'." % f.name)
+    raise ValueError("Unsupported Blob compression in '%s'." % name)
@@ -1,7 +1,8 @@
 """Bounding-box helpers: validate/normalise a box, reduce it to its bounds, flag in-box
-coordinates, and read back the in-box node ids spilled per shard."""
+coordinates and geometries, and read back the in-box node ids spilled per shard."""
 
 import numpy as np
+import shapely
 from shapely.geometry import (
     Polygon,
     MultiPolygon,
@@ -11,6 +12,7 @@ from shapely.geometry import (
 )
 
 from pyrosm.utils import validate_bounding_box
+from pyrosm.engine.shards import load_shard
 
 _ALLOWED_BBOX_TYPES = (Polygon, MultiPolygon, MultiLineString, LineString, LinearRing)
 
@@ -59,6 +61,19 @@ def _in_box_mask(lon, lat, bounds):
     return (lon >= xmin) & (lon <= xmax) & (lat >= ymin) & (lat <= ymax)
 
 
+def _vertices_in_box(geometries, bounds):
+    """Two boolean masks over ``geometries``: those with any vertex inside ``bounds``, and
+    those with every vertex inside it. A way's vertices are its nodes, so the first is the
+    decode's in-box test for ways and nodes (:func:`_in_box_nodes`); a relation whose
+    vertices are all inside has every member way in the box, i.e. its geometry is not cut.
+    """
+    coords, index = shapely.get_coordinates(geometries, return_index=True)
+    inside = _in_box_mask(coords[:, 0], coords[:, 1], bounds)
+    n_inside = np.bincount(index, weights=inside, minlength=len(geometries))
+    n_total = np.bincount(index, minlength=len(geometries))
+    return n_inside > 0, n_inside == n_total
+
+
 def _filter_features_to_box(found, bounds):
     """Keep only the node features whose coordinate is inside ``bounds``, or ``None``."""
     mask = _in_box_mask(found["lon"], found["lat"], bounds)
@@ -74,5 +89,5 @@ def _in_box_nodes(shard_paths):
     """The unique ids of all nodes that fell inside the bounding box (spilled per shard).
     A way is kept when at least one of its nodes is in this set (complete-ways semantics).
     """
-    ids = [z for z in (np.load(p)["in_box_id"] for p in shard_paths) if len(z)]
+    ids = [z for z in (load_shard(p)["in_box_id"] for p in shard_paths) if len(z)]
     return np.unique(np.concatenate(ids)) if ids else np.empty(0, np.int64)
@@ -8,23 +8,102 @@ re-decoding the PBF, the same spirit as how ``get_data`` keeps a downloaded ``*.
 layer is cached separately, so peak memory stays bounded by a single layer (never the whole file's
 features). ``pyarrow`` is optional: without it the read just returns the in-memory frame and writes
 no cache.
+
+Cached layers are stored spatially sorted, with a GeoParquet 1.1 ``bbox`` covering column,
+small row groups and the parameters of the read that wrote them. A read that a cached layer
+covers -- a ``bounding_box`` of a layer cached for the whole file, a narrower filter, other tag
+columns -- is answered by scanning just the row groups and columns it needs (see
+:func:`read_narrowed`) rather than by decoding the PBF again. What a narrower read would return
+that the layer holds no row of is told from a small sidecar kept beside it (see
+:func:`write_unheld`).
+
+Opt-in (``decode_cache=True``), the decoded file itself is cached too: the shards a decode of every
+tagged element writes (node coordinates, way refs and resolved tags) are kept in a
+``decoded_<source>_<read>`` directory, so a later read with any filter or tag columns skips the
+blob inflate and decode and goes straight to the collect phase.
+
+The cache lives under ``<tempdir>/pyrosm/cache`` unless another root is set with
+:func:`configure` (or the ``PYROSM_CACHE_DIR`` environment variable). It grows without bound
+unless a byte budget is set (``max_bytes``, or ``PYROSM_CACHE_MAX_BYTES``): then, after each
+write, the least recently used entries -- by last access, which every cache hit refreshes -- are
+evicted until the cache fits the budget. Several processes may share one cache directory; the
+hit/miss/eviction counters of :func:`stats` are per process.
 """
 
 import hashlib
 import os
+import shutil
 import tempfile
 from pathlib import Path
 
-from rapidjson import dumps
+from rapidjson import dumps, loads
+
+CACHE_DIR_ENV = "PYROSM_CACHE_DIR"
+MAX_BYTES_ENV = "PYROSM_CACHE_MAX_BYTES"
+
+# Set by :func:`configure`; ``None`` falls back to the environment, then the default.
+_settings = {"directory": None, "max_bytes": None, "index_beside_source": False}
+
+# Per-process counters reported by :func:`stats`.
+_counters = {
+    "hits": 0,
+    "misses": 0,
+    "evictions": 0,
+    "bytes_written": 0,
+    "bytes_evicted": 0,
+}
+
+
+def configure(directory=None, max_bytes=None, index_beside_source=False):
+    """Set the cache root and byte budget for this process. ``directory=None`` restores the
+    default root (``PYROSM_CACHE_DIR``, else ``<tempdir>/pyrosm/cache``); ``max_bytes=None``
+    restores the default budget (``PYROSM_CACHE_MAX_BYTES``, else unbounded). Setting a budget
+    evicts down to it straight away. ``index_beside_source=True`` saves a file's blob index
+    next to the source file instead of in the cache directory (see
+    :mod:`pyrosm.engine.blob_index`)."""
+    if max_bytes is not None:
+        if isinstance(max_bytes, bool) or not isinstance(max_bytes, int):
+            raise ValueError("'max_bytes' should be a non-negative integer or None.")
+        if max_bytes < 0:
+            raise ValueError("'max_bytes' should be a non-negative integer or None.")
+    _settings["directory"] = None if directory is None else Path(directory)
+    _settings["max_bytes"] = max_bytes
+    _settings["index_beside_source"] = bool(index_beside_source)
+    evict()
 
 
 def cache_dir():
-    """The persistent result-cache directory (created on demand): ``<tempdir>/pyrosm/cache``."""
-    path = Path(tempfile.gettempdir()) / "pyrosm" / "cache"
+    """The persistent result-cache directory (created on demand): the :func:`configure`-d root,
+    else ``PYROSM_CACHE_DIR``, else ``<tempdir>/pyrosm/cache``."""
+    path = _settings["directory"]
+    if path is None:
+        env = os.environ.get(CACHE_DIR_ENV)
+        path = Path(env) if env else Path(tempfile.gettempdir()) / "pyrosm" / "cache"
     path.mkdir(parents=True, exist_ok=True)
     return path
 
 
+def index_beside_source():
+    """Whether blob indexes are saved next to their source file (see :func:`configure`)."""
+    return _settings["index_beside_source"]
+
+
+def max_bytes():
+    """The cache's byte budget: the :func:`configure`-d one, else ``PYROSM_CACHE_MAX_BYTES``,
+    else ``None`` (unbounded)."""
+    if _settings["max_bytes"] is not None:
+        return _settings["max_bytes"]
+    env = os.environ.get(MAX_BYTES_ENV)
+    if not env:
+        return None
+    try:
+        return max(int(env), 0)
+    except ValueError:
+        raise ValueError(
+            "%s should be an integer number of bytes, got %r." % (MAX_BYTES_ENV, env)
+        )
+
+
 def _stable(obj):
     """A JSON-serialisable, order-independent view of a cache-key input: dict keys are sorted,
     lists/tuples keep their order, and a shapely ``bounding_box`` becomes its WKT."""
@@ -43,48 +122,251 @@ def _source_digest(filepath):
     return hashlib.sha1(str(Path(filepath).resolve()).encode("utf-8")).hexdigest()[:16]
 
 
-def result_path(filepath, key_params):
-    """Deterministic per-layer result-cache path, keyed on the source file (path + modification
-    time + size) and the read's parameters (the filter, tag columns, metadata/bbox/element-kind
-    options). Identical reads share one cache file; any difference keys a new one. The filename is
-    ``result_<source>_<read>.parquet``, where ``<source>`` depends only on the source path so all
-    of one file's cache files can be matched by that prefix (see :func:`clear`)."""
+def read_key(filepath, key_params):
+    """The identity of a read: the source file (path + modification time + size) and the
+    read's parameters, in a JSON-serialisable form (see :func:`_stable`)."""
     fp = Path(filepath)
     st = fp.stat()
-    key = {
+    return {
         "filepath": str(fp.resolve()),
         "mtime_ns": st.st_mtime_ns,
         "size": st.st_size,
-        "params": _stable(key_params),
+        "params": _stable_params(key_params),
     }
-    digest = hashlib.sha1(
-        dumps(key, sort_keys=True, default=str).encode("utf-8")
+
+
+def _stable_params(key_params):
+    """``key_params`` as stored in a :func:`read_key`: :func:`_stable`, through JSON."""
+    return loads(dumps(_stable(key_params), sort_keys=True, default=str))
+
+
+def _read_digest(filepath, key_params):
+    """Digest of a read: the source file (path + modification time + size) and the read's
+    parameters."""
+    return hashlib.sha1(
+        dumps(read_key(filepath, key_params), sort_keys=True).encode("utf-8")
     ).hexdigest()[:16]
-    return cache_dir() / ("result_%s_%s.parquet" % (_source_digest(filepath), digest))
+
+
+# Read parameters in which a cached layer may be broader than a read it serves (see
+# :func:`covers`); the family digest of a cache file leaves them out, so the cached reads that
+# could serve a read are found by its family's filename prefix.
+_NARROWABLE_PARAMS = ("filter_spec", "tags_as_columns", "complete_relations")
+
+
+def _family_digest(key_params):
+    family = {k: v for k, v in key_params.items() if k not in _NARROWABLE_PARAMS}
+    return hashlib.sha1(
+        dumps(_stable(family), sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()[:8]
+
+
+def result_path(filepath, key_params):
+    """Deterministic per-layer result-cache path, keyed on the source file (path + modification
+    time + size) and the read's parameters (the filter, tag columns, metadata/bbox/element-kind
+    options). Identical reads share one cache file; any difference keys a new one. The filename is
+    ``result_<source>_<family>_<read>.parquet``, where ``<source>`` depends only on the source
+    path so all of one file's cache files can be matched by that prefix (see :func:`clear`), and
+    ``<family>`` only on the parameters a broader cached read must share with a read it serves
+    (see :func:`covering_results`)."""
+    return cache_dir() / (
+        "result_%s_%s_%s.parquet"
+        % (
+            _source_digest(filepath),
+            _family_digest(key_params),
+            _read_digest(filepath, key_params),
+        )
+    )
+
+
+# Lists a decoded-shard directory's shards in order; written last, so a directory holding it is
+# complete.
+_DECODED_MANIFEST = "shards.txt"
+
+
+def decoded_path(filepath, key_params):
+    """Deterministic decoded-shard cache directory, keyed like :func:`result_path` on the source
+    file and the decode's parameters (the bounding box): ``decoded_<source>_<read>``."""
+    return cache_dir() / (
+        "decoded_%s_%s" % (_source_digest(filepath), _read_digest(filepath, key_params))
+    )
 
 
 def list_files(filepath=None):
-    """List the cached layer GeoParquet files. With no ``filepath`` every cached file is listed;
-    with a ``filepath`` only the cached layers for that source PBF. Returns a sorted list of
-    string paths."""
+    """List the cached layer GeoParquet files (and decoded-shard directories). With no
+    ``filepath`` every cached file is listed; with a ``filepath`` only the cached layers and
+    decoded shards of that source PBF. Returns a sorted list of string paths."""
     directory = cache_dir()
     if filepath is None:
-        pattern = "*.parquet"
+        files, dirs = "*.parquet", "decoded_*"
+    else:
+        files = "result_%s_*.parquet" % _source_digest(filepath)
+        dirs = "decoded_%s_*" % _source_digest(filepath)
+    paths = [p for p in directory.glob(files) if p.is_file()]
+    paths += [p for p in directory.glob(dirs) if (p / _DECODED_MANIFEST).is_file()]
+    return sorted(str(p) for p in paths)
+
+
+def _entry_size(path):
+    """Bytes of a cache entry: a decoded-shard directory's files, else the file and -- for a
+    cached layer -- its unheld sidecar (see :func:`write_unheld`)."""
+    if path.is_dir():
+        return sum(p.stat().st_size for p in path.iterdir() if p.is_file())
+    sidecar = unheld_path(path)
+    extra = sidecar.stat().st_size if sidecar.is_file() else 0
+    return path.stat().st_size + extra
+
+
+def _entry_stamp(path):
+    """Last-access stamp of a cache entry: a decoded-shard directory's manifest, else the
+    file itself (see :func:`touch`)."""
+    if path.is_dir():
+        path = path / _DECODED_MANIFEST
+    return path.stat().st_mtime
+
+
+# Filename prefixes of the cache's file entries (result files, their empty-result markers and
+# blob indexes); other files in the cache directory, such as the worker calibration,
+# are not entries, so neither eviction nor clear() removes them.
+_FILE_ENTRY_PREFIXES = ("result_", "index_")
+
+
+def _entries():
+    """``(last_access, size, path)`` of every complete cache entry: result files, empty-result
+    markers, blob indexes and decoded-shard directories. In-progress temp files and
+    directories are not entries; a cached layer's unheld sidecar is part of its entry.
+    """
+    entries = []
+    directory = cache_dir()
+    for path in directory.iterdir():
+        try:
+            if path.is_file():
+                if path.name.endswith((".tmp", UNHELD_SUFFIX)) or not (
+                    path.name.startswith(_FILE_ENTRY_PREFIXES)
+                ):
+                    continue
+            elif not (
+                path.name.startswith("decoded_")
+                and (path / _DECODED_MANIFEST).is_file()
+            ):
+                continue
+            entries.append((_entry_stamp(path), _entry_size(path), path))
+        except OSError:
+            # Removed by another process meanwhile.
+            continue
+    return entries
+
+
+def touch(path):
+    """Record an access of the cache entry ``path`` (a file or decoded-shard directory), so
+    LRU eviction keeps it over entries used less recently."""
+    path = Path(path)
+    if path.is_dir():
+        path = path / _DECODED_MANIFEST
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _remove(path):
+    if path.is_dir():
+        shutil.rmtree(path, ignore_errors=True)
     else:
-        pattern = "result_%s_*.parquet" % _source_digest(filepath)
-    return sorted(str(p) for p in directory.glob(pattern) if p.is_file())
+        for file in (path, unheld_path(path)):
+            try:
+                file.unlink()
+            except OSError:
+                pass
+
+
+def evict(keep=()):
+    """Evict least recently used entries until the cache fits :func:`max_bytes` (a no-op
+    without a budget). Entries in ``keep`` -- the ones a read is about to return -- are never
+    evicted. Returns the number of bytes freed."""
+    budget = max_bytes()
+    if budget is None:
+        return 0
+    keep = {Path(p) for p in keep}
+    entries = _entries()
+    total = sum(size for _, size, _ in entries)
+    freed = 0
+    for _, size, path in sorted(entries, key=lambda e: e[0]):
+        if total <= budget:
+            break
+        if path in keep:
+            continue
+        _remove(path)
+        total -= size
+        freed += size
+        _counters["evictions"] += 1
+        _counters["bytes_evicted"] += size
+    return freed
+
+
+def _record_write(paths):
+    """Count a miss that wrote the entries ``paths``, then evict down to the budget."""
+    _counters["misses"] += 1
+    for path in paths:
+        try:
+            _counters["bytes_written"] += _entry_size(Path(path))
+        except OSError:
+            pass
+    evict(keep=paths)
+
+
+def _record_hit(paths):
+    _counters["hits"] += 1
+    for path in paths:
+        touch(path)
+
+
+def stats():
+    """Cache statistics: the ``directory``, the ``entries`` and ``bytes`` it holds, its
+    ``max_bytes`` budget, and this process's ``hits``, ``misses``, ``evictions``,
+    ``bytes_written`` and ``bytes_evicted``."""
+    entries = _entries()
+    return {
+        "directory": str(cache_dir()),
+        "entries": len(entries),
+        "bytes": sum(size for _, size, _ in entries),
+        "max_bytes": max_bytes(),
+        **_counters,
+    }
+
+
+def reset_stats():
+    """Zero this process's cache counters."""
+    for key in _counters:
+        _counters[key] = 0
 
 
 def clear(filepath=None):
-    """Remove out-of-core result-cache files. With no ``filepath`` the whole cache directory is
-    emptied; with a ``filepath`` only the cached layers for that source PBF are removed. Returns
-    the number of files removed."""
+    """Remove out-of-core result-cache files (and decoded-shard directories). With no
+    ``filepath`` every cache entry is removed (not the worker calibration); with a
+    ``filepath`` only the cached layers, decoded shards and cache-directory blob index of that
+    source PBF are removed. Returns the number of files (and directories) removed."""
+    from pyrosm.engine.blob_index import INDEX_SUFFIX
+
     directory = cache_dir()
-    pattern = "*" if filepath is None else "result_%s_*" % _source_digest(filepath)
+    if filepath is None:
+        files = ["%s*" % prefix for prefix in _FILE_ENTRY_PREFIXES]
+        dirs = "decoded_*"
+    else:
+        digest = _source_digest(filepath)
+        files = ["result_%s_*" % digest, "index_%s%s" % (digest, INDEX_SUFFIX)]
+        dirs = "decoded_%s_*" % digest
     removed = 0
-    for entry in directory.glob(pattern):
-        if entry.is_file():
-            entry.unlink()
+    for pattern in files:
+        for entry in directory.glob(pattern):
+            if entry.is_file():
+                entry.unlink()
+                # A layer's unheld sidecar goes with it, uncounted.
+                removed += not entry.name.endswith(UNHELD_SUFFIX)
+    # Only the decoded-shard directories are removed; any other subdirectory is left alone.
+    for entry in directory.glob(dirs):
+        if entry.is_dir():
+            shutil.rmtree(entry, ignore_errors=True)
             removed += 1
     return removed
 
@@ -97,6 +379,19 @@ def read_result(cache_path):
     import geopandas as gpd
 
     gdf = gpd.read_parquet(cache_path)
+    return _normalise(gdf)
+
+
+def _normalise(gdf):
+    import numpy as np
+    from pyrosm.engine.geoparquet import BBOX_COLUMN, ROW_COLUMN
+
+    if ROW_COLUMN in gdf.columns:
+        # A spatially indexed layer: restore the read's own row order. (geopandas >= 1.0
+        # already leaves the covering column out.)
+        gdf = gdf.iloc[np.argsort(gdf[ROW_COLUMN].to_numpy(), kind="stable")]
+        helpers = [c for c in (ROW_COLUMN, BBOX_COLUMN) if c in gdf.columns]
+        gdf = gdf.drop(columns=helpers).reset_index(drop=True)
     for col in gdf.columns:
         if col == "geometry":
             continue
@@ -105,6 +400,430 @@ def read_result(cache_path):
     return gdf
 
 
+def _matches_all(values):
+    # A filter value list that matches any value of its key (see ``record_should_be_kept``).
+    return values is True or values == [True]
+
+
+def _values_cover(broad, narrow):
+    """Whether the filter values ``broad`` match every value ``narrow`` matches."""
+    if _matches_all(broad):
+        return True
+    if _matches_all(narrow):
+        return False
+    return set(narrow) <= set(broad)
+
+
+def _filter_covers(cached, wanted):
+    """Whether the ``filter_spec`` ``cached`` (``[osm_keys, data_filter, filter_type]``, in
+    :func:`read_key` form) keeps every element ``wanted`` keeps: the same filter, or a plain
+    dict filter of the same type over at least the wanted keys whose values are wider (for
+    ``keep``) or narrower (for ``exclude``)."""
+    if cached == wanted:
+        return True
+    cached_keys, cached_filter, cached_type = cached
+    wanted_keys, wanted_filter, wanted_type = wanted
+    if not (isinstance(cached_filter, dict) and isinstance(wanted_filter, dict)):
+        return False
+    if cached_type != wanted_type or not set(wanted_keys) <= set(cached_keys):
+        return False
+    if cached_type == "keep":
+        if len(cached_filter) == 0:
+            return True
+        if len(wanted_filter) == 0:
+            return False
+        return all(
+            k in cached_filter and _values_cover(cached_filter[k], v)
+            for k, v in wanted_filter.items()
+        )
+    return all(
+        k in wanted_filter and _values_cover(wanted_filter[k], v)
+        for k, v in cached_filter.items()
+    )
+
+
+def covers(cached, wanted):
+    """Whether a cached read with the parameters ``cached`` holds everything a read with
+    ``wanted`` returns (both in :func:`read_key` form): all parameters but the narrowable ones
+    are equal, the cached read covers the whole file or the same bounding box, its filter
+    covers the wanted one, and it holds the wanted tags (as columns, or -- when other tags are
+    kept -- in the ``tags`` column)."""
+    for key in set(cached) | set(wanted):
+        if key not in _NARROWABLE_PARAMS + ("bounding_box",):
+            if cached.get(key) != wanted.get(key):
+                return False
+    if cached.get("bounding_box") is not None:
+        if cached["bounding_box"] != wanted.get("bounding_box"):
+            return False
+        if cached.get("complete_relations") != wanted.get("complete_relations"):
+            return False
+    if not _filter_covers(cached["filter_spec"], wanted["filter_spec"]):
+        return False
+    if not wanted["keep_other_tags"]:
+        osm_keys, data_filter, _ = wanted["filter_spec"]
+        needed = set(wanted["tags_as_columns"]) | set(osm_keys) | set(data_filter or ())
+        return needed <= set(cached["tags_as_columns"])
+    return True
+
+
+def _cached_read(cache_path):
+    """The :func:`read_key` a cached layer was written with (see
+    :func:`pyrosm.engine.geoparquet._write_cached_layer`), or ``None``."""
+    import pyarrow.parquet as pq
+    from pyrosm.engine.geoparquet import PYROSM_METADATA
+
+    try:
+        metadata = pq.read_schema(cache_path).metadata or {}
+    except (OSError, ValueError):
+        return None
+    if PYROSM_METADATA not in metadata:
+        return None
+    return loads(metadata[PYROSM_METADATA]).get("read")
+
+
+# The record a cached layer keeps of the elements passing its filter that it holds no row of
+# (see :func:`read_narrowed`) lives beside it, in ``<layer>.unheld.json``; a record larger
+# than this is not kept, and narrower reads of that layer decode instead.
+UNHELD_SUFFIX = ".unheld.json"
+_MAX_UNHELD_BYTES = 1 << 20
+
+
+def unheld_path(cache_path):
+    """The sidecar of the cached layer at ``cache_path`` holding its ``unheld`` record."""
+    return cache_path.with_name(cache_path.name + UNHELD_SUFFIX)
+
+
+def write_unheld(cache_path, unheld):
+    """Keep the record ``unheld`` of the elements the layer at ``cache_path`` holds no row of
+    (see :func:`pyrosm.engine.assemble._iter_layer_chunks`) in its sidecar, unless it is larger
+    than ``_MAX_UNHELD_BYTES``. Returns whether it was kept."""
+    path = unheld_path(cache_path)
+    data = dumps(unheld).encode("utf-8")
+    if len(data) > _MAX_UNHELD_BYTES:
+        _remove(path)
+        return False
+    tmp_path = _temp_in(path)
+    try:
+        tmp_path.write_bytes(data)
+        tmp_path.replace(path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return True
+
+
+def _read_unheld(cache_path):
+    """The ``unheld`` record of the cached layer at ``cache_path`` (see :func:`write_unheld`),
+    or ``None`` when it was not kept."""
+    try:
+        return loads(unheld_path(cache_path).read_bytes())
+    except (OSError, ValueError):
+        return None
+
+
+def covering_results(filepath, key_params):
+    """The cached layers of ``filepath`` that hold everything the read ``key_params`` returns
+    (see :func:`covers`): those of its own family, then -- for a ``bounding_box`` read -- the
+    whole-file ones. Returns ``[(path, cached_params)]``."""
+    wanted = read_key(filepath, key_params)
+    families = [key_params]
+    if key_params.get("bounding_box") is not None:
+        families.append(dict(key_params, bounding_box=None))
+    found = []
+    for params in families:
+        pattern = "result_%s_%s_*.parquet" % (
+            _source_digest(filepath),
+            _family_digest(params),
+        )
+        for path in sorted(cache_dir().glob(pattern)):
+            cached = _cached_read(path)
+            if cached is None:
+                continue
+            if any(cached[k] != wanted[k] for k in ("filepath", "mtime_ns", "size")):
+                continue
+            if covers(cached["params"], wanted["params"]):
+                found.append((path, cached["params"]))
+    return found
+
+
+def _row_tags(gdf, keys, tag_columns):
+    """Each row's tags among ``keys``, from its tag columns and the JSON ``tags`` column of
+    its other tags (or, for nodes without other tags, the tag dict kept there instead).
+    """
+    rows = [{} for _ in range(len(gdf))]
+    for key in keys:
+        if key in tag_columns and key in gdf.columns:
+            for tags, value in zip(rows, gdf[key].tolist()):
+                if isinstance(value, str):
+                    tags[key] = value
+    other = [k for k in keys if k not in tag_columns]
+    if other and "tags" in gdf.columns:
+        for tags, value in zip(rows, gdf["tags"].tolist()):
+            if isinstance(value, str):
+                value = loads(value)
+            if isinstance(value, dict):
+                tags.update(
+                    (k, value[k]) for k in other if isinstance(value.get(k), str)
+                )
+    return rows
+
+
+def _unheld_rows(unheld, keep, filter_keys, bounds=None):
+    """What a read with the exact value filter ``keep`` (on ``filter_keys``) keeps of the
+    elements a cached layer recorded in ``unheld`` as passing its filter without a row of
+    their own (see :func:`pyrosm.engine.assemble._iter_layer_chunks`): ``(returned,
+    dropped)``, whether it returns a way the layer's relations absorbed -- one passing the
+    filter while every relation holding it fails it -- and the tag keys of each way dropped
+    for lacking a geometry that it keeps (with ``bounds``, only those with a node inside
+    them). ``None`` when the record lacks a key the filter needs."""
+    import numpy as np
+    from pyrosm.engine.bounding_box import _in_box_mask
+
+    if not set(filter_keys) <= set(unheld["keys"]):
+        return None
+    relations = unheld["relations"]
+    returned = any(
+        keep(tags)
+        and not any(keep(relations[str(relation_id)]) for relation_id in holders)
+        for _, tags, holders in unheld["ways"]
+    )
+    dropped = []
+    for _, tags, names, coords in unheld["dropped"]:
+        if not keep(tags):
+            continue
+        if bounds is not None:
+            coords = np.array(coords, dtype=float).reshape(-1, 2)
+            if not _in_box_mask(coords[:, 0], coords[:, 1], bounds).any():
+                continue
+        dropped.append(names)
+    return returned, dropped
+
+
+def _cuts_relation(gdf, any_inside, all_inside):
+    """Whether a relation straddles the box: a read of the box would return it cut."""
+    relations = (gdf["osm_type"] == "relation").to_numpy()
+    return bool((any_inside & ~all_inside & relations).any())
+
+
+def _lost_ways_make_tags(lost, unheld_columns, key_params):
+    """Whether the ways the layer dropped for lacking a geometry make the 'tags' column: by
+    tags outside the read's columns, or by metadata left over from a way's own row."""
+    tags_as_columns = set(key_params["tags_as_columns"])
+    metadata_in_tags = (
+        not key_params["keep_metadata"] or "visible" not in tags_as_columns
+    )
+    return bool(unheld_columns - tags_as_columns) or (bool(lost) and metadata_in_tags)
+
+
+def _dropped_columns_hold_values(gdf, dropped):
+    """Whether a dropped tag column has values, which a read would put in the 'tags' column
+    in an order the cache does not hold."""
+    present = [c for c in dropped if c in gdf.columns]
+    return bool(present) and bool(gdf[present].notna().any().any())
+
+
+def _holds_node_tag_dicts(other):
+    """Whether a row keeps a node's whole tag dict in 'tags', which the read would not."""
+    return any(isinstance(value, dict) for value in other)
+
+
+def _lacks_tags_column(gdf):
+    """Whether no kept row has other tags, so a lost way would make a 'tags' column alone."""
+    return not ("tags" in gdf.columns and gdf["tags"].notna().any())
+
+
+def _nodes_lack_other_tags(gdf):
+    """Whether kept nodes have no other tags: the node reader then keeps each node's whole
+    tag dict in 'tags'."""
+    nodes = (gdf["osm_type"] == "node").to_numpy()
+    return bool(nodes.any()) and not (
+        "tags" in gdf.columns
+        and gdf["tags"][nodes].map(lambda tags: isinstance(tags, str)).any()
+    )
+
+
+def read_narrowed(cache_path, cached_params, key_params):
+    """Answer the read ``key_params`` (a layer read's cache parameters) from the cached layer at
+    ``cache_path``, written by a read with the broader ``cached_params`` (see :func:`covers`),
+    instead of decoding the PBF. Only what the read needs is scanned: for a ``bounding_box``
+    the row groups whose ``bbox`` covering statistics reach the box, for a value filter on tag
+    columns the rows whose values can match, and only the tag columns it needs.
+
+    The rows are then selected as the read itself would: a node or way in a box is kept when
+    any of its vertices lies in the box's bounds and its geometry intersects the box, and each
+    row's tags are re-checked against the filter. Tag columns are moved between the columns and
+    the ``tags`` column as the read asks, and columns it would not have created are dropped
+    (tag columns no kept row uses, and columns used only by element kinds it does not hold).
+
+    Returns the frame (possibly empty), or ``None`` when the cached layer cannot answer the
+    read exactly: it is not indexed, or its record of the elements it holds no row of was not
+    kept (see :func:`write_unheld`); a relation straddles the box (a read of the box returns
+    it cut, unless ``complete_relations``); the filter drops every relation holding a member
+    way that passes it, so a read would return the way itself (told from the layer's record of
+    the elements it holds no row of, see :func:`_unheld_rows`, which also names the columns
+    the ways it dropped for lacking a geometry still make); a dropped tag column has values
+    that would go to the ``tags`` column (in an order the cache does not hold), or a kept
+    dropped way would make a ``tags`` column no row has; or no kept node has other tags (the
+    node reader then keeps each node's whole tag dict in ``tags``)."""
+    import numpy as np
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+    import geopandas as gpd
+    import shapely
+    from pyrosm.engine.bounding_box import _bbox_bounds, _vertices_in_box
+    from pyrosm.engine.collect import _keep_fn
+    from pyrosm.engine.geoparquet import BBOX_COLUMN, ROW_COLUMN, PYROSM_METADATA
+
+    schema = pq.read_schema(cache_path)
+    if ROW_COLUMN not in schema.names:
+        return None
+    # Read only now that the layer covers the read, and before any rows are scanned.
+    unheld = _read_unheld(cache_path)
+    if unheld is None:
+        return None
+    layer_metadata = loads(schema.metadata[PYROSM_METADATA])
+    column_kinds = layer_metadata["column_kinds"]
+    cached_columns = set(cached_params["tags_as_columns"])
+    tags_as_columns = list(key_params["tags_as_columns"])
+    keep_other_tags = key_params["keep_other_tags"]
+    osm_keys, data_filter, filter_type = key_params["filter_spec"]
+    filter_keys = list(dict.fromkeys(list(osm_keys) + list(data_filter or ())))
+    narrowed = cached_params["filter_spec"] != _stable_params(key_params)["filter_spec"]
+    dropped = [c for c in cached_columns if c not in tags_as_columns]
+    added = [c for c in tags_as_columns if c not in cached_columns]
+
+    # Project to the columns the read needs: every non-tag column, the wanted and filter tag
+    # columns, and -- when their values would go to the 'tags' column -- the dropped ones.
+    needed = set(tags_as_columns) | set(filter_keys)
+    if keep_other_tags:
+        needed |= set(dropped)
+    columns = [
+        name
+        for name in schema.names
+        if name != BBOX_COLUMN and (name not in cached_columns or name in needed)
+    ]
+
+    predicates = []
+    bounding_box = key_params["bounding_box"]
+    in_box = bounding_box is not None and cached_params["bounding_box"] is None
+    if in_box:
+        xmin, ymin, xmax, ymax = _bbox_bounds(bounding_box)
+        predicates.append(
+            (pc.field(BBOX_COLUMN, "xmin") <= xmax)
+            & (pc.field(BBOX_COLUMN, "xmax") >= xmin)
+            & (pc.field(BBOX_COLUMN, "ymin") <= ymax)
+            & (pc.field(BBOX_COLUMN, "ymax") >= ymin)
+        )
+    if (
+        narrowed
+        and filter_type == "keep"
+        and isinstance(data_filter, dict)
+        and len(data_filter) > 0
+        and set(data_filter) <= cached_columns
+    ):
+        # Rows whose filter-tag values can match (the exact filter is applied below). The
+        # relations are all read, to tell whether the filter drops any.
+        can_match = pc.field("osm_type") == "relation"
+        for key, values in data_filter.items():
+            if key not in schema.names:
+                continue  # the tag never occurs in the layer
+            if _matches_all(values):
+                can_match = can_match | pc.field(key).is_valid()
+            else:
+                can_match = can_match | pc.field(key).isin(
+                    [v for v in values if isinstance(v, str)]
+                )
+        predicates.append(can_match)
+    filters = None
+    for predicate in predicates:
+        filters = predicate if filters is None else filters & predicate
+    gdf = _normalise(gpd.read_parquet(cache_path, columns=columns, filters=filters))
+
+    if in_box:
+        any_inside, all_inside = _vertices_in_box(
+            gdf.geometry.values, (xmin, ymin, xmax, ymax)
+        )
+        if not key_params["complete_relations"] and _cuts_relation(
+            gdf, any_inside, all_inside
+        ):
+            return None
+        gdf = gdf[any_inside]
+    # The ways the read keeps but the layer dropped for lacking a geometry (their tags still
+    # make columns), and the tag keys they have.
+    lost, unheld_columns = [], set()
+    keep = _keep_fn(key_params["filter_spec"])
+    found = _unheld_rows(
+        unheld,
+        keep if narrowed else lambda tags: True,
+        filter_keys,
+        (xmin, ymin, xmax, ymax) if in_box else None,
+    )
+    if found is None:
+        return None
+    returned, lost = found
+    if returned and narrowed and key_params["keep_ways"]:
+        # The filter drops every relation holding a way it passes: a read returns the way.
+        return None
+    for names in lost:
+        unheld_columns.update(names)
+    if narrowed:
+        kept = np.fromiter(
+            (keep(tags) for tags in _row_tags(gdf, filter_keys, cached_columns)),
+            dtype=bool,
+            count=len(gdf),
+        )
+        gdf = gdf[kept]
+    leftover = _lost_ways_make_tags(lost, unheld_columns, key_params)
+    unheld_columns &= set(tags_as_columns)
+
+    if keep_other_tags:
+        if _dropped_columns_hold_values(gdf, dropped):
+            return None
+        if added and "tags" in gdf.columns:
+            other = gdf["tags"].tolist()
+            if _holds_node_tag_dicts(other):
+                return None
+            other = [
+                loads(value) if isinstance(value, str) else None for value in other
+            ]
+            for key in added:
+                gdf[key] = [
+                    None if tags is None else tags.pop(key, None) for tags in other
+                ]
+            gdf["tags"] = [dumps(tags) if tags else None for tags in other]
+            # The geometry stays the last column, as in a read's own frame.
+            gdf = gdf[[c for c in gdf.columns if c != "geometry"] + ["geometry"]]
+        if leftover and _lacks_tags_column(gdf):
+            return None
+        if _nodes_lack_other_tags(gdf):
+            return None
+
+    missing = [
+        col for col in tags_as_columns if col in unheld_columns - set(gdf.columns)
+    ]
+    if missing:
+        gdf = gdf.assign(**{col: None for col in missing})
+        gdf = gdf[[c for c in gdf.columns if c != "geometry"] + ["geometry"]]
+    tag_columns = set(tags_as_columns) | {"tags"}
+    kinds = set(gdf["osm_type"])
+    unused = [
+        col
+        for col in gdf.columns
+        if (col in cached_columns and col not in tags_as_columns)
+        or (col in tag_columns and col not in unheld_columns and gdf[col].isna().all())
+        or (
+            col not in tag_columns
+            and col not in cached_columns
+            and column_kinds.get(col)
+            and not kinds & set(column_kinds[col])
+        )
+    ]
+    gdf = gdf.drop(columns=unused)
+    if in_box and not isinstance(bounding_box, (list, tuple)):
+        gdf = gdf[shapely.intersects(gdf.geometry.values, bounding_box)]
+    return gdf.reset_index(drop=True)
+
+
 def _temp_in(cache_path):
     """A closed, unique temp-file path in ``cache_path``'s directory, for a build-then-atomic-
     replace so concurrent identical first-reads never share a temp file or observe a half-written
@@ -126,17 +845,22 @@ def materialize(cache_path, build):
     already-marked-empty) result."""
     empty_marker = cache_path.with_name(cache_path.name + ".empty")
     if empty_marker.exists():
+        _record_hit([empty_marker])
         return None
-    if not cache_path.exists():
+    if cache_path.exists():
+        _record_hit([cache_path])
+    else:
         tmp_path = _temp_in(cache_path)
         try:
             if not build(tmp_path):
                 empty_marker.touch()
+                _record_write([empty_marker])
                 return None
             tmp_path.replace(cache_path)
         finally:
             if tmp_path.exists():
                 tmp_path.unlink()
+        _record_write([cache_path])
     return read_result(cache_path)
 
 
@@ -149,13 +873,17 @@ def materialize_pair(edges_path, nodes_path, build, read_nodes=read_result):
     empty (or already-marked-empty) result."""
     empty_marker = edges_path.with_name(edges_path.name + ".empty")
     if empty_marker.exists():
+        _record_hit([empty_marker])
         return None, None
-    if not (edges_path.exists() and nodes_path.exists()):
+    if edges_path.exists() and nodes_path.exists():
+        _record_hit([edges_path, nodes_path])
+    else:
         edges_tmp = _temp_in(edges_path)
         nodes_tmp = _temp_in(nodes_path)
         try:
             if not build(edges_tmp, nodes_tmp):
                 empty_marker.touch()
+                _record_write([empty_marker])
                 return None, None
             edges_tmp.replace(edges_path)
             nodes_tmp.replace(nodes_path)
@@ -163,4 +891,5 @@ def materialize_pair(edges_path, nodes_path, build, read_nodes=read_result):
             for tmp in (edges_tmp, nodes_tmp):
                 if tmp.exists():
                     tmp.unlink()
+        _record_write([edges_path, nodes_path])
     return read_nodes(nodes_path), read_result(edges_path)
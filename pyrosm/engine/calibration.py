@@ -0,0 +1,221 @@
+"""Per-machine calibration of the ``workers="auto"`` cost model.
+
+``workers="auto"`` picks the worker count that minimises the estimated read time -- the pool
+start-up cost of the workers plus the decode time of the file's blobs split across them (see
+:func:`choose_workers`). The two machine-dependent inputs are measured once, on the first
+``"auto"`` read worth a pool, and saved as ``calibration_<host>.json`` in the cache directory:
+
+- ``startup_s`` / ``per_worker_s``: the time to start a process pool and run a task on each of
+  its workers (under ``spawn`` each worker re-imports pyrosm, geopandas and shapely), from a
+  one- and a two-worker pool;
+- ``bytes_per_s``: single-core decode throughput in compressed blob bytes per second, from the
+  first few MB of blobs of the file being read.
+
+A calibration file that cannot be read is measured again (and one that cannot be written is
+kept for the process only). When the measuring pools cannot start (an environment that forbids
+process pools, or an unguarded ``spawn`` entry point) there is no calibration, and nothing is
+saved.
+"""
+
+import os
+import platform
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from rapidjson import dumps, loads
+
+from pyrosm.engine import cache
+
+# Compressed blob bytes decoded to measure the decode throughput.
+_SAMPLE_BYTES = 4_000_000
+# Resident memory a decode worker needs: its imports plus about one shard of decoded blocks.
+_WORKER_MEMORY_BYTES = 512_000_000
+
+_KEYS = ("startup_s", "per_worker_s", "bytes_per_s")
+
+# The memory controller files of the process's cgroup, v2 (unified) then v1: (directory,
+# limit file, usage file, the memory.stat key of the inactive page cache).
+_CGROUP_MEMORY = (
+    ("/sys/fs/cgroup", "memory.max", "memory.current", "inactive_file"),
+    (
+        "/sys/fs/cgroup/memory",
+        "memory.limit_in_bytes",
+        "memory.usage_in_bytes",
+        "total_inactive_file",
+    ),
+)
+
+# Calibrations measured by this process (also those that could not be saved), by path.
+_measured = {}
+
+
+def _calibration_path():
+    host = "".join(c if c.isalnum() else "_" for c in platform.node()) or "host"
+    return cache.cache_dir() / ("calibration_%s.json" % host)
+
+
+def _worker_ready(_):
+    return os.getpid()
+
+
+def _pool_startup(workers):
+    """Seconds to start a pool of ``workers`` processes and run a task on each of them."""
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(_worker_ready, range(workers)))
+    return time.perf_counter() - start
+
+
+def _decode_throughput(filepath, blobs):
+    """Compressed bytes per second of decoding the first ``_SAMPLE_BYTES`` of ``blobs``
+    (``(offset, size)`` data blobs of ``filepath``) in this process."""
+    from pyrosm.primitive_block_decoder import decode_primitive_block
+    from pyrosm.engine.blobs import _read_block
+
+    decoded = 0
+    start = time.perf_counter()
+    with open(filepath, "rb") as f:
+        for offset, size in blobs:
+            decode_primitive_block(_read_block(f, offset, size))
+            decoded += size
+            if decoded >= _SAMPLE_BYTES:
+                break
+    return decoded / max(time.perf_counter() - start, 1e-6)
+
+
+def measure(filepath, blobs):
+    """Measure a calibration (see the module docstring) using the blobs of ``filepath``."""
+    one, two = _pool_startup(1), _pool_startup(2)
+    per_worker = max(two - one, 0.0)
+    return {
+        "startup_s": max(one - per_worker, 0.0),
+        "per_worker_s": per_worker,
+        "bytes_per_s": _decode_throughput(filepath, blobs),
+    }
+
+
+def _read(path):
+    try:
+        calibration = loads(path.read_text())
+        if (
+            all(float(calibration[k]) >= 0 for k in _KEYS)
+            and calibration["bytes_per_s"]
+        ):
+            return {k: float(calibration[k]) for k in _KEYS}
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return None
+
+
+def _write(path, calibration):
+    try:
+        fd, tmp_path = tempfile.mkstemp(
+            dir=path.parent, prefix=path.name + ".", suffix=".tmp"
+        )
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(dumps(calibration))
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def load(filepath, blobs):
+    """This machine's calibration: the saved one, else one measured now (with the blobs of
+    ``filepath``) and saved -- or ``None`` when the measuring pools cannot start."""
+    path = _calibration_path()
+    calibration = _measured.get(path) or _read(path)
+    if calibration is None:
+        try:
+            calibration = measure(filepath, blobs)
+        except (BrokenProcessPool, OSError):
+            return None
+        _write(path, calibration)
+    _measured[path] = calibration
+    return calibration
+
+
+def available_memory():
+    """Bytes of memory available to new processes: the host's (``MemAvailable``), or what the
+    process's memory cgroup still allows when that is less (see :func:`_cgroup_available`), or
+    ``None`` when the platform reports neither."""
+    host = _host_available()
+    limited = _cgroup_available()
+    if host is None or limited is None:
+        return limited if host is None else host
+    return min(host, limited)
+
+
+def _host_available():
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def _cgroup_available():
+    """Bytes the process's memory cgroup (a container's memory limit) still allows: its limit
+    less its usage, not counting the inactive page cache the kernel reclaims before it hits the
+    limit -- or ``None`` when there is no cgroup or it is unlimited (v2 ``max``, or v1's
+    page-rounded ``2**63 - 1``, which no machine's memory reaches)."""
+    for directory, limit_name, usage_name, inactive_key in _CGROUP_MEMORY:
+        try:
+            with open(os.path.join(directory, limit_name)) as f:
+                limit = f.read().strip()
+            if limit == "max":
+                return None
+            limit = int(limit)
+            with open(os.path.join(directory, usage_name)) as f:
+                usage = int(f.read())
+        except (OSError, ValueError):
+            continue
+        if limit >= 2**62:
+            return None
+        try:
+            with open(os.path.join(directory, "memory.stat")) as f:
+                for line in f:
+                    key, _, value = line.partition(" ")
+                    if key == inactive_key:
+                        usage -= int(value)
+                        break
+        except (OSError, ValueError):
+            pass
+        return max(limit - max(usage, 0), 0)
+    return None
+
+
+def estimated_seconds(workers, blob_sizes, calibration):
+    """Estimated decode time of blobs of ``blob_sizes`` bytes across ``workers`` processes:
+    the pool start-up (none for a single worker) plus each worker's share of the decode,
+    which cannot drop below the largest blob's."""
+    total = sum(blob_sizes)
+    share = max(total / workers, max(blob_sizes, default=0))
+    startup = 0.0
+    if workers > 1:
+        startup = calibration["startup_s"] + calibration["per_worker_s"] * workers
+    return startup + share / calibration["bytes_per_s"]
+
+
+def choose_workers(blob_sizes, n_cores, calibration, memory=None):
+    """The worker count in ``1..n_cores`` (and at most one per blob, and per
+    ``_WORKER_MEMORY_BYTES`` of ``memory`` when given) with the lowest
+    :func:`estimated_seconds` -- the fewest such when several tie."""
+    limit = min(n_cores, len(blob_sizes))
+    if memory is not None:
+        limit = min(limit, memory // _WORKER_MEMORY_BYTES)
+    candidates = range(1, max(limit, 1) + 1)
+    return min(candidates, key=lambda w: estimated_seconds(w, blob_sizes, calibration))
@@ -13,7 +13,10 @@ from pyrosm._arrays import columns_to_arrays
 from pyrosm.tagparser import explode_node_tag_array
 from pyrosm.data_filter import element_should_be_kept
 from pyrosm.engine.decode import _object_array
+from pyrosm import instrument
+from pyrosm.engine import stats
 from pyrosm.engine.bounding_box import _in_box_nodes
+from pyrosm.engine.shards import load_shard
 
 # Relation.MemberType -> the byte labels pyrosm's relation assembly expects.
 _MEMBER_TYPE = {0: b"node", 1: b"way", 2: b"relation"}
@@ -35,7 +38,7 @@ def _read_way_columns(shard_paths):
     ``_WAY_COLUMNS``). ``None`` if no shard holds a way."""
     ids, nodes_list, tags, vers, tss, viss = [], [], [], [], [], []
     for path in shard_paths:
-        z = np.load(path, allow_pickle=True)
+        z = load_shard(path)
         wid = z["way_id"]
         if len(wid) == 0:
             continue
@@ -76,6 +79,31 @@ def _slice_way_columns(cols, start, stop):
     return {k: v[start:stop] for k, v in cols.items()}
 
 
+def _relation_batches(relations, chunk_size):
+    """The ``(start, stop)`` row ranges splitting ``relations`` into batches of at most
+    ``chunk_size`` way members (a relation with more is a batch of its own) -- the relation
+    counterpart of slicing the ways ``chunk_size`` at a time."""
+    start, members = 0, 0
+    for i, m in enumerate(relations["members"]):
+        size = max(1, int(np.count_nonzero(m["member_type"] == b"way")))
+        if members and members + size > chunk_size:
+            yield start, i
+            start, members = i, 0
+        members += size
+    yield start, len(relations["id"])
+
+
+def _slice_relations(relations, relation_ways, start, stop):
+    """The relations ``[start:stop]`` and their member ways (still sorted by id), or
+    ``(relations, None)`` when none of their member ways is present."""
+    batch = _slice_way_columns(relations, start, stop)
+    way_ids = [m["member_id"][m["member_type"] == b"way"] for m in batch["members"]]
+    present = np.isin(relation_ways["id"], np.concatenate(way_ids))
+    if not present.any():
+        return batch, None
+    return batch, {k: v[present] for k, v in relation_ways.items()}
+
+
 def _concat_way_columns(parts):
     """Concatenate per-partition way-column dicts (from :func:`_read_way_columns`) back into
     one, preserving order -- the parallel way read partitions the shards into contiguous
@@ -96,7 +124,7 @@ def _collect_node_features(shard_paths, tags_as_columns, keep_metadata, keep):
     columns and a JSON ``tags`` column). ``None`` if no node passes."""
     ids, lon, lat, tags, meta = [], [], [], [], []
     for path in shard_paths:
-        z = np.load(path, allow_pickle=True)
+        z = load_shard(path)
         nid = z["nfeat_id"]
         if len(nid) == 0:
             continue
@@ -140,7 +168,7 @@ def _gather_node_shards(shard_subset, needed):
     n = len(needed)
     pos_parts, lon_parts, lat_parts = [], [], []
     for path in shard_subset:
-        z = np.load(path, allow_pickle=True)
+        z = load_shard(path)
         nid = z["node_id"]
         if len(nid) == 0:
             continue
@@ -162,10 +190,10 @@ def _gather_node_shards(shard_subset, needed):
 def _scatter_node_coords(parts, needed):
     """Scatter the per-partition ``(pos, lon, lat)`` gathers into one coordinate store for
     ``needed``, dropping ids no shard held (left ``NaN``). Order-independent: each hit is
-    written at its own ``needed`` position, so the partitions may arrive in any order.
+    written at its own ``needed`` position, so the partitions may arrive in any order. The
+    store's backend follows the density of the found ids (see ``choose_backend``): ids filling
+    much of their span get the dense coordinate index, which holds no per-node arrays.
     """
-    import pandas as pd
-
     from pyrosm.node_lookup import NodeLocations
 
     lon = np.full(len(needed), np.nan)
@@ -174,9 +202,7 @@ def _scatter_node_coords(parts, needed):
         lon[pos] = lon_part
         lat[pos] = lat_part
     present = ~np.isnan(lon)
-    return NodeLocations(
-        pd.DataFrame({"id": needed[present], "lon": lon[present], "lat": lat[present]})
-    )
+    return NodeLocations.from_coordinates(needed[present], lon[present], lat[present])
 
 
 # Worker-side state for the parallel node gather: the sorted ``needed`` array, shared
@@ -194,6 +220,7 @@ def _node_gather_worker(shard_subset):
     return _gather_node_shards(shard_subset, _GATHER_NEEDED)
 
 
+@stats.phase("node_gather")
 def _node_lookup(shard_paths, needed, workers=1):
     """Gather only the coordinates of ``needed`` node ids from the shards (bounded memory) and
     wrap them in a ``NodeLocations`` for geometry assembly. With ``workers > 1`` the shards are
@@ -201,16 +228,12 @@ def _node_lookup(shard_paths, needed, workers=1):
     read-only via a memory-mapped ``.npy``) and the hits are scattered back -- which
     parallelises the dominant per-shard decompress + searchsorted work; ``workers == 1`` runs
     the same gather in this process."""
-    import pandas as pd
-
     from pyrosm.node_lookup import NodeLocations
 
     if len(needed) == 0:
         # Node-only result (the filter matched no ways/relations): no coordinates needed.
-        empty = np.empty(0, np.int64)
-        return NodeLocations(
-            pd.DataFrame({"id": empty, "lon": np.empty(0), "lat": np.empty(0)})
-        )
+        empty = np.empty(0)
+        return NodeLocations.from_coordinates(np.empty(0, np.int64), empty, empty)
 
     if workers > 1:
         from pathlib import Path
@@ -220,12 +243,28 @@ def _node_lookup(shard_paths, needed, workers=1):
         needed_path = str(Path(shard_paths[0]).parent / "needed.npy")
         np.save(needed_path, needed)
         partitions = [shard_paths[i::workers] for i in range(workers)]
-        parts, _ = _run_pool(
+        parts, pool_ok = _run_pool(
             _node_gather_worker, partitions, workers, _init_node_gather, (needed_path,)
         )
-        return _scatter_node_coords(parts, needed)
-
-    return _scatter_node_coords([_gather_node_shards(shard_paths, needed)], needed)
+        node_coordinates = _scatter_node_coords(parts, needed)
+        stats.peak("node_gather", workers=workers if pool_ok else 1)
+    else:
+        node_coordinates = _scatter_node_coords(
+            [_gather_node_shards(shard_paths, needed)], needed
+        )
+        stats.peak("node_gather", workers=1)
+    stats.count(
+        "node_gather",
+        nodes_needed=len(needed),
+        nodes_found=len(node_coordinates),
+        backends={node_coordinates.backend: 1},
+    )
+    instrument.count(
+        shards=len(shard_paths),
+        nodes_needed=len(needed),
+        nodes_found=len(node_coordinates),
+    )
+    return node_coordinates
 
 
 # Node-record column dtypes for the graph-export gather (id/coords + element metadata).
@@ -240,17 +279,20 @@ _NODE_RECORD_DTYPES = {
 }
 
 
+@stats.phase("node_gather")
 def _gather_node_records(filepath, node_ids, keep_metadata):
     """Second pass over the file gathering the full records (coordinates + tags + metadata)
     of ``node_ids``, returned as a rich ``NodeLocations`` -- the coordinate store the
     graph-export node frame is built from (its records carry the node tags and metadata the
     lean coordinate lookup omits). Only the requested (network) nodes are materialised, so
-    peak memory stays bounded by the graph's node set rather than the whole file."""
+    peak memory stays bounded by the graph's node set rather than the whole file. With a saved
+    blob index only the blobs whose node id range can hold a requested node are read."""
     import pandas as pd
 
     from pyrosm.node_lookup import NodeLocations
     from pyrosm.primitive_block_decoder import decode_primitive_block
     from pyrosm.engine.blobs import _index_blobs, _read_block
+    from pyrosm.engine.blob_index import KIND_NODES, load_index
     from pyrosm.engine.decode import _node_records_by_id
 
     wanted = set(node_ids.tolist())
@@ -259,8 +301,13 @@ def _gather_node_records(filepath, node_ids, keep_metadata):
         cols += ["version", "timestamp", "changeset"]
     arrays = {c: [] for c in cols}
     tags = []
+    index = load_index(filepath)
+    if index is None:
+        blobs = _index_blobs(filepath)
+    else:
+        blobs = index.blobs(index.may_contain_ids(KIND_NODES, node_ids))
     with open(filepath, "rb") as f:
-        for blob_type, offset, size in _index_blobs(filepath):
+        for blob_type, offset, size in blobs:
             if blob_type != "OSMData":
                 continue
             st, header, nodes, _, _ = decode_primitive_block(
@@ -283,13 +330,15 @@ def _gather_node_records(filepath, node_ids, keep_metadata):
     return NodeLocations(pd.DataFrame(frame))
 
 
-def _filter_way_columns(cols, exclude_ids, keep, in_box):
+def _filter_way_columns(cols, exclude_ids, keep, in_box, absorbed=None):
     """Refine read way columns down to the standalone ways to output: the candidates passing
     the exact value filter ``keep``, then -- when reading a bounding box -- restricted to ways
     with at least one node inside it (kept whole, so geometry is not cut at the edge), and
     finally with the relation member ways (``exclude_ids``) dropped (pyrosm assigns those to
     the relation, so they are not standalone way rows). Filtering is a single ordered mask, so
-    the surviving rows keep their input order. ``None`` if nothing survives."""
+    the surviving rows keep their input order. ``None`` if nothing survives. The ``(id,
+    tags)`` of the ways dropped only as relation members are appended to the list
+    ``absorbed``, if given."""
     if cols is None:
         return None
     tags = cols["tags"]
@@ -301,7 +350,11 @@ def _filter_way_columns(cols, exclude_ids, keep, in_box):
             if inside.isdisjoint(nodes[i].tolist()):
                 mask[i] = False
     if len(exclude_ids):
-        mask &= ~np.isin(cols["id"], exclude_ids)
+        members = np.isin(cols["id"], exclude_ids)
+        if absorbed is not None:
+            rows = np.nonzero(mask & members)[0]
+            absorbed.extend(zip(cols["id"][rows].tolist(), tags[rows]))
+        mask &= ~members
     if not mask.any():
         return None
     return {k: v[mask] for k, v in cols.items()}
@@ -310,15 +363,16 @@ def _filter_way_columns(cols, exclude_ids, keep, in_box):
 def _keep_fn(filter_spec):
     """The exact value-filter predicate for a layer: keep an element whose resolved tags pass
     ``filter_spec`` = ``(osm_keys, data_filter, filter_type)``. A ``None`` ``data_filter``
-    (network ``all`` / ``driving_psv``) keeps every candidate. Rebuilt from the picklable
-    ``filter_spec`` inside each parallel worker, so the serial and parallel reads filter
-    identically."""
+    (network ``all`` / ``driving_psv``) keeps every candidate carrying one of ``osm_keys`` --
+    the shards of a multi-layer read also hold the other layers' elements. Rebuilt from the
+    picklable ``filter_spec`` inside each parallel worker, so the serial and parallel reads
+    filter identically."""
     osm_keys, data_filter, filter_type = filter_spec
 
     def keep(tag):
-        return data_filter is None or element_should_be_kept(
-            tag, osm_keys, data_filter, filter_type
-        )
+        if data_filter is None:
+            return tag is not None and any(k in tag for k in osm_keys)
+        return element_should_be_kept(tag, osm_keys, data_filter, filter_type)
 
     return keep
 
@@ -332,31 +386,45 @@ def _contiguous_partitions(items, workers):
 
 
 # Worker-side state for the parallel standalone-way read: the value-filter predicate plus the
-# relation-member exclusion set and the bounding-box node set, set once per worker.
+# relation-member exclusion set and the bounding-box node set, and whether to return the ways
+# the relations absorbed, set once per worker.
 _WAY_COLLECT_STATE = None
 
 
-def _init_way_collect(filter_spec, exclude_ids, in_box):
+def _init_way_collect(filter_spec, exclude_ids, in_box, absorbed=False):
     global _WAY_COLLECT_STATE
-    _WAY_COLLECT_STATE = (_keep_fn(filter_spec), exclude_ids, in_box)
+    _WAY_COLLECT_STATE = (_keep_fn(filter_spec), exclude_ids, in_box, absorbed)
 
 
 def _way_collect_worker(shard_subset):
-    keep, exclude_ids, in_box = _WAY_COLLECT_STATE
-    return _filter_way_columns(
-        _read_way_columns(shard_subset), exclude_ids, keep, in_box
+    keep, exclude_ids, in_box, absorbed = _WAY_COLLECT_STATE
+    if not absorbed:
+        return _filter_way_columns(
+            _read_way_columns(shard_subset), exclude_ids, keep, in_box
+        )
+    found = []
+    cols = _filter_way_columns(
+        _read_way_columns(shard_subset), exclude_ids, keep, in_box, found
     )
+    return cols, found
 
 
 def _collect_kept_ways(
-    shard_paths, exclude_ids, keep, in_box=None, workers=1, filter_spec=None
+    shard_paths,
+    exclude_ids,
+    keep,
+    in_box=None,
+    workers=1,
+    filter_spec=None,
+    absorbed=None,
 ):
     """The standalone way columns to output: read the spilled candidates and refine them by
     the value filter, the bounding box, and the relation-member exclusion (see
-    :func:`_filter_way_columns`). With ``workers > 1`` (and a ``filter_spec`` to rebuild the
-    predicate worker-side) the shards are split into contiguous ordered ranges across a process
-    pool and the per-range columns concatenated back in order -- identical rows in identical
-    order to the serial read. ``None`` if nothing survives."""
+    :func:`_filter_way_columns`, also for ``absorbed``). With ``workers > 1`` (and a
+    ``filter_spec`` to rebuild the predicate worker-side) the shards are split into contiguous
+    ordered ranges across a process pool and the per-range columns concatenated back in order
+    -- identical rows in identical order to the serial read. ``None`` if nothing survives.
+    """
     if workers > 1 and filter_spec is not None:
         from pyrosm.engine.pool import _run_pool
 
@@ -366,14 +434,86 @@ def _collect_kept_ways(
             partitions,
             workers,
             _init_way_collect,
-            (filter_spec, exclude_ids, in_box),
+            (filter_spec, exclude_ids, in_box, absorbed is not None),
         )
+        if absorbed is not None:
+            for _, found in parts:
+                absorbed.extend(found)
+            parts = [cols for cols, _ in parts]
         return _concat_way_columns(parts)
     return _filter_way_columns(
-        _read_way_columns(shard_paths), exclude_ids, keep, in_box
+        _read_way_columns(shard_paths), exclude_ids, keep, in_box, absorbed
     )
 
 
+def _filter_keys(filter_spec):
+    """The tag keys the value filter ``filter_spec`` looks at, sorted."""
+    osm_keys, data_filter, _ = filter_spec
+    keys = set(osm_keys)
+    if isinstance(data_filter, dict):
+        keys.update(data_filter)
+    return sorted(keys)
+
+
+def _cut_tags(tags, keys):
+    return {k: v for k, v in (tags or {}).items() if k in keys}
+
+
+def _absorbed_record(ways, relations, keys):
+    """The record of the ways ``ways`` (``[(id, tags)]``) that pass a layer's filter but are
+    not standalone rows, as members of the kept ``relations``: ``{"keys": keys, "ways": [[id,
+    tags, [relation ids]], ...], "relations": {relation id: tags}}`` (the relations having
+    any of them as a member), with the tags cut to the filter's ``keys``. A narrower read of
+    the layer keeps the ways whose relations it all drops, so from this record it can tell
+    which ways it would return that the layer does not hold (see
+    :func:`pyrosm.engine.cache.read_narrowed`)."""
+    way_ids = {way_id for way_id, _ in ways}
+    containing = {}
+    relation_tags = {}
+    if way_ids:
+        for relation_id, members, tags in zip(
+            relations["id"].tolist(), relations["members"], relations["tags"]
+        ):
+            ids = members["member_id"][members["member_type"] == b"way"].tolist()
+            for way_id in way_ids.intersection(ids):
+                containing.setdefault(way_id, []).append(relation_id)
+                relation_tags[str(relation_id)] = _cut_tags(tags, keys)
+    return {
+        "keys": keys,
+        "ways": [
+            [way_id, _cut_tags(tags, keys), containing[way_id]] for way_id, tags in ways
+        ],
+        "relations": relation_tags,
+    }
+
+
+def _dropped_record(kept, held, keys, node_coordinates):
+    """The record of the standalone ways (``kept``) a layer's assembly dropped for lacking a
+    geometry -- those whose id is not among the ``held`` ids of its way rows: ``[[id, tags,
+    [tag keys], [[lon, lat], ...]], ...]``, the tags cut to the filter's ``keys``, with the
+    coordinates of the nodes the way has in ``node_coordinates``. A dropped way still creates
+    the columns of its tags (a dropped relation does not), so a narrower read of the layer
+    keeps the columns of the dropped ways it keeps (in a bounding box, those with a node
+    inside it)."""
+    if kept is None:
+        return []
+    dropped = []
+    ids = kept["id"]
+    for i in np.nonzero(~np.isin(ids, held))[0].tolist():
+        tags = kept["tags"][i] or {}
+        idx, lon, lat = node_coordinates.gather(kept["nodes"][i])
+        found = idx >= 0
+        dropped.append(
+            [
+                int(ids[i]),
+                _cut_tags(tags, keys),
+                ["id_tag" if k == "id" else k for k in tags],
+                np.column_stack([lon[found], lat[found]]).tolist(),
+            ]
+        )
+    return dropped
+
+
 def _collect_relations(shard_paths, keep):
     """Reassemble the spilled relations into the ``relations`` struct pyrosm's assembly
     expects (``id`` / ``members`` / ``tags`` / metadata), refined by the exact value filter
@@ -381,7 +521,7 @@ def _collect_relations(shard_paths, keep):
     when no relation passes."""
     ids, members, tags, meta, way_member_ids = [], [], [], [], []
     for path in shard_paths:
-        z = np.load(path, allow_pickle=True)
+        z = load_shard(path)
         rid = z["rel_id"]
         if len(rid) == 0:
             continue
@@ -443,7 +583,7 @@ def _collect_relation_ways(shard_paths, member_ids, in_box=None):
     found = {}
     inside = None if in_box is None else set(in_box.tolist())
     for path in shard_paths:
-        z = np.load(path, allow_pickle=True)
+        z = load_shard(path)
         wid, off, refs = z["all_id"], z["all_refs_off"], z["all_refs"]
         if len(wid) == 0:
             continue
@@ -580,6 +720,7 @@ def _needed_node_ids(kept, relation_ways):
     return unique
 
 
+@stats.phase("collect")
 def _collect_layer(
     shard_paths,
     tags_as_columns,
@@ -590,6 +731,8 @@ def _collect_layer(
     bounding_box=None,
     complete_relations=False,
     workers=1,
+    keep_nodes=True,
+    unheld=None,
 ):
     """Shared collection for both output modes: node features, standalone ways, relations,
     their member ways and the node coordinates the ways/relations reference. ``filter_spec``
@@ -600,7 +743,10 @@ def _collect_layer(
     restricted to in-box (partial geometry) unless ``complete_relations``. ``workers > 1``
     splits the standalone-way read and the node-coordinate gather (the dominant costs) across a
     process pool; the comparatively small relation and node-feature reads stay serial.
-    ``None`` if there is nothing to assemble."""
+    ``keep_nodes=False`` skips the node features (a layer without point features whose shards
+    were decoded together with one that has them). ``None`` if there is nothing to assemble.
+    A dict ``unheld`` is filled with the record of the ways the relations absorbed (see
+    :func:`_absorbed_record`)."""
     keep = _keep_fn(filter_spec)
 
     in_box = _in_box_nodes(shard_paths) if bounding_box is not None else None
@@ -613,6 +759,7 @@ def _collect_layer(
             present = _collect_relation_ways(shard_paths, member_ids, in_box)
             present_ids = set() if present is None else set(present["id"].tolist())
             relations, member_ids = _restrict_relations_to_box(relations, present_ids)
+        absorbing = relations
         member_box = None if complete_relations else in_box
         relation_ways = (
             _collect_relation_ways(shard_paths, member_ids, member_box)
@@ -626,6 +773,8 @@ def _collect_layer(
         # Without relations there is no member-way set, so matching ways that would have
         # been members stay as standalone ways (matching get_data_by_custom_criteria).
         relations, relation_ways, member_ids = None, None, np.empty(0, np.int64)
+        absorbing = None
+    absorbed_ways = [] if unheld is not None and len(member_ids) else None
     kept = (
         _collect_kept_ways(
             shard_paths,
@@ -634,12 +783,25 @@ def _collect_layer(
             in_box,
             workers=workers,
             filter_spec=filter_spec,
+            absorbed=absorbed_ways,
         )
         if keep_ways
         else None
     )
-    node_features = _collect_node_features(
-        shard_paths, tags_as_columns, keep_metadata, keep
+    if unheld is not None:
+        unheld.update(
+            _absorbed_record(absorbed_ways or [], absorbing, _filter_keys(filter_spec))
+        )
+    node_features = (
+        _collect_node_features(shard_paths, tags_as_columns, keep_metadata, keep)
+        if keep_nodes
+        else None
+    )
+    stats.count(
+        "collect",
+        nodes=0 if node_features is None else len(node_features["id"]),
+        ways=0 if kept is None else _num_ways(kept),
+        relations=0 if relations is None else len(relations["id"]),
     )
     if kept is None and relations is None and node_features is None:
         return None
@@ -5,22 +5,28 @@ spilling it once it reaches ``_SHARD_TARGET_BYTES`` (so a country file produces
 shards rather than one per ~8k-element block -- far less per-file open/read overhead when
 collect re-reads them -- while peak memory stays bounded by one shard's worth of blocks).
 Each shard holds the node coordinates, the matching layer features (ways, point nodes and
-relations -- selected by filter-key presence) and *every* way (id + refs, for relation-member
-lookup).
+relations -- selected by filter-key presence, or every tagged element when no filter keys are
+given) and *every* way (id + refs, for relation-member lookup).
 """
 
+import time
 from pathlib import Path
 
 import numpy as np
 
+from pyrosm import instrument
 from pyrosm.primitive_block_decoder import decode_primitive_block
 from pyrosm.engine.blobs import _read_block
+from pyrosm.engine.blob_index import summarize_block
 from pyrosm.engine.bounding_box import _in_box_mask, _filter_features_to_box
+from pyrosm.engine.shards import write_shard
+from pyrosm.engine.stats import peak_rss, reset_peak_rss
 
 # Accumulate decoded blocks into a shard until it reaches roughly this many bytes, then spill.
 # Coarser shards amortise the per-file open/read overhead collect pays across thousands of
 # tiny per-block files; ~8 MB keeps the spill near the point past which that overhead stops
-# shrinking, while bounding a worker's in-flight memory to about one shard.
+# shrinking, while bounding a worker's in-flight memory to about one shard. A ``max_memory``
+# budget may lower it (see ``memory.shard_target_bytes``).
 _SHARD_TARGET_BYTES = 8_000_000
 
 # The CSR offset arrays in a shard dict: when several blocks' shard dicts are merged into one,
@@ -28,7 +34,8 @@ _SHARD_TARGET_BYTES = 8_000_000
 _OFFSET_KEYS = ("refs_off", "all_refs_off", "rel_memoff")
 
 # Per-worker globals, set by the pool initializer (or directly for the in-process path).
-# ``_OSM_KEYS`` holds the layer's filter keys (utf-8 bytes) used to pre-select elements;
+# ``_OSM_KEYS`` holds the layer's filter keys (utf-8 bytes) used to pre-select elements (None
+# selects every tagged element, for the decoded-shard cache that serves any later layer);
 # ``_INCLUDE_NODES`` is False for layers that emit no node features (buildings, boundary);
 # ``_BBOX_BOUNDS`` is ``(xmin, ymin, xmax, ymax)`` when reading a bounding box, else None.
 _FILEPATH = None
@@ -39,19 +46,54 @@ _BBOX_BOUNDS = None
 # When not None, the only tag keys (utf-8 bytes) to resolve into the element tag dicts
 # (the ``keep_other_tags=False`` minimal-tags mode); None resolves every tag.
 _REQUESTED_TAG_KEYS = None
+# Whether to summarise each decoded block for the blob index (a read of a file that has no
+# saved index yet decodes every blob, so it builds the index as it goes).
+_SUMMARIZE = False
+# Whether a block whose string table holds none of ``_OSM_KEYS`` may skip decoding its ways
+# and relations (only its node coordinates are needed). ``_MEMBER_WAY_BLOBS`` holds the
+# offsets of the blobs whose ways must be kept anyway, as possible members of the layer's
+# relations (the all-ways store the relation geometries are built from).
+_PREFILTER = False
+_MEMBER_WAY_BLOBS = frozenset()
+# Whether shards are written in the compact encoding (``shards.compact_enabled()`` of the
+# main process, which the workers may not share when they do not inherit its settings).
+_COMPACT = False
+# The shard size to spill at (``_SHARD_TARGET_BYTES`` unless the read has a memory budget).
+_SHARD_BYTES = _SHARD_TARGET_BYTES
+# Whether the main process reports instrumentation spans (``instrument.enabled()``): the
+# workers then capture a ``decode_blob`` span per blob and send it back with their results.
+_INSTRUMENTED = False
 
 
 def _init_worker(
-    filepath, shard_dir, osm_keys, include_nodes, bbox_bounds, requested_tag_keys=None
+    filepath,
+    shard_dir,
+    osm_keys,
+    include_nodes,
+    bbox_bounds,
+    requested_tag_keys=None,
+    summarize=False,
+    prefilter=False,
+    member_way_blobs=frozenset(),
+    compact=False,
+    shard_bytes=_SHARD_TARGET_BYTES,
+    instrumented=False,
 ):
     global _FILEPATH, _SHARD_DIR, _OSM_KEYS, _INCLUDE_NODES, _BBOX_BOUNDS
-    global _REQUESTED_TAG_KEYS
+    global _REQUESTED_TAG_KEYS, _SUMMARIZE, _PREFILTER, _MEMBER_WAY_BLOBS, _COMPACT
+    global _SHARD_BYTES, _INSTRUMENTED
     _FILEPATH = filepath
     _SHARD_DIR = shard_dir
     _OSM_KEYS = osm_keys
     _INCLUDE_NODES = include_nodes
     _BBOX_BOUNDS = bbox_bounds
     _REQUESTED_TAG_KEYS = requested_tag_keys
+    _SUMMARIZE = summarize
+    _PREFILTER = prefilter
+    _MEMBER_WAY_BLOBS = member_way_blobs
+    _COMPACT = compact
+    _SHARD_BYTES = shard_bytes
+    _INSTRUMENTED = instrumented
 
 
 def _key_indices(string_table, osm_keys):
@@ -83,23 +125,32 @@ def _requested_keep_indices(string_table):
     return set(_key_indices(string_table, _REQUESTED_TAG_KEYS))
 
 
+def _elements_with_keys(string_table, elements, osm_keys):
+    """Indices of the ways/relations in ``elements`` carrying any of ``osm_keys`` (every
+    tagged element when ``osm_keys`` is None), in order; empty when none do."""
+    tags_off = elements["tags_off"]
+    if osm_keys is None:
+        return np.flatnonzero(np.diff(tags_off) > 0)
+    key_indices = _key_indices(string_table, osm_keys)
+    if not key_indices:
+        return np.empty(0, np.int64)
+    key_positions = np.nonzero(np.isin(elements["keys"], key_indices))[0]
+    # A tag key belongs to the element whose [tags_off[i], tags_off[i+1]) slice contains it;
+    # an element may carry several filter keys, so de-duplicate.
+    return np.unique(np.searchsorted(tags_off, key_positions, side="right") - 1)
+
+
 def _matching_ways(string_table, ways, osm_keys):
-    """Select the ways carrying any of ``osm_keys`` and return, per matching way, its
-    node-ref slice, full (resolved) tag dict and ``version``/``timestamp``/``visible``
-    metadata -- everything pyrosm's way record carries. Returns a dict of parallel
-    arrays/lists, or ``None``."""
+    """Select the ways carrying any of ``osm_keys`` (every tagged way when ``osm_keys`` is
+    None) and return, per matching way, its node-ref slice, full (resolved) tag dict and
+    ``version``/``timestamp``/``visible`` metadata -- everything pyrosm's way record carries.
+    Returns a dict of parallel arrays/lists, or ``None``."""
     if ways is None:
         return None
-    key_indices = _key_indices(string_table, osm_keys)
-    if not key_indices:
+    way_index = _elements_with_keys(string_table, ways, osm_keys)
+    if len(way_index) == 0:
         return None
     keys, vals, tags_off = ways["keys"], ways["vals"], ways["tags_off"]
-    key_positions = np.nonzero(np.isin(keys, key_indices))[0]
-    if len(key_positions) == 0:
-        return None
-    # A tag key belongs to the way whose [tags_off[i], tags_off[i+1]) slice contains it;
-    # a way may carry several filter keys, so de-duplicate.
-    way_index = np.unique(np.searchsorted(tags_off, key_positions, side="right") - 1)
     refs, refs_off = ways["refs"], ways["refs_off"]
     keep_indices = _requested_keep_indices(string_table)
     return {
@@ -118,16 +169,18 @@ def _matching_ways(string_table, ways, osm_keys):
 
 
 def _matching_nodes(string_table, nodes, osm_keys, node_lon, node_lat):
-    """Dense nodes carrying any of ``osm_keys`` -> a dict of parallel arrays/lists
-    (``id`` / ``lon`` / ``lat`` / ``tags`` + ``version`` / ``timestamp`` / ``changeset`` /
-    ``visible`` metadata) for the matching nodes, or ``None``. Tags are parsed from the
-    block's dense ``keys_vals`` stream; untagged nodes (the vast majority) cost nothing.
+    """Dense nodes carrying any of ``osm_keys`` (every tagged node when ``osm_keys`` is None)
+    -> a dict of parallel arrays/lists (``id`` / ``lon`` / ``lat`` / ``tags`` + ``version`` /
+    ``timestamp`` / ``changeset`` / ``visible`` metadata) for the matching nodes, or ``None``.
+    Tags are parsed from the block's dense ``keys_vals`` stream; untagged nodes (the vast
+    majority) cost nothing.
     """
     if nodes is None:
         return None
-    key_indices = set(_key_indices(string_table, osm_keys))
+    any_key = osm_keys is None
+    key_indices = set() if any_key else set(_key_indices(string_table, osm_keys))
     keys_vals = nodes["keys_vals"]
-    if not key_indices or len(keys_vals) == 0:
+    if not (key_indices or any_key) or len(keys_vals) == 0:
         return None
     keep_indices = _requested_keep_indices(string_table)
     ids = nodes["id"]
@@ -140,7 +193,7 @@ def _matching_nodes(string_table, nodes, osm_keys, node_lon, node_lat):
             k, v = keys_vals[p], keys_vals[p + 1]
             p += 2
             pairs.append((k, v))
-            if k in key_indices:
+            if any_key or k in key_indices:
                 matched = True
         p += 1  # skip the per-node 0 terminator
         if matched:
@@ -234,20 +287,17 @@ def _node_records_by_id(string_table, header, nodes, wanted, keep_metadata):
 
 
 def _layer_relations(string_table, relations, osm_keys):
-    """The relations carrying any of ``osm_keys`` in this block. Yields, per relation, its
-    id, member id/type/role arrays, full tag dict and ``version``/``timestamp``/
-    ``changeset`` metadata -- everything pyrosm needs to assemble the (multi)polygon and
-    its columns. Member roles and tags are resolved through the block's string table."""
+    """The relations carrying any of ``osm_keys`` (every tagged relation when ``osm_keys``
+    is None) in this block. Yields, per relation, its id, member id/type/role arrays, full tag
+    dict and ``version``/``timestamp``/``changeset`` metadata -- everything pyrosm needs to
+    assemble the (multi)polygon and its columns. Member roles and tags are resolved through
+    the block's string table."""
     if relations is None:
         return
-    key_indices = _key_indices(string_table, osm_keys)
-    if not key_indices:
-        return
-    key_positions = np.nonzero(np.isin(relations["keys"], key_indices))[0]
-    if len(key_positions) == 0:
+    rel_index = _elements_with_keys(string_table, relations, osm_keys)
+    if len(rel_index) == 0:
         return
     tags_off = relations["tags_off"]
-    rel_index = np.unique(np.searchsorted(tags_off, key_positions, side="right") - 1)
     ids, keys, vals = relations["id"], relations["keys"], relations["vals"]
     version, timestamp, changeset = (
         relations["version"],
@@ -282,6 +332,23 @@ def _layer_relations(string_table, relations, osm_keys):
         }
 
 
+def _relation_member_way_ids(string_table, relations, osm_keys):
+    """The way member ids of the relations carrying any of ``osm_keys`` in this block (a
+    superset of the relations a layer keeps), or an empty array."""
+    if relations is None:
+        return np.empty(0, np.int64)
+    rel_index = _elements_with_keys(string_table, relations, osm_keys)
+    moff = relations["members_off"]
+    members = [
+        np.arange(moff[i], moff[i + 1], dtype=np.int64) for i in rel_index.tolist()
+    ]
+    if not members:
+        return np.empty(0, np.int64)
+    members = np.concatenate(members)
+    # Member type 1 is a way (0: node, 2: relation).
+    return relations["memids"][members[relations["types"][members] == 1]]
+
+
 def _offsets_from_lengths(lengths):
     """CSR offsets array for variable-length rows: ``[0, l0, l0+l1, ...]``."""
     off = np.zeros(len(lengths) + 1, dtype=np.int64)
@@ -301,7 +368,8 @@ def _decode_one_block(string_table, header, nodes, ways, relations):
     """Decode one primitive block into the per-shard arrays: node coordinates, the matching
     layer point nodes, the matching layer ways (refs + resolved tags + metadata), *all* ways
     (id + refs, for relation-member lookup) and the matching layer relations. Returns a dict
-    of the npz arrays ``_write_shard`` spills (every key present, empty when absent)."""
+    of the arrays a shard holds (every key present, empty when absent; see
+    :mod:`pyrosm.engine.shards`)."""
     node_id, node_lon, node_lat, in_box = [], [], [], []
     nf = {k: [] for k in ("id", "lon", "lat", "tags", "meta")}
     way_match_id, way_match_refs, way_match_tags = [], [], []
@@ -433,31 +501,63 @@ def _merge_shards(blocks):
 
 def _decode_batch(task):
     """Worker: decode a contiguous run of blobs, accumulating decoded blocks into a shard and
-    spilling it once it reaches ``_SHARD_TARGET_BYTES`` (so peak memory stays bounded by about
+    spilling it once it reaches ``_SHARD_BYTES`` (so peak memory stays bounded by about
     one shard's worth of blocks rather than the whole batch, while the file count -- and the
     per-file overhead collect pays re-reading them -- drops by one to two orders of magnitude).
-    Returns the list of shard paths."""
-    worker_id, blobs = task
+    Returns ``(shard_paths, summaries, counters)`` -- ``summaries`` holds the blob-index
+    summary of each block, in order, when ``_SUMMARIZE`` is set (else it is empty), and
+    ``counters`` the batch's ``seconds``, ``bytes_inflated`` and ``peak_rss`` for the read's
+    statistics (see :mod:`pyrosm.engine.stats`), and its ``events``: the ``decode_blob``
+    spans captured when ``_INSTRUMENTED`` is set, for the main process to report."""
+    batch_id, blobs = task
+    started = time.perf_counter()
+    reset_peak_rss()
     paths = []
+    summaries = []
     pending = []
     pending_bytes = 0
+    inflated = 0
 
     def flush():
         nonlocal pending, pending_bytes
         if not pending:
             return
-        path = Path(_SHARD_DIR) / ("shard_%d_%d.npz" % (worker_id, len(paths)))
-        np.savez(path, **_merge_shards(pending))
-        paths.append(path)
+        path = Path(_SHARD_DIR) / ("shard_%d_%d" % (batch_id, len(paths)))
+        paths.append(Path(write_shard(path, _merge_shards(pending), _COMPACT)))
         pending, pending_bytes = [], 0
 
-    with open(_FILEPATH, "rb") as f:
+    with open(_FILEPATH, "rb") as f, instrument.capturing(_INSTRUMENTED) as events:
         for offset, size in blobs:
-            data = _read_block(f, offset, size)
-            arrays = _decode_one_block(*decode_primitive_block(data))
-            pending.append(arrays)
-            pending_bytes += sum(v.nbytes for v in arrays.values())
-            if pending_bytes >= _SHARD_TARGET_BYTES:
-                flush()
-    flush()
-    return paths
+            with instrument.span("decode_blob", offset=offset, size=size) as blob:
+                # A block without any filter key needs only its node coordinates, unless
+                # its ways may be members of the layer's relations. Blocks are summarised
+                # for the blob index in full.
+                prefilter = (
+                    _PREFILTER and not _SUMMARIZE and offset not in _MEMBER_WAY_BLOBS
+                )
+                data = _read_block(f, offset, size)
+                inflated += len(data)
+                block = decode_primitive_block(
+                    data, required_keys=_OSM_KEYS if prefilter else None
+                )
+                if _SUMMARIZE:
+                    summaries.append(summarize_block(*block))
+                arrays = _decode_one_block(*block)
+                blob["bytes_inflated"] = len(data)
+                blob["nodes"] = len(arrays["node_id"])
+                blob["ways"] = len(arrays["all_id"])
+                blob["features"] = sum(
+                    len(arrays[key]) for key in ("nfeat_id", "way_id", "rel_id")
+                )
+                pending.append(arrays)
+                pending_bytes += sum(v.nbytes for v in arrays.values())
+                if pending_bytes >= _SHARD_BYTES:
+                    flush()
+        flush()
+    counters = {
+        "seconds": time.perf_counter() - started,
+        "bytes_inflated": inflated,
+        "peak_rss": peak_rss(),
+        "events": events or [],
+    }
+    return paths, summaries, counters
@@ -6,19 +6,47 @@ Because pyrosm builds a tag column only when that tag occurs in a chunk, differe
 carry different columns; the temporary files are then combined under one schema that is the
 union (by name) of every chunk's columns, so a tag column that first appears in a later
 chunk is not dropped. Needs the optional pyarrow dependency.
+
+With ``spatial_index`` the file is written for spatial reads instead: the rows sorted along a
+Hilbert curve, a GeoParquet 1.1 ``bbox`` covering column and row groups of
+``_SORTED_ROW_GROUP_SIZE`` rows, so a reader filtering by a bounding box (GeoPandas
+``bbox=``, DuckDB, a tile server) skips the row groups away from it by their statistics. The
+chunks are then spilled as uncompressed Arrow IPC files, which the sorted write gathers its
+rows from memory-mapped, a window of rows at a time -- so the sort holds only the rows'
+bounding boxes and sort keys in memory, not the output frame. The result cache's layers are
+written the same way, in the same single pass (see :func:`_write_cached_layer`).
 """
 
+import os
 import shutil
 import tempfile
 from pathlib import Path
 
-from pyrosm.engine.collect import _collect_layer, _num_ways, _slice_way_columns
-from pyrosm.engine.assemble import _assemble_chunk
+from pyrosm.engine import stats
+from pyrosm.engine.assemble import _iter_layer_chunks, _to_arrow
 
 # Assemble and write this many ways per chunk, so the output frame is never fully
 # materialised.
 _OUTPUT_CHUNK_SIZE = 250_000
 
+# A cached layer's per-row bounding-box covering column (GeoParquet 1.1) and the column holding
+# each row's position in the read's own order (the file is stored spatially sorted).
+BBOX_COLUMN = "bbox"
+ROW_COLUMN = "_pyrosm_row"
+
+# Schema-metadata key of a cached layer's ``read`` (its cache key, see ``cache.read_key``) and
+# ``column_kinds``: for each column, the element kinds (``osm_type``) with a value in it, as
+# only some kinds' frames carry e.g. ``changeset``.
+PYROSM_METADATA = b"pyrosm"
+
+# Rows per row group of a cached layer: small enough that a bounding-box read of the spatially
+# sorted file skips most row groups by the covering column's statistics.
+_CACHE_ROW_GROUP_SIZE = 8192
+# Rows per row group of a spatially indexed output file: larger than the cache's, as the
+# readers of an output file (DuckDB, the tile server) pay a fixed cost per row group scanned,
+# while a Hilbert-sorted group of this size still covers a small area.
+_SORTED_ROW_GROUP_SIZE = 32_768
+
 
 def _align_table(table, schema):
     """Reorder ``table`` to ``schema``'s field order, adding any columns it lacks as typed
@@ -50,6 +78,11 @@ def _unify_schemas(schemas):
     return unified
 
 
+def _record_batch(table):
+    """An arrow ``table`` as one ``pyarrow.RecordBatch``."""
+    return table.combine_chunks().to_batches()[0]
+
+
 def _stream_layer_to_parquet(
     shard_paths,
     output,
@@ -63,16 +96,26 @@ def _stream_layer_to_parquet(
     complete_relations=False,
     keep_other_tags=True,
     workers=1,
+    keep_nodes=True,
+    spatial_index=False,
+    unheld=None,
+    cached_read=None,
 ):
     """Stream the layer (point nodes, then ways in chunks, then relations) to a GeoParquet
     at ``output``, spilling each chunk to its own temporary parquet file and then combining
     the files under the union of their schemas. Returns the path, or ``None`` if there was
-    nothing to write. ``workers > 1`` runs the collect phase across a process pool."""
+    nothing to write. ``workers > 1`` runs the collect phase across a process pool.
+    ``spatial_index`` writes the rows Hilbert-sorted with a ``bbox`` covering column (see
+    :func:`_write_spatially_sorted`). ``unheld`` is passed to :func:`_iter_layer_chunks`.
+    ``cached_read`` (a ``cache.read_key``) writes the file as the result cache's layer of
+    that read, in the same single sorted pass (see :func:`_write_cached_layer`).
+    """
+    import pyarrow as pa
     import pyarrow.parquet as pq
-    from geopandas.io.arrow import _geopandas_to_arrow
 
-    collected = _collect_layer(
+    chunks = _iter_layer_chunks(
         shard_paths,
+        chunk_size,
         tags_as_columns,
         keep_metadata,
         filter_spec,
@@ -80,65 +123,221 @@ def _stream_layer_to_parquet(
         keep_relations,
         bounding_box,
         complete_relations,
+        keep_other_tags=keep_other_tags,
         workers=workers,
+        keep_nodes=keep_nodes,
+        as_table=True,
+        unheld=unheld,
     )
-    if collected is None:
-        return None
-    node_features, kept, relations, relation_ways, node_coordinates = collected
-
-    def to_table(way_records=None, relations=None, relation_ways=None, nodes=None):
-        gdf = _assemble_chunk(
-            node_coordinates,
-            way_records,
-            relations,
-            relation_ways,
-            tags_as_columns,
-            keep_metadata,
-            nodes=nodes,
-            bounding_box=bounding_box,
-            complete_relations=complete_relations,
-            keep_other_tags=keep_other_tags,
-        )
-        if gdf is None or len(gdf) == 0:
-            return None
-        return _geopandas_to_arrow(gdf, index=False, geometry_encoding="WKB")
-
-    def chunk_tables():
-        if node_features is not None:
-            table = to_table(nodes=node_features)
-            if table is not None:
-                yield table
-        if kept is not None:
-            for start in range(0, _num_ways(kept), chunk_size):
-                table = to_table(
-                    way_records=_slice_way_columns(kept, start, start + chunk_size)
-                )
-                if table is not None:
-                    yield table
-        if relations is not None:
-            table = to_table(relations=relations, relation_ways=relation_ways)
-            if table is not None:
-                yield table
 
+    sort = spatial_index or cached_read is not None
     part_dir = tempfile.mkdtemp(prefix="pyrosm_ooc_parquet_")
     try:
-        # Spill each chunk to its own parquet file (heterogeneous columns allowed).
+        # Spill each chunk to its own parquet file (heterogeneous columns allowed); an Arrow
+        # IPC file for the sorted write, to gather its rows from memory-mapped.
         part_paths = []
-        for table in chunk_tables():
-            part_path = Path(part_dir) / ("part_%d.parquet" % len(part_paths))
-            pq.write_table(table, part_path)
-            part_paths.append(part_path)
+        for table in chunks:
+            with stats.phase("cache_write"):
+                part_path = Path(part_dir) / ("part_%d" % len(part_paths))
+                if sort:
+                    with pa.ipc.new_file(str(part_path), table.schema) as part:
+                        part.write_table(table)
+                else:
+                    pq.write_table(table, part_path)
+                part_paths.append(part_path)
         if not part_paths:
             return None
+        if sort:
+            with stats.phase("cache_write"):
+                parts = [
+                    pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+                    for path in part_paths
+                ]
+                if cached_read is not None:
+                    _write_cached_layer(parts, output, chunk_size, cached_read)
+                else:
+                    _write_spatially_sorted(parts, output, chunk_size)
+                del parts
+                stats.count("cache_write", bytes_written=os.path.getsize(output))
+            return output
         # Combine the parts into the single output under the union of their schemas, one
         # part in memory at a time so the full frame is never materialised.
-        schema = _unify_schemas([pq.read_schema(p) for p in part_paths])
-        writer = pq.ParquetWriter(output, schema)
-        try:
-            for part_path in part_paths:
-                writer.write_table(_align_table(pq.read_table(part_path), schema))
-        finally:
-            writer.close()
+        with stats.phase("cache_write"):
+            schema = _unify_schemas([pq.read_schema(p) for p in part_paths])
+            writer = pq.ParquetWriter(output, schema)
+            try:
+                for part_path in part_paths:
+                    writer.write_table(_align_table(pq.read_table(part_path), schema))
+            finally:
+                writer.close()
+            stats.count("cache_write", bytes_written=os.path.getsize(output))
         return output
     finally:
         shutil.rmtree(part_dir, ignore_errors=True)
+
+
+def _bbox_covering(bounds):
+    """The ``bbox`` covering column of rows with ``bounds`` (an ``(n, 4)`` array of
+    ``xmin, ymin, xmax, ymax``)."""
+    import pyarrow as pa
+
+    return pa.StructArray.from_arrays(
+        [pa.array(bounds[:, i]) for i in range(4)],
+        names=["xmin", "ymin", "xmax", "ymax"],
+    )
+
+
+def _covered_geo(geo, total_bounds):
+    """The GeoParquet ``geo`` metadata ``geo`` declaring the ``bbox`` covering column of its
+    primary geometry column, whose rows span ``total_bounds``."""
+    geo = dict(geo, version="1.1.0")
+    column = dict(geo["columns"][geo["primary_column"]])
+    column["bbox"] = [float(v) for v in total_bounds]
+    column["covering"] = {
+        "bbox": {name: [BBOX_COLUMN, name] for name in ("xmin", "ymin", "xmax", "ymax")}
+    }
+    geo["columns"] = dict(geo["columns"], **{geo["primary_column"]: column})
+    return geo
+
+
+def _write_spatially_sorted(
+    parts,
+    output,
+    window,
+    row_group_size=None,
+    row_column=False,
+    metadata=None,
+):
+    """Write the rows of the arrow tables ``parts`` (the chunks of a layer, with the
+    GeoParquet ``geo`` metadata; e.g. memory-mapped from Arrow IPC files) to a GeoParquet at
+    ``output``, under the union of their schemas: sorted along a Hilbert curve over their
+    total bounds (ties keep the chunks' order, and empty or missing geometries go last), with
+    the ``bbox`` covering column and in row groups of ``row_group_size`` (by default
+    ``_SORTED_ROW_GROUP_SIZE``). The rows are gathered from the parts about ``window`` at a
+    time. ``row_column`` adds the ``ROW_COLUMN`` of each row's position in the parts, and
+    ``metadata`` is added to the schema metadata."""
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    import geopandas as gpd
+    import shapely
+    from rapidjson import dumps, loads
+
+    schema = _unify_schemas([part.schema for part in parts])
+    geo = loads(schema.metadata[b"geo"])
+    column = geo["primary_column"]
+    bounds = np.concatenate(
+        [shapely.bounds(shapely.from_wkb(p.column(column).to_numpy())) for p in parts]
+    )
+    # An empty or missing geometry has no bounds (NaN), so no place on the curve.
+    located = ~np.isnan(bounds).any(axis=1)
+    if located.any():
+        total_bounds = np.concatenate(
+            [
+                bounds[located, :2].min(axis=0),
+                bounds[located, 2:].max(axis=0),
+            ]
+        )
+    else:
+        total_bounds = np.zeros(4)
+    # The Hilbert distance of a geometry is that of its bounding box's centre; computed a part
+    # at a time over the total bounds, so only one part's points are built at once.
+    starts = np.cumsum([0] + [part.num_rows for part in parts])
+    centres = (bounds[:, :2] + bounds[:, 2:]) / 2
+    distances = np.full(len(bounds), np.iinfo(np.int64).max, dtype=np.int64)
+    for a, b in zip(starts[:-1], starts[1:]):
+        rows = np.flatnonzero(located[a:b]) + a
+        if len(rows):
+            distances[rows] = gpd.GeoSeries(
+                gpd.points_from_xy(*centres[rows].T)
+            ).hilbert_distance(total_bounds=total_bounds)
+    order = np.argsort(distances, kind="stable")
+    owner = np.repeat(np.arange(len(parts)), np.diff(starts))
+
+    # Each part's metadata lists the geometry types of its own rows only.
+    geometry_types = set()
+    for part in parts:
+        part_geo = loads(part.schema.metadata[b"geo"])
+        geometry_types.update(part_geo["columns"][column]["geometry_types"])
+    geo["columns"][column]["geometry_types"] = sorted(geometry_types)
+    schema_metadata = dict(schema.metadata)
+    schema_metadata.update(metadata or {})
+    schema_metadata[b"geo"] = dumps(_covered_geo(geo, total_bounds)).encode("utf-8")
+    covering = pa.field(BBOX_COLUMN, _bbox_covering(bounds[:0]).type)
+    extra = [pa.field(ROW_COLUMN, pa.int64())] if row_column else []
+    output_schema = pa.schema(list(schema) + extra + [covering])
+    writer = pq.ParquetWriter(output, output_schema.with_metadata(schema_metadata))
+    if row_group_size is None:
+        row_group_size = _SORTED_ROW_GROUP_SIZE
+    # Each window is a whole number of row groups, so only the last group is short.
+    window = max(1, window // row_group_size) * row_group_size
+    try:
+        for start in range(0, len(order), window):
+            rows = order[start : start + window]
+            # Take the window's rows part by part, then put them back in the sorted order.
+            by_part = np.argsort(owner[rows], kind="stable")
+            grouped = rows[by_part]
+            cuts = np.searchsorted(owner[grouped], np.arange(len(parts) + 1))
+            pieces = [
+                _align_table(part.take(pa.array(grouped[a:b] - starts[i])), schema)
+                for i, (part, a, b) in enumerate(zip(parts, cuts[:-1], cuts[1:]))
+                if b > a
+            ]
+            table = pa.concat_tables(pieces).take(pa.array(np.argsort(by_part)))
+            if row_column:
+                table = table.append_column(ROW_COLUMN, pa.array(rows, type=pa.int64()))
+            table = table.append_column(covering, _bbox_covering(bounds[rows]))
+            writer.write_table(table, row_group_size=row_group_size)
+    finally:
+        writer.close()
+
+
+def _write_spatially_sorted_frame(gdf, path):
+    """Write the GeoDataFrame ``gdf`` to a GeoParquet at ``path`` as
+    :func:`_write_spatially_sorted` does."""
+    table = _to_arrow(gdf)
+    _write_spatially_sorted([table], path, max(table.num_rows, 1))
+
+
+def _column_kinds(parts):
+    """For each column of the arrow tables ``parts``, the element kinds (``osm_type``) with a
+    value in it -- or ``{}`` when the rows carry no ``osm_type``."""
+    import pyarrow.compute as pc
+
+    names = _unify_schemas([part.schema for part in parts]).names
+    if "osm_type" not in names:
+        return {}
+    kinds = {name: set() for name in names}
+    for part in parts:
+        osm_type = part.column("osm_type")
+        for name, column in zip(part.column_names, part.columns):
+            kinds[name].update(
+                pc.unique(osm_type.filter(pc.is_valid(column))).to_pylist()
+            )
+    return {name: sorted(values) for name, values in kinds.items()}
+
+
+def _write_cached_layer(parts, output, window, read):
+    """Write the arrow tables ``parts`` (the chunks of a layer) to a GeoParquet at ``output``
+    as a result-cache layer (of the read whose ``cache.read_key`` is ``read``), for narrower
+    reads answered from it, e.g. of a bounding box: sorted along a Hilbert curve with the
+    per-row ``bbox`` covering column and the rows' original positions, in small row groups
+    with statistics (see :func:`_write_spatially_sorted`), so a reader filtering on the
+    covering column skips the row groups away from its box. The element kinds using each
+    column are recorded too, so a read of part of the layer can tell which columns its rows
+    would have had, and so is ``read``, to tell which reads the layer can serve."""
+    from rapidjson import dumps
+
+    metadata = {
+        PYROSM_METADATA: dumps(
+            {"read": read, "column_kinds": _column_kinds(parts)}
+        ).encode("utf-8")
+    }
+    _write_spatially_sorted(
+        parts,
+        output,
+        window,
+        row_group_size=_CACHE_ROW_GROUP_SIZE,
+        row_column=True,
+        metadata=metadata,
+    )
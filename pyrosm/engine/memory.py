@@ -0,0 +1,158 @@
+"""The ``max_memory`` budget of an ``OSM`` object's out-of-core reads.
+
+By default the engine's memory use follows fixed sizes: each decode worker spills a shard at
+``decode._SHARD_TARGET_BYTES``, a streamed layer is assembled ``_OUTPUT_CHUNK_SIZE`` ways at
+a time (see ``geoparquet``), and the worker count follows the CPU cores. A read run within
+:func:`limited` ``(max_memory)`` derives them from the budget instead, trading speed for
+memory where the budget is tight:
+
+- at most :func:`worker_cap` decode workers, each given ``_WORKER_MEMORY_BYTES`` (the
+  calibration's estimate of a worker's resident memory) of ``_WORKER_SHARE`` of the budget;
+- shards of :func:`shard_target_bytes`, each worker's share split ``_SHARD_COPIES`` ways
+  (the pending blocks, their merged copy and the Arrow buffers of the spill);
+- streamed chunks of :func:`output_chunk_size` ways, ``_ROW_BYTES`` each within
+  ``_CHUNK_SHARE`` of the budget;
+- temp shards in shared memory (which counts against the budget of a container) only within
+  :func:`limit` of the available memory.
+
+The sizes never grow past their defaults: a budget only ever lowers them.
+"""
+
+import contextvars
+import re
+from contextlib import contextmanager
+
+# The budget in bytes of the reads run within limited(), or None when unlimited. A context
+# variable, so a budget set in one thread leaves other threads' concurrent reads alone.
+_BUDGET = contextvars.ContextVar("pyrosm_memory_budget", default=None)
+
+# Share of the budget the decode workers may take together; the rest is left to the main
+# process (collect, node gather and assembly).
+_WORKER_SHARE = 0.5
+# Copies of a shard's data a worker holds at most while it spills it.
+_SHARD_COPIES = 4
+# Smallest shard target: below this the per-shard overhead of collect dominates.
+_MIN_SHARD_BYTES = 1_000_000
+# Bytes an assembled output row takes in memory, about (its geometry, tag columns and the
+# records it is built from), and the share of the budget one streamed chunk may take.
+_ROW_BYTES = 2_000
+_CHUNK_SHARE = 0.25
+# Smallest streamed chunk, in ways.
+_MIN_CHUNK_SIZE = 10_000
+
+_UNITS = {
+    "": 1,
+    "b": 1,
+    "k": 1000,
+    "kb": 1000,
+    "m": 1000**2,
+    "mb": 1000**2,
+    "g": 1000**3,
+    "gb": 1000**3,
+    "t": 1000**4,
+    "tb": 1000**4,
+    "ki": 1024,
+    "kib": 1024,
+    "mi": 1024**2,
+    "mib": 1024**2,
+    "gi": 1024**3,
+    "gib": 1024**3,
+    "ti": 1024**4,
+    "tib": 1024**4,
+}
+_SIZE = re.compile(r"^\s*(\d+(?:\.\d*)?|\.\d+)\s*([a-z]*)\s*$")
+
+
+def parse_size(value):
+    """The bytes of a memory size: an int of bytes, or a string such as ``"8GB"``,
+    ``"512 MB"`` or the Kubernetes-style ``"8Gi"`` (decimal ``k``/``M``/``G``/``T`` units,
+    binary ``Ki``/``Mi``/``Gi``/``Ti``/``KiB``/...). Raises ``ValueError`` for anything else.
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        size = value
+    elif isinstance(value, str) and _SIZE.match(value.lower()):
+        number, unit = _SIZE.match(value.lower()).groups()
+        if unit not in _UNITS:
+            raise ValueError("Unknown memory unit %r in %r." % (unit, value))
+        size = int(float(number) * _UNITS[unit])
+    else:
+        raise ValueError(
+            "'max_memory' should be a number of bytes or a size such as '8GB', got %r."
+            % (value,)
+        )
+    if size <= 0:
+        raise ValueError("'max_memory' should be positive, got %r." % (value,))
+    return size
+
+
+@contextmanager
+def limited(max_memory):
+    """Size the reads run within the block by the budget ``max_memory`` (bytes; ``None``
+    keeps the default sizes)."""
+    token = _BUDGET.set(max_memory)
+    try:
+        yield max_memory
+    finally:
+        _BUDGET.reset(token)
+
+
+def limited_iter(max_memory, items):
+    """Iterate ``items`` (a generator running reads) within :func:`limited` ``(max_memory)``
+    while it runs -- but not while the consumer holds a yielded item."""
+    items = iter(items)
+    while True:
+        with limited(max_memory):
+            try:
+                item = next(items)
+            except StopIteration:
+                return
+        yield item
+
+
+def budget():
+    """The budget in bytes of the current read, or ``None``."""
+    return _BUDGET.get()
+
+
+def limit(memory):
+    """``memory`` (bytes, or ``None`` when unknown) capped at the budget."""
+    budget_bytes = budget()
+    if budget_bytes is None:
+        return memory
+    if memory is None:
+        return budget_bytes
+    return min(memory, budget_bytes)
+
+
+def worker_cap():
+    """The most decode workers the budget allows (at least one), or ``None`` when
+    unlimited."""
+    from pyrosm.engine.calibration import _WORKER_MEMORY_BYTES
+
+    budget_bytes = budget()
+    if budget_bytes is None:
+        return None
+    return max(1, int(budget_bytes * _WORKER_SHARE // _WORKER_MEMORY_BYTES))
+
+
+def shard_target_bytes(workers):
+    """The shard size at which each of ``workers`` decode workers spills (see
+    ``decode._decode_batch``)."""
+    from pyrosm.engine.decode import _SHARD_TARGET_BYTES
+
+    budget_bytes = budget()
+    if budget_bytes is None:
+        return _SHARD_TARGET_BYTES
+    share = budget_bytes * _WORKER_SHARE / max(workers, 1)
+    return int(min(_SHARD_TARGET_BYTES, max(_MIN_SHARD_BYTES, share / _SHARD_COPIES)))
+
+
+def output_chunk_size():
+    """Ways per chunk of a layer streamed to a GeoParquet file or by ``iter_layer``."""
+    from pyrosm.engine.geoparquet import _OUTPUT_CHUNK_SIZE
+
+    budget_bytes = budget()
+    if budget_bytes is None:
+        return _OUTPUT_CHUNK_SIZE
+    rows = budget_bytes * _CHUNK_SHARE // _ROW_BYTES
+    return int(min(_OUTPUT_CHUNK_SIZE, max(_MIN_CHUNK_SIZE, rows)))
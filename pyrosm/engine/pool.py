@@ -1,26 +1,120 @@
-"""Worker-count resolution and parallel-decode orchestration for decoding blobs."""
+"""Worker-count resolution and parallel-decode orchestration for decoding blobs.
 
+Each parallel phase of a read (the decode, node gather and assembly) runs on a process pool of
+its own, unless a :class:`WorkerPool` is :func:`attached` -- as it is for the reads of an
+``OSM`` object with ``workers`` > 1, which owns one -- in which case every phase runs on that
+one long-lived pool: the worker processes, which under ``spawn`` re-import pyrosm, geopandas
+and shapely, start once rather than once per phase of every read.
+
+The decode workers hand their results to collect as shard files (see ``shards``), in a temp
+directory under shared memory when the read's shards fit the available memory, so they pass
+through RAM without a disk write and read-back; a larger read spills them to disk.
+"""
+
+import contextvars
+import functools
+import itertools
 import os
+import pickle
 import shutil
 import tempfile
+import threading
 import warnings
+from collections import deque
 from concurrent.futures import ProcessPoolExecutor
 from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
 from pathlib import Path
 
-from pyrosm.engine.blobs import _index_blobs
-from pyrosm.engine.decode import _init_worker, _decode_batch
+import numpy as np
+
+from pyrosm import instrument
+from pyrosm.primitive_block_decoder import decode_primitive_block
+from pyrosm.engine import cache, memory, shards, stats
+from pyrosm.engine.blobs import _index_blobs, _read_block
+from pyrosm.engine.blob_index import (
+    BlobIndex,
+    KIND_RELATIONS,
+    KIND_WAYS,
+    load_index,
+    save_index,
+)
+from pyrosm.engine.decode import _init_worker, _decode_batch, _relation_member_way_ids
+
+# ``workers="auto"`` decodes on a single core, without consulting the cost model, below this
+# many compressed blob bytes: such a read takes about as long as starting a pool (and the
+# one-time calibration would cost more than the read).
+_PARALLEL_MIN_BYTES = 4_000_000  # ~4 MB
+# Shared memory for the temp shards of a read that fits the memory budget: a tmpfs directory,
+# where the POSIX shared-memory segments of ``multiprocessing.shared_memory`` live too (None
+# where the platform has none -- the shards then go to the temp directory on disk).
+_SHARED_MEMORY_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+# Decoded shard bytes per byte of the PBF file, an upper bound: measured 1.6 for the Helsinki
+# extract and 6.1 for the node-heavy test file (a decode keeping every node's id and
+# coordinates; a layer's filter keeps fewer), with headroom for denser files.
+_SHARD_EXPANSION = 8
+# Share of the available memory the temp shards of one read may take in shared memory.
+_SHARED_MEMORY_FRACTION = 0.5
+# Decode batches per worker: enough for the faster workers to take over the rest of a slow
+# worker's share, few enough that each batch still fills whole shards.
+_BATCHES_PER_WORKER = 4
+
+# The WorkerPool the phases of the running thread or generator run on (see attached()), or
+# None for a pool per phase. A context variable, so concurrent reads of other OSM objects keep
+# to their own pools.
+_ATTACHED = contextvars.ContextVar("pyrosm_worker_pool", default=None)
+# Held while a phase's tasks run in this process: their initializer sets the worker state in
+# module globals, which a concurrent read on another thread would otherwise overwrite.
+_IN_PROCESS = threading.RLock()
+# In a worker process of an attached pool, the phase (its initargs file, see _PhaseExecutor)
+# the process was last initialised for.
+_WORKER_PHASE = None
+
+
+def _data_blobs(filepath):
+    """``(offset, size)`` of the data blobs of ``filepath``, from its blob index if saved."""
+    index = load_index(filepath)
+    blobs = _index_blobs(filepath) if index is None else index.blobs()
+    return [
+        (offset, size) for (blob_type, offset, size) in blobs if blob_type == "OSMData"
+    ]
 
-# ``workers="auto"`` decodes in parallel only for files at or above this size.
-_PARALLEL_MIN_FILE_BYTES = 70_000_000  # ~70 MB
 
+def _auto_workers(filepath, blobs=None):
+    """Worker count for ``workers="auto"``: the count with the lowest estimated read time for
+    the data blobs ``blobs`` (``(offset, size)``; all of the file's when ``None``) by this
+    machine's calibrated cost model, within the CPU cores and the available memory (see
+    :mod:`pyrosm.engine.calibration`) -- a single core below ``_PARALLEL_MIN_BYTES``, or with
+    a warning when no pool can start to calibrate."""
+    from pyrosm.engine import calibration
 
-def _auto_workers(filepath, n_blobs):
-    """Worker count for ``workers="auto"``: a single core for files below ~70 MB, otherwise
-    one worker per available CPU core, capped at the number of data blobs."""
-    if Path(filepath).stat().st_size < _PARALLEL_MIN_FILE_BYTES:
+    n_cores = os.cpu_count() or 1
+    if n_cores == 1:
+        return 1
+    if blobs is None:
+        blobs = _data_blobs(filepath)
+    sizes = [size for _, size in blobs]
+    if len(sizes) <= 1 or sum(sizes) < _PARALLEL_MIN_BYTES:
+        return 1
+    calibrated = calibration.load(filepath, blobs)
+    if calibrated is None:
+        # The calibration's pools could not start, so neither would the read's.
+        warnings.warn(_DECODE_FALLBACK_WARNING, RuntimeWarning, stacklevel=3)
+        return 1
+    return calibration.choose_workers(
+        sizes, n_cores, calibrated, memory.limit(calibration.available_memory())
+    )
+
+
+def _auto_threads(filepath):
+    """Thread count for an in-memory ``workers="auto"`` read: one per CPU core, at most one
+    per data blob -- a single thread below ``_PARALLEL_MIN_BYTES``. Threads start at no cost,
+    so unlike :func:`_auto_workers` this needs no calibrated process cost model."""
+    n_cores = os.cpu_count() or 1
+    sizes = [size for _, size in _data_blobs(filepath)]
+    if n_cores == 1 or len(sizes) <= 1 or sum(sizes) < _PARALLEL_MIN_BYTES:
         return 1
-    return max(1, min(os.cpu_count() or 1, n_blobs))
+    return min(n_cores, len(sizes))
 
 
 def _cap_workers(workers):
@@ -38,6 +132,145 @@ def _cap_workers(workers):
     return workers
 
 
+class WorkerPool:
+    """A long-lived process pool that the phases of several reads share while it is
+    :func:`attached`, of ``workers`` processes (``"auto"``: one per CPU core; capped at the
+    cores, and at the :func:`memory.worker_cap` of the budget it is created within). Its
+    executor starts with the first phase that runs on it and is replaced after it breaks;
+    :meth:`close` shuts it down (also on leaving a ``with`` block)."""
+
+    def __init__(self, workers):
+        n_cores = os.cpu_count() or 1
+        self.workers = n_cores if workers == "auto" else min(workers, n_cores)
+        self.workers = min(self.workers, memory.worker_cap() or self.workers)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def discard(self):
+        """Drop a broken executor (the next phase starts a new one)."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+@contextmanager
+def attached(worker_pool):
+    """Run the parallel phases started within the block on ``worker_pool`` (``None`` keeps a
+    pool per phase)."""
+    token = _ATTACHED.set(worker_pool)
+    try:
+        yield worker_pool
+    finally:
+        _ATTACHED.reset(token)
+
+
+def attached_iter(worker_pool, items):
+    """Iterate ``items`` (a generator running parallel phases) with ``worker_pool`` attached
+    while it runs -- but not while the consumer holds a yielded item."""
+    items = iter(items)
+    while True:
+        with attached(worker_pool):
+            try:
+                item = next(items)
+            except StopIteration:
+                return
+        yield item
+
+
+def _run_in_phase(initializer, phase, func, task):
+    """Worker: run ``func(task)`` in a process of an attached pool, initialising the process
+    with ``initializer(*initargs)`` -- the initargs loaded from the ``phase``'s file -- first
+    unless it already was for this phase."""
+    global _WORKER_PHASE
+    if _WORKER_PHASE != phase:
+        with open(phase, "rb") as f:
+            initializer(*pickle.load(f))
+        _WORKER_PHASE = phase
+    return func(task)
+
+
+class _PhaseExecutor:
+    """The executor of an attached pool as seen by one phase (``submit`` and ``map`` like a
+    ``ProcessPoolExecutor`` of ``limit`` processes initialised with ``initializer(*initargs)``).
+
+    At most ``limit`` of the phase's tasks are in flight at once, however many processes the
+    pool has -- a phase sized for fewer workers (by its memory budget, or its blob count) does
+    not spread across all of them. The initargs are pickled once, to a temp file whose path is
+    the phase's token: each task carries only the path, and a process loads the initargs the
+    first time it runs a task of the phase. :meth:`close` removes the file."""
+
+    def __init__(self, executor, limit, initializer, initargs):
+        self._executor = executor
+        self._slots = threading.BoundedSemaphore(limit)
+        fd, self._phase = tempfile.mkstemp(prefix="pyrosm_phase_", suffix=".pickle")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(initargs, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self._run = functools.partial(_run_in_phase, initializer, self._phase)
+
+    def submit(self, func, task):
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(self._run, func, task)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def map(self, func, tasks):
+        futures = [self.submit(func, task) for task in tasks]
+        return (future.result() for future in futures)
+
+    def close(self):
+        try:
+            os.remove(self._phase)
+        except OSError:
+            pass
+
+
+@contextmanager
+def _executor(workers, initializer, initargs):
+    """An executor for one phase: the attached :class:`WorkerPool`'s (running at most
+    ``workers`` of the phase's tasks at once; left running on exit, and discarded when it
+    breaks), else a new pool of ``workers`` processes initialised with
+    ``initializer(*initargs)`` (shut down on exit)."""
+    shared = _ATTACHED.get()
+    if shared is None:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=initializer, initargs=initargs
+        ) as pool:
+            yield pool
+        return
+    phase = _PhaseExecutor(
+        shared.executor(), min(workers, shared.workers), initializer, initargs
+    )
+    try:
+        yield phase
+    except (BrokenProcessPool, OSError):
+        shared.discard()
+        raise
+    finally:
+        phase.close()
+
+
 def _run_pool(func, tasks, workers, initializer, initargs, fallback_warning=None):
     """Map ``func`` over ``tasks`` across a process pool of ``workers`` (each worker process
     initialised with ``initializer(*initargs)``); return ``(results, pool_ok)`` -- the
@@ -50,20 +283,63 @@ def _run_pool(func, tasks, workers, initializer, initargs, fallback_warning=None
     process and reports ``pool_ok`` False, so a later phase can stay serial instead of
     re-attempting a pool that cannot start. ``fallback_warning`` (when given) is emitted on
     that fallback; passing ``None`` keeps a downstream phase from warning a second time after
-    the decode already did."""
+    the decode already did. Tasks run in this process one thread's phase at a time."""
     if workers == 1:
-        initializer(*initargs)
-        return [func(task) for task in tasks], False
+        return _run_in_process(func, tasks, initializer, initargs), False
     try:
-        with ProcessPoolExecutor(
-            max_workers=workers, initializer=initializer, initargs=initargs
-        ) as pool:
+        with _executor(workers, initializer, initargs) as pool:
             return list(pool.map(func, tasks)), True
     except (BrokenProcessPool, OSError):
         if fallback_warning is not None:
             warnings.warn(fallback_warning, RuntimeWarning, stacklevel=2)
+        return _run_in_process(func, tasks, initializer, initargs), False
+
+
+def _run_in_process(func, tasks, initializer, initargs):
+    """``func`` mapped over ``tasks`` in this process, after ``initializer(*initargs)``."""
+    with _IN_PROCESS:
         initializer(*initargs)
-        return [func(task) for task in tasks], False
+        return [func(task) for task in tasks]
+
+
+def _imap_pool(func, tasks, workers, initializer, initargs, fallback_warning=None):
+    """Like :func:`_run_pool`, but a generator yielding the per-task results in task order as
+    they complete, with at most two tasks per worker submitted ahead of the consumer -- so
+    neither the tasks (built lazily from the ``tasks`` iterable) nor the results pile up in
+    memory. A pool that cannot start, or breaks, runs the remaining tasks in this process,
+    emitting ``fallback_warning`` (when given)."""
+    tasks = iter(tasks)
+    if workers > 1:
+        pending = deque()
+        try:
+            with _executor(workers, initializer, initargs) as pool:
+                try:
+                    for task in tasks:
+                        pending.append((task, None))
+                        pending[-1] = (task, pool.submit(func, task))
+                        while len(pending) > 2 * workers or (
+                            pending and pending[0][1].done()
+                        ):
+                            result = pending[0][1].result()
+                            pending.popleft()
+                            yield result
+                    while pending:
+                        result = pending[0][1].result()
+                        pending.popleft()
+                        yield result
+                    return
+                finally:
+                    for _, future in pending:
+                        if future is not None:
+                            future.cancel()
+        except (BrokenProcessPool, OSError):
+            if fallback_warning is not None:
+                warnings.warn(fallback_warning, RuntimeWarning, stacklevel=2)
+            tasks = itertools.chain([task for task, _ in pending], tasks)
+    for task in tasks:
+        # Not held across the yield: the consumer may run phases of its own meanwhile.
+        (result,) = _run_in_process(func, [task], initializer, initargs)
+        yield result
 
 
 _DECODE_FALLBACK_WARNING = (
@@ -73,6 +349,28 @@ _DECODE_FALLBACK_WARNING = (
     "the entry point, or pass workers=1 to silence this."
 )
 
+_ASSEMBLE_FALLBACK_WARNING = (
+    "Parallel assembly could not start, or its worker processes died, and the rest of the "
+    "layer was assembled in a single process. Pass workers=1 to silence this."
+)
+
+
+def _batch_blobs(blobs, workers):
+    """Split ``blobs`` (``(offset, size)`` pairs in file order) into contiguous runs of about
+    equal compressed size for the decode pool: a single run for one worker, else up to
+    ``_BATCHES_PER_WORKER`` per worker. The pool hands the next run to whichever worker frees
+    up first, so a worker that drew dense city blocks does not leave the others idle behind a
+    static split."""
+    if workers == 1 or len(blobs) <= 1:
+        return [blobs] if blobs else []
+    n_batches = min(len(blobs), workers * _BATCHES_PER_WORKER)
+    ends = np.cumsum([size for _, size in blobs])
+    # Each batch ends with the blob whose cumulative size reaches its share of the total.
+    targets = ends[-1] * np.arange(1, n_batches) / n_batches
+    cuts = np.searchsorted(ends, targets) + 1
+    cuts = np.unique(np.concatenate(([0], cuts, [len(blobs)]))).tolist()
+    return [blobs[a:b] for a, b in zip(cuts[:-1], cuts[1:])]
+
 
 def _decode_all(
     filepath,
@@ -83,18 +381,18 @@ def _decode_all(
     include_nodes,
     bbox_bounds=None,
     requested_tag_keys=None,
+    summarize=False,
+    prefilter=False,
+    member_way_blobs=frozenset(),
 ):
-    """Decode every data blob into per-block shards (each worker spills one shard per block as
-    it is decoded). Returns ``(shard_paths, pool_ok)`` -- the flat list of shard paths and
-    whether the decode pool ran (so the collect phase can mirror it instead of re-attempting a
-    pool that could not start)."""
-    n = len(blobs)
-    per = (n + workers - 1) // workers
-    tasks = [
-        (i, blobs[i * per : (i + 1) * per])
-        for i in range(workers)
-        if blobs[i * per : (i + 1) * per]
-    ]
+    """Decode every data blob into shards (the blobs are split into size-balanced batches, see
+    :func:`_batch_blobs`, each spilling its decoded blocks as it goes). Returns
+    ``(shard_paths, pool_ok, summaries)`` -- the flat list of shard paths, whether the decode
+    pool ran (so the collect phase can mirror it instead of re-attempting a pool that could
+    not start) and, with ``summarize``, the blob-index summary of every decoded block in file
+    order (else ``None``). With ``prefilter`` a block holding none of the filter keys skips
+    its ways and relations, unless its offset is in ``member_way_blobs``."""
+    tasks = list(enumerate(_batch_blobs(blobs, workers)))
     init_args = (
         filepath,
         shard_dir,
@@ -102,52 +400,276 @@ def _decode_all(
         include_nodes,
         bbox_bounds,
         requested_tag_keys,
+        summarize,
+        prefilter,
+        member_way_blobs,
+        shards.compact_enabled(),
+        memory.shard_target_bytes(workers),
+        instrument.enabled(),
+    )
+    with stats.phase("decode") as phase:
+        results, pool_ok = _run_pool(
+            _decode_batch,
+            tasks,
+            workers,
+            _init_worker,
+            init_args,
+            _DECODE_FALLBACK_WARNING,
+        )
+        for _, _, counters in results:
+            instrument.replay(counters["events"])
+    shard_paths = [path for paths, _, _ in results for path in paths]
+    if phase is not None:
+        _count_decode(phase, blobs, workers if pool_ok else 1, shard_paths, results)
+    if not summarize:
+        return shard_paths, pool_ok, None
+    return shard_paths, pool_ok, [s for _, summaries, _ in results for s in summaries]
+
+
+def _count_decode(phase, blobs, workers, shard_paths, results):
+    """Add a decode's counters to its statistics ``phase`` (see :mod:`pyrosm.engine.stats`):
+    the blob and shard bytes, the workers' peak memory and the share of their time they
+    spent decoding."""
+    busy = sum(counters["seconds"] for _, _, counters in results)
+    worker_rss = [c["peak_rss"] for _, _, c in results if c["peak_rss"] is not None]
+    stats.count(
+        "decode",
+        bytes_read=sum(size for _, size in blobs),
+        bytes_inflated=sum(counters["bytes_inflated"] for _, _, counters in results),
+        shards=len(shard_paths),
+        shard_bytes=sum(os.path.getsize(path) for path in shard_paths),
+        worker_seconds=busy,
+    )
+    stats.peak("decode", workers=workers)
+    if worker_rss:
+        phase["peak_rss"] = max(phase["peak_rss"] or 0, *worker_rss)
+    capacity = phase["seconds"] * phase["workers"]
+    utilisation = phase["worker_seconds"] / capacity if capacity else 0.0
+    phase["worker_utilisation"] = min(1.0, utilisation)
+
+
+def _member_way_blobs(filepath, index, osm_key_bytes):
+    """Offsets of the data blobs whose ways may be members of a relation carrying one of the
+    filter keys. Those ways are kept in the all-ways store even when their block holds none of
+    the keys; the relation blobs (few, at the end of the file) are decoded here to find them.
+    """
+    relation_blobs = ((index.kinds & KIND_RELATIONS) != 0) & index.may_contain_keys(
+        osm_key_bytes
+    )
+    member_ids = [np.empty(0, np.int64)]
+    with open(filepath, "rb") as f:
+        for blob_type, offset, size in index.blobs(relation_blobs):
+            if blob_type != "OSMData":
+                continue
+            string_table, _, _, _, relations = decode_primitive_block(
+                _read_block(f, offset, size),
+                keep_metadata=False,
+                required_keys=osm_key_bytes,
+            )
+            member_ids.append(
+                _relation_member_way_ids(string_table, relations, osm_key_bytes)
+            )
+    wanted = index.may_contain_ids(KIND_WAYS, np.concatenate(member_ids))
+    return frozenset(index.offset[wanted].tolist())
+
+
+def _resolve_workers(filepath, workers, blobs=None):
+    """The decode worker count for a ``workers`` argument (``None`` -> 1, ``"auto"`` for the
+    data blobs ``blobs``, see :func:`_auto_workers`, or an explicit count capped at the CPU
+    cores), within the :func:`memory.worker_cap` of the read's budget."""
+    if workers is None:
+        return 1
+    cap = memory.worker_cap()
+    if isinstance(workers, str) and workers.lower() == "auto":
+        return min(_auto_workers(filepath, blobs), cap or os.cpu_count() or 1)
+    workers = _cap_workers(workers)
+    if cap is not None and workers > cap:
+        warnings.warn(
+            f"workers={workers} needs more memory than max_memory allows; reading with "
+            f"{cap} workers instead.",
+            UserWarning,
+            stacklevel=2,
+        )
+        return cap
+    return workers
+
+
+def _decode_to(
+    filepath,
+    shard_dir,
+    osm_key_bytes,
+    include_nodes,
+    workers,
+    bbox_bounds=None,
+    requested_tag_keys=None,
+):
+    """Index + parallel-decode ``filepath`` into shards under ``shard_dir``. Returns
+    ``(shard_paths, collect_workers)`` -- ``collect_workers`` is the worker count the collect
+    phase should use: the resolved decode worker count when the decode pool ran, otherwise 1
+    -- so after a decode fallback (unguarded entry point or a pool-forbidden environment) the
+    collect phase stays serial instead of re-attempting a pool that cannot start (and warning
+    a second time).
+
+    A saved blob index (see :mod:`pyrosm.engine.blob_index`) replaces the BlobHeader scan and
+    drops the relation-only blobs that carry none of the layer's filter keys (they contribute
+    nothing to the shards); the remaining blocks holding none of the keys decode only their
+    node coordinates (plus their ways, when those may be members of the layer's relations).
+    Without an index, every blob is decoded and summarised, and the index is saved for later
+    reads. ``osm_key_bytes=None`` decodes every tagged element."""
+    with stats.phase("index"):
+        index = load_index(filepath)
+        member_way_blobs = frozenset()
+        if index is None:
+            blobs = _index_blobs(filepath)
+        elif osm_key_bytes is None:
+            blobs = index.blobs()
+        else:
+            blobs = index.blobs(
+                ~(index.only(KIND_RELATIONS) & ~index.may_contain_keys(osm_key_bytes))
+            )
+            member_way_blobs = _member_way_blobs(filepath, index, osm_key_bytes)
+        data_blobs = [
+            (offset, size)
+            for (blob_type, offset, size) in blobs
+            if blob_type == "OSMData"
+        ]
+        stats.count(
+            "index", blobs=len(data_blobs), bytes=sum(size for _, size in data_blobs)
+        )
+    workers = _resolve_workers(filepath, workers, data_blobs)
+    shard_paths, pool_ok, summaries = _decode_all(
+        filepath,
+        data_blobs,
+        workers,
+        shard_dir,
+        osm_key_bytes,
+        include_nodes,
+        bbox_bounds,
+        requested_tag_keys,
+        summarize=index is None,
+        prefilter=index is not None and osm_key_bytes is not None,
+        member_way_blobs=member_way_blobs,
     )
-    results, pool_ok = _run_pool(
-        _decode_batch, tasks, workers, _init_worker, init_args, _DECODE_FALLBACK_WARNING
+    if summaries is not None:
+        save_index(filepath, BlobIndex.from_summaries(blobs, summaries))
+    return shard_paths, workers if pool_ok else 1
+
+
+def _decoded_shards(filepath, workers, bbox_bounds=None):
+    """The shards of a decode of every tagged element of ``filepath`` (within ``bbox_bounds``),
+    from the decoded-shard cache (see :mod:`pyrosm.engine.cache`), decoding them into it first
+    when missing. The shards are a superset of any layer's, so every reader can collect from
+    them. The directory is built under a temporary name and moved into place once complete, so
+    a concurrent read never sees a partial one. Returns ``(shard_paths, collect_workers)``.
+    """
+    final_dir = cache.decoded_path(
+        filepath, {"bbox_bounds": bbox_bounds, "shard_format": shards.FORMAT_VERSION}
+    )
+    manifest = final_dir / cache._DECODED_MANIFEST
+    if manifest.exists():
+        cache._record_hit([final_dir])
+        names = manifest.read_text().split()
+        return [final_dir / name for name in names], _resolve_workers(filepath, workers)
+    build_dir = Path(
+        tempfile.mkdtemp(prefix=final_dir.name + ".", dir=final_dir.parent)
     )
-    return [path for paths in results for path in paths], pool_ok
+    try:
+        shard_paths, collect_workers = _decode_to(
+            filepath, str(build_dir), None, True, workers, bbox_bounds
+        )
+        names = [Path(p).name for p in shard_paths]
+        (build_dir / cache._DECODED_MANIFEST).write_text("\n".join(names))
+        try:
+            os.replace(build_dir, final_dir)
+        except OSError:
+            # Another read finished the same directory first; use theirs.
+            if not (final_dir / cache._DECODED_MANIFEST).exists():
+                raise
+    finally:
+        shutil.rmtree(build_dir, ignore_errors=True)
+    cache._record_write([final_dir])
+    return [final_dir / name for name in names], collect_workers
 
 
-def _decode_and_run(
+def _shard_root(filepath):
+    """The directory to create the temp shard dir of a read of ``filepath`` in: shared memory
+    when the read's shards (at most ``_SHARD_EXPANSION`` times the file size) fit both the free
+    space there and ``_SHARED_MEMORY_FRACTION`` of the available memory (within the read's
+    ``max_memory`` budget and the container's memory limit, which shared memory counts
+    against; see :func:`calibration.available_memory`) -- the workers then write their shards
+    straight into shared memory and collect maps them from there, with no disk write and
+    read-back -- else ``None`` (the temp directory)."""
+    from pyrosm.engine import calibration
+
+    root = _SHARED_MEMORY_DIR
+    if root is None or not os.access(root, os.W_OK):
+        return None
+    available = memory.limit(calibration.available_memory())
+    if available is None:
+        return None
+    estimate = Path(filepath).stat().st_size * _SHARD_EXPANSION
+    try:
+        free = shutil.disk_usage(root).free
+    except OSError:
+        return None
+    if estimate > min(free, available * _SHARED_MEMORY_FRACTION):
+        return None
+    return root
+
+
+@contextmanager
+def _decoded(
     filepath,
     osm_key_bytes,
     include_nodes,
     workers,
-    run,
     bbox_bounds=None,
     requested_tag_keys=None,
+    decode_cache=False,
 ):
-    """Index + parallel-decode ``filepath`` into a temp shard dir, call
-    ``run(shard_paths, collect_workers)`` and clean up. The shared front half of every public
-    read. ``collect_workers`` is the worker count the collect phase should use: the resolved
-    decode worker count when the decode pool ran, otherwise 1 -- so after a decode fallback
-    (unguarded entry point or a pool-forbidden environment) the collect phase stays serial
-    instead of re-attempting a pool that cannot start (and warning a second time)."""
-    data_blobs = [
-        (offset, size)
-        for (blob_type, offset, size) in _index_blobs(filepath)
-        if blob_type == "OSMData"
-    ]
-    if workers is None:
-        workers = 1
-    elif isinstance(workers, str) and workers.lower() == "auto":
-        workers = _auto_workers(filepath, len(data_blobs))
-    else:
-        workers = _cap_workers(workers)
-    shard_dir = tempfile.mkdtemp(prefix="pyrosm_ooc_")
+    """Decode ``filepath`` into a temp shard dir (see :func:`_decode_to`; in shared memory when
+    it fits, see :func:`_shard_root`) and yield ``(shard_paths, collect_workers)``, removing
+    the shards on exit. With ``decode_cache`` the shards come from the persistent decoded-shard
+    cache instead (see :func:`_decoded_shards`) and are kept."""
+    if decode_cache:
+        yield _decoded_shards(filepath, workers, bbox_bounds)
+        return
+    shard_dir = tempfile.mkdtemp(prefix="pyrosm_ooc_", dir=_shard_root(filepath))
     try:
-        shard_paths, pool_ok = _decode_all(
+        yield _decode_to(
             filepath,
-            data_blobs,
-            workers,
             shard_dir,
             osm_key_bytes,
             include_nodes,
+            workers,
             bbox_bounds,
             requested_tag_keys,
         )
-        collect_workers = workers if pool_ok else 1
-        return run(shard_paths, collect_workers)
     finally:
         shutil.rmtree(shard_dir, ignore_errors=True)
+
+
+def _decode_and_run(
+    filepath,
+    osm_key_bytes,
+    include_nodes,
+    workers,
+    run,
+    bbox_bounds=None,
+    requested_tag_keys=None,
+    decode_cache=False,
+):
+    """Decode ``filepath`` (see :func:`_decoded`), call ``run(shard_paths, collect_workers)``
+    on the shards and clean up. The shared front half of every public read."""
+    with instrument.span("decode_and_run", workers=workers):
+        with _decoded(
+            filepath,
+            osm_key_bytes,
+            include_nodes,
+            workers,
+            bbox_bounds,
+            requested_tag_keys,
+            decode_cache,
+        ) as (shard_paths, collect_workers):
+            instrument.count(shards=len(shard_paths))
+            return run(shard_paths, collect_workers)
@@ -3,16 +3,22 @@ into per-worker shards selecting the layer's elements (and, for point layers, th
 nodes), then collects and assembles (or streams to GeoParquet) the requested layer. A
 ``bounding_box`` restricts the read to that area."""
 
+import os
 from pathlib import Path
 
 from rapidjson import dumps, loads
 
+from pyrosm import instrument
 from pyrosm.data_manager import parse_custom_filter
 from pyrosm.utils import _compat
-from pyrosm.engine.pool import _decode_and_run
+from pyrosm.engine.pool import _decode_and_run, _decoded
 from pyrosm.engine.bounding_box import _bbox_bounds, _normalize_bounding_box
-from pyrosm.engine.assemble import _assemble_layer, _assemble_network
-from pyrosm.engine import cache, geoparquet
+from pyrosm.engine.assemble import (
+    _assemble_layer,
+    _assemble_network,
+    _iter_layer_chunks,
+)
+from pyrosm.engine import cache, geoparquet, memory, stats
 
 # Tags the geometry assembly reads straight from an element's tag dict (not from the exploded
 # columns): ``relations.pyx`` consults ``type`` and ``area`` plus the linestring keys
@@ -32,13 +38,87 @@ _GEOMETRY_TAG_KEYS = (
 )
 
 
-def _get_layer(
+class _LayerRead:
+    """One layer of a read with its arguments resolved: what the decode must select for it
+    (the elements carrying any of ``osm_key_bytes``; with ``include_nodes``, the matching nodes
+    as point features; ``requested_tag_keys``, or every tag when ``None``) and how its result is
+    built from the decoded shards. ``assemble(shard_paths, collect_workers)`` returns the
+    in-memory result, ``write(shard_paths, path, collect_workers, spatial_index=False,
+    unheld=None, cached_read=None)`` writes it to ``path`` (Hilbert-sorted with
+    ``spatial_index``; filling a dict ``unheld`` with the elements passing its filter that it
+    holds no row of; as the result cache's layer of the read ``cached_read``) and returns
+    the path (``None`` when empty), ``chunks(shard_paths, chunk_size, collect_workers)``
+    yields it chunk by chunk (arrow tables with ``as_table=True``; ``None`` for a layer only
+    assembled as a whole, the network), and ``finish`` post-processes an in-memory result.
+    Kept apart from the decode so :func:`get_layers` can serve several layers from one pass.
+
+    ``narrowable`` marks a layer whose read can be answered from a broader cached layer, e.g.
+    the whole file's or one with a wider filter (see :func:`_read_from_broader_cache`).
+    """
+
+    def __init__(
+        self,
+        filepath,
+        osm_keys,
+        include_nodes,
+        bounding_box,
+        cache_params,
+        assemble,
+        write,
+        requested_tag_keys=None,
+        finish=None,
+        writes_directory=False,
+        narrowable=False,
+        chunks=None,
+    ):
+        self.filepath = filepath
+        self.osm_key_bytes = [k.encode("utf-8") for k in osm_keys]
+        self.include_nodes = include_nodes
+        self.bounding_box = bounding_box
+        self.cache_params = cache_params
+        self.assemble = assemble
+        self.write = write
+        self.requested_tag_keys = requested_tag_keys
+        self.finish = finish
+        self.writes_directory = writes_directory
+        self.narrowable = narrowable
+        self.chunks = chunks
+
+    def decode(self, workers, run, decode_cache=False):
+        """Decode the file for this layer alone (or, with ``decode_cache``, take the cached
+        decoded shards) and call ``run(shard_paths, collect_workers)`` on the shards (see
+        :func:`_decode_and_run`)."""
+        return _decode_and_run(
+            self.filepath,
+            self.osm_key_bytes,
+            self.include_nodes,
+            workers,
+            run,
+            bbox_bounds=_bbox_bounds(self.bounding_box),
+            requested_tag_keys=self.requested_tag_keys,
+            decode_cache=decode_cache,
+        )
+
+    def decoded(self, workers, decode_cache=False):
+        """Like :meth:`decode`, as a context manager yielding ``(shard_paths,
+        collect_workers)`` (see :func:`pyrosm.engine.pool._decoded`), so the shards can outlive
+        a single call -- e.g. while a generator consumes them."""
+        return _decoded(
+            self.filepath,
+            self.osm_key_bytes,
+            self.include_nodes,
+            workers,
+            bbox_bounds=_bbox_bounds(self.bounding_box),
+            requested_tag_keys=self.requested_tag_keys,
+            decode_cache=decode_cache,
+        )
+
+
+def _layer_read(
     filepath,
     custom_filter,
     filter_type,
     tags_as_columns,
-    workers,
-    output,
     keep_metadata,
     include_nodes=True,
     keep_ways=True,
@@ -48,30 +128,19 @@ def _get_layer(
     complete_relations=False,
     keep_other_tags=True,
 ):
-    """Read a layer: decode the file in parallel selecting the elements that carry any of
-    the filter keys (``osm_keys`` if given, else ``custom_filter``'s keys; and, when
-    ``include_nodes``, the matching nodes as point features), refine them by the exact value
-    filter (``filter_type`` keep/exclude), then assemble with the full ``tags_as_columns``
-    schema (every occurring tag as its own column, the rest in a JSON ``tags`` column, and
-    -- when ``keep_metadata`` -- the element metadata), matching the in-memory reader.
-    ``keep_ways`` / ``keep_relations`` drop those element kinds from the output. A
-    ``bounding_box`` restricts the read to that area (relations are partial unless
-    ``complete_relations``).
-
-    Returns an in-memory GeoDataFrame, or -- when ``output`` is a path -- streams the layer
-    to a chunked GeoParquet there and returns the path (needs the optional ``pyarrow``).
-    ``workers`` defaults to a single process; pass ``workers=N`` for N processes or
-    ``workers="auto"`` to choose automatically by file size (on macOS/Windows a parallel read
-    must run under an ``if __name__ == "__main__":`` guard, otherwise it falls back to one
-    process with a warning) -- see the package docstring.
-    """
-    if output is not None:
-        _compat.require_pyarrow()
+    """Resolve a layer read: the decode selects the elements that carry any of the filter
+    keys (``osm_keys`` if given, else ``custom_filter``'s keys; and, when ``include_nodes``,
+    the matching nodes as point features), the collect phase refines them by the exact value
+    filter (``filter_type`` keep/exclude), and the assembly builds the full
+    ``tags_as_columns`` schema (every occurring tag as its own column, the rest in a JSON
+    ``tags`` column, and -- when ``keep_metadata`` -- the element metadata), matching the
+    in-memory reader. ``keep_ways`` / ``keep_relations`` drop those element kinds from the
+    output. A ``bounding_box`` restricts the read to that area (relations are partial unless
+    ``complete_relations``)."""
     data_filter, derived_keys = parse_custom_filter(custom_filter)
     if osm_keys is None:
         osm_keys = derived_keys
     filter_spec = (osm_keys, data_filter, filter_type)
-    osm_key_bytes = [k.encode("utf-8") for k in osm_keys]
     # keep_other_tags=False: the workers resolve only the requested tag keys -- the output
     # columns (tags_as_columns) plus the filter keys (so the value filter still has what it
     # checks). None lets them resolve every tag (the default).
@@ -80,71 +149,34 @@ def _get_layer(
         wanted = list(tags_as_columns) + list(osm_keys) + list(_GEOMETRY_TAG_KEYS)
         requested_tag_keys = [k.encode("utf-8") for k in dict.fromkeys(wanted)]
     bounding_box = _normalize_bounding_box(bounding_box)
-    bounds = _bbox_bounds(bounding_box)
 
-    # Per-layer result cache: when returning an in-memory frame (not streaming to a user file)
-    # and pyarrow is available, assemble the layer once via the bounded per-call path, write its
-    # result to a deterministic GeoParquet keyed by the read, and reuse that file on any identical
-    # later read instead of re-decoding the PBF. Each layer is cached separately, so memory stays
-    # bounded by one layer. With pyarrow absent the engine returns the in-memory frame (no cache).
-    if output is None and _compat.HAS_PYARROW:
-        key_params = {
-            "filter_spec": filter_spec,
-            "tags_as_columns": tags_as_columns,
-            "keep_metadata": keep_metadata,
-            "include_nodes": include_nodes,
-            "keep_ways": keep_ways,
-            "keep_relations": keep_relations,
-            "bounding_box": bounding_box,
-            "complete_relations": complete_relations,
-            "keep_other_tags": keep_other_tags,
-        }
-        cache_path = cache.result_path(filepath, key_params)
-        return cache.materialize(
-            cache_path,
-            lambda tmp_path: _decode_and_run(
-                filepath,
-                osm_key_bytes,
-                include_nodes,
-                workers,
-                lambda shard_paths, collect_workers: geoparquet._stream_layer_to_parquet(
-                    shard_paths,
-                    tmp_path,
-                    geoparquet._OUTPUT_CHUNK_SIZE,
-                    tags_as_columns,
-                    keep_metadata,
-                    filter_spec,
-                    keep_ways,
-                    keep_relations,
-                    bounding_box,
-                    complete_relations,
-                    keep_other_tags=keep_other_tags,
-                    workers=collect_workers,
-                ),
-                bbox_bounds=bounds,
-                requested_tag_keys=requested_tag_keys,
-            )
-            is not None,
+    def assemble(shard_paths, collect_workers):
+        return _assemble_layer(
+            shard_paths,
+            tags_as_columns,
+            keep_metadata,
+            filter_spec,
+            keep_ways,
+            keep_relations,
+            bounding_box,
+            complete_relations,
+            keep_other_tags=keep_other_tags,
+            workers=collect_workers,
+            keep_nodes=include_nodes,
         )
 
-    def run(shard_paths, collect_workers):
-        if output is None:
-            return _assemble_layer(
-                shard_paths,
-                tags_as_columns,
-                keep_metadata,
-                filter_spec,
-                keep_ways,
-                keep_relations,
-                bounding_box,
-                complete_relations,
-                keep_other_tags=keep_other_tags,
-                workers=collect_workers,
-            )
+    def write(
+        shard_paths,
+        path,
+        collect_workers,
+        spatial_index=False,
+        unheld=None,
+        cached_read=None,
+    ):
         return geoparquet._stream_layer_to_parquet(
             shard_paths,
-            output,
-            geoparquet._OUTPUT_CHUNK_SIZE,
+            path,
+            memory.output_chunk_size(),
             tags_as_columns,
             keep_metadata,
             filter_spec,
@@ -154,19 +186,157 @@ def _get_layer(
             complete_relations,
             keep_other_tags=keep_other_tags,
             workers=collect_workers,
+            keep_nodes=include_nodes,
+            spatial_index=spatial_index,
+            unheld=unheld,
+            cached_read=cached_read,
         )
 
-    return _decode_and_run(
+    def chunks(shard_paths, chunk_size, collect_workers, as_table=False):
+        return _iter_layer_chunks(
+            shard_paths,
+            chunk_size,
+            tags_as_columns,
+            keep_metadata,
+            filter_spec,
+            keep_ways,
+            keep_relations,
+            bounding_box,
+            complete_relations,
+            keep_other_tags=keep_other_tags,
+            workers=collect_workers,
+            keep_nodes=include_nodes,
+            as_table=as_table,
+        )
+
+    cache_params = {
+        "filter_spec": filter_spec,
+        "tags_as_columns": tags_as_columns,
+        "keep_metadata": keep_metadata,
+        "include_nodes": include_nodes,
+        "keep_ways": keep_ways,
+        "keep_relations": keep_relations,
+        "bounding_box": bounding_box,
+        "complete_relations": complete_relations,
+        "keep_other_tags": keep_other_tags,
+    }
+    return _LayerRead(
         filepath,
-        osm_key_bytes,
+        osm_keys,
         include_nodes,
-        workers,
-        run,
-        bbox_bounds=bounds,
+        bounding_box,
+        cache_params,
+        assemble,
+        write,
         requested_tag_keys=requested_tag_keys,
+        narrowable=True,
+        chunks=chunks,
     )
 
 
+def _read_from_broader_cache(layer):
+    """Answer ``layer``'s read from a broader cached layer, if there is one: a read with the
+    same arguments but a wider filter, other tag columns, or -- for a ``bounding_box`` read --
+    the whole file (see :func:`pyrosm.engine.cache.covers`). Returns ``(True, result)``, or
+    ``(False, None)`` when no cached layer can answer the read exactly."""
+    if not layer.narrowable:
+        return False, None
+    if layer.bounding_box is not None:
+        # A whole-file read is empty, so is any box of it (whole-file reads do not depend on
+        # complete_relations, so either setting's marker serves).
+        for complete in (False, True):
+            whole = cache.result_path(
+                layer.filepath,
+                dict(
+                    layer.cache_params, bounding_box=None, complete_relations=complete
+                ),
+            )
+            empty_marker = whole.with_name(whole.name + ".empty")
+            if empty_marker.exists():
+                cache._record_hit([empty_marker])
+                return True, None
+    for path, cached_params in cache.covering_results(
+        layer.filepath, layer.cache_params
+    ):
+        gdf = cache.read_narrowed(path, cached_params, layer.cache_params)
+        if gdf is not None:
+            cache._record_hit([path])
+            return True, (gdf if len(gdf) > 0 else None)
+    return False, None
+
+
+def _get_layer(layer, workers, output, decode_cache=False, spatial_index=False):
+    """Read a resolved :class:`_LayerRead` on its own.
+
+    Returns an in-memory GeoDataFrame, or -- when ``output`` is a path -- streams the layer
+    to a chunked GeoParquet there and returns the path (needs the optional ``pyarrow``).
+    ``workers`` defaults to a single process; pass ``workers=N`` for N processes or
+    ``workers="auto"`` to choose automatically by file size (on macOS/Windows a parallel read
+    must run under an ``if __name__ == "__main__":`` guard, otherwise it falls back to one
+    process with a warning) -- see the package docstring.
+
+    ``decode_cache=True`` keeps the decoded file in the persistent decoded-shard cache (see
+    :mod:`pyrosm.engine.cache`): the first such read decodes every tagged element once, and any
+    later read of the file -- with any filter, tag columns or layer -- skips the decode and
+    goes straight to the collect phase.
+
+    ``spatial_index=True`` writes the ``output`` file for spatial reads: its rows sorted along
+    a Hilbert curve, with a GeoParquet 1.1 ``bbox`` covering column and small row groups, so a
+    reader filtering by a bounding box (GeoPandas ``bbox=``, DuckDB) skips most of the file
+    (see :mod:`pyrosm.engine.geoparquet`). Writing it takes longer; the result cache is written
+    this way regardless.
+    """
+    if output is not None:
+        _compat.require_pyarrow()
+        return layer.decode(
+            workers,
+            lambda shard_paths, collect_workers: layer.write(
+                shard_paths, output, collect_workers, spatial_index
+            ),
+            decode_cache,
+        )
+
+    # Per-layer result cache: when returning an in-memory frame (not streaming to a user file)
+    # and pyarrow is available, assemble the layer once via the bounded per-call path, write its
+    # result to a deterministic GeoParquet keyed by the read, and reuse that file on any identical
+    # later read instead of re-decoding the PBF. Each layer is cached separately, so memory stays
+    # bounded by one layer. With pyarrow absent the engine returns the in-memory frame (no cache).
+    # The cached files are indexed (spatially, and by the read that wrote them), so a read that
+    # a cached layer covers -- a bounding box of the whole file's layer, a narrower filter or
+    # other tag columns -- is answered from that file instead of decoding the PBF again.
+    if _compat.HAS_PYARROW:
+        cache_path = cache.result_path(layer.filepath, layer.cache_params)
+        empty_marker = cache_path.with_name(cache_path.name + ".empty")
+        if not (cache_path.exists() or empty_marker.exists()):
+            served, gdf = _read_from_broader_cache(layer)
+            if served:
+                return gdf
+
+        def build(tmp_path):
+            # A layer narrower reads can be served from keeps, beside it, the record of the
+            # elements passing its filter that it holds no row of (see cache.write_unheld).
+            unheld = {} if layer.narrowable else None
+            written = layer.decode(
+                workers,
+                lambda shard_paths, collect_workers: layer.write(
+                    shard_paths,
+                    tmp_path,
+                    collect_workers,
+                    unheld=unheld,
+                    cached_read=cache.read_key(layer.filepath, layer.cache_params),
+                ),
+                decode_cache,
+            )
+            if written is None:
+                return False
+            if unheld is not None:
+                cache.write_unheld(cache_path, unheld)
+            return True
+
+        return cache.materialize(cache_path, build)
+    return layer.decode(workers, layer.assemble, decode_cache)
+
+
 def _resolve_tags_as_columns(base_tags, extra_attributes, tags_to_keep):
     """Build the tag-as-columns list the way the in-memory feature methods do: ``tags_to_keep``
     replaces the layer default, ``extra_attributes`` appends (both validated)."""
@@ -193,6 +363,29 @@ def _ensure_layer_key(custom_filter, key):
     return ensure_filter_key(validate_custom_filter(custom_filter), key)
 
 
+def _buildings_layer(
+    filepath,
+    custom_filter=None,
+    extra_attributes=None,
+    tags_to_keep=None,
+    bounding_box=None,
+    complete_relations=False,
+    keep_metadata=True,
+):
+    from pyrosm.config import Conf
+
+    return _layer_read(
+        filepath,
+        _ensure_layer_key(custom_filter, "building"),
+        "keep",
+        _resolve_tags_as_columns(Conf.tags.building, extra_attributes, tags_to_keep),
+        keep_metadata,
+        include_nodes=False,
+        bounding_box=bounding_box,
+        complete_relations=complete_relations,
+    )
+
+
 def get_buildings(
     filepath,
     custom_filter=None,
@@ -203,23 +396,44 @@ def get_buildings(
     workers=None,
     output=None,
     keep_metadata=True,
+    decode_cache=False,
+    spatial_index=False,
 ):
     """Read building geometries (ways + relations) from ``filepath`` with the out-of-core
     engine, with the same columns as ``OSM(...).get_buildings()``. ``custom_filter`` refines
     which buildings to keep (the ``building`` key is always ensured); ``extra_attributes`` /
-    ``tags_to_keep`` adjust the tag columns. See :func:`_get_layer` for ``bounding_box`` /
-    ``complete_relations`` / ``output`` / ``workers`` / ``keep_metadata``."""
+    ``tags_to_keep`` adjust the tag columns. See :func:`_layer_read` / :func:`_get_layer` for
+    ``bounding_box`` / ``complete_relations`` / ``output`` / ``workers`` / ``keep_metadata`` /
+    ``decode_cache`` / ``spatial_index``."""
+    layer = _buildings_layer(
+        filepath,
+        custom_filter,
+        extra_attributes,
+        tags_to_keep,
+        bounding_box,
+        complete_relations,
+        keep_metadata,
+    )
+    return _get_layer(layer, workers, output, decode_cache, spatial_index)
+
+
+def _landuse_layer(
+    filepath,
+    custom_filter=None,
+    extra_attributes=None,
+    tags_to_keep=None,
+    bounding_box=None,
+    complete_relations=False,
+    keep_metadata=True,
+):
     from pyrosm.config import Conf
 
-    return _get_layer(
+    return _layer_read(
         filepath,
-        _ensure_layer_key(custom_filter, "building"),
+        _ensure_layer_key(custom_filter, "landuse"),
         "keep",
-        _resolve_tags_as_columns(Conf.tags.building, extra_attributes, tags_to_keep),
-        workers,
-        output,
+        _resolve_tags_as_columns(Conf.tags.landuse, extra_attributes, tags_to_keep),
         keep_metadata,
-        include_nodes=False,
         bounding_box=bounding_box,
         complete_relations=complete_relations,
     )
@@ -235,20 +449,41 @@ def get_landuse(
     workers=None,
     output=None,
     keep_metadata=True,
+    decode_cache=False,
+    spatial_index=False,
 ):
     """Read landuse geometries (ways + relations) from ``filepath`` with the out-of-core
     engine, with the same columns as ``OSM(...).get_landuse()``. ``custom_filter`` refines
     which landuse to keep (the ``landuse`` key is always ensured); ``extra_attributes`` /
     ``tags_to_keep`` adjust the tag columns. See :func:`_get_layer` for the others."""
+    layer = _landuse_layer(
+        filepath,
+        custom_filter,
+        extra_attributes,
+        tags_to_keep,
+        bounding_box,
+        complete_relations,
+        keep_metadata,
+    )
+    return _get_layer(layer, workers, output, decode_cache, spatial_index)
+
+
+def _natural_layer(
+    filepath,
+    custom_filter=None,
+    extra_attributes=None,
+    tags_to_keep=None,
+    bounding_box=None,
+    complete_relations=False,
+    keep_metadata=True,
+):
     from pyrosm.config import Conf
 
-    return _get_layer(
+    return _layer_read(
         filepath,
-        _ensure_layer_key(custom_filter, "landuse"),
+        _ensure_layer_key(custom_filter, "natural"),
         "keep",
-        _resolve_tags_as_columns(Conf.tags.landuse, extra_attributes, tags_to_keep),
-        workers,
-        output,
+        _resolve_tags_as_columns(Conf.tags.natural, extra_attributes, tags_to_keep),
         keep_metadata,
         bounding_box=bounding_box,
         complete_relations=complete_relations,
@@ -265,43 +500,35 @@ def get_natural(
     workers=None,
     output=None,
     keep_metadata=True,
+    decode_cache=False,
+    spatial_index=False,
 ):
     """Read natural features (nodes + ways + relations) from ``filepath`` with the
     out-of-core engine, with the same columns as ``OSM(...).get_natural()``. ``custom_filter``
     refines which natural features to keep (the ``natural`` key is always ensured);
     ``extra_attributes`` / ``tags_to_keep`` adjust the tag columns. See :func:`_get_layer` for
     the others."""
-    from pyrosm.config import Conf
-
-    return _get_layer(
+    layer = _natural_layer(
         filepath,
-        _ensure_layer_key(custom_filter, "natural"),
-        "keep",
-        _resolve_tags_as_columns(Conf.tags.natural, extra_attributes, tags_to_keep),
-        workers,
-        output,
+        custom_filter,
+        extra_attributes,
+        tags_to_keep,
+        bounding_box,
+        complete_relations,
         keep_metadata,
-        bounding_box=bounding_box,
-        complete_relations=complete_relations,
     )
+    return _get_layer(layer, workers, output, decode_cache, spatial_index)
 
 
-def get_pois(
+def _pois_layer(
     filepath,
     custom_filter=None,
     extra_attributes=None,
     tags_to_keep=None,
     bounding_box=None,
     complete_relations=False,
-    workers=None,
-    output=None,
     keep_metadata=True,
 ):
-    """Read points of interest (nodes + ways + relations) from ``filepath`` with the
-    out-of-core engine, with the same columns as ``OSM(...).get_pois(custom_filter=...)``.
-    ``custom_filter`` defaults to ``{"amenity": True, "shop": True, "tourism": True}``;
-    ``extra_attributes`` / ``tags_to_keep`` adjust the tag columns. See :func:`_get_layer` for
-    the other keyword arguments."""
     from pyrosm.config import Conf
     from pyrosm.utils import validate_custom_filter
 
@@ -314,23 +541,19 @@ def get_pois(
     base_tags = []
     for k in custom_filter.keys():
         base_tags += getattr(Conf.tags, k, list(Conf.tags._basic_tags))
-    return _get_layer(
+    return _layer_read(
         filepath,
         custom_filter,
         "keep",
         _resolve_tags_as_columns(base_tags, extra_attributes, tags_to_keep),
-        workers,
-        output,
         keep_metadata,
         bounding_box=bounding_box,
         complete_relations=complete_relations,
     )
 
 
-def get_boundaries(
+def get_pois(
     filepath,
-    boundary_type="administrative",
-    name=None,
     custom_filter=None,
     extra_attributes=None,
     tags_to_keep=None,
@@ -339,12 +562,51 @@ def get_boundaries(
     workers=None,
     output=None,
     keep_metadata=True,
+    decode_cache=False,
+    spatial_index=False,
+):
+    """Read points of interest (nodes + ways + relations) from ``filepath`` with the
+    out-of-core engine, with the same columns as ``OSM(...).get_pois(custom_filter=...)``.
+    ``custom_filter`` defaults to ``{"amenity": True, "shop": True, "tourism": True}``;
+    ``extra_attributes`` / ``tags_to_keep`` adjust the tag columns. See :func:`_get_layer` for
+    the other keyword arguments."""
+    layer = _pois_layer(
+        filepath,
+        custom_filter,
+        extra_attributes,
+        tags_to_keep,
+        bounding_box,
+        complete_relations,
+        keep_metadata,
+    )
+    return _get_layer(layer, workers, output, decode_cache, spatial_index)
+
+
+def _filter_by_name(gdf, name):
+    """The boundaries whose name contains ``name`` (substring match), as
+    OSM.get_boundaries filters them."""
+    if name is None or gdf is None:
+        return gdf
+    if "name" not in gdf.columns:
+        raise ValueError(
+            "Could not filter by name from given area. "
+            "Any of the OSM elements did not have a name tag."
+        )
+    gdf = gdf.dropna(subset=["name"])
+    return gdf.loc[gdf["name"].str.contains(name)].reset_index(drop=True).copy()
+
+
+def _boundaries_layer(
+    filepath,
+    boundary_type="administrative",
+    name=None,
+    custom_filter=None,
+    extra_attributes=None,
+    tags_to_keep=None,
+    bounding_box=None,
+    complete_relations=False,
+    keep_metadata=True,
 ):
-    """Read boundaries (ways + relations) from ``filepath`` with the out-of-core engine,
-    with the same columns as ``OSM(...).get_boundaries()``. ``boundary_type`` selects the
-    ``boundary=*`` value (``"all"`` for any); ``name`` keeps only boundaries whose name
-    contains that text; ``extra_attributes`` / ``tags_to_keep`` adjust the tag columns. See
-    :func:`_get_layer` for the other keyword arguments."""
     from pyrosm.config import Conf
     from pyrosm.utils import (
         validate_custom_filter,
@@ -353,12 +615,6 @@ def get_boundaries(
     )
 
     boundary_type = validate_boundary_type(boundary_type)
-    if name is not None and output is not None:
-        raise ValueError(
-            "get_boundaries(name=...) cannot be combined with output= -- the streamed "
-            "GeoParquet is written before the name filter is applied. Omit output= to "
-            "filter by name, or omit name to stream all boundaries."
-        )
     value = True if boundary_type == "all" else [boundary_type]
     if custom_filter is None:
         custom_filter = {"boundary": value}
@@ -366,32 +622,67 @@ def get_boundaries(
     # the "boundary" key is present (an OR term) so boundaries are always included.
     custom_filter = validate_custom_filter(custom_filter)
     custom_filter = ensure_filter_key(custom_filter, "boundary")
-    gdf = _get_layer(
+    layer = _layer_read(
         filepath,
         custom_filter,
         "keep",
         _resolve_tags_as_columns(Conf.tags.boundary, extra_attributes, tags_to_keep),
-        workers,
-        output,
         keep_metadata,
         include_nodes=False,
         bounding_box=bounding_box,
         complete_relations=complete_relations,
     )
-    # Name post-filter (substring match), as OSM.get_boundaries does. The output= + name
-    # combination is rejected above, so reaching here means an in-memory frame.
-    if name is not None and gdf is not None:
-        if "name" not in gdf.columns:
-            raise ValueError(
-                "Could not filter by name from given area. "
-                "Any of the OSM elements did not have a name tag."
-            )
-        gdf = gdf.dropna(subset=["name"])
-        gdf = gdf.loc[gdf["name"].str.contains(name)].reset_index(drop=True).copy()
+    if name is not None:
+        layer.finish = lambda gdf: _filter_by_name(gdf, name)
+    return layer
+
+
+def get_boundaries(
+    filepath,
+    boundary_type="administrative",
+    name=None,
+    custom_filter=None,
+    extra_attributes=None,
+    tags_to_keep=None,
+    bounding_box=None,
+    complete_relations=False,
+    workers=None,
+    output=None,
+    keep_metadata=True,
+    decode_cache=False,
+    spatial_index=False,
+):
+    """Read boundaries (ways + relations) from ``filepath`` with the out-of-core engine,
+    with the same columns as ``OSM(...).get_boundaries()``. ``boundary_type`` selects the
+    ``boundary=*`` value (``"all"`` for any); ``name`` keeps only boundaries whose name
+    contains that text; ``extra_attributes`` / ``tags_to_keep`` adjust the tag columns. See
+    :func:`_get_layer` for the other keyword arguments."""
+    layer = _boundaries_layer(
+        filepath,
+        boundary_type,
+        name,
+        custom_filter,
+        extra_attributes,
+        tags_to_keep,
+        bounding_box,
+        complete_relations,
+        keep_metadata,
+    )
+    if name is not None and output is not None:
+        raise ValueError(
+            "get_boundaries(name=...) cannot be combined with output= -- the streamed "
+            "GeoParquet is written before the name filter is applied. Omit output= to "
+            "filter by name, or omit name to stream all boundaries."
+        )
+    gdf = _get_layer(layer, workers, output, decode_cache, spatial_index)
+    # Name post-filter. The output= + name combination is rejected above, so reaching here
+    # with a name means an in-memory frame.
+    if layer.finish is not None:
+        gdf = layer.finish(gdf)
     return gdf
 
 
-def get_data_by_custom_criteria(
+def _data_by_custom_criteria_layer(
     filepath,
     custom_filter,
     osm_keys_to_keep=None,
@@ -403,19 +694,9 @@ def get_data_by_custom_criteria(
     extra_attributes=None,
     bounding_box=None,
     complete_relations=False,
-    workers=None,
-    output=None,
     keep_metadata=True,
     keep_other_tags=True,
 ):
-    """Read OSM elements matching an arbitrary ``custom_filter`` from ``filepath`` with the
-    out-of-core engine, with the same columns as
-    ``OSM(...).get_data_by_custom_criteria(...)``. ``osm_keys_to_keep`` (if given) is the
-    set of keys filtered on; ``keep_nodes`` / ``keep_ways`` / ``keep_relations`` select
-    which element kinds are returned; ``extra_attributes`` adds further tag columns.
-    ``keep_other_tags=False`` resolves only the requested tags (``tags_as_columns`` plus the
-    filter keys) and drops the JSON ``tags`` column of leftovers, so the read does minimal
-    tag work. See :func:`_get_layer` for the other keyword arguments."""
     from pyrosm.config import Conf
     from pyrosm.utils import (
         validate_custom_filter,
@@ -443,13 +724,11 @@ def get_data_by_custom_criteria(
     if extra_attributes is not None:
         validate_tags_as_columns(extra_attributes)
         tags_as_columns = list(tags_as_columns) + list(extra_attributes)
-    return _get_layer(
+    return _layer_read(
         filepath,
         custom_filter,
         filter_type,
         tags_as_columns,
-        workers,
-        output,
         keep_metadata,
         include_nodes=keep_nodes,
         keep_ways=keep_ways,
@@ -461,6 +740,51 @@ def get_data_by_custom_criteria(
     )
 
 
+def get_data_by_custom_criteria(
+    filepath,
+    custom_filter,
+    osm_keys_to_keep=None,
+    filter_type="keep",
+    tags_as_columns=None,
+    keep_nodes=True,
+    keep_ways=True,
+    keep_relations=True,
+    extra_attributes=None,
+    bounding_box=None,
+    complete_relations=False,
+    workers=None,
+    output=None,
+    keep_metadata=True,
+    keep_other_tags=True,
+    decode_cache=False,
+    spatial_index=False,
+):
+    """Read OSM elements matching an arbitrary ``custom_filter`` from ``filepath`` with the
+    out-of-core engine, with the same columns as
+    ``OSM(...).get_data_by_custom_criteria(...)``. ``osm_keys_to_keep`` (if given) is the
+    set of keys filtered on; ``keep_nodes`` / ``keep_ways`` / ``keep_relations`` select
+    which element kinds are returned; ``extra_attributes`` adds further tag columns.
+    ``keep_other_tags=False`` resolves only the requested tags (``tags_as_columns`` plus the
+    filter keys) and drops the JSON ``tags`` column of leftovers, so the read does minimal
+    tag work. See :func:`_get_layer` for the other keyword arguments."""
+    layer = _data_by_custom_criteria_layer(
+        filepath,
+        custom_filter,
+        osm_keys_to_keep,
+        filter_type,
+        tags_as_columns,
+        keep_nodes,
+        keep_ways,
+        keep_relations,
+        extra_attributes,
+        bounding_box,
+        complete_relations,
+        keep_metadata,
+        keep_other_tags,
+    )
+    return _get_layer(layer, workers, output, decode_cache, spatial_index)
+
+
 def _network_filter(network_type):
     """Resolve a predefined ``network_type`` to its filter dict (or ``None`` for the
     unrestricted ``all`` / ``driving_psv``), mirroring ``OSM._get_network_filter``."""
@@ -484,25 +808,36 @@ def _network_filter(network_type):
     return None  # "all" and "driving_psv" -> every highway
 
 
-def _write_parquet(gdf, path):
-    """Write an assembled frame to ``path`` (a result-cache temp file or an ``output=`` path);
-    a ``None`` (empty read) writes nothing and reports the empty result."""
+@stats.phase("cache_write")
+def _write_parquet(gdf, path, spatial_index=False):
+    """Write an assembled frame to ``path`` (a result-cache temp file or an ``output=`` path,
+    Hilbert-sorted with ``spatial_index``); a ``None`` (empty read) writes nothing and reports
+    the empty result."""
     if gdf is None:
         return False
-    gdf.to_parquet(path)
+    if spatial_index:
+        geoparquet._write_spatially_sorted_frame(gdf, path)
+    else:
+        gdf.to_parquet(path)
+    stats.count("cache_write", bytes_written=os.path.getsize(path))
     return True
 
 
-def _write_nodes_parquet(node_gdf, path):
-    """Write the graph-export node frame to ``path``, serialising its ``tags`` dict column to
-    JSON strings first -- a column of heterogeneous dicts has no faithful GeoParquet schema
-    (pyarrow infers a struct and drops keys), whereas JSON strings round-trip exactly.
+def _write_nodes_parquet(node_gdf, path, spatial_index=False):
+    """Write the graph-export node frame to ``path`` (Hilbert-sorted with ``spatial_index``),
+    serialising its ``tags`` dict column to JSON strings first -- a column of heterogeneous
+    dicts has no faithful GeoParquet schema (pyarrow infers a struct and drops keys), whereas
+    JSON strings round-trip exactly.
     """
     node_gdf = node_gdf.copy()
     node_gdf["tags"] = node_gdf["tags"].map(
         lambda t: dumps(t) if isinstance(t, dict) else None
     )
-    node_gdf.to_parquet(path)
+    if spatial_index:
+        geoparquet._write_spatially_sorted_frame(node_gdf, path)
+    else:
+        node_gdf.to_parquet(path)
+    stats.count("cache_write", bytes_written=os.path.getsize(path))
 
 
 def _read_nodes_parquet(path):
@@ -514,6 +849,7 @@ def _read_nodes_parquet(path):
     return gdf
 
 
+@stats.phase("cache_write")
 def _write_network_pair(result, edges_path, nodes_path):
     """Write ``get_network(nodes=True)``'s ``(nodes, edges)`` tuple to the two cache files; a
     ``(None, None)`` (empty read) writes nothing and reports the empty result."""
@@ -521,25 +857,32 @@ def _write_network_pair(result, edges_path, nodes_path):
     if edges is None:
         return False
     edges.to_parquet(edges_path)
+    stats.count("cache_write", bytes_written=os.path.getsize(edges_path))
     _write_nodes_parquet(node_gdf, nodes_path)
     return True
 
 
-def _write_network_dir(result, dirpath):
+@stats.phase("cache_write")
+def _write_network_dir(result, dirpath, spatial_index=False):
     """Write ``get_network(nodes=True, output=dirpath)``'s ``(nodes, edges)`` tuple into
-    ``dirpath`` as ``edges.parquet`` + ``nodes.parquet`` and return ``dirpath``; an empty read
-    writes nothing and returns ``None``."""
+    ``dirpath`` as ``edges.parquet`` + ``nodes.parquet`` (Hilbert-sorted with
+    ``spatial_index``) and return ``dirpath``; an empty read writes nothing and returns
+    ``None``."""
     node_gdf, edges = result
     if edges is None:
         return None
     out = Path(dirpath)
     out.mkdir(parents=True, exist_ok=True)
-    edges.to_parquet(out / "edges.parquet")
-    _write_nodes_parquet(node_gdf, out / "nodes.parquet")
+    if spatial_index:
+        geoparquet._write_spatially_sorted_frame(edges, out / "edges.parquet")
+    else:
+        edges.to_parquet(out / "edges.parquet")
+    stats.count("cache_write", bytes_written=os.path.getsize(out / "edges.parquet"))
+    _write_nodes_parquet(node_gdf, out / "nodes.parquet", spatial_index)
     return dirpath
 
 
-def get_network(
+def _network_layer(
     filepath,
     network_type="walking",
     extra_attributes=None,
@@ -548,29 +891,8 @@ def get_network(
     filter_type=None,
     tags_to_keep=None,
     bounding_box=None,
-    workers=None,
-    output=None,
     keep_metadata=True,
 ):
-    """Read a street network (``highway=*`` ways as LineString edges + a ``length`` column)
-    from ``filepath`` with the out-of-core engine, with the same columns as
-    ``OSM(...).get_network()``. ``network_type`` selects a predefined filter (``walking`` /
-    ``driving`` / ``cycling`` / ``all`` / ...); a ``custom_filter`` replaces it
-    (``filter_type`` keep/exclude). ``extra_attributes`` / ``tags_to_keep`` adjust the tag
-    columns. ``bounding_box`` (a ``[minx, miny, maxx, maxy]`` list or a shapely polygon)
-    restricts the read to that area.
-
-    ``nodes=True`` returns ``(nodes, edges)``: the ways are sliced into per-segment edges
-    and the graph-export node frame is built (its node tags + metadata are gathered with a
-    second pass over the file), matching ``OSM(...).get_network(nodes=True)``.
-
-    With ``output=None`` (default) the result is cached to a deterministic GeoParquet under a
-    temp dir and reused on identical later reads, like the area/point layers; ``nodes=True``
-    caches the ``(nodes, edges)`` tuple as two files. ``output="path"`` writes the edges to that
-    GeoParquet and returns the path; with ``nodes=True`` it writes ``edges.parquet`` +
-    ``nodes.parquet`` into the ``path`` directory and returns the directory (both require
-    ``pyarrow``). With ``pyarrow`` absent the default read returns the in-memory result with no
-    cache."""
     from pyrosm.config import Conf
     from pyrosm.utils import validate_custom_filter, validate_tags_as_columns
     from pyrosm.filter_compiler import CompiledFilter
@@ -614,10 +936,6 @@ def get_network(
     )
     filter_spec = (network_keys, data_filter, filter_type)
     bounding_box = _normalize_bounding_box(bounding_box)
-    bounds = _bbox_bounds(bounding_box)
-
-    if output is not None:
-        _compat.require_pyarrow()
 
     def assemble(shard_paths, collect_workers):
         edges, node_gdf = _assemble_network(
@@ -632,19 +950,95 @@ def get_network(
         )
         return (node_gdf, edges) if nodes else edges
 
-    decode_keys = [k.encode("utf-8") for k in network_keys]
+    # The edges go to a GeoParquet file (nodes=False), or edges.parquet + nodes.parquet into a
+    # directory (nodes=True).
+    def write(shard_paths, path, collect_workers, spatial_index=False):
+        result = assemble(shard_paths, collect_workers)
+        if nodes:
+            return _write_network_dir(result, path, spatial_index)
+        return path if _write_parquet(result, path, spatial_index) else None
+
+    cache_params = {
+        "network": True,
+        "nodes": nodes,
+        "filter_spec": filter_spec,
+        "tags_as_columns": tags_as_columns,
+        "keep_metadata": keep_metadata,
+        "bounding_box": bounding_box,
+    }
+    return _LayerRead(
+        filepath,
+        network_keys,
+        False,
+        bounding_box,
+        cache_params,
+        assemble,
+        write,
+        writes_directory=nodes,
+    )
+
+
+def get_network(
+    filepath,
+    network_type="walking",
+    extra_attributes=None,
+    nodes=False,
+    custom_filter=None,
+    filter_type=None,
+    tags_to_keep=None,
+    bounding_box=None,
+    workers=None,
+    output=None,
+    keep_metadata=True,
+    decode_cache=False,
+    spatial_index=False,
+):
+    """Read a street network (``highway=*`` ways as LineString edges + a ``length`` column)
+    from ``filepath`` with the out-of-core engine, with the same columns as
+    ``OSM(...).get_network()``. ``network_type`` selects a predefined filter (``walking`` /
+    ``driving`` / ``cycling`` / ``all`` / ...); a ``custom_filter`` replaces it
+    (``filter_type`` keep/exclude). ``extra_attributes`` / ``tags_to_keep`` adjust the tag
+    columns. ``bounding_box`` (a ``[minx, miny, maxx, maxy]`` list or a shapely polygon)
+    restricts the read to that area.
+
+    ``nodes=True`` returns ``(nodes, edges)``: the ways are sliced into per-segment edges
+    and the graph-export node frame is built (its node tags + metadata are gathered with a
+    second pass over the file), matching ``OSM(...).get_network(nodes=True)``.
+
+    With ``output=None`` (default) the result is cached to a deterministic GeoParquet under a
+    temp dir and reused on identical later reads, like the area/point layers; ``nodes=True``
+    caches the ``(nodes, edges)`` tuple as two files. ``output="path"`` writes the edges to that
+    GeoParquet and returns the path; with ``nodes=True`` it writes ``edges.parquet`` +
+    ``nodes.parquet`` into the ``path`` directory and returns the directory (both require
+    ``pyarrow``); ``spatial_index=True`` writes them Hilbert-sorted with a ``bbox`` covering
+    column (see :func:`_get_layer`). With ``pyarrow`` absent the default read returns the
+    in-memory result with no cache."""
+    layer = _network_layer(
+        filepath,
+        network_type,
+        extra_attributes,
+        nodes,
+        custom_filter,
+        filter_type,
+        tags_to_keep,
+        bounding_box,
+        keep_metadata,
+    )
 
     def decode():
-        return _decode_and_run(
-            filepath, decode_keys, False, workers, assemble, bbox_bounds=bounds
-        )
+        return layer.decode(workers, layer.assemble, decode_cache)
 
     # A user-supplied output writes the result there and returns it: a GeoParquet file for the
     # edges (nodes=False), or a directory holding edges.parquet + nodes.parquet (nodes=True).
     if output is not None:
-        if nodes:
-            return _write_network_dir(decode(), output)
-        return output if _write_parquet(decode(), output) else None
+        _compat.require_pyarrow()
+        return layer.decode(
+            workers,
+            lambda shard_paths, collect_workers: layer.write(
+                shard_paths, output, collect_workers, spatial_index
+            ),
+            decode_cache,
+        )
 
     # With pyarrow absent there is nowhere to cache, so return the direct in-memory result (the
     # edges frame, or the (nodes, edges) tuple for nodes=True).
@@ -653,14 +1047,7 @@ def get_network(
 
     # Cache the result to / serve it from a per-read GeoParquet, keyed apart from the area/point
     # layers via "network". nodes=True is a (nodes, edges) tuple, cached as two files.
-    key_params = {
-        "network": True,
-        "nodes": nodes,
-        "filter_spec": filter_spec,
-        "tags_as_columns": tags_as_columns,
-        "keep_metadata": keep_metadata,
-        "bounding_box": bounding_box,
-    }
+    key_params = layer.cache_params
     if nodes:
         edges_path = cache.result_path(filepath, {**key_params, "part": "edges"})
         nodes_path = cache.result_path(filepath, {**key_params, "part": "nodes"})
@@ -675,3 +1062,207 @@ def get_network(
     return cache.materialize(
         cache_path, lambda tmp_path: _write_parquet(decode(), tmp_path)
     )
+
+
+# The layers get_layers can read, by the name of their reader without the ``get_`` prefix.
+_LAYER_READS = {
+    "network": _network_layer,
+    "buildings": _buildings_layer,
+    "landuse": _landuse_layer,
+    "natural": _natural_layer,
+    "pois": _pois_layer,
+    "boundaries": _boundaries_layer,
+    "data_by_custom_criteria": _data_by_custom_criteria_layer,
+}
+
+# Arguments every layer of a get_layers read shares (the decode is shared).
+_SHARED_LAYER_ARGS = (
+    "bounding_box",
+    "workers",
+    "output",
+    "decode_cache",
+    "spatial_index",
+)
+
+
+def get_layers(
+    filepath,
+    layers,
+    bounding_box=None,
+    complete_relations=False,
+    workers=None,
+    output=None,
+    keep_metadata=True,
+    decode_cache=False,
+    spatial_index=False,
+):
+    """Read several layers from ``filepath`` with a single decode of the file. The blobs are
+    decoded once selecting the union of the layers' filter keys, and each layer is then
+    collected and assembled from the shared shards, so e.g. the network, buildings and POIs of
+    a region cost one pass over the file instead of three.
+
+    ``layers`` names the layers by their reader without the ``get_`` prefix (``"network"``,
+    ``"buildings"``, ``"landuse"``, ``"natural"``, ``"pois"``, ``"boundaries"``,
+    ``"data_by_custom_criteria"``), either as a list or as a dict mapping each name to the
+    keyword arguments of its reader -- e.g. ``{"network": {"network_type": "driving"},
+    "pois": {"custom_filter": {"amenity": True}}}``. ``bounding_box``, ``workers``, ``output``,
+    ``decode_cache`` and ``spatial_index`` apply to every layer; ``complete_relations`` and
+    ``keep_metadata`` are defaults a layer's own arguments override.
+
+    Returns a dict of the layers' results (as their readers return them; ``None`` for an
+    empty layer). With ``output`` a directory path, each layer is instead written there as
+    ``<name>.parquet`` (the ``nodes=True`` network as a ``network`` directory holding
+    ``edges.parquet`` + ``nodes.parquet``) and the dict holds the paths written (needs the
+    optional ``pyarrow``). The per-layer result cache of the single-layer readers is not used;
+    ``decode_cache`` takes the shards from the decoded-shard cache (see :func:`_get_layer`).
+    """
+    if isinstance(layers, str):
+        layers = [layers]
+    if not isinstance(layers, dict):
+        layers = {name: {} for name in layers}
+    if len(layers) == 0:
+        raise ValueError("'layers' should name at least one layer.")
+
+    reads = {}
+    for name, kwargs in layers.items():
+        if name not in _LAYER_READS:
+            raise ValueError(
+                "Unknown layer %r; 'layers' should name any of: %s."
+                % (name, ", ".join(_LAYER_READS))
+            )
+        kwargs = dict(kwargs or {})
+        for arg in _SHARED_LAYER_ARGS:
+            if arg in kwargs:
+                raise ValueError(
+                    "'%s' is shared by all layers of a get_layers read; pass it to "
+                    "get_layers instead of the %r layer." % (arg, name)
+                )
+        kwargs.setdefault("keep_metadata", keep_metadata)
+        if name != "network":
+            kwargs.setdefault("complete_relations", complete_relations)
+        reads[name] = _LAYER_READS[name](filepath, bounding_box=bounding_box, **kwargs)
+
+    out_dir = None
+    if output is not None:
+        _compat.require_pyarrow()
+        for name, layer in reads.items():
+            if layer.finish is not None:
+                raise ValueError(
+                    "The %r layer filters by name=, which cannot be combined with "
+                    "output= -- its GeoParquet is written before the name filter is "
+                    "applied." % name
+                )
+        out_dir = Path(output)
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+    # One decode serves every layer: the union of their filter keys (each layer's collect phase
+    # re-applies its own filter to the shared shards), their point nodes when any layer emits
+    # them, and every tag unless each layer asks only for specific ones.
+    osm_key_bytes = list(
+        dict.fromkeys(k for layer in reads.values() for k in layer.osm_key_bytes)
+    )
+    include_nodes = any(layer.include_nodes for layer in reads.values())
+    requested_tag_keys = None
+    if all(layer.requested_tag_keys is not None for layer in reads.values()):
+        requested_tag_keys = list(
+            dict.fromkeys(
+                k for layer in reads.values() for k in layer.requested_tag_keys
+            )
+        )
+
+    def run(shard_paths, collect_workers):
+        results = {}
+        for name, layer in reads.items():
+            if out_dir is None:
+                result = layer.assemble(shard_paths, collect_workers)
+                if layer.finish is not None:
+                    result = layer.finish(result)
+            else:
+                path = out_dir / (name if layer.writes_directory else name + ".parquet")
+                result = layer.write(
+                    shard_paths, str(path), collect_workers, spatial_index
+                )
+            results[name] = result
+        return results
+
+    return _decode_and_run(
+        filepath,
+        osm_key_bytes,
+        include_nodes,
+        workers,
+        run,
+        bbox_bounds=_bbox_bounds(_normalize_bounding_box(bounding_box)),
+        requested_tag_keys=requested_tag_keys,
+        decode_cache=decode_cache,
+    )
+
+
+def iter_layer(
+    filepath,
+    layer,
+    chunk_size=None,
+    as_arrow=False,
+    bounding_box=None,
+    complete_relations=False,
+    workers=None,
+    keep_metadata=True,
+    decode_cache=False,
+    **kwargs,
+):
+    """Read a layer from ``filepath`` as a stream of chunks instead of one frame: a generator
+    yielding each chunk's GeoDataFrame -- or, with ``as_arrow=True``, its
+    ``pyarrow.RecordBatch`` (WKB geometry, needs the optional ``pyarrow``) -- as soon as it is
+    assembled, so a consumer (e.g. a database loader) can start before the whole layer exists
+    and memory stays bounded by one chunk. The chunks are the point nodes, then the standalone
+    ways ``chunk_size`` at a time (default 250 000, fewer within a ``max_memory`` budget), then
+    the relations in batches of ``chunk_size`` member ways; together they hold the rows of the
+    layer's ``get_<layer>`` read, but each chunk carries only the tag columns occurring in it,
+    so the columns can differ between chunks.
+
+    ``layer`` names the layer like :func:`get_layers` (any but ``"network"``, which is only
+    assembled as a whole), and ``kwargs`` are the other keyword arguments of its reader (``name``
+    of ``"boundaries"`` excepted). The decoded shards are removed once the generator is
+    exhausted or closed; the per-layer result cache is not used."""
+    if layer not in _LAYER_READS:
+        raise ValueError(
+            "Unknown layer %r; 'layer' should be any of: %s."
+            % (layer, ", ".join(_LAYER_READS))
+        )
+    if layer == "network":
+        raise ValueError(
+            "The network is assembled as a whole and cannot be read in chunks; use "
+            "get_network instead."
+        )
+    from pyrosm.utils import validate_chunk_size
+
+    chunk_size = validate_chunk_size(chunk_size) or memory.output_chunk_size()
+    if as_arrow:
+        _compat.require_pyarrow()
+    read = _LAYER_READS[layer](
+        filepath,
+        bounding_box=bounding_box,
+        complete_relations=complete_relations,
+        keep_metadata=keep_metadata,
+        **kwargs,
+    )
+    if read.finish is not None:
+        raise ValueError(
+            "The %r layer filters by name=, which cannot be combined with iter_layer -- "
+            "the name filter applies to the whole layer." % layer
+        )
+    return instrument.isolated_iter(
+        _iter_chunks(read, chunk_size, as_arrow, workers, decode_cache)
+    )
+
+
+def _iter_chunks(layer, chunk_size, as_arrow, workers, decode_cache):
+    # The read is one decode_and_run span, like a get_<layer> read's, open while the chunks
+    # are consumed (isolated_iter keeps it out of the consumer's spans).
+    with instrument.span("decode_and_run", workers=workers):
+        with layer.decoded(workers, decode_cache) as (shard_paths, collect_workers):
+            instrument.count(shards=len(shard_paths))
+            chunks = layer.chunks(
+                shard_paths, chunk_size, collect_workers, as_table=as_arrow
+            )
+            for chunk in chunks:
+                yield geoparquet._record_batch(chunk) if as_arrow else chunk
@@ -0,0 +1,387 @@
+"""On-disk format of the decoded shards.
+
+A worker spills each shard as an Arrow IPC file: a one-row table whose columns each hold one
+of the shard's arrays as a list value, so a shard of arrays of different lengths is one file
+that collect memory-maps and reads without copying. The numeric arrays (node coordinates,
+ids, metadata) come back as read-only numpy views of the mapped file; the way node refs are
+stored list-typed (their offsets are the ``*_off`` CSR arrays) and the relation member roles
+dictionary-encoded. The tag dicts are stored as int32 key/value indices into a string table of
+the shard (its ``tag_strings`` column), each element's indices one list value: collect rebuilds
+the dicts from the table's strings, so a shard -- one read back from the shared cache directory
+included -- is never unpickled.
+
+Shards take 24 bytes per node for its id and coordinates, so a large extract spills a lot of
+temp data. With the compact encoding -- :func:`configure` ``(compact=True)`` or the
+``PYROSM_COMPACT_SHARDS`` environment variable -- the ids, node refs and CSR offsets are stored
+as varint-coded deltas (mostly one or two bytes each) and the coordinates as int32 multiples of
+1e-7 degrees, the default PBF granularity. The encoding is lossless: a coordinate that would
+not round-trip exactly keeps its float64 column. Each encoded column records its encoding in
+the field metadata, so a shard is read back the same way whichever setting wrote it.
+
+Without the optional pyarrow, shards are written with ``np.savez`` instead (the tags in the
+same string-table form, the other strings as unicode arrays, so the file loads without
+pickle). Either format is read back by :func:`load_shard` through the same ``shard["key"]``
+interface.
+"""
+
+import os
+
+import numpy as np
+
+from pyrosm.utils import _compat
+
+ARROW_SUFFIX = ".arrow"
+NPZ_SUFFIX = ".npz"
+COMPACT_ENV = "PYROSM_COMPACT_SHARDS"
+# Version of the shard layout, part of the key of the decoded-shard cache: a cached shard of an
+# older layout is decoded again rather than read.
+FORMAT_VERSION = 2
+
+# Set by :func:`configure`; ``None`` falls back to the environment, then the default.
+_settings = {"compact": None}
+
+# Each list-typed array and the CSR offsets array its list offsets are stored as.
+_LIST_OFFSETS = {"refs": "refs_off", "all_refs": "all_refs_off"}
+# The object arrays of tag dicts (string-table indices) and of strings (dictionary-encoded).
+_TAGS = ("nfeat_tags", "way_tags", "rel_tags")
+_DICTIONARY = ("rel_memrole",)
+# The shard's string table of tag keys and values, and the suffixes of the CSR offsets and the
+# mask of the untagged (``None``) elements of a tag array in an ``.npz`` shard.
+_TAG_STRINGS = "tag_strings"
+_NPZ_TAG_OFFSETS = "__off"
+_NPZ_TAG_MISSING = "__none"
+
+# The arrays the compact encoding stores as varint zigzag deltas (ids and node refs) and as int32
+# fixed-point coordinates, in units of 1 / _FIXED_POINT_SCALE degrees.
+_DELTA_CODED = (
+    "node_id",
+    "in_box_id",
+    "nfeat_id",
+    "way_id",
+    "refs",
+    "refs_off",
+    "all_id",
+    "all_refs",
+    "all_refs_off",
+)
+_FIXED_POINT = ("node_lon", "node_lat", "nfeat_lon", "nfeat_lat")
+_FIXED_POINT_SCALE = 10**7
+
+
+def configure(compact=None):
+    """Set whether this process writes compact shards (see the module docstring).
+    ``compact=None`` restores the default (``PYROSM_COMPACT_SHARDS``, else off)."""
+    if compact is not None and not isinstance(compact, bool):
+        raise ValueError("'compact' should be True, False or None.")
+    _settings["compact"] = compact
+
+
+def compact_enabled():
+    """Whether new shards use the compact encoding: the :func:`configure`-d setting, else
+    ``PYROSM_COMPACT_SHARDS`` (``1``/``true``/``yes``), else False."""
+    if _settings["compact"] is not None:
+        return _settings["compact"]
+    return os.environ.get(COMPACT_ENV, "").strip().lower() in ("1", "true", "yes")
+
+
+def shard_suffix():
+    """The file suffix of a newly written shard."""
+    return ARROW_SUFFIX if _compat.HAS_PYARROW else NPZ_SUFFIX
+
+
+def _zigzag_deltas(arr):
+    """The zigzag-coded differences between consecutive values of the int64 ``arr`` (the first
+    difference taken against ``arr[0]``, so it is 0) -- mostly small non-negative integers for
+    the ascending ids and the clustered node refs of a shard."""
+    deltas = np.diff(arr, prepend=arr[:1])
+    return ((deltas << 1) ^ (deltas >> 63)).view(np.uint64)
+
+
+def _varint_bytes(values):
+    """LEB128 varint bytes of the uint64 ``values``: 7 bits per byte, low bits first, the high
+    bit set on every byte but a value's last -- so a small delta takes one byte."""
+    nbytes = np.ones(len(values), dtype=np.int64)
+    for k in range(1, 10):
+        nbytes += values >= (np.uint64(1) << np.uint64(7 * k))
+    starts = np.cumsum(nbytes) - nbytes
+    position = np.arange(int(nbytes.sum())) - np.repeat(starts, nbytes)
+    out = (np.repeat(values, nbytes) >> (7 * position).astype(np.uint64)) & np.uint64(
+        0x7F
+    )
+    out |= np.where(position < np.repeat(nbytes, nbytes) - 1, 0x80, 0).astype(np.uint64)
+    return out.astype(np.uint8)
+
+
+def _varint_values(data):
+    """The uint64 values of the varint bytes ``data`` (see :func:`_varint_bytes`)."""
+    ends = np.flatnonzero(data < 0x80)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    position = np.arange(len(data)) - np.repeat(starts, ends - starts + 1)
+    payload = (data & 0x7F).astype(np.uint64) << (7 * position).astype(np.uint64)
+    return np.add.reduceat(payload, starts)
+
+
+def _encode(key, arr):
+    """``arr`` in its compact stored form and the field metadata describing it: ids and refs
+    as varint-coded zigzag deltas, coordinates as int32 multiples of 1e-7 degrees (the default
+    PBF granularity). An array the encoding would not reproduce exactly is stored as it is (no
+    metadata)."""
+    if len(arr) == 0:
+        return arr, None
+    if key in _DELTA_CODED:
+        metadata = {b"encoding": b"varint", b"first": str(int(arr[0])).encode()}
+        return _varint_bytes(_zigzag_deltas(arr)), metadata
+    if key in _FIXED_POINT:
+        units = np.rint(arr * _FIXED_POINT_SCALE)
+        if np.abs(units).max() < 2**31:
+            units = units.astype(np.int32)
+            if np.array_equal(_from_fixed_point(units), arr):
+                return units, {b"encoding": b"fixed"}
+    return arr, None
+
+
+def _from_fixed_point(units):
+    # The readers compute a coordinate as ``nanodegrees / 1e9``: rebuild it the same way, so
+    # the decoded float is bit-for-bit the one encoded.
+    return (units.astype(np.int64) * (10**9 // _FIXED_POINT_SCALE)) / 1e9
+
+
+def _decode(stored, metadata):
+    """Invert :func:`_encode` (``metadata`` is its field metadata, or ``None``)."""
+    encoding = (metadata or {}).get(b"encoding")
+    if encoding == b"varint":
+        zigzag = _varint_values(stored)
+        one = np.uint64(1)
+        deltas = ((zigzag >> one) ^ (np.uint64(0) - (zigzag & one))).view(np.int64)
+        return int(metadata[b"first"]) + np.cumsum(deltas)
+    if encoding == b"fixed":
+        return _from_fixed_point(stored)
+    return stored
+
+
+def _tag_indices(tags, strings):
+    """The tag dicts ``tags`` (``None`` for an untagged element) as flat int32 key/value
+    indices into the string table ``strings`` (a dict of string to index, extended with the
+    strings new to it), the CSR offsets of each element's indices and the mask of the ``None``
+    elements."""
+    indices = []
+    lengths = np.zeros(len(tags), dtype=np.int64)
+    missing = np.zeros(len(tags), dtype=bool)
+    for i, element_tags in enumerate(tags):
+        if element_tags is None:
+            missing[i] = True
+            continue
+        lengths[i] = 2 * len(element_tags)
+        for key, value in element_tags.items():
+            indices.append(strings.setdefault(key, len(strings)))
+            indices.append(strings.setdefault(value, len(strings)))
+    offsets = np.zeros(len(tags) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return np.array(indices, dtype=np.int32), offsets, missing
+
+
+def _tag_dicts(strings, indices, offsets, missing):
+    """Invert :func:`_tag_indices`: the object array of tag dicts (``strings`` is the string
+    table as an array)."""
+    words = strings[indices].tolist()
+    keys, values = words[0::2], words[1::2]
+    bounds = (np.asarray(offsets) // 2).tolist()
+    tags = np.empty(len(bounds) - 1, dtype=object)
+    tags[:] = [
+        dict(zip(keys[start:stop], values[start:stop]))
+        for start, stop in zip(bounds[:-1], bounds[1:])
+    ]
+    if missing.any():
+        tags[missing] = None
+    return tags
+
+
+def _string_table(strings):
+    return np.array(list(strings), dtype=str) if strings else np.empty(0, dtype=str)
+
+
+def _column(key, arrays, compact, strings):
+    """The one-row list column holding ``arrays[key]`` (see the module docstring) and its
+    field metadata (``None`` unless ``compact`` encoded it, see :func:`_encode`). A tag array's
+    strings are added to the string table ``strings``."""
+    import pyarrow as pa
+
+    arr = arrays[key]
+    metadata = None
+    if key in _TAGS:
+        indices, offsets, missing = _tag_indices(arr, strings)
+        values = pa.LargeListArray.from_arrays(
+            pa.array(offsets), pa.array(indices), mask=pa.array(missing)
+        )
+        column = pa.LargeListArray.from_arrays(
+            pa.array([0, len(values)], type=pa.int64()), values
+        )
+        return column, None
+    if compact:
+        arr, metadata = _encode(key, arr)
+    if key in _DICTIONARY:
+        values = pa.array(arr, type=pa.string()).dictionary_encode()
+    elif key in _LIST_OFFSETS and not compact:
+        values = pa.LargeListArray.from_arrays(
+            pa.array(arrays[_LIST_OFFSETS[key]], type=pa.int64()), pa.array(arr)
+        )
+    elif arr.ndim == 2:
+        values = pa.FixedSizeListArray.from_arrays(
+            pa.array(arr.reshape(-1)), arr.shape[1]
+        )
+    else:
+        values = pa.array(arr)
+    column = pa.LargeListArray.from_arrays(
+        pa.array([0, len(values)], type=pa.int64()), values
+    )
+    return column, metadata
+
+
+def write_shard(path, arrays, compact=False):
+    """Write the shard dict ``arrays`` (the per-key arrays of ``decode._decode_one_block``) to
+    ``path`` plus :func:`shard_suffix`. ``compact`` stores the ids, refs and coordinates in the
+    compact encoding (an Arrow shard only, see :func:`_encode`; the refs and their offsets are
+    then separate columns, the encoded refs no longer being one value per list element).
+    Returns the path written."""
+    path = str(path) + shard_suffix()
+    if not _compat.HAS_PYARROW:
+        save_npz(path, arrays)
+        return path
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    columns, fields, strings = [], [], {}
+    for key in arrays:
+        if key in _LIST_OFFSETS.values() and not compact:
+            continue
+        column, metadata = _column(key, arrays, compact, strings)
+        columns.append(column)
+        fields.append(pa.field(key, column.type, metadata=metadata))
+    if any(key in _TAGS for key in arrays):
+        column = pa.LargeListArray.from_arrays(
+            pa.array([0, len(strings)], type=pa.int64()),
+            pa.array(list(strings), type=pa.large_string()),
+        )
+        columns.append(column)
+        fields.append(pa.field(_TAG_STRINGS, column.type))
+    table = pa.Table.from_arrays(columns, schema=pa.schema(fields))
+    with pa.OSFile(path, "wb") as sink:
+        with ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    return path
+
+
+def save_npz(path, arrays):
+    """Write the shard dict ``arrays`` to the ``.npz`` file ``path`` in a layout that loads
+    without pickle: the tag arrays as string-table indices (see :func:`_tag_indices`), the
+    other object arrays as unicode arrays."""
+    stored, strings = {}, {}
+    for key, arr in arrays.items():
+        if key in _TAGS:
+            indices, offsets, missing = _tag_indices(arr, strings)
+            stored[key] = indices
+            stored[key + _NPZ_TAG_OFFSETS] = offsets
+            stored[key + _NPZ_TAG_MISSING] = missing
+        elif arr.dtype == object:
+            stored[key] = arr.astype(str) if len(arr) else np.empty(0, dtype=str)
+        else:
+            stored[key] = arr
+    if any(key in _TAGS for key in arrays):
+        stored[_TAG_STRINGS] = _string_table(strings)
+    np.savez(path, **stored)
+
+
+class _NpzShard:
+    """An ``.npz`` shard written by :func:`save_npz`, indexed by key like an
+    :class:`_ArrowShard` (each array is converted on first access)."""
+
+    def __init__(self, path):
+        self._file = np.load(path, allow_pickle=False)
+        self._arrays = {}
+
+    def keys(self):
+        """The keys of the arrays the shard was written from."""
+        suffixes = (_NPZ_TAG_OFFSETS, _NPZ_TAG_MISSING)
+        return [
+            key
+            for key in self._file.files
+            if key != _TAG_STRINGS and not key.endswith(suffixes)
+        ]
+
+    def _convert(self, key):
+        if key in _TAGS:
+            return _tag_dicts(
+                self._file[_TAG_STRINGS].astype(object),
+                self._file[key],
+                self._file[key + _NPZ_TAG_OFFSETS],
+                self._file[key + _NPZ_TAG_MISSING],
+            )
+        arr = self._file[key]
+        return arr.astype(object) if arr.dtype.kind == "U" else arr
+
+    def __getitem__(self, key):
+        if key not in self._arrays:
+            self._arrays[key] = self._convert(key)
+        return self._arrays[key]
+
+
+class _ArrowShard:
+    """A memory-mapped Arrow shard, indexed by key like the ``NpzFile`` of an ``.npz`` shard
+    (each array is converted on first access)."""
+
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+
+        self._table = ipc.open_file(pa.memory_map(str(path))).read_all()
+        self._arrays = {}
+
+    def keys(self):
+        """The keys of the arrays the shard was written from."""
+        names = [n for n in self._table.column_names if n != _TAG_STRINGS]
+        listed = [_LIST_OFFSETS[n] for n in names if n in _LIST_OFFSETS]
+        return names + [n for n in listed if n not in names]
+
+    def _values(self, name):
+        return self._table.column(name).chunk(0).values
+
+    def _convert(self, key):
+        import pyarrow as pa
+
+        if key in _TAGS:
+            values = self._values(key)
+            return _tag_dicts(
+                self[_TAG_STRINGS],
+                values.values.to_numpy(),
+                values.offsets.to_numpy(),
+                values.is_null().to_numpy(zero_copy_only=False),
+            )
+        if key not in self._table.column_names:
+            # The offsets of a list-typed array are its list offsets.
+            name = next(n for n, offsets in _LIST_OFFSETS.items() if offsets == key)
+            return self._values(name).offsets.to_numpy()
+        values = self._values(key)
+        if isinstance(values.type, pa.LargeListType):
+            return values.values.to_numpy()
+        if key in _DICTIONARY:
+            dictionary = values.dictionary.to_numpy(zero_copy_only=False)
+            return dictionary[values.indices.to_numpy(zero_copy_only=False)]
+        if isinstance(values.type, pa.FixedSizeListType):
+            return values.flatten().to_numpy().reshape(-1, values.type.list_size)
+        return self._decoded(key, values.to_numpy(zero_copy_only=False))
+
+    def _decoded(self, key, stored):
+        return _decode(stored, self._table.schema.field(key).metadata)
+
+    def __getitem__(self, key):
+        if key not in self._arrays:
+            self._arrays[key] = self._convert(key)
+        return self._arrays[key]
+
+
+def load_shard(path):
+    """Open a shard written by :func:`write_shard` (either format) for ``shard["key"]``
+    access."""
+    if str(path).endswith(ARROW_SUFFIX):
+        return _ArrowShard(path)
+    return _NpzShard(path)
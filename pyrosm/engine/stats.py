@@ -0,0 +1,242 @@
+"""Per-phase statistics of an out-of-core read.
+
+A read run within :func:`recording` fills a :class:`ReadStats` report, phase by phase:
+
+- ``index``: finding the data blobs (the blob index, or a BlobHeader scan);
+- ``decode``: decoding the blobs into shards, on the decode workers;
+- ``collect``: reading the layer's elements back from the shards;
+- ``node_gather``: gathering the coordinates of the nodes the ways and relations reference;
+- ``assemble``: building the geometries and frames;
+- ``cache_write``: writing the result to the result cache (or a streamed output file).
+
+Each phase records its wall time -- excluding the phases run within it, so the phase times add
+up to the read's -- and its peak resident memory, plus counters of its own (see
+:class:`ReadStats`). A phase run several times in one read (e.g. by ``get_layers``) adds up.
+Outside :func:`recording` a phase records nothing.
+"""
+
+import contextvars
+import sys
+import time
+from contextlib import contextmanager
+
+from pyrosm import instrument
+
+PHASES = ("index", "decode", "collect", "node_gather", "assemble", "cache_write")
+
+# The report of the read the running thread or generator records, or None; and the phases
+# open in it, innermost last, as ``[name, started]`` (``started`` is None while an inner phase
+# runs). Context variables, so concurrent reads in other threads each keep their own.
+_CURRENT = contextvars.ContextVar("pyrosm_read_stats", default=None)
+_OPEN = contextvars.ContextVar("pyrosm_open_phases", default=None)
+
+
+class ReadStats:
+    """The per-phase report of one out-of-core read (see :mod:`pyrosm.engine.stats`).
+
+    ``phases`` maps each phase run, in the order they first ran, to a dict of ``seconds``
+    (wall time), ``peak_rss`` (the peak resident memory in bytes of the process running it --
+    the largest worker's for the decode -- or ``None`` where the platform does not report it)
+    and its counters:
+
+    - ``index``: ``blobs`` and ``bytes`` (the compressed bytes of the data blobs to decode);
+    - ``decode``: ``workers``, ``bytes_read`` and ``bytes_inflated`` (compressed and
+      decompressed blob bytes), ``shards`` and ``shard_bytes`` (as spilled),
+      ``worker_seconds`` (the workers' decode time, summed) and ``worker_utilisation`` -- the
+      share of the phase's worker time spent decoding;
+    - ``collect``: ``nodes``, ``ways`` and ``relations`` (the elements collected);
+    - ``node_gather``: ``workers``, ``nodes_needed`` and ``nodes_found``, and ``backends``
+      (the node lookups built per backend, see :func:`pyrosm.node_lookup.choose_backend`);
+    - ``assemble``: ``rows`` per element kind (``{"node": ..., "way": ..., "relation": ...}``);
+    - ``cache_write``: ``bytes_written``.
+
+    ``seconds`` is the read's wall time; :meth:`to_dict` gives the whole report as plain
+    Python values (e.g. to send to a metrics system)."""
+
+    def __init__(self):
+        self.phases = {}
+        self.seconds = 0.0
+
+    def _phase(self, name):
+        if name not in self.phases:
+            self.phases[name] = {"seconds": 0.0, "peak_rss": None}
+        return self.phases[name]
+
+    def to_dict(self):
+        phases = {
+            name: {k: dict(v) if isinstance(v, dict) else v for k, v in phase.items()}
+            for name, phase in self.phases.items()
+        }
+        return {"seconds": self.seconds, "phases": phases}
+
+    def __repr__(self):
+        lines = ["ReadStats(%.3f s)" % self.seconds]
+        for name, phase in self.phases.items():
+            counters = ", ".join(
+                ("%s=%.3f" if isinstance(value, float) else "%s=%s") % (key, value)
+                for key, value in phase.items()
+                if key not in ("seconds", "peak_rss")
+            )
+            rss = phase["peak_rss"]
+            lines.append(
+                "  %-12s %8.3f s  %s  %s"
+                % (
+                    name,
+                    phase["seconds"],
+                    "%7.1f MB" % (rss / 1e6) if rss is not None else "      - MB",
+                    counters,
+                )
+            )
+        return "\n".join(lines)
+
+
+def reset_peak_rss():
+    """Restart the peak resident memory :func:`peak_rss` reports, where Linux allows it
+    (else it stays the process's peak so far)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss():
+    """The peak resident memory in bytes of this process since :func:`reset_peak_rss`
+    (``VmHWM``; else the process's peak so far), or ``None`` when the platform does not
+    report it."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in kilobytes on Linux, in bytes on macOS.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _close_segment(report, open_phases, now):
+    """Add the time and peak memory of the running segment of the innermost of
+    ``open_phases`` to ``report``."""
+    name, started = open_phases[-1]
+    phase = report._phase(name)
+    phase["seconds"] += now - started
+    rss = peak_rss()
+    if rss is not None:
+        phase["peak_rss"] = max(phase["peak_rss"] or 0, rss)
+
+
+@contextmanager
+def recording():
+    """Record the phases of the reads run within the block into a new :class:`ReadStats`,
+    which it yields."""
+    report = ReadStats()
+    tokens = _CURRENT.set(report), _OPEN.set([])
+    started = time.perf_counter()
+    try:
+        yield report
+    finally:
+        report.seconds += time.perf_counter() - started
+        _CURRENT.reset(tokens[0])
+        _OPEN.reset(tokens[1])
+
+
+def recording_iter(report, items):
+    """Iterate ``items`` (a generator running reads), recording into ``report`` while it runs
+    -- but not while the consumer holds a yielded item."""
+    items = iter(items)
+    while True:
+        tokens = _CURRENT.set(report), _OPEN.set([])
+        started = time.perf_counter()
+        try:
+            item = next(items)
+        except StopIteration:
+            return
+        finally:
+            report.seconds += time.perf_counter() - started
+            _CURRENT.reset(tokens[0])
+            _OPEN.reset(tokens[1])
+        yield item
+
+
+@contextmanager
+def phase(name):
+    """Time the block as the phase ``name`` of the read being recorded (pausing the phase it
+    runs within), yielding the phase's dict to add counters to (see :func:`count`) -- or
+    ``None`` when no read is recorded. The block is also an instrumentation span ``name``
+    (see :mod:`pyrosm.instrument`)."""
+    with instrument.span(name):
+        with _recorded(name) as recorded:
+            yield recorded
+
+
+@contextmanager
+def _recorded(name):
+    report, open_phases = _CURRENT.get(), _OPEN.get()
+    if report is None:
+        yield None
+        return
+    now = time.perf_counter()
+    if open_phases:
+        _close_segment(report, open_phases, now)
+        open_phases[-1][1] = None
+    reset_peak_rss()
+    open_phases.append([name, time.perf_counter()])
+    try:
+        yield report._phase(name)
+    finally:
+        _close_segment(report, open_phases, time.perf_counter())
+        open_phases.pop()
+        if open_phases:
+            reset_peak_rss()
+            open_phases[-1][1] = time.perf_counter()
+
+
+def count(name, **counters):
+    """Add ``counters`` to the phase ``name`` of the read being recorded (numbers add up, a
+    dict of numbers adds up per key); a no-op when no read is recorded."""
+    report = _CURRENT.get()
+    if report is None:
+        return
+    phase = report._phase(name)
+    for key, value in counters.items():
+        if isinstance(value, dict):
+            totals = phase.setdefault(key, {})
+            for k, v in value.items():
+                totals[k] = totals.get(k, 0) + v
+        else:
+            phase[key] = phase.get(key, 0) + value
+
+
+def peak(name, **values):
+    """Keep the largest of each of ``values`` and its earlier value in the phase ``name`` of the
+    read being recorded (e.g. the workers of a phase run several times); a no-op when no read
+    is recorded."""
+    report = _CURRENT.get()
+    if report is None:
+        return
+    phase = report._phase(name)
+    for key, value in values.items():
+        phase[key] = max(phase.get(key, value), value)
+
+
+def count_rows(frame):
+    """Add the rows of ``frame`` (a GeoDataFrame or an arrow table, or ``None``) per element
+    kind (its ``osm_type``) to the ``assemble`` phase."""
+    if _CURRENT.get() is None or frame is None or len(frame) == 0:
+        return
+    arrow = hasattr(frame, "column_names")
+    if "osm_type" not in (frame.column_names if arrow else frame.columns):
+        count("assemble", rows={"element": len(frame)})
+        return
+    if arrow:
+        counts = frame.column("osm_type").value_counts().to_pylist()
+        rows = {c["values"]: c["counts"] for c in counts}
+    else:
+        rows = frame["osm_type"].value_counts().to_dict()
+    count("assemble", rows={str(k): int(v) for k, v in rows.items()})
@@ -160,6 +160,21 @@ cdef int _count_straddling_relations(relations, relation_ways):
     return n_straddling
 
 
+cpdef warn_straddling_relations(relations, relation_ways):
+    """Warn when a bounding-box read returned relations the box cut (some member ways
+    fall outside the box, so the geometry is incomplete)."""
+    n_straddling = _count_straddling_relations(relations, relation_ways)
+    if n_straddling > 0:
+        warnings.warn(
+            f"{n_straddling} relation(s) extend beyond the bounding box and were "
+            f"returned with incomplete geometry (some member ways fall outside "
+            f"the box). Pass complete_relations=True to OSM(...) to fetch their "
+            f"full member set.",
+            UserWarning,
+            stacklevel=2,
+        )
+
+
 cpdef prepare_geodataframe(nodes, node_coordinates, ways,
                            relations, relation_ways,
                            tags_as_columns, bounding_box,
@@ -168,21 +183,11 @@ cpdef prepare_geodataframe(nodes, node_coordinates, ways,
                            bint keep_metadata=True,
                            bint complete_relations=False):
 
-    # Warn when a bounding-box read returned relations the box cut (some member ways
-    # fall outside the box, so the geometry is incomplete) and completion was not
-    # requested. Skipped for whole-file reads (which hold every member) and when
-    # complete_relations=True (the user already opted into fetching the full members).
+    # Warn when a bounding-box read returned relations the box cut. Skipped for whole-file
+    # reads (which hold every member) and when complete_relations=True (the user already
+    # opted into fetching the full members).
     if bounding_box is not None and not complete_relations:
-        n_straddling = _count_straddling_relations(relations, relation_ways)
-        if n_straddling > 0:
-            warnings.warn(
-                f"{n_straddling} relation(s) extend beyond the bounding box and were "
-                f"returned with incomplete geometry (some member ways fall outside "
-                f"the box). Pass complete_relations=True to OSM(...) to fetch their "
-                f"full member set.",
-                UserWarning,
-                stacklevel=2,
-            )
+        warn_straddling_relations(relations, relation_ways)
 
     # Prepare ways
     way_gdf, node_attr = prepare_way_gdf(node_coordinates,
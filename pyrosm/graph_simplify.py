@@ -25,6 +25,8 @@ import numpy as np
 import pandas as pd
 import shapely
 
+from pyrosm import instrument
+
 try:
     from pyrosm._simplify_walk import walk_chains as _cython_walk_chains
 except Exception:  # pragma: no cover - exercised only before the extension is built
@@ -236,6 +238,7 @@ def _stitch_geometries(geoms, geom_reversed, chain_edge_ids, chain_ptr):
     return shapely.linestrings(seg_coords[src], indices=seg_chain[seg_of_pos])
 
 
+@instrument.span("simplify_graph")
 def simplify_graph(
     nodes,
     directed_edges,
@@ -297,6 +300,7 @@ def simplify_graph(
     """
     edges = directed_edges.reset_index(drop=True)
     m = len(edges)
+    instrument.count(edges=m, nodes=len(nodes))
     if m == 0:
         return nodes, edges
 
@@ -428,5 +432,6 @@ def simplify_graph(
     kept_factors = np.unique(np.concatenate([new_u_factor, new_v_factor]))
     kept_ids = uniques[kept_factors]
     out_nodes = nodes[nodes[node_id_col].isin(kept_ids)].reset_index(drop=True)
+    instrument.count(edges_out=len(out), nodes_out=len(out_nodes))
 
     return out_nodes, out
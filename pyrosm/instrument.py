@@ -0,0 +1,230 @@
+"""Instrumentation hooks: events and tracing spans around pyrosm's hot paths.
+
+pyrosm times the stages of its work as *spans* and reports each finished span as an
+:class:`Event` to the listeners registered with :func:`add_listener`, and -- after
+:func:`enable_tracing` -- as an OpenTelemetry span, nested under the span that was
+current when it started::
+
+    from pyrosm import OSM, instrument
+
+    slow = []
+    instrument.add_listener(lambda e: slow.append(e) if e.seconds > 0.5 else None)
+    OSM(fp, engine="out_of_core", workers=4).get_buildings()
+
+The spans are:
+
+- ``decode_and_run``: an out-of-core read of a layer (``workers``, ``shards``; for
+  ``iter_layer``, open until the chunks are consumed), with the read's phases within it
+  (``index``, ``decode``, ``collect``, ``node_gather`` -- with ``shards``,
+  ``nodes_needed`` and ``nodes_found`` -- ``assemble`` and ``cache_write``, see
+  :mod:`pyrosm.engine.stats`);
+- ``decode_blob``: the decode of one blob, within ``decode`` (``offset`` and ``size``
+  -- the blob's byte range in the file -- ``bytes_inflated``, the ``nodes`` and
+  ``ways`` decoded and the layer ``features`` selected);
+- ``assemble_chunk``: the assembly of one chunk, within ``assemble`` (``ways`` in,
+  ``rows`` out);
+- ``crop_pbf`` (``workers``) and its stages ``crop_nodes``, ``crop_ways``,
+  ``crop_relations`` (the ids kept) and ``crop_write`` (``bytes_written``);
+- ``simplify_graph`` (``edges`` and ``nodes`` in, ``edges_out`` and ``nodes_out``).
+
+The spans of worker processes are sent back with the workers' results and reported by
+the main process once the work completes. Each thread nests its spans on its own. With
+no listener and no tracer a span costs a flag check.
+"""
+
+import contextvars
+import time
+from contextlib import contextmanager
+
+# The listeners add_listener() registered, and the tracer enable_tracing() set (or None).
+_LISTENERS = []
+_TRACER = None
+# While capturing(), the events the spans finished (instead of reporting them), else None.
+_CAPTURED = None
+# The open spans of the running thread or generator (see isolated_iter()), innermost last, as
+# ``[name, counters]`` -- each closed by identity, so one closed out of order takes no other.
+_OPEN = contextvars.ContextVar("pyrosm_open_spans", default=())
+
+
+class Event:
+    """A finished span: its ``name``, ``start`` (seconds since the epoch), ``seconds`` (wall
+    time), ``counters`` (a dict of its counts, e.g. bytes and elements) and ``parent`` (the
+    name of the span it ran within, or ``None``)."""
+
+    def __init__(self, name, start, seconds, counters, parent=None):
+        self.name = name
+        self.start = start
+        self.seconds = seconds
+        self.counters = counters
+        self.parent = parent
+
+    def __repr__(self):
+        return "Event(%r, %.6f s, %r)" % (self.name, self.seconds, self.counters)
+
+
+def add_listener(fn):
+    """Call ``fn(event)`` with the :class:`Event` of every span finished from now on (in the
+    order they finish: a span after the spans within it). Returns ``fn``, so it can be used
+    as a decorator."""
+    if fn not in _LISTENERS:
+        _LISTENERS.append(fn)
+    return fn
+
+
+def remove_listener(fn):
+    """Stop calling a listener added with :func:`add_listener`."""
+    if fn in _LISTENERS:
+        _LISTENERS.remove(fn)
+
+
+def enable_tracing(tracer=None):
+    """Also report the spans as OpenTelemetry spans (named ``pyrosm.<name>``, the counters as
+    attributes) with ``tracer``, by default ``opentelemetry.trace.get_tracer("pyrosm")``
+    (needs the optional ``opentelemetry-api``)."""
+    global _TRACER
+    if tracer is None:
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            raise ImportError(
+                "Tracing requires the optional 'opentelemetry-api' dependency. "
+                "Install it with `pip install opentelemetry-api`, or pass a tracer."
+            ) from None
+        tracer = trace.get_tracer("pyrosm")
+    _TRACER = tracer
+
+
+def disable_tracing():
+    global _TRACER
+    _TRACER = None
+
+
+def enabled():
+    """Whether spans are reported (or captured) -- so a hot loop can skip building them."""
+    return bool(_LISTENERS) or _TRACER is not None or _CAPTURED is not None
+
+
+def _attributes(counters):
+    return {
+        key: value
+        for key, value in counters.items()
+        if isinstance(value, (bool, int, float, str))
+    }
+
+
+@contextmanager
+def span(name, **counters):
+    """Time the block as the span ``name``, yielding its counters dict (starting with
+    ``counters``) for the block to fill in; see also :func:`count`. Usable as a decorator.
+    """
+    if not enabled():
+        yield counters
+        return
+    parent = _innermost()
+    traced = None
+    if _TRACER is not None and _CAPTURED is None:
+        traced = _TRACER.start_as_current_span("pyrosm." + name)
+        otel_span = traced.__enter__()
+    start = time.time()
+    started = time.perf_counter()
+    entry = [name, counters]
+    _OPEN.set(_OPEN.get() + (entry,))
+    error = None
+    try:
+        yield counters
+    except BaseException as raised:
+        error = raised
+        raise
+    finally:
+        _OPEN.set(tuple(e for e in _OPEN.get() if e is not entry))
+        event = Event(name, start, time.perf_counter() - started, counters, parent)
+        if traced is not None:
+            otel_span.set_attributes(_attributes(counters))
+            if error is None:
+                traced.__exit__(None, None, None)
+            else:
+                # Lets the tracer record the error on the span.
+                traced.__exit__(type(error), error, error.__traceback__)
+        _report(event)
+
+
+def count(**counters):
+    """Add ``counters`` to the innermost open span (numbers add up; other values replace).
+    A no-op outside a span."""
+    open_spans = _OPEN.get()
+    if not open_spans:
+        return
+    totals = open_spans[-1][1]
+    for key, value in counters.items():
+        previous = totals.get(key)
+        if isinstance(value, (int, float)) and isinstance(previous, (int, float)):
+            totals[key] = previous + value
+        else:
+            totals[key] = value
+
+
+def _innermost():
+    """The name of the innermost open span, or ``None``."""
+    open_spans = _OPEN.get()
+    return open_spans[-1][0] if open_spans else None
+
+
+def isolated_iter(items):
+    """Iterate ``items`` (a generator opening spans) running each step in a copy of the
+    context it is first iterated in -- so a span it holds open across a yield is neither the parent
+    of the consumer's spans nor of those of another generator run in between."""
+    context = contextvars.copy_context()
+    items = iter(items)
+    try:
+        while True:
+            try:
+                item = context.run(next, items)
+            except StopIteration:
+                return
+            yield item
+    finally:
+        # Closed early: close ``items`` now (and in its context), not when it is collected.
+        if hasattr(items, "close"):
+            context.run(items.close)
+
+
+def _report(event):
+    if _CAPTURED is not None:
+        _CAPTURED.append(event)
+        return
+    for fn in list(_LISTENERS):
+        fn(event)
+
+
+@contextmanager
+def capturing(active=True):
+    """Collect the events of the spans finished within the block into the list it yields,
+    instead of reporting them -- in a worker process, whose events are sent back with its
+    results to be :func:`replay`-ed by the main process. With ``active=False`` (spans are not
+    reported in the main process) nothing is collected and it yields ``None``."""
+    global _CAPTURED
+    if not active:
+        yield None
+        return
+    previous, _CAPTURED = _CAPTURED, []
+    try:
+        yield _CAPTURED
+    finally:
+        _CAPTURED = previous
+
+
+def replay(events):
+    """Report ``events`` collected by :func:`capturing` (e.g. in a worker process) as if their
+    spans had run here, within the current span."""
+    if not events:
+        return
+    parent = _innermost()
+    for event in events:
+        if event.parent is None:
+            event.parent = parent
+        if _TRACER is not None and _CAPTURED is None:
+            start_ns = int(event.start * 1e9)
+            otel_span = _TRACER.start_span("pyrosm." + event.name, start_time=start_ns)
+            otel_span.set_attributes(_attributes(event.counters))
+            otel_span.end(end_time=start_ns + int(event.seconds * 1e9))
+        _report(event)
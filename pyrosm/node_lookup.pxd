@@ -1,13 +1,26 @@
+from libc.stdint cimport int32_t, int64_t
 from cykhash.khashmaps cimport Int64toInt64Map
 
 
 cdef class NodeLocations:
+    cdef int _backend
     cdef Int64toInt64Map _id2idx
+    cdef const int64_t[::1] _sorted_ids
+    cdef const int64_t[::1] _sorted_rows
+    cdef const int64_t[::1] _dense
+    cdef const int32_t[:, ::1] _coords
+    cdef bint _has_rows
+    cdef long long _dense_base
+    cdef long long _last_node
+    cdef long long _last_idx
+    cdef long long _count
     cdef const double[::1] _lon
     cdef const double[::1] _lat
     cdef object _ids
+    cdef object _dense_file
     cdef dict _columns
     cdef list _column_order
+    cdef long long find(self, long long node)
     cdef bint contains(self, long long node)
     cdef long long index(self, long long node)
     cdef double lon_at(self, long long idx)
@@ -1,18 +1,76 @@
+import tempfile
+
 import numpy as np
 from cykhash import Int64toInt64Map_from_buffers, Int64toInt64Map_to
+from libc.stdint cimport int32_t, int64_t, INT64_MIN
+
+# Id -> row index backends of a NodeLocations (see its docstring).
+HASH = "hash"
+SORTED = "sorted"
+DENSE = "dense"
+BACKENDS = (HASH, SORTED, DENSE)
+
+cdef enum:
+    _HASH = 0
+    _SORTED = 1
+    _DENSE = 2
+    # The dense backend holding the coordinates themselves (NodeLocations.from_coordinates).
+    _DENSE_COORDS = 3
+
+# A dense index takes 8 bytes per id of the id span, the hash map about 32 bytes per node: the
+# dense index is chosen when the ids fill at least this share of their span.
+DENSE_MIN_DENSITY = 0.25
+# Sparse ascending ids up to this many use the sorted index: it builds an order of magnitude
+# faster than the hash map, and its binary search stays cache-resident.
+SORTED_MAX_NODES = 1_000_000
+# A dense index larger than this is backed by an anonymous memory-mapped temp file (only the
+# pages holding ids are ever written, and the OS may page them out) rather than by memory.
+DENSE_MMAP_BYTES = 256 * 1024 * 1024
+# Fixed-point units per degree of the coordinates a dense coordinate index holds: the default
+# PBF granularity (100 nanodegrees), so a coordinate read from a PBF file round-trips exactly.
+FIXED_POINT_SCALE = 10**7
+
+
+def choose_backend(ids):
+    """The backend ``backend="auto"`` picks for the node ids ``ids``: ``"dense"`` when they
+    fill at least ``DENSE_MIN_DENSITY`` of their span, else ``"sorted"`` for up to
+    ``SORTED_MAX_NODES`` strictly ascending ids (as read from a PBF file or gathered from the
+    shards, so the sorted index needs no memory beyond the ids themselves), else ``"hash"``."""
+    ids = np.asarray(ids)
+    if len(ids) == 0:
+        return SORTED
+    span = int(ids.max()) - int(ids.min()) + 1
+    if len(ids) >= DENSE_MIN_DENSITY * span:
+        return DENSE
+    if len(ids) <= SORTED_MAX_NODES and np.all(ids[1:] > ids[:-1]):
+        return SORTED
+    return HASH
 
 
 cdef class NodeLocations:
-    """Compact node-coordinate store: a cykhash id->row-index map plus the node
-    column arrays, replacing the per-node dict-of-dicts produced previously by
+    """Compact node-coordinate store: an id->row-index lookup plus the node column arrays,
+    replacing the per-node dict-of-dicts produced previously by
     ``coords_df.set_index("id").to_dict(orient="index")``.
 
-    Geometry construction looks up a node's row index once (C-level khash) and
-    reads the contiguous ``lon``/``lat`` arrays; the full per-node record (used as
-    graph-node attributes) is rebuilt on demand from the column arrays in the
-    original column order, so the observable output is unchanged."""
+    Geometry construction looks up a node's row index once and reads the contiguous
+    ``lon``/``lat`` arrays; the full per-node record (used as graph-node attributes) is rebuilt
+    on demand from the column arrays in the original column order, so the observable output is
+    unchanged.
 
-    def __init__(self, coords_df):
+    The id lookup has three backends, chosen by ``backend`` (``"auto"`` picks one by id
+    density, see :func:`choose_backend`):
+
+    - ``"dense"``: an array indexed directly by ``id - min(id)`` holding ``row + 1`` (0 for an
+      absent id): an O(1) lookup without hashing, for ids that fill much of their span. A large
+      one is memory-mapped, but the node column arrays stay in memory beside it. A
+      coordinate-only store built by :meth:`from_coordinates` instead holds each node's
+      fixed-point ``(lon, lat)`` in the id-indexed array itself -- osmium's dense mmap array
+      layout, 8 bytes per id of the span -- and keeps no id or coordinate arrays at all, so a
+      memory-mapped one bounds resident memory.
+    - ``"sorted"``: a binary search of the sorted ids, for sparse ids of small extracts.
+    - ``"hash"``: a cykhash id->row map, for other sparse ids."""
+
+    def __init__(self, coords_df, backend="auto"):
         cdef str c
         # from_buffers takes writable int64 buffers; pandas' to_numpy() can be
         # read-only, so ensure a writable copy for the (transient) build inputs.
@@ -20,8 +78,31 @@ cdef class NodeLocations:
         if not ids.flags.writeable:
             ids = ids.copy()
         self._ids = ids
-        indices = np.arange(len(ids), dtype=np.int64)
-        self._id2idx = Int64toInt64Map_from_buffers(ids, indices)
+        if backend == "auto":
+            backend = choose_backend(ids)
+        if backend == HASH:
+            self._backend = _HASH
+            indices = np.arange(len(ids), dtype=np.int64)
+            self._id2idx = Int64toInt64Map_from_buffers(ids, indices)
+        elif backend == SORTED:
+            self._backend = _SORTED
+            if np.all(ids[1:] >= ids[:-1]):
+                self._sorted_ids = ids
+            else:
+                rows = np.argsort(ids, kind="stable")
+                self._sorted_ids = ids[rows]
+                self._sorted_rows = rows
+                self._has_rows = True
+        elif backend == DENSE:
+            self._backend = _DENSE
+            self._build_dense(ids)
+        else:
+            raise ValueError(
+                "'backend' should be 'auto' or one of %s, got %r." % (BACKENDS, backend)
+            )
+        self._count = len(ids)
+        self._last_node = INT64_MIN
+        self._last_idx = -1
 
         # Every column except 'id' (re-added per record), in coords_df column
         # order, so a reconstructed node record matches the previous layout.
@@ -37,16 +118,116 @@ cdef class NodeLocations:
         self._lon = lon
         self._lat = lat
 
+    @staticmethod
+    def from_coordinates(ids, lon, lat, backend="auto"):
+        """A coordinate-only store of the nodes ``ids`` at ``lon``/``lat`` (records hold just
+        ``lon`` and ``lat``), with its backend chosen as in the constructor. A dense one holds
+        the coordinates in its id-indexed array (see the class docstring) when they are whole
+        multiples of ``1 / FIXED_POINT_SCALE`` degrees -- as every coordinate of a PBF file of
+        the default granularity is -- and is built like a frame's otherwise."""
+        import pandas as pd
+
+        cdef NodeLocations self
+        ids = np.ascontiguousarray(ids, dtype=np.int64)
+        lon = np.ascontiguousarray(lon, dtype=np.float64)
+        lat = np.ascontiguousarray(lat, dtype=np.float64)
+        if backend == "auto":
+            backend = choose_backend(ids)
+        if backend == DENSE and len(ids):
+            lon_units = _fixed_point(lon)
+            lat_units = _fixed_point(lat)
+            if lon_units is not None and lat_units is not None:
+                self = NodeLocations.__new__(NodeLocations)
+                self._backend = _DENSE_COORDS
+                self._build_dense_coords(ids, lon_units, lat_units)
+                self._count = len(ids)
+                self._last_node = INT64_MIN
+                self._last_idx = -1
+                self._column_order = ["lon", "lat"]
+                return self
+        return NodeLocations(
+            pd.DataFrame({"id": ids, "lon": lon, "lat": lat}), backend=backend
+        )
+
+    def _build_dense(self, ids):
+        base = int(ids.min()) if len(ids) else 0
+        span = int(ids.max()) - base + 1 if len(ids) else 0
+        dense = self._zeros((span,), np.int64)
+        dense[ids - base] = np.arange(1, len(ids) + 1, dtype=np.int64)
+        self._dense = dense
+        self._dense_base = base
+
+    def _build_dense_coords(self, ids, lon_units, lat_units):
+        # A present node's longitude is stored shifted off zero (see _stored_lon), so the zeros
+        # of an absent id -- all of a fresh memory-mapped file, never written -- stay apart.
+        base = int(ids.min())
+        coords = self._zeros((int(ids.max()) - base + 1, 2), np.int32)
+        coords[ids - base, 0] = lon_units + (lon_units >= 0)
+        coords[ids - base, 1] = lat_units
+        self._coords = coords
+        self._dense_base = base
+
+    def _zeros(self, shape, dtype):
+        """A zeroed dense index array, memory-mapped past ``DENSE_MMAP_BYTES``."""
+        if int(np.prod(shape)) * np.dtype(dtype).itemsize > DENSE_MMAP_BYTES:
+            # Unlinked on creation: the mapping keeps the file alive until it is released.
+            self._dense_file = tempfile.TemporaryFile(prefix="pyrosm_nodes_")
+            return np.memmap(self._dense_file, dtype=dtype, mode="w+", shape=shape)
+        return np.zeros(shape, dtype=dtype)
+
+    @property
+    def backend(self):
+        """The id lookup backend in use: ``"hash"``, ``"sorted"`` or ``"dense"``."""
+        return DENSE if self._backend == _DENSE_COORDS else BACKENDS[self._backend]
+
+    cdef long long find(self, long long node):
+        """Row index of ``node``, or -1 when it is absent. The last lookup is remembered, so
+        the usual ``contains`` + ``index`` pair searches once."""
+        cdef long long lo, hi, mid, off, idx = -1
+        if node == self._last_node:
+            return self._last_idx
+        if self._backend == _DENSE_COORDS:
+            # The "row" of a node is its slot in the id-indexed coordinate array.
+            off = node - self._dense_base
+            if 0 <= off < self._coords.shape[0] and self._coords[off, 0] != 0:
+                idx = off
+        elif self._backend == _DENSE:
+            off = node - self._dense_base
+            if 0 <= off < self._dense.shape[0]:
+                idx = self._dense[off] - 1
+        elif self._backend == _SORTED:
+            lo = 0
+            hi = self._sorted_ids.shape[0]
+            while lo < hi:
+                mid = (lo + hi) >> 1
+                if self._sorted_ids[mid] < node:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            if lo < self._sorted_ids.shape[0] and self._sorted_ids[lo] == node:
+                idx = self._sorted_rows[lo] if self._has_rows else lo
+        elif self._id2idx.contains(node):
+            idx = self._id2idx.cget(node)
+        self._last_node = node
+        self._last_idx = idx
+        return idx
+
     cdef bint contains(self, long long node):
-        return self._id2idx.contains(node)
+        return self.find(node) >= 0
 
     cdef long long index(self, long long node):
-        return self._id2idx.cget(node)
+        return self.find(node)
 
     cdef double lon_at(self, long long idx):
+        cdef int32_t stored
+        if self._backend == _DENSE_COORDS:
+            stored = self._coords[idx, 0]
+            return _degrees(stored - 1 if stored > 0 else stored)
         return self._lon[idx]
 
     cdef double lat_at(self, long long idx):
+        if self._backend == _DENSE_COORDS:
+            return _degrees(self._coords[idx, 1])
         return self._lat[idx]
 
     cpdef tuple gather(self, node_ids):
@@ -56,10 +237,44 @@ cdef class NodeLocations:
         coordinates (placeholder values where ``idx == -1``, which callers mask
         out via ``idx >= 0``)."""
         keys = np.ascontiguousarray(node_ids, dtype=np.int64)
-        if not keys.flags.writeable:
-            keys = keys.copy()
-        idx = np.empty(len(keys), dtype=np.int64)
-        Int64toInt64Map_to(self._id2idx, keys, idx, stop_at_unknown=False, default_value=-1)
+        if self._backend == _DENSE_COORDS:
+            coords = np.asarray(self._coords)
+            off = keys - self._dense_base
+            inside = (off >= 0) & (off < len(coords))
+            stored = np.zeros((len(keys), 2), dtype=np.int32)
+            stored[inside] = coords[off[inside]]
+            idx = np.where(stored[:, 0] != 0, off, -1)
+            lon_units = stored[:, 0] - (stored[:, 0] > 0)
+            return idx, _from_fixed_point(lon_units), _from_fixed_point(stored[:, 1])
+        if self._backend == _DENSE:
+            dense = np.asarray(self._dense)
+            off = keys - self._dense_base
+            inside = (off >= 0) & (off < len(dense))
+            idx = np.full(len(keys), -1, dtype=np.int64)
+            idx[inside] = dense[off[inside]] - 1
+        elif self._backend == _SORTED:
+            sorted_ids = np.asarray(self._sorted_ids)
+            idx = np.full(len(keys), -1, dtype=np.int64)
+            if len(sorted_ids):
+                if np.all(keys[1:] >= keys[:-1]):
+                    pos = np.searchsorted(sorted_ids, keys)
+                else:
+                    # Searching in key order keeps the probes local (several times faster
+                    # than searching random keys against a large array).
+                    order = np.argsort(keys, kind="stable")
+                    pos = np.empty(len(keys), dtype=np.intp)
+                    pos[order] = np.searchsorted(sorted_ids, keys[order])
+                pos = np.minimum(pos, len(sorted_ids) - 1)
+                hit = sorted_ids[pos] == keys
+                rows = np.asarray(self._sorted_rows)[pos] if self._has_rows else pos
+                idx[hit] = rows[hit]
+        else:
+            if not keys.flags.writeable:
+                keys = keys.copy()
+            idx = np.empty(len(keys), dtype=np.int64)
+            Int64toInt64Map_to(
+                self._id2idx, keys, idx, stop_at_unknown=False, default_value=-1
+            )
         safe = np.where(idx >= 0, idx, 0)
         lon = np.asarray(self._lon)[safe]
         lat = np.asarray(self._lat)[safe]
@@ -68,6 +283,8 @@ cdef class NodeLocations:
     cdef dict _base_record(self, long long idx):
         cdef str c
         cdef dict rec = {}
+        if self._backend == _DENSE_COORDS:
+            return {"lon": self.lon_at(idx), "lat": self.lat_at(idx)}
         for c in self._column_order:
             v = self._columns[c][idx]
             # Match the previous pandas to_dict, which yielded Python scalars (so a
@@ -81,16 +298,42 @@ cdef class NodeLocations:
         return rec
 
     def __contains__(self, key):
-        return self._id2idx.contains(key)
+        return self.find(key) >= 0
 
     def __len__(self):
-        return len(self._ids)
+        return self._count
 
     def items(self):
         # (id, record) pairs equivalent to the previous dict-of-dicts (the record
         # has no 'id' key); used by the PBF writer to re-emit the base nodes. Ids
-        # are returned as Python ints to match the former pandas to_dict keys.
-        cdef long long idx, n = len(self._ids)
+        # are returned as Python ints to match the former pandas to_dict keys. A
+        # dense coordinate index yields its nodes in id order.
+        cdef long long idx, n = self._count
+        if self._backend == _DENSE_COORDS:
+            for idx in np.flatnonzero(np.asarray(self._coords)[:, 0]):
+                yield int(idx + self._dense_base), self._base_record(idx)
+            return
         ids = self._ids
         for idx in range(n):
             yield int(ids[idx]), self._base_record(idx)
+
+
+cdef inline double _degrees(int32_t units):
+    # As the readers compute a coordinate, ``nanodegrees / 1e9``, so it is bit-for-bit theirs.
+    return <double>(<int64_t>units * (1000000000 // FIXED_POINT_SCALE)) / 1e9
+
+
+def _from_fixed_point(units):
+    return (units.astype(np.int64) * (10**9 // FIXED_POINT_SCALE)) / 1e9
+
+
+def _fixed_point(degrees):
+    """``degrees`` as int32 multiples of ``1 / FIXED_POINT_SCALE`` degrees, or ``None`` when
+    a coordinate is not one exactly (or is beyond +-180 degrees)."""
+    units = np.rint(degrees * FIXED_POINT_SCALE)
+    if not (np.abs(units) <= 180 * FIXED_POINT_SCALE).all():
+        return None
+    units = units.astype(np.int32)
+    if not np.array_equal(_from_fixed_point(units), degrees):
+        return None
+    return units
@@ -22,6 +22,7 @@ from struct import pack, unpack
 
 import numpy as np
 
+from pyrosm import instrument
 from pyrosm.proto.fileformat_pb2 import BlobHeader, Blob
 from pyrosm.proto.osmformat_pb2 import (
     HeaderBlock,
@@ -571,45 +572,56 @@ cpdef crop_pbf(source_path, output_path, bounding_box, keep_relations=True,
         fd, output_path = tempfile.mkstemp(suffix=".osm.pbf", prefix="pyrosm_crop_")
         os.close(fd)
 
-    # Stage 0: header pre-flight (rejects unsupported inputs before any streaming).
-    _read_header(source_path)
+    with instrument.span("crop_pbf", workers=1) as crop:
+        # Stage 0: header pre-flight (rejects unsupported inputs before any streaming).
+        _read_header(source_path)
 
-    if workers is not None and workers > 1:
-        if _count_data_blocks(source_path) >= 2 * int(workers):
-            return _crop_pbf_parallel(
-                source_path, output_path, bounds, keep_relations, int(workers),
-                compact, repack
-            )
-        # Too few blocks for parallelism to pay off -> run sequentially.
-
-    # Stage 1: nodes inside the bbox.
-    nodes_in_bbox = _stage1_nodes_in_bbox(source_path, bounds)
-    nib_set = _to_set(nodes_in_bbox)
-
-    # Stage 2: ways with >=1 node in the bbox (+ all their refs -> complete ways).
-    kept_ways, extra_nodes = _stage2_ways(source_path, nib_set)
-    kept_nodes = _unique_concat([nodes_in_bbox, extra_nodes])
-    kept_nodes_set = _to_set(kept_nodes)
-    kept_ways_set = _to_set(kept_ways)
+        if workers is not None and workers > 1:
+            if _count_data_blocks(source_path) >= 2 * int(workers):
+                crop["workers"] = int(workers)
+                return _crop_pbf_parallel(
+                    source_path, output_path, bounds, keep_relations, int(workers),
+                    compact, repack
+                )
+            # Too few blocks for parallelism to pay off -> run sequentially.
 
-    # Stage 3: relations referencing a kept node/way.
-    if keep_relations:
-        kept_rel = _stage3_relations(source_path, kept_nodes_set, kept_ways_set)
-    else:
-        kept_rel = np.empty(0, dtype=np.int64)
-    kept_rel_set = _to_set(kept_rel)
-
-    # Write pass.
-    if repack:
-        _repack_write(
-            source_path, output_path, kept_nodes_set, kept_ways_set, kept_rel_set,
-            bounds
-        )
-    else:
-        _write_pbf(
-            source_path, output_path, kept_nodes_set, kept_ways_set, kept_rel_set,
-            bounds, compact
-        )
+        # Stage 1: nodes inside the bbox.
+        with instrument.span("crop_nodes") as stage:
+            nodes_in_bbox = _stage1_nodes_in_bbox(source_path, bounds)
+            nib_set = _to_set(nodes_in_bbox)
+            stage["nodes"] = len(nodes_in_bbox)
+
+        # Stage 2: ways with >=1 node in the bbox (+ all their refs -> complete ways).
+        with instrument.span("crop_ways") as stage:
+            kept_ways, extra_nodes = _stage2_ways(source_path, nib_set)
+            kept_nodes = _unique_concat([nodes_in_bbox, extra_nodes])
+            kept_nodes_set = _to_set(kept_nodes)
+            kept_ways_set = _to_set(kept_ways)
+            stage["ways"] = len(kept_ways)
+            stage["nodes"] = len(kept_nodes)
+
+        # Stage 3: relations referencing a kept node/way.
+        with instrument.span("crop_relations") as stage:
+            if keep_relations:
+                kept_rel = _stage3_relations(source_path, kept_nodes_set, kept_ways_set)
+            else:
+                kept_rel = np.empty(0, dtype=np.int64)
+            kept_rel_set = _to_set(kept_rel)
+            stage["relations"] = len(kept_rel)
+
+        # Write pass.
+        with instrument.span("crop_write") as stage:
+            if repack:
+                _repack_write(
+                    source_path, output_path, kept_nodes_set, kept_ways_set,
+                    kept_rel_set, bounds
+                )
+            else:
+                _write_pbf(
+                    source_path, output_path, kept_nodes_set, kept_ways_set,
+                    kept_rel_set, bounds, compact
+                )
+            stage["bytes_written"] = os.path.getsize(output_path)
     return output_path
 
 
@@ -797,40 +809,49 @@ cdef _crop_pbf_parallel(source_path, output_path, bounds, keep_relations, worker
     pool = mp.Pool(workers, initializer=_winit, initargs=(bounds, tmpdir, compact))
     try:
         # Stage 1: nodes inside the bbox.
-        results = pool.map(_w_stage1, _iter_payloads(source_path))
-        nodes_in_bbox = _unique_concat(results)
-        _broadcast(tmpdir, "nodes_in_bbox", nodes_in_bbox)
+        with instrument.span("crop_nodes") as stage:
+            results = pool.map(_w_stage1, _iter_payloads(source_path))
+            nodes_in_bbox = _unique_concat(results)
+            _broadcast(tmpdir, "nodes_in_bbox", nodes_in_bbox)
+            stage["nodes"] = len(nodes_in_bbox)
 
         # Stage 2: complete ways.
-        results = pool.map(_w_stage2, _iter_payloads(source_path))
-        kept_ways = _unique_concat([w for w, _ in results])
-        extra_nodes = _unique_concat([e for _, e in results])
-        kept_nodes = _unique_concat([nodes_in_bbox, extra_nodes])
-        _broadcast(tmpdir, "kept_nodes", kept_nodes)
-        _broadcast(tmpdir, "kept_ways", kept_ways)
+        with instrument.span("crop_ways") as stage:
+            results = pool.map(_w_stage2, _iter_payloads(source_path))
+            kept_ways = _unique_concat([w for w, _ in results])
+            extra_nodes = _unique_concat([e for _, e in results])
+            kept_nodes = _unique_concat([nodes_in_bbox, extra_nodes])
+            _broadcast(tmpdir, "kept_nodes", kept_nodes)
+            _broadcast(tmpdir, "kept_ways", kept_ways)
+            stage["ways"] = len(kept_ways)
+            stage["nodes"] = len(kept_nodes)
 
         # Stage 3: relations.
-        if keep_relations:
-            results = pool.map(_w_stage3, _iter_payloads(source_path))
-            kept_rel = _unique_concat(results)
-        else:
-            kept_rel = np.empty(0, dtype=np.int64)
-        _broadcast(tmpdir, "kept_rel", kept_rel)
-
-        if repack:
-            # Re-pack needs a global re-chunk, so the write is sequential (selection
-            # above stays parallel). Build the kept-id sets in the main process.
-            _repack_write(
-                source_path, output_path, _to_set(kept_nodes), _to_set(kept_ways),
-                _to_set(kept_rel), bounds
-            )
-        else:
-            # Write pass (imap preserves input order -> deterministic output bytes).
-            with open(output_path, "wb") as out:
-                _write_header(out, bounds)
-                for blob_bytes in pool.imap(_w_write, _iter_payloads(source_path)):
-                    if blob_bytes is not None:
-                        out.write(blob_bytes)
+        with instrument.span("crop_relations") as stage:
+            if keep_relations:
+                results = pool.map(_w_stage3, _iter_payloads(source_path))
+                kept_rel = _unique_concat(results)
+            else:
+                kept_rel = np.empty(0, dtype=np.int64)
+            _broadcast(tmpdir, "kept_rel", kept_rel)
+            stage["relations"] = len(kept_rel)
+
+        with instrument.span("crop_write") as stage:
+            if repack:
+                # Re-pack needs a global re-chunk, so the write is sequential (selection
+                # above stays parallel). Build the kept-id sets in the main process.
+                _repack_write(
+                    source_path, output_path, _to_set(kept_nodes), _to_set(kept_ways),
+                    _to_set(kept_rel), bounds
+                )
+            else:
+                # Write pass (imap preserves input order -> deterministic output bytes).
+                with open(output_path, "wb") as out:
+                    _write_header(out, bounds)
+                    for blob_bytes in pool.imap(_w_write, _iter_payloads(source_path)):
+                        if blob_bytes is not None:
+                            out.write(blob_bytes)
+            stage["bytes_written"] = os.path.getsize(output_path)
     finally:
         pool.close()
         pool.join()
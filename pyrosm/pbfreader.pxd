@@ -1,4 +1,6 @@
-cpdef parse_osm_data(filepath, bounding_box, exclude_relations, unix_time_filter, bint keep_metadata=*, bint complete_relations=*)
-cdef parse_dense(pblock, data, string_table, bounding_box, unix_time_filter, node_id_filter=*, bint keep_metadata=*)
-cdef parse_nodes(pblock, data, string_table, bounding_box, unix_time_filter=*, node_id_filter=*, bint keep_metadata=*)
-cdef parse_ways(data, stringtable, node_lookup, unix_time_filter, way_id_filter=*)
+from cykhash.khashsets cimport Int64Set
+
+cpdef parse_osm_data(filepath, bounding_box, exclude_relations, unix_time_filter, bint keep_metadata=*, bint complete_relations=*, workers=*)
+cdef parse_nodes(string_table, header, nodes, bounding_box, unix_time_filter, node_id_filter=*, bint keep_metadata=*)
+cdef parse_ways(ways, Int64Set node_lookup, unix_time_filter, way_id_filter=*)
+cdef parse_relations(string_table, relations, unix_time_filter)
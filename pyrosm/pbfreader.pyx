@@ -1,33 +1,37 @@
-from pyrosm.exceptions import PBFNotImplemented
-from struct import unpack
 import warnings
-import zlib
-from pyrosm.proto.fileformat_pb2 import BlobHeader, Blob
-from pyrosm.proto.osmformat_pb2 import HeaderBlock, PrimitiveBlock
-from pyrosm.tagparser cimport tounicode, parse_dense_tags, parse_tags, explode_way_tags
-from pyrosm._arrays cimport to_clong_array, concatenate_dicts_of_arrays
-from pyrosm.delta_compression cimport (
-    delta_decode_latitude,
-    delta_decode_longitude,
-    delta_decode_id,
-    delta_decode_timestamp,
-    delta_decode_changeset,
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pyrosm.proto.osmformat_pb2 import HeaderBlock
+from pyrosm.primitive_block_decoder import decode_primitive_block
+from pyrosm.engine.blobs import _index_blobs, _inflate_blob, _read_block
+from pyrosm.engine.pool import _auto_threads, _cap_workers
+from pyrosm.engine.blob_index import (
+    BlobIndex,
+    KIND_NODES,
+    KIND_WAYS,
+    load_index,
+    save_index,
+    summarize_block,
 )
+from pyrosm.tagparser cimport tounicode, parse_dense_tags
+from pyrosm._arrays cimport concatenate_dicts_of_arrays
 from pyrosm.data_filter cimport (
-    get_nodeid_lookup_khash,
-    nodes_for_way_exist_khash,
     get_latest_version,
     clean_empty_values_from_ways,
 )
 from pyrosm.utils import valid_header_block
 from pyrosm.frames import create_df
 from pyrosm.node_lookup import NodeLocations
+from pyrosm.way_store cimport WayStore, WayStoreBuilder
+from cykhash.khashsets cimport Int64Set, Int64Set_from_buffer, isin_int64
 import numpy as np
 import pandas as pd
-from libc.stdlib cimport malloc, free
 
 _warned_slow_backend = False
 
+# Relation member types, indexed by the PBF MemberType enum (0: node, 1: way, 2: relation).
+_MEMBER_TYPES = np.array([b"node", b"way", b"relation"], dtype=object)
+
 
 cdef _warn_if_slow_protobuf_backend():
     global _warned_slow_backend
@@ -45,118 +49,120 @@ cdef _warn_if_slow_protobuf_backend():
         )
 
 
-def iter_primitive_blocks_and_string_tables(filepath):
-    # Generator: yield one (PrimitiveBlock, string_table) at a time so the parser
-    # can process and discard each block instead of holding the whole decompressed
-    # file in a list. A def function (not cdef) is required because it yields.
+def _decode_blob(payload, name):
+    # Inflate and decode one serialized data Blob. Both steps run mostly without the
+    # GIL (zlib/lzma, and the decoder's varint loops), so several threads can decode
+    # blobs concurrently.
+    data = _inflate_blob(payload, name)
+    string_table, header, nodes, ways, relations = decode_primitive_block(data)
+    str_table = [tounicode(s) for s in string_table]
+    return str_table, header, nodes, ways, relations
+
+
+def _thread_count(filepath, workers):
+    # Resolve the 'workers' option into the number of in-memory decode threads: "auto"
+    # is a thread per core (and data blob), an explicit count is capped at the cores.
+    if workers is None:
+        return 1
+    if isinstance(workers, str) and workers.lower() == "auto":
+        return _auto_threads(filepath)
+    return _cap_workers(workers)
+
+
+def iter_primitive_blocks(filepath, int workers=1, blobs=None):
+    # Generator: yield one decoded block at a time so the parser can process and
+    # discard each block instead of holding the whole decompressed file in memory.
+    # Protobuf only handles the small BlobHeader / Blob / HeaderBlock framing; the
+    # PrimitiveBlock itself is decoded straight into numpy arrays by the raw decoder.
+    # With workers > 1 the blobs are read in order on this thread and inflated and
+    # decoded by a thread pool; at most 2 * workers blocks are in flight, and they are
+    # yielded in file order. 'blobs' restricts the read to those (type, offset, size)
+    # rows (e.g. the blobs a saved blob index says can contribute).
+    if blobs is None:
+        blobs = _index_blobs(filepath)
     with open(filepath, 'rb') as f:
+        if workers <= 1:
+            for blob_type, offset, size in blobs:
+                data = _read_block(f, offset, size)
 
-        # Check that the data stream is valid OSM
-        # =======================================
-
-        buf = f.read(4)
-        msg_len = unpack('!L', buf)[0]
-        msg = BlobHeader()
-        msg.ParseFromString(f.read(msg_len))
-        blob_header = msg
-
-        msg = Blob()
-        msg.ParseFromString(f.read(blob_header.datasize))
-        blob_data = zlib.decompress(msg.zlib_data)
-        header_block = HeaderBlock()
-        header_block.ParseFromString(blob_data)
-
-        if valid_header_block(header_block):
-            pass
-
-        while True:
-            # Read header
-            buf = f.read(4)
-
-            # Stop when the end has been reached
-            if len(buf) == 0:
-                break
-
-            msg_len = unpack('!L', buf)[0]
-
-            msg = BlobHeader()
-            msg.ParseFromString(f.read(msg_len))
-            blob_header = msg
-
-            # Get data
-            msg = Blob()
-            msg.ParseFromString(f.read(blob_header.datasize))
-            blob_data = zlib.decompress(msg.zlib_data)
+                # Check that the data stream is valid OSM
+                if blob_type == "OSMHeader":
+                    _check_header_block(data)
+                    continue
 
-            # Get primite block
-            pblock = PrimitiveBlock()
-            pblock.ParseFromString(blob_data)
+                string_table, header, nodes, ways, relations = decode_primitive_block(data)
+                str_table = [tounicode(s) for s in string_table]
+                yield str_table, header, nodes, ways, relations
+            return
+
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for blob_type, offset, size in blobs:
+                f.seek(offset)
+                payload = f.read(size)
+                if blob_type == "OSMHeader":
+                    _check_header_block(_inflate_blob(payload, f.name))
+                    continue
+                pending.append(pool.submit(_decode_blob, payload, f.name))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
 
-            # Get string table and decode
-            str_table = [tounicode(s) for s in pblock.stringtable.s]
 
-            yield pblock, str_table
+cdef _check_header_block(data):
+    header_block = HeaderBlock()
+    header_block.ParseFromString(data)
+    valid_header_block(header_block)
 
 
-cdef parse_dense(
-        pblock,
-        data,
+cdef parse_nodes(
         string_table,
+        header,
+        nodes,
         bounding_box,
         unix_time_filter,
         node_id_filter=None,
         bint keep_metadata=True,
 ):
-    cdef:
-        int node_granularity = pblock.granularity
-        int timestamp_granularity = pblock.date_granularity
-        int lon_offset = pblock.lon_offset
-        int lat_offset = pblock.lat_offset
+    # Both the dense and the plain (non-dense) node encodings arrive from the decoder
+    # in the same layout: cumulative ids/coordinates, a 0-delimited keys_vals stream
+    # and per-node metadata columns (empty when the block carries no DenseInfo).
 
     # History (.osh) parsing filters on timestamp/visible, so the per-node metadata
     # is always decoded for history files regardless of the flag.
     cdef bint keep_meta = keep_metadata or unix_time_filter is not None
+    cdef Py_ssize_t n = len(nodes["id"])
+    div = 1000000000
 
-    # Get latitudes
-    lats = delta_decode_latitude(data, node_granularity, lat_offset)
-
-    # Get longitudes
-    lons = delta_decode_longitude(data, node_granularity, lon_offset)
-
-    # Ids
-    ids = delta_decode_id(data)
-
-    # Tags
-    tags = np.empty(len(data.id), dtype=object)
-    parsed = parse_dense_tags(data.keys_vals, string_table)
+    ids = nodes["id"]
+    lats = (nodes["lat"] * header["granularity"] + header["lat_offset"]) / div
+    lons = (nodes["lon"] * header["granularity"] + header["lon_offset"]) / div
 
-    # In some cases node-tags are not available at all
-    if len(parsed) != 0:
-        tags[:] = parsed
+    # Tags (in some cases node-tags are not available at all)
+    tags = np.empty(n, dtype=object)
+    if len(nodes["keys_vals"]) != 0:
+        tags[:] = parse_dense_tags(nodes["keys_vals"].tolist(), string_table)
 
     # Visible flags (if visible is False, the element has been deleted)
-    visible = np.array(list(data.denseinfo.visible)).astype(bool)
-    if visible.shape[0] == 0:
-        visible = np.full(len(data.id), False, dtype=bool)
+    visible = nodes["visible"].astype(bool)
+    if visible.shape[0] != n:
+        visible = np.full(n, False, dtype=bool)
 
     if keep_meta:
-        # Version
-        versions = np.array(list(data.denseinfo.version), dtype=np.int64)
-
-        # Timestamp
-        timestamps = delta_decode_timestamp(data, timestamp_granularity)
-
-        # Changeset
-        changesets = delta_decode_changeset(data)
+        versions = nodes["version"]
+        timestamps = (nodes["timestamp"] * header["date_granularity"]
+                      / 1000).astype(int).astype(np.uint32)
+        changesets = nodes["changeset"].astype(np.int32)
 
         # Metadata might not be available, if so add empty
         # This can happen with BBBike data
-        if versions.shape[0] == 0:
-            versions = np.zeros(len(data.id), dtype=np.int8)
-        if changesets.shape[0] == 0:
-            changesets = np.zeros(len(data.id), dtype=np.int8)
-        if timestamps.shape[0] == 0:
-            timestamps = np.zeros(len(data.id), dtype=np.int8)
+        if versions.shape[0] != n:
+            versions = np.zeros(n, dtype=np.int8)
+        if changesets.shape[0] != n:
+            changesets = np.zeros(n, dtype=np.int8)
+        if timestamps.shape[0] != n:
+            timestamps = np.zeros(n, dtype=np.int8)
 
     # 'node_id_filter' (a second, completeness pass) keeps nodes by id rather than
     # by the bounding box, to fetch a kept way's vertices that lie just outside the box.
@@ -167,6 +173,11 @@ cdef parse_dense(
         xmin, ymin, xmax, ymax = bounding_box
         mask = (xmin <= lons) & (lons <= xmax) & (ymin <= lats) & (lats <= ymax)
 
+    if unix_time_filter is not None:
+        # Filter out node (versions) based on time
+        time_mask = timestamps <= unix_time_filter
+        mask = time_mask if mask is None else mask & time_mask
+
     if mask is not None:
         ids = ids[mask]
         lons = lons[mask]
@@ -178,261 +189,89 @@ cdef parse_dense(
             changesets = changesets[mask]
             timestamps = timestamps[mask]
 
-    if unix_time_filter is not None:
-        # Filter out node (versions) based on time
-        mask = timestamps <= unix_time_filter
-        ids = ids[mask]
-        versions = versions[mask]
-        changesets = changesets[mask]
-        timestamps = timestamps[mask]
-        lons = lons[mask]
-        lats = lats[mask]
-        tags = tags[mask]
-        visible = visible[mask]
-
-    if keep_meta:
-        return [dict(id=ids,
-                     version=versions,
-                     changeset=changesets,
-                     timestamp=timestamps,
-                     lon=lons,
-                     lat=lats,
-                     tags=tags,
-                     visible=visible,
-                     )]
-    return [dict(id=ids,
-                 lon=lons,
-                 lat=lats,
-                 tags=tags,
-                 visible=visible,
-                 )]
-
-
-# Handles the non-dense PBF node encoding (exercised via an osmium-generated
-# non-dense fixture in the tests).
-cdef parse_nodes(pblock, data, string_table, bounding_box, unix_time_filter=None,
-                 node_id_filter=None, bint keep_metadata=True):
-    # History (.osh) parsing filters on timestamp/visible, so the per-node metadata
-    # is always decoded for history files regardless of the flag.
-    cdef bint keep_meta = keep_metadata or unix_time_filter is not None
-
-    ids = []
-    versions = []
-    changesets = []
-    timestamps = []
-    lons = []
-    lats = []
-    visibles = []
-    tag_dicts = []
-
-    granularity = pblock.granularity
-    lon_offset = pblock.lon_offset
-    lat_offset = pblock.lat_offset
-    div = 1000000000
-
-    for node in data:
-        ids.append(node.id)
-        lons.append(node.lon)
-        lats.append(node.lat)
-        visibles.append(node.info.visible)
-        tag_dicts.append(parse_tags(node.keys, node.vals, string_table))
-        if keep_meta:
-            try:
-                changesets.append(int(node.info.changeset))
-            except:
-                changesets.append(0)
-            versions.append(node.info.version)
-            timestamps.append(node.info.timestamp)
-
-    id_ = np.array(ids, dtype=np.int64)
-    lon = (np.array(lons, dtype=np.int64) * granularity + lon_offset) / div
-    lat = (np.array(lats, dtype=np.int64) * granularity + lat_offset) / div
-    visible = np.array(visibles, dtype=bool)
-    # Keep the same schema as parse_dense (incl. 'tags' and 'visible') so the
-    # node frame concatenates with dense nodes and the OSH 'visible' filter works.
-    tags = np.empty(len(ids), dtype=object)
-    tags[:] = tag_dicts
-
     if keep_meta:
-        version = np.array(versions, dtype=np.int64)
-        changeset = np.array(changesets, dtype=np.int64)
-        timestamp = np.array(timestamps, dtype=np.int64)
-
-    if node_id_filter is not None:
-        # Completeness pass: keep nodes by id rather than by the bounding box.
-        mask = np.isin(id_, node_id_filter)
-    elif bounding_box is not None:
-        xmin, ymin, xmax, ymax = bounding_box
-        mask = (xmin <= lon) & (lon <= xmax) & (ymin <= lat) & (lat <= ymax)
-    else:
-        mask = None
-
-    if mask is not None:
-        id_ = id_[mask]
-        lon = lon[mask]
-        lat = lat[mask]
-        visible = visible[mask]
-        tags = tags[mask]
-        if keep_meta:
-            version = version[mask]
-            changeset = changeset[mask]
-            timestamp = timestamp[mask]
-
-    if unix_time_filter is not None:
-        # Drop node versions newer than the requested timestamp (OSH files), so
-        # get_latest_version later picks the latest version at/before it.
-        time_mask = timestamp <= unix_time_filter
-        id_ = id_[time_mask]
-        version = version[time_mask]
-        changeset = changeset[time_mask]
-        timestamp = timestamp[time_mask]
-        lon = lon[time_mask]
-        lat = lat[time_mask]
-        visible = visible[time_mask]
-        tags = tags[time_mask]
-
-    if keep_meta:
-        return dict(id=id_,
-                    version=version,
-                    changeset=changeset,
-                    timestamp=timestamp,
-                    lon=lon,
-                    lat=lat,
+        return dict(id=ids,
+                    version=versions,
+                    changeset=changesets,
+                    timestamp=timestamps,
+                    lon=lons,
+                    lat=lats,
                     tags=tags,
                     visible=visible,
                     )
-    return dict(id=id_,
-                lon=lon,
-                lat=lat,
+    return dict(id=ids,
+                lon=lons,
+                lat=lats,
                 tags=tags,
                 visible=visible,
                 )
 
 
-cdef parse_nodeids_from_ref_deltas(refs):
-    cdef long long delta, nid = 0
-    cdef int i, N = len(refs)
-    cdef long long * refs_c = to_clong_array(refs)
-    cdef long long *nodes = <long long *>malloc(N*sizeof(long long))
-
-    try:
-        for i in range(N):
-            nid += refs_c[i]
-            nodes[i] = nid
-        return [x for x in nodes[:N]]
-
-    finally:
-        free(nodes)
-        free(refs_c)
-
-
 cdef parse_ways(
-        data,
-        string_table,
-        node_lookup,
+        ways,
+        Int64Set node_lookup,
         unix_time_filter,
         way_id_filter=None,
 ):
-    cdef long long id
-    cdef int version, i, timestamp, n=len(data)
-
-    way_set = []
-    for i in range(0, n):
-        way = data[i]
-        if unix_time_filter is not None:
-            # Filter way versions according the time filter
-            if way.info.timestamp > unix_time_filter:
-                continue
-        if way_id_filter is not None:
-            # Completeness pass: keep ways by id (relation member completion),
-            # regardless of whether their nodes fall inside the bounding box.
-            if way.id not in way_id_filter:
-                continue
-        nodes = parse_nodeids_from_ref_deltas(way.refs)
-        if node_lookup is not None:
-            if nodes_for_way_exist_khash(nodes, node_lookup):
-                way_set.append(
-                    dict(
-                        id=way.id,
-                        version=way.info.version,
-                        timestamp=way.info.timestamp,
-                        visible=way.info.visible,
-                        tags=parse_tags(way.keys, way.vals, string_table),
-                        nodes=nodes,
-                    )
-                )
-        else:
-            way_set.append(
-                dict(
-                    id=way.id,
-                    version=way.info.version,
-                    timestamp=way.info.timestamp,
-                    visible=way.info.visible,
-                    tags=parse_tags(way.keys, way.vals, string_table),
-                    nodes=nodes,
-                )
-            )
-    return way_set
-
-
-cdef get_relation_members(relation, str_table):
-    relation_types = {
-        0: b"node",
-        1: b"way",
-        2: b"relation"
-        }
-
-    # Member-ids
-    member_N = len(relation.memids)
-    member_id_deltas = np.zeros(member_N+1, dtype=np.int64)
-    member_id_deltas[1:] = list(relation.memids)
-    member_ids = np.cumsum(member_id_deltas)[1:]
-
-    # Member types - 0: Node, 1: Way, 2: Relation
-    member_types = np.array([relation_types[t]
-                             for t in relation.types],
-                            dtype=object)
-
-    # Member roles
-    member_roles = np.array([str_table[role_id] for role_id in relation.roles_sid],
-                            dtype=object)
-
-    return dict(
-        member_id=member_ids,
-        member_type=member_types,
-        member_role=member_roles,
-        )
-
-
-cdef parse_relations(data, string_table, unix_time_filter):
-    N = len(data)
-
-    # Version
-    versions = np.array([rel.info.version for rel in data], dtype=np.int64)
-
-    ids = np.array([rel.id for rel in data], dtype=np.int64)
-
-    timestamps = np.array([rel.info.timestamp for rel in data], dtype=np.int64)
-
-    # Changeset
-    changesets = np.array([rel.info.changeset for rel in data], dtype=np.int64)
+    # Returns the indices of the block's ways to keep; the caller adds them to
+    # its WayStoreBuilder.
+    cdef Py_ssize_t n = len(ways["id"])
 
-    # Visible
-    visible = np.array([rel.info.visible for rel in data], dtype=bool)
-
-    # Relation members
-    members = np.array([
-        get_relation_members(rel, string_table)
-        for rel in data],
-        dtype=object
+    mask = np.ones(n, dtype=bool)
+    if unix_time_filter is not None:
+        # Filter way versions according the time filter
+        mask &= ways["timestamp"] <= unix_time_filter
+    if way_id_filter is not None:
+        # Completeness pass: keep ways by id (relation member completion),
+        # regardless of whether their nodes fall inside the bounding box.
+        mask &= np.isin(ways["id"], way_id_filter)
+
+    if node_lookup is not None:
+        # Keep a way when any of its nodes was kept by the bounding box: flag every
+        # ref found in the lookup, then count the hits within each way's ref slice.
+        refs, refs_off = ways["refs"], ways["refs_off"]
+        hits = np.empty(len(refs), dtype=bool)
+        isin_int64(refs, node_lookup, hits)
+        hit_count = np.zeros(len(refs) + 1, dtype=np.int64)
+        np.cumsum(hits, out=hit_count[1:])
+        mask &= (hit_count[refs_off[1:]] - hit_count[refs_off[:-1]]) > 0
+
+    return np.flatnonzero(mask)
+
+
+cdef parse_relations(string_table, relations, unix_time_filter):
+    cdef Py_ssize_t i, n = len(relations["id"])
+
+    ids = relations["id"]
+    versions = relations["version"]
+    timestamps = relations["timestamp"]
+    changesets = relations["changeset"]
+    visible = relations["visible"].astype(bool)
+
+    # Relation members: member ids are already cumulative, types map to their name
+    # and roles are resolved through the string table once for the whole block.
+    member_ids = relations["memids"]
+    member_types = _MEMBER_TYPES[relations["types"]]
+    member_roles = np.array(string_table, dtype=object)[relations["roles"]]
+    members_off = relations["members_off"].tolist()
+    members = np.empty(n, dtype=object)
+    for i in range(n):
+        start, end = members_off[i], members_off[i + 1]
+        members[i] = dict(
+            member_id=member_ids[start:end],
+            member_type=member_types[start:end],
+            member_role=member_roles[start:end],
         )
 
     # Tags
-    tags = np.array([
-            parse_tags(rel.keys, rel.vals, string_table)
-            for rel in data],
-            dtype=object
-            )
+    keys = relations["keys"].tolist()
+    vals = relations["vals"].tolist()
+    tags_off = relations["tags_off"].tolist()
+    tags = np.empty(n, dtype=object)
+    for i in range(n):
+        tags[i] = {string_table[k]: string_table[v]
+                   for k, v in zip(keys[tags_off[i]:tags_off[i + 1]],
+                                   vals[tags_off[i]:tags_off[i + 1]])}
 
     # Filter by time
     if unix_time_filter is not None:
@@ -445,14 +284,14 @@ cdef parse_relations(data, string_table, unix_time_filter):
         tags = tags[mask]
         visible = visible[mask]
 
-    return [dict(id=ids,
+    return dict(id=ids,
                 version=versions,
                 changeset=changesets,
                 timestamp=timestamps,
                 members=members,
                 tags=tags,
                 visible=visible,
-                )]
+                )
 
 
 cpdef parse_osm_data(
@@ -462,10 +301,12 @@ cpdef parse_osm_data(
         unix_time_filter,
         bint keep_metadata=True,
         bint complete_relations=False,
+        workers=None,
 ):
     _warn_if_slow_protobuf_backend()
     return _parse_osm_data(filepath, bounding_box, exclude_relations,
-                           unix_time_filter, keep_metadata, complete_relations)
+                           unix_time_filter, keep_metadata, complete_relations,
+                           _thread_count(filepath, workers))
 
 
 cdef _parse_osm_data(
@@ -475,36 +316,64 @@ cdef _parse_osm_data(
         unix_time_filter,
         bint keep_metadata=True,
         bint complete_relations=False,
+        int workers=1,
 ):
-    all_ways = []
+    cdef Int64Set node_lookup = None
+    cdef WayStoreBuilder way_builder = WayStoreBuilder()
     all_nodes = []
     all_relations = []
-    node_lookup_created = False
-
-    for pblock, str_table in iter_primitive_blocks_and_string_tables(filepath):
-        for pgroup in pblock.primitivegroup:
-            if len(pgroup.dense.id) > 0:
-                all_nodes += parse_dense(pblock, pgroup.dense, str_table, bounding_box,
-                                         unix_time_filter, None, keep_metadata)
-            elif len(pgroup.nodes) > 0:
-                all_nodes += [parse_nodes(pblock, pgroup.nodes, str_table,
-                                          bounding_box, unix_time_filter, None,
-                                          keep_metadata)]
-            elif len(pgroup.ways) > 0:
-                # Once all the nodes have been parsed comes Ways
-                if bounding_box is not None:
-                    if not node_lookup_created:
-                        node_lookup = get_nodeid_lookup_khash(all_nodes)
-                    all_ways += parse_ways(pgroup.ways, str_table, node_lookup, unix_time_filter)
-                else:
-                    all_ways += parse_ways(pgroup.ways, str_table, None, unix_time_filter)
-            elif len(pgroup.relations) > 0:
-                if exclude_relations:
-                    continue
-                all_relations += parse_relations(pgroup.relations, str_table, unix_time_filter)
+    # Ids of the nodes kept by the bounding box that are not yet in 'node_lookup'.
+    # The lookup is extended once per run of node blocks rather than rebuilt from
+    # every node parsed so far for each block of ways.
+    pending_node_ids = []
+
+    # A saved blob index replaces the BlobHeader scan and lets a bounding-box read skip
+    # the node-only blobs outside the box (none of their nodes would be kept). Without
+    # one, this full pass summarises every block and saves the index for later reads.
+    index = load_index(filepath)
+    summaries = None
+    if index is None:
+        blobs = _index_blobs(filepath)
+        summaries = []
+    else:
+        blobs = index.blobs()
+        if bounding_box is not None:
+            blobs = index.blobs(
+                ~(index.only(KIND_NODES) & index.outside_bbox(bounding_box))
+            )
 
-    # Explode the way tags
-    all_ways = explode_way_tags(all_ways)
+    for str_table, header, nodes, ways, relations in iter_primitive_blocks(
+            filepath, workers, blobs):
+        if summaries is not None:
+            summaries.append(
+                summarize_block(str_table, header, nodes, ways, relations))
+        if nodes is not None and len(nodes["id"]) > 0:
+            node_arrays = parse_nodes(str_table, header, nodes, bounding_box,
+                                      unix_time_filter, None, keep_metadata)
+            all_nodes.append(node_arrays)
+            if bounding_box is not None:
+                pending_node_ids.append(node_arrays["id"])
+        if ways is not None:
+            # Once all the nodes have been parsed comes Ways
+            if bounding_box is not None:
+                if len(pending_node_ids) > 0:
+                    new_ids = Int64Set_from_buffer(np.concatenate(pending_node_ids))
+                    if node_lookup is None:
+                        node_lookup = new_ids
+                    else:
+                        node_lookup.update(new_ids)
+                    pending_node_ids = []
+                elif node_lookup is None:
+                    node_lookup = Int64Set()
+            way_builder.add_block(str_table, ways,
+                                  parse_ways(ways, node_lookup, unix_time_filter))
+        if relations is not None and not exclude_relations:
+            all_relations.append(parse_relations(str_table, relations, unix_time_filter))
+
+    all_ways = way_builder.build()
+    if summaries is not None:
+        index = BlobIndex.from_summaries(blobs, summaries)
+        save_index(filepath, index)
 
     # Concatenate nodes and create a DataFrame
     nodes_df = create_df(concatenate_dicts_of_arrays(all_nodes))
@@ -526,7 +395,7 @@ cdef _parse_osm_data(
 
     # Keep the closest record to the timestamp if filter is used
     if unix_time_filter is not None:
-        ways_df = pd.DataFrame(all_ways)
+        ways_df = pd.DataFrame(all_ways.records())
         # Drop deleted history items
         nodes_df = nodes_df.loc[nodes_df["visible"]==True].copy()
         ways_df = ways_df.loc[ways_df["visible"]==True].copy()
@@ -537,7 +406,7 @@ cdef _parse_osm_data(
         all_ways = get_latest_version(ways_df).to_dict(orient="records")
 
         # DataFrame structure produces unnecesary None values that needs to be cleaned
-        all_ways = clean_empty_values_from_ways(all_ways)
+        all_ways = WayStore.from_records(clean_empty_values_from_ways(all_ways))
 
         relations_df = get_latest_version(relations_df)
 
@@ -557,9 +426,7 @@ cdef _parse_osm_data(
     # coordinates are picked up by the #236 pass below. bbox-only and opt-in.
     completed_relation_ways = []
     if complete_relations and bounding_box is not None and len(all_ways) > 0:
-        present_way_ids = set()
-        for way in all_ways:
-            present_way_ids.add(way["id"])
+        present_way_ids = set(all_ways.id.tolist())
 
         missing_way_ids = set()
         for members in all_relations.get("members", []):
@@ -581,14 +448,19 @@ cdef _parse_osm_data(
                     missing_way_ids.add(wid)
 
         if len(missing_way_ids) > 0:
-            for pblock, str_table in iter_primitive_blocks_and_string_tables(filepath):
-                for pgroup in pblock.primitivegroup:
-                    if len(pgroup.ways) > 0:
-                        completed_relation_ways += parse_ways(
-                            pgroup.ways, str_table, None, unix_time_filter,
-                            missing_way_ids,
-                        )
-            completed_relation_ways = explode_way_tags(completed_relation_ways)
+            way_id_filter = np.array(sorted(missing_way_ids), dtype=np.int64)
+            completed_builder = WayStoreBuilder()
+            # Only the blobs whose way id range can hold a missing way are read.
+            way_blobs = index.blobs(index.may_contain_ids(KIND_WAYS, way_id_filter))
+            for str_table, header, nodes, ways, relations in iter_primitive_blocks(
+                    filepath, workers, way_blobs):
+                if ways is not None:
+                    completed_builder.add_block(
+                        str_table, ways,
+                        parse_ways(ways, None, unix_time_filter, way_id_filter),
+                    )
+            # The completed ways are few; keep them as way records.
+            completed_relation_ways = completed_builder.build().records()
             if unix_time_filter is not None and len(completed_relation_ways) > 0:
                 # Mirror the OSH latest-version selection applied to all_ways above.
                 cw_df = pd.DataFrame(completed_relation_ways)
@@ -602,33 +474,32 @@ cdef _parse_osm_data(
     # kept when >=1 of its nodes is inside the box, but the box-filtered node parse
     # dropped the vertices that lie just outside it, so its polygon/line would otherwise
     # be cut. Fetch ONLY those missing node coordinates with a second streaming pass
-    # over the blocks (the blocks are not retained, so this re-reads the file) and add
-    # them to the coordinate lookup used for geometry building. They are deliberately
+    # over the blocks (the blocks are not retained, so this re-reads the blobs whose
+    # node id range can hold them) and add them to the coordinate lookup used for
+    # geometry building. They are deliberately
     # NOT added to `all_nodes` (the standalone node features), so out-of-box nodes never
     # leak into node-feature results (e.g. POIs). bbox-only.
     coords_df = nodes_df
     if bounding_box is not None and len(all_ways) > 0:
-        present_ids = set(nodes_df["id"].tolist())
-        missing_ids = set()
         # Completed relation member ways also need their out-of-box vertices fetched
         # into the coordinate store so the relation geometries are complete.
-        for way in all_ways + completed_relation_ways:
-            for node_id in way["nodes"]:
-                if node_id not in present_ids:
-                    missing_ids.add(node_id)
-        if len(missing_ids) > 0:
-            node_id_filter = np.array(sorted(missing_ids), dtype=np.int64)
+        way_node_ids = np.concatenate(
+            [all_ways.refs] + [np.asarray(way["nodes"], dtype=np.int64)
+                               for way in completed_relation_ways]
+        )
+        node_id_filter = np.setdiff1d(
+            way_node_ids, nodes_df["id"].to_numpy(dtype=np.int64)
+        )
+        if len(node_id_filter) > 0:
             boundary_nodes = []
-            for pblock, str_table in iter_primitive_blocks_and_string_tables(filepath):
-                for pgroup in pblock.primitivegroup:
-                    if len(pgroup.dense.id) > 0:
-                        boundary_nodes += parse_dense(pblock, pgroup.dense, str_table,
+            # Only the blobs whose node id range can hold a missing vertex are read.
+            node_blobs = index.blobs(index.may_contain_ids(KIND_NODES, node_id_filter))
+            for str_table, header, nodes, ways, relations in iter_primitive_blocks(
+                    filepath, workers, node_blobs):
+                if nodes is not None and len(nodes["id"]) > 0:
+                    boundary_nodes.append(parse_nodes(str_table, header, nodes,
                                                       None, unix_time_filter,
-                                                      node_id_filter, keep_metadata)
-                    elif len(pgroup.nodes) > 0:
-                        boundary_nodes += [parse_nodes(pblock, pgroup.nodes, str_table,
-                                                       None, unix_time_filter,
-                                                       node_id_filter, keep_metadata)]
+                                                      node_id_filter, keep_metadata))
             if len(boundary_nodes) > 0:
                 boundary_df = create_df(concatenate_dicts_of_arrays(boundary_nodes))
                 if "id" in boundary_df.columns:
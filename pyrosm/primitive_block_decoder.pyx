@@ -19,8 +19,9 @@ Wire-format primer (the field numbers live in ``primitive_block_decoder.pxd``):
   additionally *delta coded* (each value is added to the running total), which we undo
   with a cumulative sum -- mirroring ``delta_compression.pyx``.
 
-Nodes are decoded straight into flat arrays. Ways and relations are variable length, so
-they are decoded in two passes: a cheap counting pass sizes the flat (CSR) arrays
+Nodes are decoded straight into flat arrays; plain (non-dense) ``Node`` groups are
+rebuilt into the same layout as ``DenseNodes``. Ways and relations are variable length,
+so they are decoded in two passes: a cheap counting pass sizes the flat (CSR) arrays
 exactly, then a single fill pass writes into them -- no per-element allocation.
 Coordinates and ids are returned as raw cumulative integers (not scaled by
 ``granularity``/offset); scaling is the caller's job, which keeps the values exact and
@@ -46,7 +47,7 @@ cdef enum WireType:
 # --- low-level wire-format primitives -------------------------------------------------
 
 cdef inline uint64_t _read_varint(const unsigned char* buf, Py_ssize_t* pos,
-                                  Py_ssize_t end) nogil:
+                                  Py_ssize_t end) noexcept nogil:
     """Read one base-128 varint at ``pos`` and advance ``pos`` past it."""
     cdef uint64_t result = 0
     cdef int shift = 0
@@ -61,13 +62,13 @@ cdef inline uint64_t _read_varint(const unsigned char* buf, Py_ssize_t* pos,
     return result
 
 
-cdef inline int64_t _zig_zag_decode(uint64_t value) nogil:
+cdef inline int64_t _zig_zag_decode(uint64_t value) noexcept nogil:
     """Undo protobuf's zig-zag encoding of a signed integer."""
     return (<int64_t>(value >> 1)) ^ (-(<int64_t>(value & 1)))
 
 
 cdef inline void _read_tag(const unsigned char* buf, Py_ssize_t* pos, Py_ssize_t end,
-                           int* field_number, int* wire_type) nogil:
+                           int* field_number, int* wire_type) noexcept nogil:
     """Read a field tag and split it into its field number and wire type."""
     cdef uint64_t tag = _read_varint(buf, pos, end)
     field_number[0] = <int>(tag >> 3)
@@ -75,7 +76,7 @@ cdef inline void _read_tag(const unsigned char* buf, Py_ssize_t* pos, Py_ssize_t
 
 
 cdef inline void _skip_field(const unsigned char* buf, Py_ssize_t* pos,
-                             Py_ssize_t end, int wire_type) nogil:
+                             Py_ssize_t end, int wire_type) noexcept nogil:
     """Advance ``pos`` past a field whose value we don't need."""
     cdef uint64_t length
     if wire_type == WIRE_VARINT:
@@ -90,7 +91,7 @@ cdef inline void _skip_field(const unsigned char* buf, Py_ssize_t* pos,
 
 
 cdef inline Py_ssize_t _count_packed(const unsigned char* buf, Py_ssize_t start,
-                                     Py_ssize_t end) nogil:
+                                     Py_ssize_t end) noexcept nogil:
     """Count the varints packed in ``buf[start:end]`` (one ends per continuation-clear
     byte) without decoding them -- used by the way/relation sizing pass."""
     cdef Py_ssize_t pos = start
@@ -103,7 +104,7 @@ cdef inline Py_ssize_t _count_packed(const unsigned char* buf, Py_ssize_t start,
 
 
 cdef Py_ssize_t _fill_packed(const unsigned char* buf, Py_ssize_t start, Py_ssize_t end,
-                             bint is_signed, int64_t[::1] out, Py_ssize_t at) nogil:
+                             bint is_signed, int64_t* out, Py_ssize_t at) noexcept nogil:
     """Decode a packed run of varints into ``out[at:]``; return how many were written.
     ``is_signed`` zig-zag-decodes each value."""
     cdef Py_ssize_t pos = start
@@ -120,8 +121,8 @@ cdef Py_ssize_t _fill_packed(const unsigned char* buf, Py_ssize_t start, Py_ssiz
 
 
 cdef Py_ssize_t _fill_packed_delta(const unsigned char* buf, Py_ssize_t start,
-                                   Py_ssize_t end, int64_t[::1] out,
-                                   Py_ssize_t at) nogil:
+                                   Py_ssize_t end, int64_t* out,
+                                   Py_ssize_t at) noexcept nogil:
     """Like ``_fill_packed`` for a delta-coded ``sint`` field: write the running
     cumulative sum into ``out[at:]`` and return how many were written."""
     cdef Py_ssize_t pos = start
@@ -137,10 +138,16 @@ cdef Py_ssize_t _fill_packed_delta(const unsigned char* buf, Py_ssize_t start,
 cdef _read_packed(const unsigned char* buf, Py_ssize_t start, Py_ssize_t end,
                   bint is_signed):
     """Decode a packed run of varints into a freshly allocated ``int64`` array (used by
-    the dense-node path, which is naturally flat)."""
-    out = np.empty(_count_packed(buf, start, end), dtype=np.int64)
+    the dense-node path, which is naturally flat). The varint loop runs without the
+    GIL."""
+    cdef Py_ssize_t n
+    with nogil:
+        n = _count_packed(buf, start, end)
+    out = np.empty(n, dtype=np.int64)
     cdef int64_t[::1] values = out
-    _fill_packed(buf, start, end, is_signed, values, 0)
+    if n > 0:
+        with nogil:
+            _fill_packed(buf, start, end, is_signed, &values[0], 0)
     return out
 
 
@@ -238,8 +245,8 @@ cdef dict _decode_dense_group(const unsigned char* buf, Py_ssize_t start,
 
 
 cdef dict _merge_dense(list groups, bint keep_metadata):
-    """Concatenate the per-group dense-node dicts into one. (Delta coding is per
-    group, so each group's arrays are already cumulative before they are joined.)"""
+    """Concatenate the per-group node dicts into one. (Delta coding is per group, so
+    each group's arrays are already cumulative before they are joined.)"""
     if len(groups) == 0:
         return None
     out = {
@@ -250,37 +257,74 @@ cdef dict _merge_dense(list groups, bint keep_metadata):
     }
     if keep_metadata:
         for name in _META_COLS:
-            out[name] = np.concatenate([g[name] for g in groups])
+            parts = [g[name] for g in groups]
+            # A column absent from some groups only (a dense group without DenseInfo
+            # next to one that has it, or next to a plain-node group) is padded with
+            # the Info default so it stays aligned with the ids.
+            if any(len(p) == 0 for p in parts) and any(len(p) > 0 for p in parts):
+                parts = [
+                    p if len(p) == len(g["id"])
+                    else np.full(len(g["id"]), -1 if name == "version" else 0,
+                                 dtype=np.int64)
+                    for p, g in zip(parts, groups)
+                ]
+            out[name] = np.concatenate(parts)
     return out
 
 
 # --- ways & relations (two-pass flat decode) ------------------------------------------
 
+cdef struct _Columns:
+    # Raw pointers into one block's flat output arrays plus the write positions, so the
+    # fill pass runs without the GIL. ``members`` is way refs or relation memids;
+    # ``types``/``roles`` are relation-only and the metadata columns are NULL when
+    # metadata is skipped.
+    int64_t* ids
+    int64_t* keys
+    int64_t* vals
+    int64_t* tags_off
+    int64_t* members
+    int64_t* members_off
+    int64_t* types
+    int64_t* roles
+    int64_t* version
+    int64_t* timestamp
+    int64_t* changeset
+    int64_t* uid
+    int64_t* user_sid
+    int64_t* visible
+    bint keep_metadata
+    Py_ssize_t ei, ti, mi       # next element / tag / member write position
+
+
+cdef int64_t* _data(arr):
+    """Pointer to the first item of a contiguous ``int64`` array (NULL when empty)."""
+    cdef int64_t[::1] view = arr
+    if view.shape[0] == 0:
+        return NULL
+    return &view[0]
+
+
 cdef class _ElementArrays:
     """Flat output buffers for one block's ways or relations, sized exactly by a
-    counting pass and then filled in a single pass. ``members`` is way refs or relation
-    memids; ``types``/``roles`` are relation-only. ``*_off`` are CSR offsets so element
-    ``i`` owns ``members[members_off[i]:members_off[i + 1]]`` (and likewise its tags)."""
-    cdef int64_t[::1] ids, keys, vals, tags_off, members, members_off, types, roles
-    cdef int64_t[::1] version, timestamp, changeset, uid, user_sid, visible
-    cdef bint keep_metadata, is_relation
-    cdef Py_ssize_t ei, ti, mi          # next element / tag / member write position
+    counting pass and then filled in a single pass through ``cols``. ``*_off`` are CSR
+    offsets so element ``i`` owns ``members[members_off[i]:members_off[i + 1]]`` (and
+    likewise its tags). The numpy arrays in ``_arr`` own the memory ``cols`` points
+    into."""
+    cdef _Columns cols
+    cdef bint is_relation
     cdef dict _arr                      # the owning numpy arrays, by name
 
     def __cinit__(self, Py_ssize_t n_elem, Py_ssize_t n_tags, Py_ssize_t n_members,
                   bint keep_metadata, bint is_relation):
-        self.keep_metadata = keep_metadata
         self.is_relation = is_relation
-        self.ei = 0
-        self.ti = 0
-        self.mi = 0
         self._arr = {
             "id": np.empty(n_elem, np.int64),
             "keys": np.empty(n_tags, np.int64),
             "vals": np.empty(n_tags, np.int64),
-            "tags_off": np.empty(n_elem + 1, np.int64),
+            "tags_off": np.zeros(n_elem + 1, np.int64),
             "members": np.empty(n_members, np.int64),
-            "members_off": np.empty(n_elem + 1, np.int64),
+            "members_off": np.zeros(n_elem + 1, np.int64),
         }
         if is_relation:
             self._arr["types"] = np.empty(n_members, np.int64)
@@ -288,24 +332,32 @@ cdef class _ElementArrays:
         if keep_metadata:
             for name in _META_COLS:
                 self._arr[name] = np.empty(n_elem, np.int64)
-        self.ids = self._arr["id"]
-        self.keys = self._arr["keys"]
-        self.vals = self._arr["vals"]
-        self.tags_off = self._arr["tags_off"]
-        self.members = self._arr["members"]
-        self.members_off = self._arr["members_off"]
-        self.tags_off[0] = 0
-        self.members_off[0] = 0
-        if is_relation:
-            self.types = self._arr["types"]
-            self.roles = self._arr["roles"]
+        self.cols.keep_metadata = keep_metadata
+        self.cols.ei = 0
+        self.cols.ti = 0
+        self.cols.mi = 0
+        self.cols.ids = _data(self._arr["id"])
+        self.cols.keys = _data(self._arr["keys"])
+        self.cols.vals = _data(self._arr["vals"])
+        self.cols.tags_off = _data(self._arr["tags_off"])
+        self.cols.members = _data(self._arr["members"])
+        self.cols.members_off = _data(self._arr["members_off"])
+        self.cols.types = _data(self._arr["types"]) if is_relation else NULL
+        self.cols.roles = _data(self._arr["roles"]) if is_relation else NULL
         if keep_metadata:
-            self.version = self._arr["version"]
-            self.timestamp = self._arr["timestamp"]
-            self.changeset = self._arr["changeset"]
-            self.uid = self._arr["uid"]
-            self.user_sid = self._arr["user_sid"]
-            self.visible = self._arr["visible"]
+            self.cols.version = _data(self._arr["version"])
+            self.cols.timestamp = _data(self._arr["timestamp"])
+            self.cols.changeset = _data(self._arr["changeset"])
+            self.cols.uid = _data(self._arr["uid"])
+            self.cols.user_sid = _data(self._arr["user_sid"])
+            self.cols.visible = _data(self._arr["visible"])
+        else:
+            self.cols.version = NULL
+            self.cols.timestamp = NULL
+            self.cols.changeset = NULL
+            self.cols.uid = NULL
+            self.cols.user_sid = NULL
+            self.cols.visible = NULL
 
     cdef dict result(self):
         cdef str member = "memids" if self.is_relation else "refs"
@@ -321,14 +373,14 @@ cdef class _ElementArrays:
         if self.is_relation:
             out["types"] = self._arr["types"]
             out["roles"] = self._arr["roles"]
-        if self.keep_metadata:
+        if self.cols.keep_metadata:
             for name in _META_COLS:
                 out[name] = self._arr[name]
         return out
 
 
 cdef void _fill_metadata(const unsigned char* buf, Py_ssize_t start, Py_ssize_t end,
-                         _ElementArrays b, Py_ssize_t i):
+                         _Columns* b, Py_ssize_t i) noexcept nogil:
     """Decode an ``Info`` sub-message (or the proto2 default when absent) into ``b``'s
     per-element metadata arrays at index ``i``. Info fields are plain absolute values."""
     cdef int64_t version = -1, timestamp = 0, changeset = 0
@@ -366,7 +418,7 @@ cdef void _fill_metadata(const unsigned char* buf, Py_ssize_t start, Py_ssize_t
 
 cdef void _count_element(const unsigned char* buf, Py_ssize_t start, Py_ssize_t end,
                          int keys_field, int members_field, Py_ssize_t* n_tags,
-                         Py_ssize_t* n_members) nogil:
+                         Py_ssize_t* n_members) noexcept nogil:
     """Add one way/relation's tag and member counts to the running totals, so the flat
     arrays can be sized exactly. (keys and vals share a count; types/roles share the
     member count.)"""
@@ -388,8 +440,8 @@ cdef void _count_element(const unsigned char* buf, Py_ssize_t start, Py_ssize_t
 
 
 cdef void _fill_way(const unsigned char* buf, Py_ssize_t start, Py_ssize_t end,
-                    _ElementArrays b):
-    """Decode one ``Way`` into the builder at its current write positions."""
+                    _Columns* b) noexcept nogil:
+    """Decode one ``Way`` into the columns at their current write positions."""
     cdef Py_ssize_t pos = start, f_start
     cdef Py_ssize_t info_start = -1, info_end = -1
     cdef int field, wire
@@ -428,8 +480,8 @@ cdef void _fill_way(const unsigned char* buf, Py_ssize_t start, Py_ssize_t end,
 
 
 cdef void _fill_relation(const unsigned char* buf, Py_ssize_t start, Py_ssize_t end,
-                         _ElementArrays b):
-    """Decode one ``Relation`` into the builder. Members carry an id (delta), a type and
+                         _Columns* b) noexcept nogil:
+    """Decode one ``Relation`` into the columns. Members carry an id (delta), a type and
     a role, all the same count, sharing the member offsets."""
     cdef Py_ssize_t pos = start, f_start
     cdef Py_ssize_t info_start = -1, info_end = -1
@@ -472,64 +524,165 @@ cdef void _fill_relation(const unsigned char* buf, Py_ssize_t start, Py_ssize_t
     b.ei += 1
 
 
-cdef dict _decode_elements(const unsigned char* buf, list group_ranges,
-                           int element_field, int keys_field, int members_field,
-                           bint keep_metadata, bint is_relation):
-    """Two-pass decode of every ``element_field`` (way or relation) across the block's
-    groups: count to size the flat arrays, then fill them. Returns ``None`` if there
-    are none."""
-    cdef Py_ssize_t n_elem = 0, n_tags = 0, n_members = 0
-    cdef Py_ssize_t gs, ge, pos, f_start
+cdef void _fill_node(const unsigned char* buf, Py_ssize_t start, Py_ssize_t end,
+                     _Columns* b, int64_t* lat, int64_t* lon) noexcept nogil:
+    """Decode one plain (non-dense) ``Node`` into the columns, its coordinates into
+    ``lat``/``lon``. Unlike the dense encoding, the id and coordinates are absolute."""
+    cdef Py_ssize_t pos = start, f_start
+    cdef Py_ssize_t info_start = -1, info_end = -1
     cdef int field, wire
     cdef uint64_t length
+    cdef Py_ssize_t tstart = b.ti
+    cdef Py_ssize_t n_keys = 0
+    while pos < end:
+        _read_tag(buf, &pos, end, &field, &wire)
+        if wire == WIRE_VARINT:
+            if field == NODE_ID:
+                b.ids[b.ei] = _zig_zag_decode(_read_varint(buf, &pos, end))
+            elif field == NODE_LAT:
+                lat[b.ei] = _zig_zag_decode(_read_varint(buf, &pos, end))
+            elif field == NODE_LON:
+                lon[b.ei] = _zig_zag_decode(_read_varint(buf, &pos, end))
+            else:
+                _read_varint(buf, &pos, end)
+        elif wire == WIRE_LENGTH:
+            length = _read_varint(buf, &pos, end)
+            f_start = pos
+            pos += <Py_ssize_t>length
+            if field == NODE_KEYS:
+                n_keys = _fill_packed(buf, f_start, pos, False, b.keys, tstart)
+            elif field == NODE_VALS:
+                _fill_packed(buf, f_start, pos, False, b.vals, tstart)
+            elif field == NODE_INFO:
+                info_start = f_start
+                info_end = pos
+        else:
+            _skip_field(buf, &pos, end, wire)
+    b.ti = tstart + n_keys
+    b.tags_off[b.ei + 1] = b.ti
+    b.members_off[b.ei + 1] = 0
+    if b.keep_metadata:
+        _fill_metadata(buf, info_start, info_end, b, b.ei)
+    b.ei += 1
+
 
-    for gr in group_ranges:
-        gs = gr[0]
-        ge = gr[1]
-        pos = gs
+cdef void _scan_elements(const unsigned char* buf, const Py_ssize_t* ranges,
+                         Py_ssize_t n_ranges, int element_field, int keys_field,
+                         int members_field, _Columns* b, int kind,
+                         Py_ssize_t* n_elem, Py_ssize_t* n_tags,
+                         Py_ssize_t* n_members, int64_t* lat, int64_t* lon) noexcept nogil:
+    """Walk every ``element_field`` sub-message of the groups spanning ``ranges``
+    (``[start0, end0, start1, end1, ...]``). With ``b`` NULL this is the counting pass
+    (totals into ``n_*``); otherwise each element is filled into ``b`` by the decoder
+    for ``kind`` (way, relation or plain node, the latter also writing ``lat``/``lon``)."""
+    cdef Py_ssize_t g, ge, pos, f_start
+    cdef int field, wire
+    cdef uint64_t length
+    for g in range(n_ranges):
+        pos = ranges[2 * g]
+        ge = ranges[2 * g + 1]
         while pos < ge:
             _read_tag(buf, &pos, ge, &field, &wire)
             if wire == WIRE_LENGTH:
                 length = _read_varint(buf, &pos, ge)
                 f_start = pos
                 pos += <Py_ssize_t>length
-                if field == element_field:
-                    n_elem += 1
+                if field != element_field:
+                    continue
+                if b == NULL:
+                    n_elem[0] += 1
                     _count_element(buf, f_start, pos, keys_field, members_field,
-                                   &n_tags, &n_members)
+                                   n_tags, n_members)
+                elif kind == GROUP_RELATIONS:
+                    _fill_relation(buf, f_start, pos, b)
+                elif kind == GROUP_WAYS:
+                    _fill_way(buf, f_start, pos, b)
+                else:
+                    _fill_node(buf, f_start, pos, b, lat, lon)
             else:
                 _skip_field(buf, &pos, ge, wire)
+
+
+cdef dict _decode_node_group(const unsigned char* buf, Py_ssize_t start,
+                             Py_ssize_t end, bint keep_metadata):
+    """Decode a group of plain ``Node`` messages into the same dict shape as a dense
+    group, so callers handle both encodings alike: the per-node keys/vals are rebuilt
+    into a 0-delimited ``keys_vals`` stream and the ``Info`` metadata into flat columns."""
+    cdef Py_ssize_t n_elem = 0, n_tags = 0, n_members = 0
+    cdef Py_ssize_t i, p, j
+    cdef Py_ssize_t[2] group_range
+    group_range[0] = start
+    group_range[1] = end
+
+    with nogil:
+        _scan_elements(buf, group_range, 1, GROUP_NODES, NODE_KEYS, 0, NULL,
+                       GROUP_NODES, &n_elem, &n_tags, &n_members, NULL, NULL)
+
+    cdef _ElementArrays b = _ElementArrays(n_elem, n_tags, 0, keep_metadata, False)
+    lat_arr = np.empty(n_elem, np.int64)
+    lon_arr = np.empty(n_elem, np.int64)
+    cdef int64_t* lat = _data(lat_arr)
+    cdef int64_t* lon = _data(lon_arr)
+    # As in the dense encoding, a group whose nodes carry no tags has an empty stream.
+    keys_vals = np.empty(2 * n_tags + n_elem if n_tags > 0 else 0, np.int64)
+    cdef int64_t* kv = _data(keys_vals)
+    with nogil:
+        _scan_elements(buf, group_range, 1, GROUP_NODES, 0, 0, &b.cols,
+                       GROUP_NODES, NULL, NULL, NULL, lat, lon)
+        if n_tags > 0:
+            j = 0
+            for i in range(n_elem):
+                for p in range(b.cols.tags_off[i], b.cols.tags_off[i + 1]):
+                    kv[j] = b.cols.keys[p]
+                    kv[j + 1] = b.cols.vals[p]
+                    j += 2
+                kv[j] = 0
+                j += 1
+
+    elements = b.result()
+    node = {"id": elements["id"], "lat": lat_arr, "lon": lon_arr,
+            "keys_vals": keys_vals}
+    if keep_metadata:
+        for name in _META_COLS:
+            node[name] = elements[name]
+    return node
+
+
+cdef dict _decode_elements(const unsigned char* buf, list group_ranges,
+                           int element_field, int keys_field, int members_field,
+                           bint keep_metadata, bint is_relation):
+    """Two-pass decode of every ``element_field`` (way or relation) across the block's
+    groups: count to size the flat arrays, then fill them. Both passes run without the
+    GIL. Returns ``None`` if there are none."""
+    cdef Py_ssize_t n_elem = 0, n_tags = 0, n_members = 0
+    if len(group_ranges) == 0:
+        return None
+    cdef Py_ssize_t[:, ::1] ranges = np.asarray(group_ranges, dtype=np.intp)
+    cdef Py_ssize_t n_ranges = ranges.shape[0]
+
+    with nogil:
+        _scan_elements(buf, &ranges[0, 0], n_ranges, element_field, keys_field,
+                       members_field, NULL, element_field, &n_elem, &n_tags,
+                       &n_members, NULL, NULL)
     if n_elem == 0:
         return None
 
     cdef _ElementArrays b = _ElementArrays(n_elem, n_tags, n_members, keep_metadata,
                                            is_relation)
-    for gr in group_ranges:
-        gs = gr[0]
-        ge = gr[1]
-        pos = gs
-        while pos < ge:
-            _read_tag(buf, &pos, ge, &field, &wire)
-            if wire == WIRE_LENGTH:
-                length = _read_varint(buf, &pos, ge)
-                f_start = pos
-                pos += <Py_ssize_t>length
-                if field == element_field:
-                    if is_relation:
-                        _fill_relation(buf, f_start, pos, b)
-                    else:
-                        _fill_way(buf, f_start, pos, b)
-            else:
-                _skip_field(buf, &pos, ge, wire)
+    with nogil:
+        _scan_elements(buf, &ranges[0, 0], n_ranges, element_field, 0, 0, &b.cols,
+                       element_field, NULL, NULL, NULL, NULL, NULL)
     return b.result()
 
 
-cdef void _collect_dense(const unsigned char* buf, Py_ssize_t start, Py_ssize_t end,
-                         bint keep_metadata, list dense_groups):
-    """Decode every ``DenseNodes`` block in one group into ``dense_groups``."""
+cdef void _collect_nodes(const unsigned char* buf, Py_ssize_t start, Py_ssize_t end,
+                         bint keep_metadata, list node_groups):
+    """Decode the nodes of one group -- a ``DenseNodes`` block or a run of plain
+    ``Node`` messages -- into ``node_groups``."""
     cdef Py_ssize_t pos = start, f_start
     cdef int field, wire
     cdef uint64_t length
+    cdef bint has_plain = False
     while pos < end:
         _read_tag(buf, &pos, end, &field, &wire)
         if wire == WIRE_LENGTH:
@@ -537,21 +690,32 @@ cdef void _collect_dense(const unsigned char* buf, Py_ssize_t start, Py_ssize_t
             f_start = pos
             pos += <Py_ssize_t>length
             if field == GROUP_DENSE:
-                dense_groups.append(
+                node_groups.append(
                     _decode_dense_group(buf, f_start, pos, keep_metadata))
+            elif field == GROUP_NODES:
+                has_plain = True
         else:
             _skip_field(buf, &pos, end, wire)
+    if has_plain:
+        node_groups.append(_decode_node_group(buf, start, end, keep_metadata))
 
 
-def decode_primitive_block(const unsigned char[::1] data, bint keep_metadata=True):
+def decode_primitive_block(const unsigned char[::1] data, bint keep_metadata=True,
+                           required_keys=None):
     """Decode a decompressed ``PrimitiveBlock`` into ``(string_table, header, nodes,
     ways, relations)``.
 
     ``string_table`` is a list of ``bytes``; ``header`` carries ``granularity`` /
     ``date_granularity`` / ``lat_offset`` / ``lon_offset``. ``nodes`` / ``ways`` /
     ``relations`` are dicts of numpy arrays (or ``None`` when the block has none of
-    that element). Tag and member arrays use CSR ``*_off`` offsets. When
+    that element); plain ``Node`` groups are returned in the dense-node layout. Tag and
+    member arrays use CSR ``*_off`` offsets. When
     ``keep_metadata`` is False the per-element version/timestamp/etc. are skipped.
+
+    ``required_keys`` (an iterable of ``bytes`` tag keys) is a prefilter: when none of
+    them is in the block's string table, no element of the block can carry one, so the
+    way and relation groups are skipped (returned as ``None``) and the nodes are decoded
+    without metadata -- only their ids, coordinates and tag stream.
     """
     cdef Py_ssize_t end = data.shape[0]
     if end == 0:
@@ -566,8 +730,10 @@ def decode_primitive_block(const unsigned char[::1] data, bint keep_metadata=Tru
     string_table = []
     header = {"granularity": 100, "date_granularity": 1000,
               "lat_offset": 0, "lon_offset": 0}
-    dense_groups = []
+    node_groups = []
     group_ranges = []
+    # -1 until the first group: then whether the block's elements are wanted at all.
+    cdef int keep_elements = -1
 
     while pos < end:
         _read_tag(buf, &pos, end, &field, &wire)
@@ -589,12 +755,23 @@ def decode_primitive_block(const unsigned char[::1] data, bint keep_metadata=Tru
             if field == PB_STRINGTABLE:
                 string_table = _decode_string_table(buf, f_start, pos)
             elif field == PB_PRIMITIVEGROUP:
+                if keep_elements < 0:
+                    # Writers emit the string table (field 1) before the groups; should
+                    # it come later, the block is conservatively decoded in full.
+                    keep_elements = (
+                        required_keys is None
+                        or len(string_table) == 0
+                        or not set(string_table).isdisjoint(required_keys)
+                    )
                 group_ranges.append((f_start, pos))
-                _collect_dense(buf, f_start, pos, keep_metadata, dense_groups)
+                _collect_nodes(buf, f_start, pos, keep_metadata and keep_elements,
+                               node_groups)
         else:
             _skip_field(buf, &pos, end, wire)
 
-    nodes = _merge_dense(dense_groups, keep_metadata)
+    nodes = _merge_dense(node_groups, keep_metadata and keep_elements != 0)
+    if keep_elements == 0:
+        return string_table, header, nodes, None, None
     ways = _decode_elements(buf, group_ranges, GROUP_WAYS, WAY_KEYS, WAY_REFS,
                             keep_metadata, False)
     relations = _decode_elements(buf, group_ranges, GROUP_RELATIONS, REL_KEYS,
@@ -1,4 +1,7 @@
+import functools
+import inspect
 import warnings
+import weakref
 
 import pandas as pd
 from pyrosm.config import Conf
@@ -16,11 +19,14 @@ from pyrosm.utils import (
     validate_graph_type,
     validate_engine,
     validate_workers,
+    validate_max_memory,
+    validate_chunk_size,
     get_bounding_box,
     get_unix_time,
     warn_about_timestamp_not_set,
     warn_about_single_core,
 )
+from pyrosm.utils import _compat
 from pyrosm.utils.download import get_file_size
 from shapely.geometry import (
     Polygon,
@@ -43,6 +49,51 @@ from pyrosm.graphs import to_networkx, to_igraph, to_pandana, to_pandarm
 from pyrosm import engine as engine_backend
 
 
+def _result_cached(method):
+    """Serve an in-memory feature read from the engine's persistent result cache (see
+    :mod:`pyrosm.engine.cache`) when the reader was constructed with ``cache=True``: the read is
+    keyed like the out-of-core layers -- on the source file, the method and its arguments, the
+    reader options and (for history reads) the resolved unix time, or ``"latest"`` without a
+    ``timestamp`` -- and materialized to a GeoParquet the first time, so an identical read in
+    a later process skips parsing the PBF. Reads routed to the out-of-core engine use its own
+    cache and pass straight through; any other read resets :attr:`OSM.last_read_stats`.
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def read(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        params = dict(bound.arguments)
+        del params["self"]
+        timestamp = params.pop("timestamp", None)
+        if self._use_engine(timestamp):
+            return method(self, *args, **kwargs)
+        # The in-memory reader records no phases: drop an earlier out-of-core read's report
+        # rather than leave it standing for this read.
+        self.last_read_stats = None
+        if not (self.cache and _compat.HAS_PYARROW):
+            return method(self, *args, **kwargs)
+        return self._cached_read(
+            method.__name__, params, timestamp, lambda: method(self, *args, **kwargs)
+        )
+
+    return read
+
+
+def _iter_frame_chunks(gdf, chunk_size, as_arrow):
+    """Yield ``gdf`` in row slices of ``chunk_size`` (as ``pyarrow.RecordBatch`` chunks with
+    ``as_arrow``); nothing for an empty result."""
+    from pyrosm.engine.assemble import _to_arrow
+    from pyrosm.engine.geoparquet import _record_batch
+
+    if gdf is None:
+        return
+    for start in range(0, len(gdf), chunk_size):
+        chunk = gdf.iloc[start : start + chunk_size].reset_index(drop=True)
+        yield _record_batch(_to_arrow(chunk)) if as_arrow else chunk
+
+
 class OSM:
     """
     OpenStreetMap PBF reader object.
@@ -109,12 +160,76 @@ class OSM:
         file. By default (`None`) the engine reads on a single core, and the first
         out-of-core read reports how many CPU cores are available and how to opt
         into parallelism. Pass `workers="auto"` to let pyrosm choose the count
-        automatically -- a single core for small files and one worker per CPU core
-        for larger files -- or `workers=N` for an explicit count (a count above the
-        available CPU cores is reduced to the core count, with a warning). Parallel
+        automatically -- the count with the lowest estimated read time for the
+        file's blobs, given this machine's pool start-up cost and decode speed
+        (measured once and saved in the cache directory) and the available memory:
+        a single core for small files, a few workers for mid-size ones and one per
+        CPU core for large ones -- or `workers=N` for an explicit count (a count
+        above the available CPU cores is reduced to the core count, with a
+        warning). Parallel
         reads need the `if __name__ == "__main__":` guard on macOS/Windows; pass
-        `workers=1` to read on a single core silently. Has no effect on the
-        `'in_memory'` engine.
+        `workers=1` to read on a single core silently.
+
+        A parallel `'out_of_core'` read starts a pool of worker processes that the
+        `OSM` object keeps for its later reads, so the workers start (and import
+        pyrosm) once rather than for every read. Release them with :meth:`close`,
+        or use the object as a context manager::
+
+            with OSM(fp, engine="out_of_core", workers=8) as osm:
+                buildings = osm.get_buildings()
+                roads = osm.get_network()
+
+        With the `'in_memory'` engine (and for history reads) `workers` is the
+        number of threads that inflate and decode the file's blocks; the blocks
+        are still merged in file order, so the result is identical to a
+        single-threaded read. Threads need no `__main__` guard. The default
+        (`None`) reads on a single thread; `workers="auto"` reads on a thread per
+        CPU core (a single one for small files).
+
+    decode_cache : bool (default: False)
+        With the `'out_of_core'` engine, keep the decoded file (node coordinates,
+        way refs and the resolved tags of every tagged element) in a persistent
+        cache next to the engine's result cache (see :meth:`list_cache`). The first
+        read decodes the file once; any later read of it -- with any
+        `custom_filter`, tag columns or feature method, in this or a later
+        process -- skips decoding and only collects and assembles its layer. The
+        decoded file takes disk space comparable to the PBF; remove it with
+        :meth:`clear_cache`. Ignored by the in-memory engine.
+
+    cache : bool (default: False)
+        With the `'in_memory'` engine, cache each feature read's result as a
+        GeoParquet in the same persistent cache the `'out_of_core'` engine always
+        uses (see :meth:`list_cache`). An identical later read -- in this or a
+        later process -- reads the GeoParquet back instead of parsing the PBF.
+        History reads are keyed by their resolved timestamp. Requires the optional
+        `pyarrow`; without it the reads are not cached.
+
+    max_memory : int | str (default: None)
+        A memory budget for the `'out_of_core'` engine's reads, in bytes or as a
+        size such as `"8GB"`, `"512MB"` or `"8Gi"`. The engine sizes the read to
+        stay within it rather than by its defaults: fewer worker processes
+        (reducing an explicit `workers` count, with a warning), smaller decoded
+        shards, fewer ways per chunk when a layer is streamed (`output=` and
+        `iter_layer`), and temp shards kept in shared memory only within the
+        budget. A tight budget trades speed for memory; the output is the same.
+        The budget covers the engine's working memory, not the returned
+        GeoDataFrame, so stream large layers to stay within it. By default
+        (`None`) the reads are sized for speed. Ignored by the in-memory engine.
+
+    Attributes
+    ----------
+
+    last_read_stats : ReadStats | None
+        Where the last `'out_of_core'` feature read spent its time: a
+        `pyrosm.engine.stats.ReadStats` report of each phase it ran (`index`,
+        `decode`, `collect`, `node_gather`, `assemble`, `cache_write`) with its
+        wall time and peak resident memory, plus the bytes read and inflated, the
+        shard bytes, the rows per element kind and the decode workers'
+        utilisation. `last_read_stats.to_dict()` gives it as plain values, e.g.
+        to send to a metrics system. A read answered from the result cache runs
+        no phases. For `iter_layer` the report fills in as the chunks are
+        consumed. `None` before the first out-of-core read, and after a read by
+        the in-memory reader (e.g. a history read).
     """
 
     allowed_bbox_types = [
@@ -133,6 +248,9 @@ class OSM:
         complete_relations=False,
         engine="in_memory",
         workers=None,
+        decode_cache=False,
+        cache=False,
+        max_memory=None,
     ):
         # Check input file
         self.filepath = validate_input_file(filepath)
@@ -147,7 +265,19 @@ class OSM:
 
         self.engine = validate_engine(engine)
         self.workers = validate_workers(workers)
+        if not isinstance(decode_cache, bool):
+            raise ValueError("'decode_cache' should be a boolean.")
+        self.decode_cache = decode_cache
+        if not isinstance(cache, bool):
+            raise ValueError("'cache' should be a boolean.")
+        self.cache = cache
+        self.max_memory = validate_max_memory(max_memory)
+        self.last_read_stats = None
         self._single_core_notice_emitted = False
+        # The worker pool the parallel engine reads share (started by the first one), and
+        # the finalizer that closes it should the object be collected unclosed.
+        self._worker_pool = None
+        self._worker_pool_finalizer = None
 
         # Check if file contains history
         self._osh_file = False
@@ -212,11 +342,46 @@ class OSM:
         materialised multi-version frame, so history is read in memory."""
         return self.engine == "out_of_core" and timestamp is None and not self._osh_file
 
+    def close(self):
+        """
+        Shut down the worker processes kept for parallel ``'out_of_core'`` reads.
+
+        The object stays usable: a later parallel read starts a new pool. Leaving a
+        ``with OSM(...) as osm:`` block closes it.
+        """
+        if self._worker_pool is not None:
+            self._worker_pool_finalizer()
+            self._worker_pool = None
+            self._worker_pool_finalizer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def _shared_pool(self):
+        """The worker pool of this object's parallel engine reads (``None`` for a read on a
+        single core), created on first use."""
+        from pyrosm.engine import pool
+
+        if self.workers is None or self.workers == 1:
+            return None
+        if self._worker_pool is None:
+            self._worker_pool = pool.WorkerPool(self.workers)
+            self._worker_pool_finalizer = weakref.finalize(
+                self, self._worker_pool.close
+            )
+        return self._worker_pool
+
     def _read_engine(self, reader, with_relations=True, **kwargs):
         """Route a feature read to the given out-of-core engine reader, threading the
-        constructor-level ``bounding_box`` / ``keep_metadata`` / ``workers`` (and
-        ``complete_relations`` for the layer readers). Only non-history reads reach here;
-        history reads use the in-memory path (see :meth:`_use_engine`)."""
+        constructor-level ``bounding_box`` / ``keep_metadata`` / ``workers`` /
+        ``decode_cache`` (and ``complete_relations`` for the layer readers), within the
+        ``max_memory`` budget, recording the read's :attr:`last_read_stats`. Only non-history
+        reads reach here; history reads use the in-memory path (see :meth:`_use_engine`).
+        """
         workers = self.workers
         if workers is None:
             workers = 1
@@ -226,9 +391,68 @@ class OSM:
         kwargs["bounding_box"] = self.bounding_box
         kwargs["keep_metadata"] = self.keep_metadata
         kwargs["workers"] = workers
+        kwargs["decode_cache"] = self.decode_cache
         if with_relations:
             kwargs["complete_relations"] = self.complete_relations
-        return reader(self.filepath, **kwargs)
+        from pyrosm.engine import memory, pool, stats
+
+        with stats.recording() as report, memory.limited(self.max_memory):
+            self.last_read_stats = report
+            worker_pool = self._shared_pool()
+            with pool.attached(worker_pool):
+                result = reader(self.filepath, **kwargs)
+        if inspect.isgenerator(result):
+            # iter_layer: the reads happen as the chunks are consumed.
+            result = stats.recording_iter(report, result)
+            result = memory.limited_iter(self.max_memory, result)
+            return pool.attached_iter(worker_pool, result)
+        return result
+
+    def _cached_read(self, method_name, params, timestamp, read):
+        """Materialize ``read()`` (the uncached feature read) in the result cache, keyed on
+        ``method_name`` and its ``params`` plus the reader's options, and return the cached
+        result (see :func:`_result_cached`)."""
+        from pyrosm.engine import cache
+        from pyrosm.engine.readers import (
+            _write_parquet,
+            _write_network_pair,
+            _read_nodes_parquet,
+        )
+
+        unix_time = None
+        if timestamp is not None:
+            unix_time = get_unix_time(timestamp, self._osh_file)
+        elif self._osh_file:
+            # A history read without a timestamp selects each element's latest version, which
+            # does not change with the current time the read resolves it to.
+            unix_time = "latest"
+        key_params = {
+            "in_memory": method_name,
+            "params": params,
+            "bounding_box": self.bounding_box,
+            "keep_metadata": self.keep_metadata,
+            "complete_relations": self.complete_relations,
+            "keep_node_info": self.keep_node_info,
+            "unix_time": unix_time,
+        }
+        if method_name == "get_network" and params["nodes"]:
+            nodes, edges = cache.materialize_pair(
+                cache.result_path(self.filepath, {**key_params, "part": "edges"}),
+                cache.result_path(self.filepath, {**key_params, "part": "nodes"}),
+                lambda e_tmp, n_tmp: _write_network_pair(read(), e_tmp, n_tmp),
+                read_nodes=_read_nodes_parquet,
+            )
+            result = (nodes, edges)
+        else:
+            edges = result = cache.materialize(
+                cache.result_path(self.filepath, key_params),
+                lambda tmp_path: _write_parquet(read(), tmp_path),
+            )
+        # The network type travels with the edges (see get_network); restore it on the frame
+        # read back from the cache.
+        if method_name == "get_network" and edges is not None:
+            edges._metadata.append(params["network_type"])
+        return result
 
     def _get_pbf_elements(self, bounding_box):
         (
@@ -244,6 +468,7 @@ class OSM:
             unix_time_filter=self._current_timestamp,
             keep_metadata=self.keep_metadata,
             complete_relations=self.complete_relations,
+            workers=self.workers,
         )
 
         self._nodes = nodes
@@ -311,6 +536,7 @@ class OSM:
             self._set_current_time(unix_time)
             warn_about_timestamp_not_set(unix_time)
 
+    @_result_cached
     def get_network(
         self,
         network_type="walking",
@@ -496,6 +722,7 @@ class OSM:
             return (node_gdf, edges)
         return edges
 
+    @_result_cached
     def get_buildings(
         self,
         custom_filter=None,
@@ -585,6 +812,7 @@ class OSM:
                 gdf = gdf.drop("nodes", axis=1)
         return gdf
 
+    @_result_cached
     def get_landuse(
         self,
         custom_filter=None,
@@ -676,6 +904,7 @@ class OSM:
                 gdf = gdf.drop("nodes", axis=1)
         return gdf
 
+    @_result_cached
     def get_natural(
         self,
         custom_filter=None,
@@ -767,6 +996,7 @@ class OSM:
                 gdf = gdf.drop("nodes", axis=1)
         return gdf
 
+    @_result_cached
     def get_boundaries(
         self,
         boundary_type="administrative",
@@ -883,6 +1113,7 @@ class OSM:
                 gdf = gdf.drop("nodes", axis=1)
         return gdf
 
+    @_result_cached
     def get_pois(
         self,
         custom_filter=None,
@@ -1016,6 +1247,7 @@ class OSM:
                 gdf = gdf.drop("nodes", axis=1)
         return gdf
 
+    @_result_cached
     def get_data_by_custom_criteria(
         self,
         custom_filter=None,
@@ -1205,6 +1437,126 @@ class OSM:
                 gdf = gdf.drop("nodes", axis=1)
         return gdf
 
+    def get_layers(self, layers, timestamp=None):
+        """
+        Parse several layers from OSM with a single read of the file.
+
+        Parameters
+        ----------
+
+        layers : list | dict
+            The layers to parse, named by their method without the ``get_`` prefix:
+            ``"network"``, ``"buildings"``, ``"landuse"``, ``"natural"``, ``"pois"``,
+            ``"boundaries"`` or ``"data_by_custom_criteria"``. A dict maps each name to
+            the keyword arguments of its method, e.g.::
+
+                layers={"network": {"network_type": "driving"},
+                        "pois": {"custom_filter": {"amenity": True}}}
+
+        timestamp: str | datetime | int
+            If provided, the data from given moment of time will be returned
+            (see :meth:`get_buildings`).
+
+        Returns
+        -------
+
+        dict of layer name -> the result of its method (``None`` for an empty layer)
+
+        Notes
+        -----
+
+        With ``engine='out_of_core'`` the file is decoded once for all the layers
+        (selecting the union of their filter keys) instead of once per layer. The
+        in-memory engine reads the file once anyway and reuses it across the layers.
+        """
+        from pyrosm.engine.readers import _LAYER_READS
+
+        if isinstance(layers, str):
+            layers = [layers]
+        if not isinstance(layers, dict):
+            layers = {name: {} for name in layers}
+        for name in layers:
+            if name not in _LAYER_READS:
+                raise ValueError(
+                    "Unknown layer %r; 'layers' should name any of: %s."
+                    % (name, ", ".join(_LAYER_READS))
+                )
+
+        if self._use_engine(timestamp):
+            return self._read_engine(engine_backend.get_layers, layers=layers)
+
+        return {
+            name: getattr(self, "get_" + name)(timestamp=timestamp, **(kwargs or {}))
+            for name, kwargs in layers.items()
+        }
+
+    def iter_layer(
+        self, layer, chunk_size=None, as_arrow=False, timestamp=None, **kwargs
+    ):
+        """
+        Parse a layer from OSM as a stream of chunks instead of one GeoDataFrame.
+
+        Parameters
+        ----------
+
+        layer : str
+            The layer to parse, named like in :meth:`get_layers` (any but ``"network"``).
+
+        chunk_size : int (optional)
+            The number of ways assembled per chunk (default 250 000, fewer within a
+            ``max_memory`` budget).
+
+        as_arrow : bool
+            If True, yield ``pyarrow.RecordBatch`` chunks (WKB geometry) instead of
+            GeoDataFrames. Requires ``pyarrow``.
+
+        timestamp: str | datetime | int
+            If provided, the data from given moment of time will be returned
+            (see :meth:`get_buildings`).
+
+        **kwargs
+            The other keyword arguments of the layer's method, e.g.
+            ``custom_filter`` of :meth:`get_buildings`.
+
+        Returns
+        -------
+
+        generator of GeoDataFrame | pyarrow.RecordBatch
+
+        Notes
+        -----
+
+        With ``engine='out_of_core'`` each chunk is yielded as soon as it is assembled
+        (the point nodes, then the ways ``chunk_size`` at a time, then the relations),
+        so a consumer can start before the whole layer exists and memory stays bounded
+        by one chunk. A chunk carries only the tag columns occurring in it, so the
+        columns can differ between chunks. The in-memory engine parses the whole layer
+        and yields it in slices of ``chunk_size`` rows.
+        """
+        from pyrosm.engine.readers import _LAYER_READS
+        from pyrosm.engine.geoparquet import _OUTPUT_CHUNK_SIZE
+
+        if layer not in _LAYER_READS or layer == "network":
+            raise ValueError(
+                "Unknown layer %r; 'layer' should be any of: %s."
+                % (layer, ", ".join(name for name in _LAYER_READS if name != "network"))
+            )
+
+        if self._use_engine(timestamp):
+            return self._read_engine(
+                engine_backend.iter_layer,
+                layer=layer,
+                chunk_size=chunk_size,
+                as_arrow=as_arrow,
+                **kwargs,
+            )
+
+        chunk_size = validate_chunk_size(chunk_size) or _OUTPUT_CHUNK_SIZE
+        if as_arrow:
+            _compat.require_pyarrow()
+        gdf = getattr(self, "get_" + layer)(timestamp=timestamp, **kwargs)
+        return _iter_frame_chunks(gdf, chunk_size, as_arrow)
+
     def to_pbf(
         self,
         output_path=None,
@@ -1539,9 +1891,11 @@ class OSM:
             )
 
     @staticmethod
-    def list_cache(filepath=None):
+    def list_cache(filepath=None, stats=False):
         """List the out-of-core engine's cached layer files -- the GeoParquet files that
-        ``engine="out_of_core"`` reads write under ``<tempdir>/pyrosm/cache``.
+        ``engine="out_of_core"`` reads write under the cache directory (``<tempdir>/pyrosm/cache``
+        unless set with :meth:`configure_cache`), and the decoded-file directories of
+        ``decode_cache=True`` reads.
 
         Parameters
         ----------
@@ -1550,14 +1904,52 @@ class OSM:
             When given, only the cached layers for that source PBF are listed; when ``None``
             (default) every cached file is listed.
 
+        stats : bool (default: False)
+            When True, return the listing together with the cache's statistics.
+
         Returns
         -------
-        list of str
-            The cached files' paths.
+        list of str | dict
+            The cached files' paths. With ``stats=True`` a dict with those paths under
+            ``"files"``, plus the cache ``"directory"``, the ``"entries"`` and ``"bytes"`` it
+            holds, its ``"max_bytes"`` budget, and this process's ``"hits"``, ``"misses"``,
+            ``"evictions"``, ``"bytes_written"`` and ``"bytes_evicted"``.
+        """
+        from pyrosm.engine import cache
+
+        files = cache.list_files(filepath)
+        if not stats:
+            return files
+        return {"files": files, **cache.stats()}
+
+    @staticmethod
+    def configure_cache(directory=None, max_bytes=None, index_beside_source=False):
+        """Set where the engine's cache lives and how large it may grow, for this process.
+
+        Parameters
+        ----------
+
+        directory : str | os.PathLike (optional)
+            The cache directory, e.g. a shared one on fast local disk. When ``None``
+            (default) the ``PYROSM_CACHE_DIR`` environment variable is used, else
+            ``<tempdir>/pyrosm/cache``.
+
+        max_bytes : int (optional)
+            The cache's byte budget. Once a write takes the cache over it, the least
+            recently used entries are evicted until it fits; a cache hit counts as a use.
+            When ``None`` (default) the ``PYROSM_CACHE_MAX_BYTES`` environment variable is
+            used, else the cache is unbounded.
+
+        index_beside_source : bool (default: False)
+            The first full read of a file saves an index of its blobs, which lets later
+            reads skip the blobs they do not need. By default it is kept in the cache
+            directory; with ``True`` it is saved next to the source file, as
+            ``<file>.pbfidx``, so it stays with the file (in the cache directory when the
+            file's directory is not writable).
         """
         from pyrosm.engine import cache
 
-        return cache.list_files(filepath)
+        cache.configure(directory, max_bytes, index_beside_source)
 
     @staticmethod
     def list_downloads():
@@ -1576,14 +1968,17 @@ class OSM:
     @staticmethod
     def clear_cache(filepath=None):
         """Remove the out-of-core engine's result cache -- the GeoParquet files that
-        ``engine="out_of_core"`` reads write under ``<tempdir>/pyrosm/cache``.
+        ``engine="out_of_core"`` reads write under the cache directory (see
+        :meth:`configure_cache`), and the decoded-file directories of ``decode_cache=True``
+        reads.
 
         Parameters
         ----------
 
         filepath : str | os.PathLike (optional)
-            When given, only the cached layers for that source PBF are removed; when ``None``
-            (default) the whole cache is cleared.
+            When given, only the cached layers, decoded-file directory and cache-directory
+            blob index of that source PBF are removed; when ``None`` (default) the whole cache
+            is cleared.
 
         Returns
         -------
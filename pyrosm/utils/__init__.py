@@ -208,6 +208,24 @@ def validate_workers(workers):
     return workers
 
 
+def validate_max_memory(max_memory):
+    if max_memory is None:
+        return None
+    from pyrosm.engine.memory import parse_size
+
+    return parse_size(max_memory)
+
+
+def validate_chunk_size(chunk_size):
+    if chunk_size is not None and (
+        not isinstance(chunk_size, int)
+        or isinstance(chunk_size, bool)
+        or chunk_size < 1
+    ):
+        raise ValueError("'chunk_size' should be a positive integer or None.")
+    return chunk_size
+
+
 def validate_node_gdf(nodes):
     if not isinstance(nodes, gpd.GeoDataFrame):
         raise ValueError(f"'nodes' should be a GeoDataFrame, got '{type(nodes)}'.")
@@ -0,0 +1,17 @@
+cdef class WayStore:
+    cdef readonly object id, version, timestamp, visible
+    cdef readonly object refs, refs_off
+    cdef readonly object tag_keys, tag_vals, tags_off
+    cdef readonly list key_names, values
+    cpdef dict record(self, Py_ssize_t i)
+    cpdef list records(self, indices=*)
+
+
+cdef class WayStoreBuilder:
+    cdef list _chunks, _key_names, _values
+    cdef dict _key_ids, _value_ids
+    cdef int _intern_key(self, name)
+    cdef int _intern_value(self, value)
+    cpdef add_block(self, string_table, ways, indices)
+    cpdef build_from_records(self, records)
+    cpdef WayStore build(self)
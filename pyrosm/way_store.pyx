@@ -0,0 +1,229 @@
+import numpy as np
+
+
+cdef class WayStore:
+    """Columnar store of the ways read by the in-memory reader, replacing the list
+    of per-way dicts produced previously by ``explode_way_tags``.
+
+    Node refs are kept as one flat int64 array with CSR offsets (way ``i`` owns
+    ``refs[refs_off[i]:refs_off[i + 1]]``), and tags as parallel arrays of indices
+    into two interned string tables (``key_names`` / ``values``), so a tag string
+    is held once however many ways carry it. The per-way record the filters and
+    the PBF writer read is rebuilt on demand with the exact layout of an exploded
+    way dict (``id``, ``version``, ``timestamp``, ``visible``, ``nodes``, then the
+    tags; an OSM tag keyed "id" is stored as "id_tag")."""
+
+    def __init__(self, ids, version, timestamp, visible, refs, refs_off,
+                 tag_keys, tag_vals, tags_off, list key_names, list values):
+        self.id = ids
+        self.version = version
+        self.timestamp = timestamp
+        self.visible = visible
+        self.refs = refs
+        self.refs_off = refs_off
+        self.tag_keys = tag_keys
+        self.tag_vals = tag_vals
+        self.tags_off = tags_off
+        self.key_names = key_names
+        self.values = values
+
+    @staticmethod
+    def from_records(records):
+        """Build a store from exploded way dicts (e.g. after the OSH latest-version
+        selection, which runs on a DataFrame of the records)."""
+        cdef WayStoreBuilder builder = WayStoreBuilder()
+        return builder.build_from_records(records)
+
+    def __len__(self):
+        return len(self.id)
+
+    def __iter__(self):
+        cdef Py_ssize_t i, n = len(self.id)
+        for i in range(n):
+            yield self.record(i)
+
+    cpdef dict record(self, Py_ssize_t i):
+        cdef Py_ssize_t p
+        cdef dict rec = {
+            "id": int(self.id[i]),
+            "version": self.version[i].item(),
+            "timestamp": self.timestamp[i].item(),
+            "visible": bool(self.visible[i]),
+            "nodes": self.refs[self.refs_off[i]:self.refs_off[i + 1]].tolist(),
+        }
+        for p in range(self.tags_off[i], self.tags_off[i + 1]):
+            rec[self.key_names[self.tag_keys[p]]] = self.values[self.tag_vals[p]]
+        return rec
+
+    cpdef list records(self, indices=None):
+        """The exploded way dicts for ``indices`` (all ways when None), in order."""
+        cdef Py_ssize_t i, p, a, b
+        cdef list key_names = self.key_names
+        cdef list values = self.values
+        cdef list out = []
+        cdef dict rec
+        if indices is None:
+            indices = range(len(self.id))
+        ids = self.id.tolist()
+        versions = self.version.tolist()
+        timestamps = self.timestamp.tolist()
+        visible = self.visible.tolist()
+        refs = self.refs
+        refs_off = self.refs_off.tolist()
+        tag_keys = self.tag_keys.tolist()
+        tag_vals = self.tag_vals.tolist()
+        tags_off = self.tags_off.tolist()
+        for i in indices:
+            rec = {
+                "id": ids[i],
+                "version": versions[i],
+                "timestamp": timestamps[i],
+                "visible": visible[i],
+                "nodes": refs[refs_off[i]:refs_off[i + 1]].tolist(),
+            }
+            a = tags_off[i]
+            b = tags_off[i + 1]
+            for p in range(a, b):
+                rec[key_names[tag_keys[p]]] = values[tag_vals[p]]
+            out.append(rec)
+        return out
+
+
+cdef _gather_csr(values, offsets, indices):
+    """Gather the CSR slices of ``indices`` into a new flat array and offsets."""
+    starts = offsets[indices]
+    lengths = offsets[indices + 1] - starts
+    new_off = np.zeros(len(indices) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=new_off[1:])
+    positions = np.repeat(starts - new_off[:-1], lengths) + np.arange(new_off[-1])
+    return values[positions], new_off
+
+
+cdef _concat(list chunks, str name, dtype):
+    if len(chunks) == 0:
+        return np.empty(0, dtype=dtype)
+    return np.concatenate([c[name] for c in chunks]).astype(dtype, copy=False)
+
+
+cdef class WayStoreBuilder:
+    """Accumulates the kept ways of each decoded block and concatenates them into a
+    ``WayStore``. Each block's string-table indices are remapped onto the store's
+    interned key/value tables, interning only the strings the kept ways use."""
+
+    def __cinit__(self):
+        self._chunks = []
+        self._key_names = []
+        self._key_ids = {}
+        self._values = []
+        self._value_ids = {}
+
+    cdef int _intern_key(self, name):
+        cdef int idx
+        try:
+            return self._key_ids[name]
+        except KeyError:
+            idx = len(self._key_names)
+            self._key_ids[name] = idx
+            self._key_names.append(name)
+            return idx
+
+    cdef int _intern_value(self, value):
+        cdef int idx
+        try:
+            return self._value_ids[value]
+        except KeyError:
+            idx = len(self._values)
+            self._value_ids[value] = idx
+            self._values.append(value)
+            return idx
+
+    cpdef add_block(self, string_table, ways, indices):
+        """Add the ways at ``indices`` of one block as decoded by
+        ``decode_primitive_block`` (``string_table`` decoded to str)."""
+        if len(indices) == 0:
+            return
+        indices = np.asarray(indices, dtype=np.int64)
+        refs, refs_off = _gather_csr(ways["refs"], ways["refs_off"], indices)
+        keys, tags_off = _gather_csr(ways["keys"], ways["tags_off"], indices)
+        vals, _ = _gather_csr(ways["vals"], ways["tags_off"], indices)
+
+        key_map = np.full(len(string_table), -1, dtype=np.int32)
+        for k in np.unique(keys).tolist():
+            name = string_table[k]
+            # Same renaming as explode_way_tags: keep the element's OSM id intact.
+            key_map[k] = self._intern_key("id_tag" if name == "id" else name)
+        value_map = np.full(len(string_table), -1, dtype=np.int32)
+        for v in np.unique(vals).tolist():
+            value_map[v] = self._intern_value(string_table[v])
+
+        self._chunks.append(dict(
+            id=ways["id"][indices],
+            version=ways["version"][indices],
+            timestamp=ways["timestamp"][indices],
+            visible=ways["visible"][indices].astype(bool),
+            refs=refs,
+            refs_len=np.diff(refs_off),
+            tag_keys=key_map[keys],
+            tag_vals=value_map[vals],
+            tags_len=np.diff(tags_off),
+        ))
+
+    cpdef build_from_records(self, records):
+        cdef dict rec
+        ids, versions, timestamps, visible = [], [], [], []
+        refs, refs_len, tag_keys, tag_vals, tags_len = [], [], [], [], []
+        for rec in records:
+            ids.append(rec["id"])
+            versions.append(rec.get("version", -1))
+            timestamps.append(rec.get("timestamp", 0))
+            visible.append(bool(rec.get("visible", False)))
+            nodes = rec.get("nodes", [])
+            refs.extend(nodes)
+            refs_len.append(len(nodes))
+            n_tags = 0
+            for k, v in rec.items():
+                if k in _RECORD_FIELDS:
+                    continue
+                tag_keys.append(self._intern_key(k))
+                tag_vals.append(self._intern_value(v))
+                n_tags += 1
+            tags_len.append(n_tags)
+        self._chunks = [dict(
+            id=np.array(ids, dtype=np.int64),
+            version=np.array(versions, dtype=np.int64),
+            timestamp=np.array(timestamps, dtype=np.int64),
+            visible=np.array(visible, dtype=bool),
+            refs=np.array(refs, dtype=np.int64),
+            refs_len=np.array(refs_len, dtype=np.int64),
+            tag_keys=np.array(tag_keys, dtype=np.int32),
+            tag_vals=np.array(tag_vals, dtype=np.int32),
+            tags_len=np.array(tags_len, dtype=np.int64),
+        )]
+        return self.build()
+
+    cpdef WayStore build(self):
+        cdef list chunks = self._chunks
+        refs_len = _concat(chunks, "refs_len", np.int64)
+        refs_off = np.zeros(len(refs_len) + 1, dtype=np.int64)
+        np.cumsum(refs_len, out=refs_off[1:])
+        tags_off = np.zeros(len(refs_off), dtype=np.int64)
+        np.cumsum(_concat(chunks, "tags_len", np.int64), out=tags_off[1:])
+        store = WayStore(
+            _concat(chunks, "id", np.int64),
+            _concat(chunks, "version", np.int64),
+            _concat(chunks, "timestamp", np.int64),
+            _concat(chunks, "visible", bool),
+            _concat(chunks, "refs", np.int64),
+            refs_off,
+            _concat(chunks, "tag_keys", np.int32),
+            _concat(chunks, "tag_vals", np.int32),
+            tags_off,
+            self._key_names,
+            self._values,
+        )
+        self._chunks = []
+        return store
+
+
+# The fields every way record carries besides its tags, in record order.
+_RECORD_FIELDS = ("id", "version", "timestamp", "visible", "nodes")
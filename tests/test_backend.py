@@ -17,11 +17,14 @@ def test_protobuf_fast_backend_is_active():
 
 
 def test_pbfreader_uses_google_protobuf_messages():
+    # Only the blob framing and the file header go through protobuf; the
+    # PrimitiveBlocks are decoded by the raw Cython decoder.
     import pyrosm.pbfreader as pbfreader
+    from pyrosm.engine import blobs
     from google.protobuf.message import Message
 
-    assert issubclass(pbfreader.Blob, Message)
-    assert issubclass(pbfreader.PrimitiveBlock, Message)
+    assert issubclass(blobs.Blob, Message)
+    assert issubclass(pbfreader.HeaderBlock, Message)
 
 
 def test_pure_python_backend_emits_warning(monkeypatch):
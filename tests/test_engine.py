@@ -1,7 +1,10 @@
 """Out-of-core engine buildings reader: parity vs the in-memory OSM(fp).get_buildings()
 way and relation rows, plus the output= GeoParquet path and the worker-count policy."""
 
+import os
+import tempfile
 import zlib
+from concurrent.futures import Future
 from struct import pack, unpack
 
 import geopandas as gpd
@@ -19,7 +22,7 @@ from pyrosm.engine import (
     get_data_by_custom_criteria,
     get_network,
 )
-from pyrosm.engine import pool, geoparquet, cache
+from pyrosm.engine import pool, geoparquet, cache, shards
 from pyrosm.proto.fileformat_pb2 import BlobHeader, Blob
 
 # Captured before the autouse fixture below stubs the module attribute, so a test can exercise
@@ -237,9 +240,9 @@ def test_engine_output_requires_pyarrow(helsinki_pbf, tmp_path, monkeypatch):
 
 
 def _fake_executor(raise_init=None, raise_map=None):
-    """A ProcessPoolExecutor stand-in that runs map() in-process, optionally raising at
-    construction or at map() to exercise the parallel branch and its fallback without real
-    worker processes."""
+    """A ProcessPoolExecutor stand-in that runs map() / submit() in-process, optionally raising
+    at construction or at map() / submit() to exercise the parallel branch and its fallback
+    without real worker processes."""
 
     class _F:
         def __init__(self, max_workers=None, initializer=None, initargs=()):
@@ -259,6 +262,13 @@ def _fake_executor(raise_init=None, raise_map=None):
                 raise raise_map("simulated")
             return [fn(t) for t in tasks]
 
+        def submit(self, fn, *args):
+            if raise_map is not None:
+                raise raise_map("simulated")
+            future = Future()
+            future.set_result(fn(*args))
+            return future
+
     return _F
 
 
@@ -291,6 +301,31 @@ def test_engine_parallel_decode_falls_back_to_serial(
     _assert_full_parity(mine, OSM(helsinki_pbf).get_buildings())
 
 
+@pytest.mark.parametrize("error", ["OSError", "BrokenProcessPool"])
+def test_auto_workers_falls_back_to_serial_when_calibration_cannot_start_a_pool(
+    error, helsinki_pbf, monkeypatch, fresh_cache
+):
+    # The first workers="auto" read calibrates with pools of its own; a pool that cannot start
+    # there must fall back to a single process with a warning, and save no calibration.
+    from concurrent.futures.process import BrokenProcessPool
+
+    from pyrosm.engine import calibration
+
+    if error == "OSError":
+        fake = _fake_executor(raise_init=OSError)
+    else:
+        fake = _fake_executor(raise_map=BrokenProcessPool)
+    monkeypatch.setattr(calibration, "ProcessPoolExecutor", fake)
+    monkeypatch.setattr(calibration, "_measured", {})
+    monkeypatch.setattr(pool.os, "cpu_count", lambda: 4)
+    monkeypatch.setattr(pool, "_PARALLEL_MIN_BYTES", 0)
+    with pytest.warns(RuntimeWarning, match="single process"):
+        mine = get_buildings(helsinki_pbf, workers="auto")
+    _assert_full_parity(mine, OSM(helsinki_pbf).get_buildings())
+    assert not calibration._calibration_path().exists()
+    assert calibration._measured == {}
+
+
 def _make_way_partition(ids):
     # A standalone-way column dict (as _collect_kept_ways returns) for `ids`, one node ref each.
     nodes = np.empty(len(ids), dtype=object)
@@ -339,14 +374,22 @@ def test_engine_scatter_node_coords_combines_partitions():
 @pytest.mark.parametrize("read", ["buildings", "pois", "network"])
 def test_engine_parallel_collect_matches_serial(read, helsinki_pbf, monkeypatch):
     # The parallel collect path (contiguous way-shard ranges concatenated in order + the pooled
-    # node-coordinate gather) must yield exactly the serial result -- same rows in the same
-    # order -- and match the in-memory reader. HAS_PYARROW=False bypasses the result cache so
-    # both reads actually run; the fake executor runs the pools in-process.
+    # node-coordinate gather), and the layer's assembly in chunks across the pool, must yield
+    # exactly the serial result -- same rows in the same order -- and match the in-memory
+    # reader. HAS_PYARROW=False bypasses the result cache so both reads actually run; the fake
+    # executor runs the pools in-process.
+    from pyrosm.engine import assemble
     from pyrosm.utils import _compat
 
     monkeypatch.setattr(_compat, "HAS_PYARROW", False)
     monkeypatch.setattr(pool.os, "cpu_count", lambda: 8)
     monkeypatch.setattr(pool, "ProcessPoolExecutor", _fake_executor())
+    monkeypatch.setattr(assemble, "_MIN_PARALLEL_CHUNK", 100)
+    pooled = []
+    real_worker = assemble._assemble_worker
+    monkeypatch.setattr(
+        assemble, "_assemble_worker", lambda task: pooled.append(1) or real_worker(task)
+    )
 
     fn = {"buildings": get_buildings, "pois": get_pois, "network": get_network}[read]
     ref = {
@@ -356,6 +399,8 @@ def test_engine_parallel_collect_matches_serial(read, helsinki_pbf, monkeypatch)
     }[read]()
 
     parallel = fn(helsinki_pbf, workers=3)
+    # The network is assembled as a whole; the other layers in chunks on the pool.
+    assert (len(pooled) > 1) == (read != "network")
     serial = fn(helsinki_pbf, workers=1)
     # Identical rows in identical order (the ordering contract), not just the same set.
     assert list(parallel["id"]) == list(serial["id"])
@@ -363,6 +408,101 @@ def test_engine_parallel_collect_matches_serial(read, helsinki_pbf, monkeypatch)
     _assert_full_parity(parallel, ref)
 
 
+def test_engine_relations_assembled_in_batches(helsinki_pbf, monkeypatch):
+    # The relations are assembled in batches of member ways like the ways, each sent to the
+    # pool with only its own member ways; the rows match the in-memory layer in order, and a
+    # bounding-box read still warns once of all the relations the box cut.
+    import pandas as pd
+    import warnings as _warnings
+    from pyrosm.engine import iter_layer
+
+    ref = OSM(helsinki_pbf).get_buildings()
+    serial = list(iter_layer(helsinki_pbf, "buildings", chunk_size=5, workers=1))
+    assert sum((c["osm_type"] == "relation").all() for c in serial) > 1
+    _assert_full_parity(pd.concat(serial, ignore_index=True), ref)
+
+    monkeypatch.setattr(pool.os, "cpu_count", lambda: 8)
+    monkeypatch.setattr(pool, "ProcessPoolExecutor", _fake_executor())
+    parallel = iter_layer(helsinki_pbf, "buildings", chunk_size=5, workers=3)
+    _assert_full_parity(pd.concat(parallel, ignore_index=True), ref)
+
+    bbox = [24.93, 60.16, 24.95, 60.17]
+    with _warnings.catch_warnings(record=True) as caught:
+        _warnings.simplefilter("always")
+        OSM(helsinki_pbf, bounding_box=bbox).get_buildings()
+        list(iter_layer(helsinki_pbf, "buildings", chunk_size=5, bounding_box=bbox))
+    straddling = [str(w.message) for w in caught if "extend beyond" in str(w.message)]
+    assert len(straddling) == 2 and straddling[0] == straddling[1]
+
+
+@pytest.mark.parametrize("layer", ["buildings", "pois", "natural"])
+def test_engine_parallel_assembly_matches_serial(layer, helsinki_pbf, monkeypatch):
+    # Chunks assembled across the pool (each worker sent its records and the coordinates they
+    # reference) come back in order, identical to the serial chunks; a warning raised while a
+    # worker assembles is re-emitted by the caller.
+    import pandas as pd
+    import warnings as _warnings
+    from pyrosm.engine import assemble, iter_layer
+
+    serial = pd.concat(iter_layer(helsinki_pbf, layer, workers=1), ignore_index=True)
+    monkeypatch.setattr(pool.os, "cpu_count", lambda: 8)
+    monkeypatch.setattr(pool, "ProcessPoolExecutor", _fake_executor())
+    monkeypatch.setattr(assemble, "_MIN_PARALLEL_CHUNK", 50)
+    chunks = list(iter_layer(helsinki_pbf, layer, workers=3))
+    assert len(chunks) > 2
+    parallel = pd.concat(chunks, ignore_index=True)
+    assert list(parallel["id"]) == list(serial["id"])
+    _assert_full_parity(parallel, serial)
+
+    bbox = [24.93, 60.16, 24.95, 60.17]
+    with _warnings.catch_warnings(record=True) as caught:
+        _warnings.simplefilter("always")
+        tables = list(
+            iter_layer(
+                helsinki_pbf, "buildings", workers=3, bounding_box=bbox, as_arrow=True
+            )
+        )
+    assert any("extend beyond the bounding box" in str(w.message) for w in caught)
+    assert sum(t.num_rows for t in tables) == len(
+        get_buildings(helsinki_pbf, bounding_box=bbox)
+    )
+
+
+def test_imap_pool_falls_back_and_keeps_order(monkeypatch):
+    # A pool that breaks runs the tasks not yet yielded in this process, in order, with the
+    # fallback warning when one is given.
+    monkeypatch.setattr(
+        pool, "ProcessPoolExecutor", _fake_executor(raise_map=pool.BrokenProcessPool)
+    )
+    results = pool._imap_pool(lambda t: t * 2, range(5), 3, lambda: None, ())
+    assert list(results) == [0, 2, 4, 6, 8]
+    results = pool._imap_pool(
+        lambda t: t * 2, range(5), 3, lambda: None, (), pool._ASSEMBLE_FALLBACK_WARNING
+    )
+    with pytest.warns(RuntimeWarning, match="single process"):
+        assert list(results) == [0, 2, 4, 6, 8]
+    monkeypatch.setattr(pool, "ProcessPoolExecutor", _fake_executor())
+    assert list(
+        pool._imap_pool(lambda t: t + 1, range(20), 2, lambda: None, ())
+    ) == list(range(1, 21))
+
+
+def test_batch_blobs_balances_compressed_size():
+    # The decode batches cover the blobs in file order, split by compressed size (the large
+    # city blobs get batches of their own) into at most _BATCHES_PER_WORKER per worker.
+    blobs = [(i, 1000 if 10 <= i < 14 else 10) for i in range(60)]
+    batches = pool._batch_blobs(blobs, 2)
+    assert [b for batch in batches for b in batch] == blobs
+    assert len(batches) <= 2 * pool._BATCHES_PER_WORKER
+    share = sum(size for _, size in blobs) / (2 * pool._BATCHES_PER_WORKER)
+    # A batch only reaches past its share with its last blob.
+    assert all(sum(size for _, size in batch[:-1]) < share for batch in batches)
+    assert [len(batch) for batch in batches][1:4] == [1, 1, 1]
+    assert pool._batch_blobs(blobs, 1) == [blobs]
+    assert pool._batch_blobs(blobs[:3], 4) == [[b] for b in blobs[:3]]
+    assert pool._batch_blobs([], 4) == []
+
+
 def test_engine_collect_stays_serial_after_decode_fallback(
     helsinki_pbf, monkeypatch, fresh_cache
 ):
@@ -497,7 +637,7 @@ def _write_shard(path, **overrides):
         rel_meta=np.empty((0, 3), np.int64),
     )
     arrays.update(overrides)
-    np.savez(path, **arrays)
+    shards.save_npz(path, arrays)
 
 
 def _write_pbf_no_buildings(path):
@@ -605,6 +745,22 @@ def test_engine_collect_empty_and_edge_shards(tmp_path):
     # Member ids that match no stored way -> no relation ways.
     assert _collect_relation_ways([ways_only], np.array([999], np.int64)) is None
 
+    # Needed ids filling their span get the dense index holding the coordinates themselves.
+    nodes = str(tmp_path / "nodes.npz")
+    units = np.array([249384000, 601699000, -1, 0], np.int64)
+    _write_shard(
+        nodes,
+        node_id=np.array([10, 11, 12, 13], np.int64),
+        node_lon=units * 100 / 1e9,
+        node_lat=units[::-1] * 100 / 1e9,
+    )
+    lookup = _node_lookup([nodes], np.array([10, 12, 13, 14], np.int64))
+    assert lookup.backend == "dense" and len(lookup) == 3
+    idx, lon, lat = lookup.gather(np.array([13, 14, 10], np.int64))
+    assert list(idx >= 0) == [True, False, True]
+    assert list(lon[idx >= 0]) == [0.0, units[0] * 100 / 1e9]
+    assert list(lat[idx >= 0]) == [units[0] * 100 / 1e9, 0.0]
+
 
 def test_engine_geoparquet_schema_helpers():
     pa = pytest.importorskip("pyarrow")
@@ -630,7 +786,7 @@ def test_engine_stream_parquet_chunk_table_branches(
     import shutil
     from pyrosm.config import Conf
     from pyrosm.data_manager import parse_custom_filter
-    from pyrosm.engine import geoparquet
+    from pyrosm.engine import assemble, geoparquet
     from pyrosm.engine.blobs import _index_blobs
     from pyrosm.engine.pool import _decode_all
     from pyrosm.engine.collect import _collect_layer
@@ -641,7 +797,7 @@ def test_engine_stream_parquet_chunk_table_branches(
     data_blobs = [(o, s) for (t, o, s) in _index_blobs(helsinki_pbf) if t == "OSMData"]
     shard_dir = tempfile.mkdtemp()
     try:
-        shards, _ = _decode_all(
+        shards, _, _ = _decode_all(
             helsinki_pbf, data_blobs, 1, shard_dir, [b"building"], False
         )
         node_features, kept, relations, relation_ways, nc = _collect_layer(
@@ -650,7 +806,7 @@ def test_engine_stream_parquet_chunk_table_branches(
         assert kept is not None and relations is not None  # helsinki has both
 
         def write(collected):
-            monkeypatch.setattr(geoparquet, "_collect_layer", lambda *a, **k: collected)
+            monkeypatch.setattr(assemble, "_collect_layer", lambda *a, **k: collected)
             return geoparquet._stream_layer_to_parquet(
                 shards,
                 str(tmp_path / "o.parquet"),
@@ -1001,12 +1157,38 @@ def test_engine_cache_pyarrow_absent_falls_back(helsinki_pbf, monkeypatch, fresh
 def test_cache_dir_builds_and_creates_tempdir_path(monkeypatch, tmp_path):
     # cache_dir() roots the result cache at <tempdir>/pyrosm/cache and creates it on demand. The
     # fixtures stub the module attribute, so exercise the real implementation captured at import.
+    monkeypatch.delenv(cache.CACHE_DIR_ENV, raising=False)
     monkeypatch.setattr(cache.tempfile, "gettempdir", lambda: str(tmp_path))
     result = _real_cache_dir()
     assert result == tmp_path / "pyrosm" / "cache"
     assert result.is_dir()
 
 
+def test_cache_dir_and_budget_configurable(monkeypatch, tmp_path):
+    # configure() wins over the environment, which wins over the defaults; None restores them.
+    monkeypatch.setitem(cache._settings, "directory", None)
+    monkeypatch.setitem(cache._settings, "max_bytes", None)
+    monkeypatch.setenv(cache.CACHE_DIR_ENV, str(tmp_path / "env"))
+    monkeypatch.setenv(cache.MAX_BYTES_ENV, "1000")
+    assert _real_cache_dir() == tmp_path / "env"
+    assert cache.max_bytes() == 1000
+
+    OSM.configure_cache(tmp_path / "nvme", max_bytes=5000)
+    assert _real_cache_dir() == tmp_path / "nvme"
+    assert (tmp_path / "nvme").is_dir()
+    assert cache.max_bytes() == 5000
+
+    OSM.configure_cache()
+    assert _real_cache_dir() == tmp_path / "env"
+    assert cache.max_bytes() == 1000
+    monkeypatch.delenv(cache.MAX_BYTES_ENV)
+    assert cache.max_bytes() is None
+
+    for bad in (-1, 1.5, True, "10"):
+        with pytest.raises(ValueError, match="max_bytes"):
+            OSM.configure_cache(max_bytes=bad)
+
+
 def test_engine_boundaries_parity(helsinki_region_pbf):
     # The Helsinki region extract has administrative boundaries (relations + ways).
     mine = get_boundaries(helsinki_region_pbf)
@@ -1118,16 +1300,16 @@ def test_engine_stream_skips_empty_node_chunk(tmp_path, monkeypatch):
     pytest.importorskip("pyarrow")
     from pyrosm.config import Conf
     from pyrosm.data_manager import parse_custom_filter
-    from pyrosm.engine import geoparquet
+    from pyrosm.engine import assemble, geoparquet
 
     data_filter, osm_keys = parse_custom_filter({"natural": [True]})
     filter_spec = (osm_keys, data_filter, "keep")
     node_features = {
         "id": np.array([1], np.int64)
     }  # presence is enough; assemble stubbed
-    monkeypatch.setattr(geoparquet, "_assemble_chunk", lambda *a, **k: None)
+    monkeypatch.setattr(assemble, "_assemble_chunk", lambda *a, **k: None)
     monkeypatch.setattr(
-        geoparquet,
+        assemble,
         "_collect_layer",
         lambda *a, **k: (node_features, None, None, None, None),
     )
@@ -1778,22 +1960,571 @@ def test_osm_out_of_core_auto_workers_threaded_and_silent(
     _assert_full_parity(mine, OSM(helsinki_pbf).get_buildings())
 
 
-def test_auto_workers_picks_single_core_for_small_files(tmp_path, monkeypatch):
-    # "auto" reads small files on a single core; above the size threshold it uses one worker
-    # per CPU core, capped at the data-blob count.
-    import os
+def test_osm_in_memory_auto_workers_resolves_thread_count(
+    helsinki_pbf, monkeypatch, fresh_cache
+):
+    # workers="auto" on the in-memory reader decodes on a thread per core (at most one per
+    # data blob), without calibrating the out-of-core process pool.
+    import pyrosm.pbfreader as pbfreader
+    from pyrosm.engine import calibration
+
+    captured = []
+    real = pbfreader.iter_primitive_blocks
+
+    def spy(filepath, workers=1, blobs=None):
+        captured.append(workers)
+        return real(filepath, workers, blobs)
+
+    def no_calibration(*args, **kwargs):
+        raise AssertionError("threads need no process calibration")
+
+    monkeypatch.setattr(pbfreader, "iter_primitive_blocks", spy)
+    monkeypatch.setattr(calibration, "load", no_calibration)
+    monkeypatch.setattr(pool.os, "cpu_count", lambda: 4)
+    reference = OSM(helsinki_pbf).get_buildings()
+    # The bundled file is below the size threshold: a single thread.
+    OSM(helsinki_pbf, workers="auto").get_buildings()
+    assert captured and set(captured) == {1}
+
+    captured.clear()
+    monkeypatch.setattr(pool, "_PARALLEL_MIN_BYTES", 0)
+    mine = OSM(helsinki_pbf, workers="auto").get_buildings()
+    assert set(captured) == {min(4, len(pool._data_blobs(helsinki_pbf)))} != {1}
+    _assert_full_parity(mine, reference)
+
+
+_PHASE_STATE = None
+_PHASE_INITS = 0
+_PICKLED_INITARGS = 0
+
+
+class _CountedPickle:
+    """An initarg that counts the times it is pickled (in the process pickling it)."""
+
+    def __init__(self, value):
+        self.value = value
+
+    def __reduce__(self):
+        global _PICKLED_INITARGS
+        _PICKLED_INITARGS += 1
+        return _CountedPickle, (self.value,)
+
+
+def _set_phase_state(value):
+    global _PHASE_STATE, _PHASE_INITS
+    _PHASE_STATE = getattr(value, "value", value)
+    _PHASE_INITS += 1
+
+
+def _phase_task(task):
+    import time
+
+    start = time.monotonic()
+    time.sleep(0.05)
+    return os.getpid(), _PHASE_STATE, task, _PHASE_INITS, start, time.monotonic()
+
+
+def test_worker_pool_is_shared_across_phases_and_reads(
+    helsinki_pbf, monkeypatch, fresh_cache
+):
+    # Phases run while a WorkerPool is attached reuse its processes, each initialised once for
+    # the phase it runs (its initargs shipped once, not with every task) and running at most
+    # the phase's worker count of tasks at once; an OSM object with workers > 1 keeps one pool
+    # for all its reads and closes it on leaving the with block.
+    import gc
+
+    global _PICKLED_INITARGS
+
+    _PICKLED_INITARGS = 0
+    with pool.WorkerPool(4) as worker_pool, pool.attached(worker_pool):
+        first, ok = pool._run_pool(
+            _phase_task, range(8), 2, _set_phase_state, (_CountedPickle("a"),)
+        )
+        second, _ = pool._run_pool(_phase_task, [8], 4, _set_phase_state, ("b",))
+    assert ok and [r[1:3] for r in first + second] == [("a", i) for i in range(8)] + [
+        ("b", 8)
+    ]
+    assert _PICKLED_INITARGS == 1
+    pids = {r[0] for r in first + second}
+    assert os.getpid() not in pids and len(pids) <= worker_pool.workers
+    for pid in pids:
+        inits = {r[3] for r in first if r[0] == pid}
+        assert len(inits) <= 1  # initialised once for the phase, before its first task
+    edges = sorted([(r[4], 1) for r in first] + [(r[5], -1) for r in first])
+    running = [sum(step for _, step in edges[: i + 1]) for i in range(len(edges))]
+    assert max(running) <= 2
+    assert worker_pool._executor is None and pool._ATTACHED.get() is None
+    assert not [
+        p for p in os.listdir(tempfile.gettempdir()) if p.startswith("pyrosm_phase_")
+    ]
+
+    executors = []
+
+    class _Counted(_fake_executor()):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.closed = False
+            executors.append(self)
+
+        def shutdown(self, wait=True, cancel_futures=False):
+            self.closed = True
+
+    monkeypatch.setattr(pool.os, "cpu_count", lambda: 8)
+    monkeypatch.setattr(pool, "ProcessPoolExecutor", _Counted)
+    with OSM(helsinki_pbf, engine="out_of_core", workers=2) as osm:
+        buildings = osm.get_buildings()
+        osm.get_pois()
+        assert sum(len(c) for c in osm.iter_layer("landuse")) > 0
+        assert len(executors) == 1 and not executors[0].closed
+    assert executors[0].closed and osm._worker_pool is None
+    _assert_full_parity(buildings, OSM(helsinki_pbf).get_buildings())
+
+    # An OSM object collected unclosed shuts its pool down.
+    unclosed = OSM(helsinki_pbf, engine="out_of_core", workers=2)
+    unclosed._shared_pool().executor()
+    del unclosed
+    gc.collect()
+    assert len(executors) == 2 and executors[1].closed
+
+
+def test_worker_pool_attached_per_thread():
+    # Each thread's phases run on the pool it attached: a read of another OSM object on
+    # another thread neither uses nor closes this one's pool.
+    import threading
+
+    barrier = threading.Barrier(2)
+    seen = {}
+
+    def attach(name):
+        with pool.WorkerPool(1) as worker_pool, pool.attached(worker_pool):
+            barrier.wait()
+            seen[name] = pool._ATTACHED.get() is worker_pool
+            barrier.wait()
+
+    threads = [threading.Thread(target=attach, args=(n,)) for n in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert seen == {"a": True, "b": True}
+    assert pool._ATTACHED.get() is None
+
+
+def test_auto_workers_follows_the_calibrated_cost_model(monkeypatch):
+    # "auto" reads small files on a single core without calibrating; otherwise it picks the
+    # worker count with the lowest estimated read time -- a few workers for a mid-size file,
+    # one per core for a large one -- within the blob count and the available memory.
+    from pyrosm.engine import calibration
+
+    cal = {"startup_s": 0.2, "per_worker_s": 0.3, "bytes_per_s": 20e6}
+
+    def blobs(total, n):
+        return [(i, total // n) for i in range(n)]
 
     monkeypatch.setattr(pool.os, "cpu_count", lambda: 8)
-    small = tmp_path / "small.osm.pbf"
-    small.touch()
-    os.truncate(small, pool._PARALLEL_MIN_FILE_BYTES - 1)
-    assert pool._auto_workers(str(small), 10_000) == 1
+    monkeypatch.setattr(calibration, "load", lambda filepath, blobs: cal)
+    monkeypatch.setattr(calibration, "available_memory", lambda: None)
+    assert pool._auto_workers("x", blobs(pool._PARALLEL_MIN_BYTES - 1, 100)) == 1
+    assert pool._auto_workers("x", blobs(10_000_000, 100)) == 1
+    assert pool._auto_workers("x", blobs(100_000_000, 100)) == 4
+    assert pool._auto_workers("x", blobs(2_000_000_000, 1000)) == 8  # cpu-bound
+    assert pool._auto_workers("x", blobs(2_000_000_000, 3)) == 3  # blob-bound
+    monkeypatch.setattr(calibration, "available_memory", lambda: 1_100_000_000)
+    assert pool._auto_workers("x", blobs(2_000_000_000, 1000)) == 2  # memory-bound
+    sizes = [size for _, size in blobs(100_000_000, 100)] + [500_000_000]
+    assert calibration.choose_workers(sizes, 8, cal) == 2  # one blob dominates
+
+
+def test_calibration_is_measured_once_and_saved(test_pbf, monkeypatch, fresh_cache):
+    from pyrosm.engine import calibration
+
+    monkeypatch.setattr(calibration, "_measured", {})
+    data_blobs = pool._data_blobs(test_pbf)
+    measured = calibration.load(test_pbf, data_blobs)
+    assert set(measured) == {"startup_s", "per_worker_s", "bytes_per_s"}
+    assert measured["bytes_per_s"] > 0
+    assert calibration._calibration_path().parent == fresh_cache
+
+    # A later process reads the saved calibration instead of measuring again.
+    monkeypatch.setattr(calibration, "_measured", {})
+    monkeypatch.setattr(calibration, "measure", lambda *a: pytest.fail("re-measured"))
+    assert calibration.load(test_pbf, data_blobs) == measured
+
+
+def test_temp_shards_go_to_shared_memory_when_they_fit(
+    helsinki_pbf, tmp_path, monkeypatch, fresh_cache
+):
+    # A read whose shards fit the memory budget decodes them into shared memory, a larger one
+    # into the temp directory; either way the layer is the same.
+    from pyrosm.engine import calibration
+
+    shm = tmp_path / "shm"
+    shm.mkdir()
+    monkeypatch.setattr(pool, "_SHARED_MEMORY_DIR", str(shm))
+    shard_dirs = []
+    decode_to = pool._decode_to
+
+    def spy(filepath, shard_dir, *args, **kwargs):
+        shard_dirs.append(os.path.dirname(shard_dir))
+        return decode_to(filepath, shard_dir, *args, **kwargs)
+
+    monkeypatch.setattr(pool, "_decode_to", spy)
+    monkeypatch.setattr(calibration, "available_memory", lambda: 2**40)
+    in_shm = get_buildings(helsinki_pbf, workers=1)
+    assert shard_dirs[-1] == str(shm)
+    assert not list(shm.iterdir())  # removed after the read
+
+    cache.clear()
+    monkeypatch.setattr(calibration, "available_memory", lambda: 2**20)
+    on_disk = get_buildings(helsinki_pbf, workers=1)
+    assert shard_dirs[-1] != str(shm)
+    _assert_full_parity(in_shm, on_disk)
+
+
+def test_available_memory_is_capped_by_the_cgroup_limit(tmp_path, monkeypatch):
+    # In a container the memory cgroup's limit (less its usage, not counting the reclaimable
+    # page cache) caps the host's available memory; v1 reports "unlimited" as a huge limit.
+    from pyrosm.engine import calibration
+
+    v2, v1 = tmp_path / "v2", tmp_path / "v1"
+    v2.mkdir()
+    v1.mkdir()
+    monkeypatch.setattr(
+        calibration,
+        "_CGROUP_MEMORY",
+        (
+            (str(v2), "memory.max", "memory.current", "inactive_file"),
+            (
+                str(v1),
+                "memory.limit_in_bytes",
+                "memory.usage_in_bytes",
+                "total_inactive_file",
+            ),
+        ),
+    )
+    monkeypatch.setattr(calibration, "_host_available", lambda: 2**34)
+    assert calibration.available_memory() == 2**34  # no cgroup files
+
+    (v1 / "memory.limit_in_bytes").write_text("9223372036854771712\n")
+    (v1 / "memory.usage_in_bytes").write_text("%d\n" % 2**30)
+    assert calibration.available_memory() == 2**34
+    (v1 / "memory.limit_in_bytes").write_text("%d\n" % 2**32)
+    (v1 / "memory.stat").write_text("cache 5\ntotal_inactive_file %d\n" % 2**29)
+    assert calibration.available_memory() == 2**32 - 2**30 + 2**29
+
+    # v2 comes first; "max" is unlimited.
+    (v2 / "memory.max").write_text("max\n")
+    (v2 / "memory.current").write_text("0\n")
+    assert calibration.available_memory() == 2**34
+    (v2 / "memory.max").write_text("%d\n" % 2**31)
+    assert calibration.available_memory() == 2**31
+    monkeypatch.setattr(calibration, "_host_available", lambda: None)
+    assert calibration.available_memory() == 2**31
+
+
+def test_max_memory_budget_sizes_the_read(helsinki_pbf, monkeypatch, fresh_cache):
+    # A max_memory budget lowers the worker count, shard size and chunk size (never raising
+    # them past their defaults); a read within it matches an unlimited one.
+    import threading
+
+    from pyrosm.engine import calibration, decode, memory
+
+    assert memory.parse_size("8GB") == 8 * 10**9
+    assert memory.parse_size("1.5 gib") == 3 * 2**29
+    assert memory.parse_size("8Gi") == memory.parse_size(8 * 2**30)
+    for bad in ("lots", "8 parsecs", 0, -1, True, 2.5):
+        with pytest.raises(ValueError):
+            OSM(helsinki_pbf, engine="out_of_core", max_memory=bad)
+
+    monkeypatch.setattr(pool.os, "cpu_count", lambda: 16)
+    monkeypatch.setattr(calibration, "_WORKER_MEMORY_BYTES", 500_000_000)
+    assert memory.worker_cap() is None
+    with memory.limited(memory.parse_size("2GB")):
+        assert memory.worker_cap() == 2
+        assert pool.WorkerPool(8).workers == 2
+        with pytest.warns(UserWarning, match="reading with 2 workers"):
+            assert pool._resolve_workers(helsinki_pbf, 8) == 2
+        assert memory.shard_target_bytes(2) == decode._SHARD_TARGET_BYTES
+        assert memory.output_chunk_size() == geoparquet._OUTPUT_CHUNK_SIZE
+    with memory.limited(memory.parse_size("40MB")):
+        assert memory.worker_cap() == 1
+        # The budget is the running thread's: a read on another thread is not limited by it.
+        other = []
+        thread = threading.Thread(target=lambda: other.append(memory.budget()))
+        thread.start()
+        thread.join()
+        assert other == [None]
+        assert memory.shard_target_bytes(1) == 5_000_000
+        assert memory.output_chunk_size() == memory._MIN_CHUNK_SIZE
+    assert memory.budget() is None
+
+    reference = OSM(helsinki_pbf, engine="out_of_core", workers=1).get_buildings()
+    cache.clear()
+    limited = OSM(helsinki_pbf, engine="out_of_core", workers=1, max_memory="40MB")
+    _assert_full_parity(limited.get_buildings(), reference)
+    assert decode._SHARD_BYTES == 5_000_000
+    chunks = list(limited.iter_layer("buildings"))
+    assert sum(len(c) for c in chunks) == len(reference)
+
+
+def test_last_read_stats_reports_each_phase(helsinki_pbf, fresh_cache):
+    from pyrosm.engine import stats
+
+    osm = OSM(helsinki_pbf, engine="out_of_core", workers=1)
+    assert osm.last_read_stats is None
+    buildings = osm.get_buildings()
+    report = osm.last_read_stats.to_dict()
+    phases = report["phases"]
+    assert list(phases) == list(stats.PHASES)
+    assert sum(p["seconds"] for p in phases.values()) <= report["seconds"]
+    assert phases["index"]["bytes"] == phases["decode"]["bytes_read"]
+    assert phases["decode"]["bytes_inflated"] > phases["decode"]["bytes_read"]
+    assert phases["decode"]["shard_bytes"] > 0
+    assert 0 < phases["decode"]["worker_utilisation"] <= 1
+    assert phases["assemble"]["rows"] == buildings["osm_type"].value_counts().to_dict()
+    assert sum(phases["node_gather"]["backends"].values()) == 1
+    # The cache file is written once, sorted: its bytes are all the phase wrote.
+    (cached,) = [p for p in cache.list_files() if str(p).endswith(".parquet")]
+    assert phases["cache_write"]["bytes_written"] == os.path.getsize(cached)
+    if phases["decode"]["peak_rss"] is not None:
+        assert all(p["peak_rss"] > 0 for p in phases.values())
+
+    # A cached read runs no phases; a streamed one reports as its chunks are consumed.
+    osm.get_buildings()
+    assert osm.last_read_stats.phases == {}
+    chunks = osm.iter_layer("pois")
+    assert "assemble" not in osm.last_read_stats.phases
+    rows = sum(len(c) for c in chunks)
+    assert sum(osm.last_read_stats.phases["assemble"]["rows"].values()) == rows
+    assert stats._CURRENT.get() is None
+
+
+def test_last_read_stats_reset_by_in_memory_reads(helsinki_pbf, fresh_cache):
+    # A read routed to the in-memory reader records no phases, so it does not leave the
+    # report of the out-of-core read before it standing.
+    osm = OSM(helsinki_pbf, engine="out_of_core", workers=1)
+    osm.get_buildings()
+    assert osm.last_read_stats is not None
+    with pytest.raises(ValueError, match="OSH.PBF"):
+        osm.get_buildings(timestamp="2020-01-01")
+    assert osm.last_read_stats is None
+
+    osm.get_buildings()
+    osm.engine = "in_memory"
+    osm.get_layers(["buildings", "pois"])
+    assert osm.last_read_stats is None
+
+
+def test_read_stats_recorded_per_thread(helsinki_pbf, fresh_cache):
+    # Reads recorded in concurrent threads each fill their own report: their phases neither
+    # land in nor close those of the other thread's read.
+    import threading
+
+    from pyrosm.engine import stats
+
+    barrier = threading.Barrier(2)
+    reports, errors = {}, []
+
+    def record(name):
+        try:
+            with stats.recording() as report:
+                with stats.phase("decode"):
+                    barrier.wait()
+                    with stats.phase(name):
+                        barrier.wait()
+                        stats.count(name, rows=1)
+                    barrier.wait()
+            reports[name] = report
+        except Exception as error:  # pragma: no cover - reported below
+            errors.append(error)
+
+    threads = [
+        threading.Thread(target=record, args=(n,)) for n in ("collect", "assemble")
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    for name in ("collect", "assemble"):
+        assert list(reports[name].phases) == ["decode", name]
+        assert reports[name].phases[name]["rows"] == 1
+    assert stats._CURRENT.get() is None
+
+    # Out-of-core reads on several threads at once each report their own phases.
+    results = {}
+
+    def read(layer):
+        osm = OSM(helsinki_pbf, engine="out_of_core", workers=1)
+        getattr(osm, "get_" + layer)()
+        results[layer] = osm.last_read_stats
+
+    threads = [
+        threading.Thread(target=read, args=(layer,))
+        for layer in ("buildings", "pois", "natural", "landuse")
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 4
+    assert all("assemble" in report.phases for report in results.values())
+
 
-    big = tmp_path / "big.osm.pbf"
-    big.touch()
-    os.truncate(big, pool._PARALLEL_MIN_FILE_BYTES + 1)
-    assert pool._auto_workers(str(big), 10_000) == 8  # cpu-bound
-    assert pool._auto_workers(str(big), 3) == 3  # blob-bound
+def test_instrument_listener_receives_worker_spans(
+    helsinki_pbf, fresh_cache, tmp_path, monkeypatch
+):
+    from pyrosm import instrument
+    from pyrosm.pbf_export import crop_pbf
+
+    monkeypatch.setattr(pool.os, "cpu_count", lambda: 4)
+    events = []
+    instrument.add_listener(events.append)
+    try:
+        osm = OSM(helsinki_pbf, engine="out_of_core", workers=2)
+        osm.get_buildings()
+        # The workers' blob spans are reported by this process, within their decode.
+        (read,) = [e for e in events if e.name == "decode_and_run"]
+        assert read.counters == {"workers": 2, "shards": read.counters["shards"]}
+        assert read.counters["shards"] > 0
+        blobs = [e for e in events if e.name == "decode_blob"]
+        assert all(e.parent == "decode" for e in blobs)
+        assert len({e.counters["offset"] for e in blobs}) == len(blobs)
+        assert len(blobs) == osm.last_read_stats.phases["index"]["blobs"]
+        assert all(e.counters["bytes_inflated"] > e.counters["size"] for e in blobs)
+        names = [e.name for e in events]
+        assert {"index", "decode", "collect", "node_gather", "assemble"} <= set(names)
+        assert "assemble_chunk" in names and "cache_write" in names
+
+        del events[:]
+        crop_pbf(
+            helsinki_pbf, str(tmp_path / "crop.osm.pbf"), [24.94, 60.16, 24.95, 60.17]
+        )
+        assert [e.name for e in events] == [
+            "crop_nodes",
+            "crop_ways",
+            "crop_relations",
+            "crop_write",
+            "crop_pbf",
+        ]
+        assert events[-2].counters["bytes_written"] > 0
+    finally:
+        instrument.remove_listener(events.append)
+    del events[:]
+    OSM(helsinki_pbf, engine="out_of_core", workers=1).get_pois()
+    assert events == [] and not instrument.enabled()
+
+
+def test_instrument_spans_of_interleaved_iter_layer_generators(helsinki_pbf):
+    # Each iter_layer generator holds its read's span open while its chunks are consumed: two
+    # consumed in turn each report their own read with its phases within it, and a span the
+    # consumer opens between the chunks is not nested in either read.
+    from itertools import zip_longest
+    from pyrosm import instrument
+    from pyrosm.engine import iter_layer
+
+    events = []
+    instrument.add_listener(events.append)
+    try:
+        buildings = iter_layer(helsinki_pbf, "buildings", chunk_size=100)
+        pois = iter_layer(helsinki_pbf, "pois", chunk_size=100)
+        rows = 0
+        for pair in zip_longest(buildings, pois):
+            with instrument.span("consume") as consumed:
+                consumed["rows"] = sum(
+                    len(chunk) for chunk in pair if chunk is not None
+                )
+                rows += consumed["rows"]
+    finally:
+        instrument.remove_listener(events.append)
+    assert instrument._OPEN.get() == ()
+    reads = [e for e in events if e.name == "decode_and_run"]
+    assert len(reads) == 2 and all(e.parent is None for e in reads)
+    assert all(e.counters["shards"] > 0 for e in reads)
+    consumed = [e for e in events if e.name == "consume"]
+    assert all(e.parent is None for e in consumed)
+    assert sum(e.counters["rows"] for e in consumed) == rows
+    phases = [e for e in events if e.name in ("index", "decode", "collect", "assemble")]
+    assert phases and all(e.parent == "decode_and_run" for e in phases)
+    chunks = [e for e in events if e.name == "assemble_chunk"]
+    assert all(e.parent == "assemble" for e in chunks)
+    assert sum(e.counters["rows"] for e in chunks) == rows
+
+
+def test_spatial_index_output_is_hilbert_sorted(helsinki_pbf, tmp_path, monkeypatch):
+    import geopandas as gpd
+    import pyarrow.parquet as pq
+    from rapidjson import loads
+
+    # Small chunks and row groups, so the sort gathers each window from several parts.
+    monkeypatch.setattr(geoparquet, "_OUTPUT_CHUNK_SIZE", 100)
+    monkeypatch.setattr(geoparquet, "_SORTED_ROW_GROUP_SIZE", 64)
+    plain = get_buildings(helsinki_pbf, output=str(tmp_path / "plain.parquet"))
+    path = get_buildings(
+        helsinki_pbf, output=str(tmp_path / "sorted.parquet"), spatial_index=True
+    )
+    expected, gdf = gpd.read_parquet(plain), gpd.read_parquet(path)
+    assert list(gdf.columns) == list(expected.columns)
+    _assert_full_parity(expected, gdf)
+    distance = gdf.geometry.hilbert_distance(total_bounds=gdf.total_bounds)
+    assert distance.is_monotonic_increasing
+
+    table = pq.read_table(path)
+    bbox = table.column("bbox").combine_chunks()
+    for i, name in enumerate(("xmin", "ymin", "xmax", "ymax")):
+        assert bbox.field(name).to_pylist() == gdf.geometry.bounds.iloc[:, i].tolist()
+    geometry = loads(table.schema.metadata[b"geo"])["columns"]["geometry"]
+    assert geometry["covering"]["bbox"]["xmin"] == ["bbox", "xmin"]
+    assert geometry["bbox"] == gdf.total_bounds.tolist()
+    assert set(geometry["geometry_types"]) == set(gdf.geom_type)
+    metadata = pq.ParquetFile(path).metadata
+    assert metadata.num_row_groups == -(-len(gdf) // 64)
+
+    box = (24.935, 60.165, 24.94, 60.17)
+    within = gpd.read_parquet(path, bbox=box)
+    assert 0 < len(within) < len(gdf)
+    assert set(within["id"]) == set(gdf.cx[box[0] : box[2], box[1] : box[3]]["id"])
+
+
+def test_cached_layer_sorts_parts_with_empty_geometries(tmp_path):
+    # The cached layer is sorted from several parts; its empty and missing geometries (which
+    # have no place on the Hilbert curve) go last, and the original row order is restored on
+    # reading it back.
+    import pyarrow.parquet as pq
+    from rapidjson import loads
+
+    from pyrosm.engine.assemble import _to_arrow
+
+    rng = np.random.default_rng(0)
+    geometry = list(shapely.points(rng.uniform(24, 25, (8, 2))))
+    geometry[2] = shapely.Point()
+    geometry[5] = None
+    gdf = gpd.GeoDataFrame(
+        {
+            "id": np.arange(8),
+            "osm_type": ["node"] * 4 + ["way"] * 4,
+            "name": [None] * 4 + ["a", None, "b", None],
+        },
+        geometry=geometry,
+        crs="EPSG:4326",
+    )
+    path = str(tmp_path / "layer.parquet")
+    table = _to_arrow(gdf)
+    parts = [table.slice(start, 3) for start in range(0, 8, 3)]
+    geoparquet._write_cached_layer(parts, path, 3, {"read": 1})
+
+    table = pq.read_table(path)
+    assert table.column(geoparquet.ROW_COLUMN).to_pylist()[-2:] == [2, 5]
+    located = gpd.GeoSeries.from_wkb(table.column("geometry").to_numpy()[:-2])
+    distance = located.hilbert_distance(total_bounds=located.total_bounds)
+    assert distance.is_monotonic_increasing
+    pyrosm_metadata = loads(table.schema.metadata[geoparquet.PYROSM_METADATA])
+    assert pyrosm_metadata["read"] == {"read": 1}
+    assert pyrosm_metadata["column_kinds"]["name"] == ["way"]
+    assert pyrosm_metadata["column_kinds"]["id"] == ["node", "way"]
+    restored = cache._normalise(gpd.read_parquet(path))
+    assert restored["id"].tolist() == list(range(8))
+    assert restored.geometry.is_empty.tolist()[2] and restored.geometry.isna()[5]
 
 
 def test_cap_workers_reduces_above_cpu_count(monkeypatch):
@@ -1920,3 +2651,756 @@ def test_use_engine_routing(helsinki_pbf, helsinki_history_pbf):
     osh = OSM(helsinki_history_pbf, engine="out_of_core")
     assert osh._use_engine(None) is False
     assert osh._use_engine("2015-01-01") is False
+
+
+def _copy_pbf(src, tmp_path):
+    import shutil
+
+    dst = tmp_path / "copy.osm.pbf"
+    shutil.copy(src, dst)
+    return str(dst)
+
+
+def test_blob_index_saved_by_first_read(test_pbf, tmp_path, fresh_cache):
+    # The first full read summarises every block into a .pbfidx in the cache directory, not
+    # next to the source file; it lists the same blobs as the BlobHeader scan, with each
+    # block's element kinds, id ranges and keys.
+    import os
+    from pyrosm.engine import blob_index
+    from pyrosm.engine.blobs import _index_blobs
+    from pyrosm.pbfreader import iter_primitive_blocks
+
+    fp = _copy_pbf(test_pbf, tmp_path)
+    assert blob_index.load_index(fp) is None
+    OSM(fp).get_buildings()
+    assert len(list(fresh_cache.glob("index_*" + blob_index.INDEX_SUFFIX))) == 1
+    assert not os.path.exists(fp + blob_index.INDEX_SUFFIX)
+    index = blob_index.load_index(fp)
+    assert index.blobs() == _index_blobs(fp)
+
+    data = index.blob_type == "OSMData"
+    blocks = list(iter_primitive_blocks(fp))
+    for row, (_, _, nodes, ways, relations) in zip(np.flatnonzero(data), blocks):
+        for kind, elements, ranges in [
+            (blob_index.KIND_NODES, nodes, index.node_range),
+            (blob_index.KIND_WAYS, ways, index.way_range),
+            (blob_index.KIND_RELATIONS, relations, index.relation_range),
+        ]:
+            if elements is None:
+                assert not index.kinds[row] & kind
+                continue
+            assert index.kinds[row] & kind
+            assert ranges[row].tolist() == [elements["id"].min(), elements["id"].max()]
+    building_blobs = index.may_contain_keys(["building"])
+    assert building_blobs[data].any() and not building_blobs[~data].any()
+
+    # A changed source file invalidates the index.
+    st = os.stat(fp)
+    os.utime(fp, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert blob_index.load_index(fp) is None
+
+
+def test_blob_index_saved_beside_source_when_configured(
+    test_pbf, tmp_path, monkeypatch, fresh_cache
+):
+    # index_beside_source keeps the index next to the source file, as <file>.pbfidx.
+    import os
+    from pyrosm.engine import blob_index
+
+    monkeypatch.setattr(cache, "_settings", dict(cache._settings))
+    OSM.configure_cache(index_beside_source=True)
+    fp = _copy_pbf(test_pbf, tmp_path)
+    OSM(fp).get_buildings()
+    assert os.path.exists(fp + blob_index.INDEX_SUFFIX)
+    assert list(fresh_cache.glob("index_*" + blob_index.INDEX_SUFFIX)) == []
+    assert blob_index.load_index(fp) is not None
+
+
+def test_blob_index_falls_back_to_cache_dir(
+    test_pbf, tmp_path, monkeypatch, fresh_cache
+):
+    # When the source directory is not writable the index is kept in the cache directory.
+    from pathlib import Path
+    from pyrosm.engine import blob_index
+
+    monkeypatch.setitem(cache._settings, "index_beside_source", True)
+    fp = _copy_pbf(test_pbf, tmp_path)
+    monkeypatch.setattr(
+        blob_index, "_sidecar_path", lambda f: Path(tmp_path / "missing" / "x.pbfidx")
+    )
+    get_buildings(fp)
+    assert len(list(fresh_cache.glob("index_*" + blob_index.INDEX_SUFFIX))) == 1
+    assert blob_index.load_index(fp) is not None
+    # Clearing the source's cache entries removes its index with its cached layer.
+    assert cache.clear(fp) == 2
+    assert list(fresh_cache.glob("index_*" + blob_index.INDEX_SUFFIX)) == []
+    assert blob_index.load_index(fp) is None
+
+
+def test_blob_index_skips_node_blobs_outside_bbox(test_pbf, tmp_path):
+    # With a saved index a bounding-box read skips the node-only blobs outside the box, and
+    # returns the same data as the read that built the index.
+    from pyrosm.engine import blob_index
+    from pyrosm.pbfreader import parse_osm_data
+
+    fp = _copy_pbf(test_pbf, tmp_path)
+    bbox = [24.93, 60.16, 24.95, 60.17]  # Helsinki; test.osm.pbf is in Kotka
+    with pytest.warns(UserWarning, match="did not contain any OSM nodes"):
+        first = parse_osm_data(fp, bbox, False, None)
+    index = blob_index.load_index(fp)
+    node_only = index.only(blob_index.KIND_NODES)
+    assert node_only.any() and index.outside_bbox(bbox)[node_only].all()
+    assert len(index.blobs(~(node_only & index.outside_bbox(bbox)))) < len(index)
+
+    with pytest.warns(UserWarning, match="did not contain any OSM nodes"):
+        second = parse_osm_data(fp, bbox, False, None)
+    assert len(first[1]) == len(second[1]) == 0
+    assert [n["id"].tolist() for n in first[0] if len(n["id"])] == [
+        n["id"].tolist() for n in second[0] if len(n["id"])
+    ]
+
+
+def test_blob_index_id_ranges_select_blobs(helsinki_pbf):
+    # may_contain_ids keeps exactly the blobs whose id range holds a wanted id.
+    from pyrosm.engine import blob_index
+
+    get_buildings(helsinki_pbf)
+    index = blob_index.load_index(helsinki_pbf)
+    lo, hi = index.node_range[1]
+    mask = index.may_contain_ids(blob_index.KIND_NODES, [lo, hi, hi + 1, 10**15])
+    in_range = (index.node_range[:, 0] <= hi + 1) & (hi + 1 <= index.node_range[:, 1])
+    assert mask[1] and mask.sum() == 1 + in_range.sum()
+    assert not index.may_contain_ids(blob_index.KIND_WAYS, []).any()
+
+
+def test_completion_pass_reads_only_blobs_in_id_range(
+    helsinki_pbf, tmp_path, monkeypatch
+):
+    # With complete_relations the pass fetching the missing member ways reads only the blobs
+    # whose way id range can hold them, and the result matches the read without an index.
+    import pyrosm.pbfreader as pbfreader
+
+    fp = _copy_pbf(helsinki_pbf, tmp_path)
+    bbox = [24.93, 60.16, 24.95, 60.17]
+    first = OSM(fp, bounding_box=bbox, complete_relations=True).get_buildings()
+
+    calls = []
+    real = pbfreader.iter_primitive_blocks
+
+    def spy(filepath, workers=1, blobs=None):
+        calls.append(len(blobs))
+        return real(filepath, workers, blobs)
+
+    monkeypatch.setattr(pbfreader, "iter_primitive_blocks", spy)
+    second = OSM(fp, bounding_box=bbox, complete_relations=True).get_buildings()
+    assert len(calls) == 3 and calls[1] < calls[0]
+    _assert_full_parity(second, first)
+
+
+@pytest.mark.parametrize("method", ["get_natural", "get_landuse", "get_buildings"])
+def test_prefiltered_decode_parity(helsinki_pbf, tmp_path, fresh_cache, method):
+    # Once the blob index exists, blocks holding none of the layer's keys skip decoding their
+    # ways and relations (keeping the ways that may be relation members); the layer is
+    # unchanged.
+    from pyrosm.engine import blob_index
+    from pyrosm.engine.pool import _member_way_blobs
+
+    fp = _copy_pbf(helsinki_pbf, tmp_path)
+    first = getattr(OSM(fp, engine="out_of_core"), method)()
+    index = blob_index.load_index(fp)
+    assert index is not None
+    # The relations block's own ways hold members of the building relations.
+    assert int(index.offset[-1]) in _member_way_blobs(fp, index, [b"building"])
+    cache.clear()
+    second = getattr(OSM(fp, engine="out_of_core"), method)()
+    _assert_full_parity(second, first)
+
+
+_LAYERS = {
+    "network": {"network_type": "driving"},
+    "buildings": {},
+    "pois": {"custom_filter": {"amenity": True}},
+    "natural": {},
+}
+
+
+def test_get_layers_decodes_once(helsinki_pbf, monkeypatch):
+    # Every layer comes from one decode of the file (the union of their keys) and matches
+    # the layer read on its own.
+    from pyrosm.engine import readers
+
+    calls = []
+    real = readers._decode_and_run
+
+    def spy(filepath, osm_key_bytes, include_nodes, *args, **kwargs):
+        calls.append((sorted(osm_key_bytes), include_nodes))
+        return real(filepath, osm_key_bytes, include_nodes, *args, **kwargs)
+
+    monkeypatch.setattr(readers, "_decode_and_run", spy)
+    layers = readers.get_layers(helsinki_pbf, _LAYERS)
+    assert calls == [([b"amenity", b"building", b"highway", b"natural"], True)]
+    monkeypatch.setattr(readers, "_decode_and_run", real)
+
+    assert list(layers) == list(_LAYERS)
+    for name, kwargs in _LAYERS.items():
+        ref = getattr(readers, "get_" + name)(helsinki_pbf, **kwargs)
+        assert layers[name] is not None and len(layers[name]) == len(ref) > 0
+        _assert_full_parity(layers[name], ref)
+
+
+def test_get_layers_output_dir(helsinki_pbf, tmp_path):
+    # output= writes one GeoParquet per layer (the nodes=True network as a directory).
+    pytest.importorskip("pyarrow")
+    from pyrosm.engine import get_layers
+
+    out = tmp_path / "layers"
+    paths = get_layers(
+        helsinki_pbf,
+        {"buildings": {}, "network": {"nodes": True}},
+        output=str(out),
+    )
+    assert paths == {
+        "buildings": str(out / "buildings.parquet"),
+        "network": str(out / "network"),
+    }
+    _assert_full_parity(
+        cache.read_result(paths["buildings"]), get_buildings(helsinki_pbf)
+    )
+    assert (out / "network" / "edges.parquet").exists()
+    assert (out / "network" / "nodes.parquet").exists()
+
+
+def test_get_layers_rejects_bad_layers(helsinki_pbf, tmp_path):
+    from pyrosm.engine import get_layers
+
+    with pytest.raises(ValueError, match="Unknown layer"):
+        get_layers(helsinki_pbf, ["roads"])
+    with pytest.raises(ValueError, match="shared by all layers"):
+        get_layers(helsinki_pbf, {"buildings": {"bounding_box": [0, 0, 1, 1]}})
+    with pytest.raises(ValueError, match="cannot be combined with output"):
+        get_layers(
+            helsinki_pbf, {"boundaries": {"name": "x"}}, output=str(tmp_path / "out")
+        )
+
+
+def test_osm_get_layers_matches_methods(helsinki_pbf):
+    # OSM.get_layers returns each layer as its own method does, on both engines.
+    layers = {"buildings": {}, "landuse": {}}
+    for engine in ("in_memory", "out_of_core"):
+        osm = OSM(helsinki_pbf, engine=engine)
+        result = osm.get_layers(layers)
+        assert list(result) == list(layers)
+        _assert_full_parity(result["buildings"], osm.get_buildings())
+        _assert_full_parity(result["landuse"], osm.get_landuse())
+
+
+def test_shard_formats_hold_the_same_arrays(helsinki_pbf, monkeypatch):
+    # Arrow IPC shards (memory-mapped, refs list-typed, roles dictionary-encoded) read back the
+    # same arrays as the np.savez shards written without pyarrow.
+    pytest.importorskip("pyarrow")
+    from pyrosm.utils import _compat
+    from pyrosm.engine import shards
+
+    bbox_bounds = (24.9, 60.1, 25.0, 60.2)
+
+    def read_all(arrow):
+        monkeypatch.setattr(_compat, "HAS_PYARROW", arrow)
+        with pool._decoded(helsinki_pbf, None, True, 1, bbox_bounds) as (paths, _):
+            assert all(str(p).endswith(shards.shard_suffix()) for p in paths)
+            keys = shards.load_shard(paths[0]).keys() if not arrow else None
+            return [shards.load_shard(p) for p in paths], keys
+
+    (npz, keys), (arrow, _) = read_all(False), read_all(True)
+    assert len(arrow) == len(npz) > 0
+    for a, b in zip(arrow, npz):
+        for key in keys:
+            assert a[key].shape == b[key].shape, key
+            assert list(a[key].ravel()) == list(b[key].ravel()), key
+
+
+@pytest.mark.parametrize("arrow", [True, False])
+def test_shard_tags_load_without_pickle(
+    arrow, helsinki_pbf, tmp_path, monkeypatch, fresh_cache
+):
+    # The tag dicts are stored as indices into the shard's string table, so no shard -- one
+    # from the shared decoded-shard cache included -- is ever unpickled.
+    import pickle
+
+    from pyrosm.utils import _compat
+
+    if arrow:
+        pytest.importorskip("pyarrow")
+    monkeypatch.setattr(_compat, "HAS_PYARROW", arrow)
+    tags = np.empty(4, dtype=object)
+    tags[:] = [{"building": "yes", "name": "A"}, None, {}, {"name": "yes"}]
+    arrays = {"way_tags": tags, "rel_tags": np.empty(0, dtype=object)}
+    arrays["rel_memrole"] = np.array(["outer", "inner"], dtype=object)
+    path = shards.write_shard(tmp_path / "shard", arrays)
+    monkeypatch.setattr(pickle, "loads", lambda *a, **k: pytest.fail("unpickled"))
+    shard = shards.load_shard(path)
+    assert list(shard["way_tags"]) == list(tags)
+    assert len(shard["rel_tags"]) == 0
+    assert list(shard["rel_memrole"]) == ["outer", "inner"]
+
+    direct = get_buildings(helsinki_pbf, workers=1)
+    cache.clear()
+    cached = get_buildings(helsinki_pbf, workers=1, decode_cache=True)
+    with pool._decoded(helsinki_pbf, None, True, 1, decode_cache=True) as (paths, _):
+        assert str(paths[0]).startswith(str(fresh_cache))
+        assert sum(len(shards.load_shard(p)["way_tags"]) for p in paths) > 0
+    _assert_full_parity(cached, direct)
+
+
+def test_compact_shards_hold_the_same_arrays(helsinki_pbf, monkeypatch, fresh_cache):
+    # The compact encoding (varint deltas, fixed-point coordinates) is lossless and smaller,
+    # and a layer read from compact shards matches one read from plain shards.
+    pytest.importorskip("pyarrow")
+    from pyrosm.engine import shards
+
+    bbox_bounds = (24.9, 60.1, 25.0, 60.2)
+
+    def read_all(compact):
+        monkeypatch.setenv(shards.COMPACT_ENV, "1" if compact else "")
+        with pool._decoded(helsinki_pbf, None, True, 1, bbox_bounds) as (paths, _):
+            size = sum(os.path.getsize(p) for p in paths)
+            loaded = [shards.load_shard(p) for p in paths]
+            return size, [{k: s[k] for k in s._table.column_names} for s in loaded]
+
+    (plain_size, plain), (compact_size, compact) = read_all(False), read_all(True)
+    assert compact_size < plain_size
+    assert len(compact) == len(plain) > 0
+    for a, b in zip(compact, plain):
+        for key in b:
+            assert np.array_equal(a[key], b[key]) or list(a[key]) == list(b[key]), key
+
+    # Deltas of every size and sign round-trip, the ids and refs of any extract included.
+    arr = np.array([5, 4, 2**40, -(2**62), 2**62, 0, 130, 129], dtype=np.int64)
+    stored, metadata = shards._encode("refs", arr)
+    assert stored.dtype == np.uint8
+    assert np.array_equal(shards._decode(stored, metadata), arr)
+
+    monkeypatch.setenv(shards.COMPACT_ENV, "")
+    plain_gdf = get_pois(helsinki_pbf, workers=1)
+    cache.clear()
+    shards.configure(compact=True)
+    try:
+        assert shards.compact_enabled()
+        _assert_full_parity(get_pois(helsinki_pbf, workers=1), plain_gdf)
+    finally:
+        shards.configure()
+    with pytest.raises(ValueError):
+        shards.configure(compact="yes")
+
+
+def test_iter_layer_chunks_match_layer(helsinki_pbf, monkeypatch):
+    # The chunks (ways chunk_size at a time) together hold the layer's rows; the decoded shards
+    # are removed once the generator is exhausted.
+    import pandas as pd
+    from pyrosm.engine import iter_layer
+
+    shard_dirs = []
+    real = pool._decode_to
+
+    def spy(filepath, shard_dir, *args, **kwargs):
+        shard_dirs.append(shard_dir)
+        return real(filepath, shard_dir, *args, **kwargs)
+
+    monkeypatch.setattr(pool, "_decode_to", spy)
+    chunks = list(iter_layer(helsinki_pbf, "pois", chunk_size=100))
+    assert len(chunks) > 2 and all(len(c) > 0 for c in chunks)
+    assert not os.path.exists(shard_dirs[0])
+    mine = pd.concat(chunks, ignore_index=True)
+    ref = get_pois(helsinki_pbf)
+    # A tag column missing from some chunks is NaN there in the concatenation: compare the
+    # missing values as one.
+    for frame in (mine, ref):
+        for col in frame.columns.drop("geometry"):
+            frame[col] = frame[col].astype(object).where(frame[col].notna(), None)
+    _assert_full_parity(mine, ref)
+
+
+def test_iter_layer_arrow_batches_and_osm(helsinki_pbf):
+    pa = pytest.importorskip("pyarrow")
+    from pyrosm.engine import iter_layer
+
+    batches = list(iter_layer(helsinki_pbf, "buildings", chunk_size=200, as_arrow=True))
+    assert all(isinstance(b, pa.RecordBatch) for b in batches)
+    assert b"geo" in batches[0].schema.metadata
+    assert sum(b.num_rows for b in batches) == len(get_buildings(helsinki_pbf))
+    # OSM.iter_layer on both engines (the in-memory engine slices the parsed layer).
+    for engine in ("in_memory", "out_of_core"):
+        osm = OSM(helsinki_pbf, engine=engine)
+        sizes = [len(c) for c in osm.iter_layer("landuse", chunk_size=100)]
+        assert sum(sizes) == len(osm.get_landuse())
+
+
+def test_iter_layer_rejects_bad_arguments(helsinki_pbf):
+    from pyrosm.engine import iter_layer
+
+    with pytest.raises(ValueError, match="Unknown layer"):
+        iter_layer(helsinki_pbf, "roads")
+    with pytest.raises(ValueError, match="in chunks"):
+        iter_layer(helsinki_pbf, "network")
+    with pytest.raises(ValueError, match="chunk_size"):
+        iter_layer(helsinki_pbf, "buildings", chunk_size=0)
+    with pytest.raises(ValueError, match="name="):
+        iter_layer(helsinki_pbf, "boundaries", name="Helsinki")
+
+
+def test_decode_cache_serves_later_reads(helsinki_pbf, fresh_cache, monkeypatch):
+    # decode_cache=True decodes every tagged element once into the cache; later reads with
+    # other layers and filters collect from those shards without decoding, and match the
+    # regular reads.
+    calls = []
+    real = pool._decode_all
+
+    def spy(*args, **kwargs):
+        calls.append(args[4])
+        return real(*args, **kwargs)
+
+    monkeypatch.setattr(pool, "_decode_all", spy)
+    osm = OSM(helsinki_pbf, engine="out_of_core", decode_cache=True)
+    buildings = osm.get_buildings()
+    assert calls == [None]
+    decoded = cache.list_files(helsinki_pbf)
+    assert len(decoded) == 2 and any("decoded_" in p for p in decoded)
+
+    pois = osm.get_pois(custom_filter={"amenity": ["restaurant"]})
+    network = osm.get_network("driving")
+    assert calls == [None]
+
+    cache.clear()
+    _assert_full_parity(buildings, get_buildings(helsinki_pbf))
+    _assert_full_parity(
+        pois, get_pois(helsinki_pbf, custom_filter={"amenity": ["restaurant"]})
+    )
+    _assert_full_parity(network, get_network(helsinki_pbf, "driving"))
+    assert len(calls) == 4
+
+
+def test_decode_cache_cleared_with_source(helsinki_pbf, fresh_cache):
+    # clear(filepath) removes the source's decoded-shard directory with its layers.
+    get_landuse(helsinki_pbf, decode_cache=True)
+    assert len(cache.list_files(helsinki_pbf)) == 2
+    assert cache.clear(helsinki_pbf) == 2
+    assert cache.list_files(helsinki_pbf) == []
+    assert list(fresh_cache.iterdir()) == []
+
+
+def test_in_memory_result_cache(helsinki_pbf, fresh_cache, monkeypatch):
+    # OSM(cache=True) caches in-memory reads like the out-of-core layers: a new reader (e.g.
+    # in a later process) gets the cached frame back without parsing the PBF.
+    import pyrosm.pyrosm as pyrosm_module
+
+    ref = OSM(helsinki_pbf).get_buildings()
+    first = OSM(helsinki_pbf, cache=True).get_buildings()
+    assert len(cache.list_files(helsinki_pbf)) == 1
+
+    def no_parse(*args, **kwargs):
+        raise AssertionError("the PBF was parsed")
+
+    monkeypatch.setattr(pyrosm_module, "parse_osm_data", no_parse)
+    second = OSM(helsinki_pbf, cache=True).get_buildings()
+    _assert_full_parity(first, ref)
+    _assert_full_parity(second, ref)
+    with pytest.raises(AssertionError, match="was parsed"):
+        OSM(helsinki_pbf, cache=True).get_buildings(extra_attributes=["start_date"])
+    with pytest.raises(AssertionError, match="was parsed"):
+        OSM(helsinki_pbf).get_buildings()
+
+
+def test_in_memory_result_cache_network_nodes(helsinki_pbf, fresh_cache):
+    # get_network(nodes=True) caches the (nodes, edges) pair; the cached edges keep the
+    # network type to_graph reads.
+    osm = OSM(helsinki_pbf, cache=True)
+    ref_nodes, ref_edges = OSM(helsinki_pbf).get_network("driving", nodes=True)
+    for _ in range(2):
+        nodes, edges = OSM(helsinki_pbf, cache=True).get_network("driving", nodes=True)
+        _assert_full_parity(edges, ref_edges)
+        assert nodes["id"].tolist() == ref_nodes["id"].tolist()
+        assert nodes["tags"].tolist() == ref_nodes["tags"].tolist()
+        assert osm.to_graph(nodes, edges, graph_type="networkx").number_of_edges() > 0
+
+
+def test_in_memory_result_cache_history_without_timestamp(
+    test_pbf, fresh_cache, tmp_path, monkeypatch
+):
+    # An .osh.pbf read without a timestamp (its latest versions) is keyed stably, not on the
+    # current time: a later such read is served from the first one's cache entry.
+    import warnings
+
+    import pandas as pd
+
+    import pyrosm.pyrosm as pyrosm_module
+
+    osmium = pytest.importorskip("osmium")
+    history = str(tmp_path / "test.osh.pbf")
+    with osmium.SimpleWriter(osmium.io.File(history, "osh.pbf")) as writer:
+        for obj in osmium.FileProcessor(test_pbf):
+            writer.add(obj)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        first = OSM(history, cache=True).get_buildings()
+        (entry,) = cache.list_files(history)
+
+        def no_parse(*args, **kwargs):
+            raise AssertionError("the PBF was parsed")
+
+        now = pd.Timestamp.now
+        monkeypatch.setattr(
+            pd.Timestamp, "now", lambda tz=None: now(tz) + pd.Timedelta(days=1)
+        )
+        monkeypatch.setattr(pyrosm_module, "parse_osm_data", no_parse)
+        second = OSM(history, cache=True).get_buildings()
+    assert cache.list_files(history) == [entry]
+    _assert_full_parity(second, first)
+
+
+def test_in_memory_result_cache_validation(helsinki_pbf):
+    with pytest.raises(ValueError, match="'cache' should be a boolean"):
+        OSM(helsinki_pbf, cache="yes")
+
+
+def test_cache_lru_eviction_and_stats(helsinki_pbf, fresh_cache, monkeypatch):
+    # With a byte budget, writes evict the least recently used entries; a hit counts as a use.
+    import os
+
+    monkeypatch.setitem(cache._settings, "max_bytes", None)
+    monkeypatch.delenv(cache.MAX_BYTES_ENV, raising=False)
+    cache.reset_stats()
+    get_landuse(helsinki_pbf)
+    (landuse,) = fresh_cache.glob("result_*.parquet")
+    get_buildings(helsinki_pbf)
+    (buildings,) = set(fresh_cache.glob("result_*.parquet")) - {landuse}
+    os.utime(landuse, (1000, 1000))
+    os.utime(buildings, (2000, 2000))
+    # A hit refreshes landuse, so buildings is now the least recently used.
+    get_landuse(helsinki_pbf)
+    info = OSM.list_cache(stats=True)
+    assert info["files"] == sorted([str(landuse), str(buildings)])
+    assert (info["hits"], info["misses"], info["evictions"]) == (1, 2, 0)
+    # A layer's entry holds its unheld sidecar too.
+    assert info["bytes"] == cache._entry_size(landuse) + cache._entry_size(buildings)
+    assert info["max_bytes"] is None
+
+    buildings_size = cache._entry_size(buildings)
+    monkeypatch.setitem(cache._settings, "max_bytes", cache._entry_size(landuse))
+    assert cache.evict() == buildings_size
+    assert cache.list_files() == [str(landuse)]
+
+    # A new entry is kept even over budget; the older ones make way for it.
+    get_natural(helsinki_pbf)
+    info = OSM.list_cache(stats=True)
+    assert len(info["files"]) == 1 and info["files"] != [str(landuse)]
+    assert info["evictions"] == 2
+    assert info["bytes_evicted"] > info["bytes"] > 0
+
+
+def test_cache_eviction_and_clear_keep_the_calibration(
+    helsinki_pbf, fresh_cache, monkeypatch
+):
+    # The worker calibration shares the cache directory but is not a cache entry: neither an
+    # eviction down to an empty budget nor clear() removes it.
+    from pyrosm.engine import calibration
+
+    path = calibration._calibration_path()
+    calibration._write(
+        path, {"startup_s": 0.1, "per_worker_s": 0.01, "bytes_per_s": 1e8}
+    )
+    os.utime(path, (1000, 1000))
+    get_landuse(helsinki_pbf)
+    monkeypatch.setitem(cache._settings, "max_bytes", 1)
+    cache.evict()
+    assert cache.list_files() == [] and path.is_file()
+    get_landuse(helsinki_pbf)
+    assert OSM.clear_cache() == 1
+    assert path.is_file()
+    assert [p.name for p in fresh_cache.iterdir()] == [path.name]
+
+
+@pytest.mark.parametrize("complete_relations", [False, True])
+@pytest.mark.parametrize("polygon", [False, True])
+def test_bbox_read_served_from_cached_layer(
+    helsinki_pbf, monkeypatch, fresh_cache, complete_relations, polygon
+):
+    # Once the whole-file layer is cached, a bounding-box read is answered from that file
+    # (row groups picked by the bbox covering column) instead of a new decode.
+    from shapely.geometry import box
+
+    whole = get_buildings(helsinki_pbf)
+    xmin, ymin, xmax, ymax = whole.total_bounds
+    # The north-west quarter cuts no relation, so it is served either way.
+    bbox = [xmin, (ymin + ymax) / 2, (xmin + xmax) / 2, ymax]
+    if polygon:
+        bbox = box(*bbox)
+    ref = OSM(
+        helsinki_pbf, bounding_box=bbox, complete_relations=complete_relations
+    ).get_buildings()
+    decodes = _count_decodes(monkeypatch)
+    mine = get_buildings(
+        helsinki_pbf, bounding_box=bbox, complete_relations=complete_relations
+    )
+    assert sum(decodes) == 0
+    assert len(cache.list_files()) == 1
+    _assert_full_parity(mine, ref)
+
+
+def test_cached_layer_is_spatially_indexed(helsinki_pbf, fresh_cache):
+    # The cached layer holds a GeoParquet 1.1 bbox covering column and is stored spatially
+    # sorted in row groups; reading it back restores the read's own row order.
+    import pyarrow.parquet as pq
+    from rapidjson import loads
+
+    first = get_buildings(helsinki_pbf)
+    (path,) = cache.list_files()
+    schema = pq.read_schema(path)
+    geo = loads(schema.metadata[b"geo"])
+    assert geo["version"] == "1.1.0"
+    assert geo["columns"]["geometry"]["covering"]["bbox"]["xmin"] == ["bbox", "xmin"]
+    stored = pq.read_table(path, columns=[geoparquet.ROW_COLUMN]).column(0).to_numpy()
+    assert sorted(stored) == list(range(len(first)))
+    assert not (stored == np.arange(len(first))).all()
+    again = get_buildings(helsinki_pbf)
+    assert list(again.columns) == list(first.columns)
+    assert again["id"].tolist() == first["id"].tolist()
+
+
+def test_bbox_read_cutting_a_relation_decodes(helsinki_pbf, monkeypatch, fresh_cache):
+    # A box that cuts a relation is not served from the cached layer (a read of the box
+    # returns the relation's partial geometry), so it falls back to a decode.
+    whole = get_buildings(helsinki_pbf)
+    relation = whole[whole["osm_type"] == "relation"].geometry.iloc[0]
+    xmin, ymin, xmax, ymax = relation.bounds
+    bbox = [xmin, ymin, (xmin + xmax) / 2, (ymin + ymax) / 2]
+    ref = OSM(helsinki_pbf, bounding_box=bbox).get_buildings()
+    decodes = _count_decodes(monkeypatch)
+    mine = get_buildings(helsinki_pbf, bounding_box=bbox)
+    assert sum(decodes) == 1
+    _assert_full_parity(mine, ref)
+
+
+def test_narrower_filter_served_from_cached_layer(test_pbf, monkeypatch, fresh_cache):
+    # A cached unfiltered layer answers a narrower value filter of it (and a box of that)
+    # without decoding the PBF again.
+    get_buildings(test_pbf)
+    decodes = _count_decodes(monkeypatch)
+    narrow = {"building": ["residential", "industrial"]}
+    mine = get_buildings(test_pbf, custom_filter=narrow)
+    xmin, ymin, xmax, ymax = mine.total_bounds
+    bbox = [xmin, ymin, (xmin + xmax) / 2, (ymin + ymax) / 2]
+    boxed = get_buildings(test_pbf, custom_filter=narrow, bounding_box=bbox)
+    assert sum(decodes) == 0
+    assert len(cache.list_files()) == 1
+    _assert_full_parity(mine, OSM(test_pbf).get_buildings(custom_filter=narrow))
+    _assert_full_parity(
+        boxed, OSM(test_pbf, bounding_box=bbox).get_buildings(custom_filter=narrow)
+    )
+
+
+def test_narrower_read_decodes_without_unheld_record(
+    test_pbf, monkeypatch, fresh_cache
+):
+    # A layer whose record of the elements it holds no row of was too large to keep cannot
+    # tell what a narrower read would return: the read decodes instead.
+    monkeypatch.setattr(cache, "_MAX_UNHELD_BYTES", 0)
+    get_buildings(test_pbf)
+    assert list(fresh_cache.glob("*" + cache.UNHELD_SUFFIX)) == []
+    decodes = _count_decodes(monkeypatch)
+    narrow = {"building": ["residential", "industrial"]}
+    mine = get_buildings(test_pbf, custom_filter=narrow)
+    assert sum(decodes) == 1
+    _assert_full_parity(mine, OSM(test_pbf).get_buildings(custom_filter=narrow))
+
+
+def test_other_columns_served_from_cached_layer(helsinki_pbf, monkeypatch, fresh_cache):
+    # Extra tag columns are taken out of a cached layer's 'tags' column; with only the
+    # requested tags kept, fewer columns are a projection of the cached ones.
+    get_buildings(helsinki_pbf)
+    tags = ["building", "name", "height"]
+    get_data_by_custom_criteria(
+        helsinki_pbf, {"building": True}, tags_as_columns=tags, keep_other_tags=False
+    )
+    decodes = _count_decodes(monkeypatch)
+    extra = get_buildings(helsinki_pbf, extra_attributes=["start_date", "roof:shape"])
+    fewer = get_data_by_custom_criteria(
+        helsinki_pbf,
+        {"building": True},
+        tags_as_columns=["name"],
+        keep_other_tags=False,
+    )
+    assert sum(decodes) == 0
+    _assert_full_parity(
+        extra,
+        OSM(helsinki_pbf).get_buildings(extra_attributes=["start_date", "roof:shape"]),
+    )
+    cache.clear()
+    ref = get_data_by_custom_criteria(
+        helsinki_pbf,
+        {"building": True},
+        tags_as_columns=["name"],
+        keep_other_tags=False,
+    )
+    _assert_full_parity(fewer, ref)
+
+
+def test_narrower_read_keeps_relations_absorbing_no_returned_way(
+    helsinki_pbf, monkeypatch, fresh_cache
+):
+    # The filter drops building relations, but none of the member ways it keeps: no way comes
+    # back as a standalone way, so the cached layer answers without a decode phase.
+    osm = OSM(helsinki_pbf, engine="out_of_core", workers=1)
+    osm.get_buildings()
+    decodes = _count_decodes(monkeypatch)
+    narrow = {"building": ["residential"]}
+    mine = osm.get_buildings(custom_filter=narrow)
+    assert sum(decodes) == 0
+    assert "decode" not in osm.last_read_stats.phases
+    _assert_full_parity(mine, OSM(helsinki_pbf).get_buildings(custom_filter=narrow))
+
+
+def test_narrower_read_not_served_when_inexact(helsinki_pbf, monkeypatch, fresh_cache):
+    # A narrower filter that drops the building relations holding 'building=yes' member ways
+    # lets those through as standalone ways, which the cached layer does not hold: the read
+    # decodes instead.
+    get_buildings(helsinki_pbf)
+    decodes = _count_decodes(monkeypatch)
+    narrow = {"building": ["yes"]}
+    mine = get_buildings(helsinki_pbf, custom_filter=narrow)
+    assert sum(decodes) == 1
+    _assert_full_parity(mine, OSM(helsinki_pbf).get_buildings(custom_filter=narrow))
+
+
+def test_cache_covers():
+    base = {
+        "filter_spec": [["building"], {"building": [True]}, "keep"],
+        "tags_as_columns": ["building", "name"],
+        "keep_metadata": True,
+        "bounding_box": None,
+        "complete_relations": False,
+        "keep_other_tags": True,
+    }
+
+    def read(**changes):
+        return {**base, **changes}
+
+    assert cache.covers(base, base)
+    assert cache.covers(
+        base, read(filter_spec=[["building"], {"building": ["yes"]}, "keep"])
+    )
+    assert not cache.covers(
+        read(filter_spec=[["building"], {"building": ["yes"]}, "keep"]), base
+    )
+    assert cache.covers(base, read(tags_as_columns=["height"]))
+    assert not cache.covers(
+        read(keep_other_tags=False),
+        read(keep_other_tags=False, tags_as_columns=["height"]),
+    )
+    assert cache.covers(base, read(bounding_box=[0, 0, 1, 1], complete_relations=True))
+    assert not cache.covers(read(bounding_box=[0, 0, 1, 1]), base)
+    assert not cache.covers(base, read(keep_metadata=False))
+    # exclude: excluding more values is narrower.
+    excl = [["highway"], {"highway": ["service"]}, "exclude"]
+    more = [["highway"], {"highway": ["service", "footway"]}, "exclude"]
+    assert cache.covers(read(filter_spec=excl), read(filter_spec=more))
+    assert not cache.covers(read(filter_spec=more), read(filter_spec=excl))
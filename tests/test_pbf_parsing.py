@@ -57,10 +57,12 @@ def test_parsing_basic_elements_from_pbf(test_pbf):
     # WAYS
     # ----
 
-    # Ways should be a list of dictionaries
+    # Ways are held in a columnar store that iterates as way dictionaries
+    from pyrosm.way_store import WayStore
+
     assert isinstance(
-        ways, list
-    ), f"way_records should be a list of dictionaries, got '{type(ways)}'."
+        ways, WayStore
+    ), f"way_records should be a WayStore, got '{type(ways)}'."
     for way in ways:
         assert isinstance(way, dict)
 
@@ -99,7 +101,7 @@ def test_parsing_basic_elements_from_pbf(test_pbf):
 
     # NODE COORDINATES
     # ----------------
-    # Compact store (cykhash id->index map + column arrays) replacing the former
+    # Compact store (id->index lookup + column arrays) replacing the former
     # dict-of-dicts; it still iterates as (id, record) pairs.
     from pyrosm.node_lookup import NodeLocations
 
@@ -115,6 +117,59 @@ def test_parsing_basic_elements_from_pbf(test_pbf):
         assert isinstance(value["lon"], float)
 
 
+@pytest.mark.parametrize("dense_mmap_bytes", [None, 0])
+def test_node_locations_backends_agree(monkeypatch, dense_mmap_bytes):
+    # The dense, sorted and hash id lookups return the same rows (the dense one also when
+    # memory-mapped), and "auto" picks the dense index for ids filling their span.
+    import numpy as np
+    import pandas as pd
+    from pyrosm import node_lookup
+    from pyrosm.node_lookup import NodeLocations
+
+    if dense_mmap_bytes is not None:
+        monkeypatch.setattr(node_lookup, "DENSE_MMAP_BYTES", dense_mmap_bytes)
+    ids = np.array([7, 3, 12, 5, 9, 10, 4, 8], dtype=np.int64)
+    coords = pd.DataFrame({"id": ids, "lon": ids * 0.5, "lat": ids * -0.5})
+    queries = np.array([3, 12, 2, 13, 8, 7, 6, 7, -1, 10**12], dtype=np.int64)
+    results = {}
+    for backend in node_lookup.BACKENDS:
+        lookup = NodeLocations(coords, backend=backend)
+        assert lookup.backend == backend
+        idx, lon, lat = lookup.gather(queries)
+        assert list(idx >= 0) == [q in set(ids.tolist()) for q in queries]
+        assert np.array_equal(ids[idx[idx >= 0]], queries[idx >= 0])
+        assert np.array_equal(lon[idx >= 0], queries[idx >= 0] * 0.5)
+        assert [int(q) in lookup for q in queries] == list(idx >= 0)
+        results[backend] = idx
+    assert np.array_equal(results["dense"], results["sorted"])
+    assert np.array_equal(results["dense"], results["hash"])
+
+    # A coordinate-only dense store holds the coordinates in its id-indexed array (0 included),
+    # and falls back to the row index for coordinates off the 1e-7 degree grid.
+    lon = np.array([0.0, 24.9384, -0.0000001, 180.0, -179.9999999, 60.1, 1.5, -3.25])
+    lat = np.array([0.0, 60.1699, 89.9, -90.0, 0.0000001, -45.0, 2.0, 7.5])
+    lookup = NodeLocations.from_coordinates(ids, lon, lat)
+    assert lookup.backend == "dense" and len(lookup) == len(ids)
+    idx, found_lon, found_lat = lookup.gather(queries)
+    assert np.array_equal(idx >= 0, results["dense"] >= 0)
+    row = {i: r for r, i in enumerate(ids.tolist())}
+    expected = [row[q] for q in queries[idx >= 0].tolist()]
+    assert np.array_equal(found_lon[idx >= 0], lon[expected])
+    assert np.array_equal(found_lat[idx >= 0], lat[expected])
+    assert dict(lookup.items()) == {
+        i: {"lon": lon[r], "lat": lat[r]} for i, r in row.items()
+    }
+    off_grid = NodeLocations.from_coordinates(ids, lon + 1e-9, lat)
+    assert off_grid.backend == "dense"
+    assert np.array_equal(off_grid.gather(queries)[0], results["dense"])
+
+    assert NodeLocations(coords).backend == "dense"
+    assert node_lookup.choose_backend(np.array([1, 5, 10**9])) == "sorted"
+    assert node_lookup.choose_backend(np.array([10**9, 5, 1])) == "hash"
+    with pytest.raises(ValueError):
+        NodeLocations(coords, backend="btree")
+
+
 def test_getting_nodes(test_pbf):
     from pyrosm import OSM
     from geopandas import GeoDataFrame
@@ -201,3 +256,93 @@ def test_id_tag_does_not_overwrite_osm_id():
     # A way without an 'id' tag is unaffected (no spurious id_tag key)
     assert exploded[1]["id"] == 67890
     assert "id_tag" not in exploded[1]
+
+
+def test_way_store_rebuilds_exploded_way_records():
+    """The columnar way store rebuilds the same records explode_way_tags produces,
+    including the 'id_tag' renaming (#233) and a tag overriding a structural key."""
+    from pyrosm.tagparser import explode_way_tags
+    from pyrosm.way_store import WayStore
+
+    ways = [
+        {
+            "id": 12345,
+            "version": 2,
+            "timestamp": 1600000000,
+            "visible": True,
+            "tags": {"building": "yes", "id": "stray-tag-value"},
+            "nodes": [1, 2, 3],
+        },
+        {
+            "id": 67890,
+            "version": 1,
+            "timestamp": 1500000000,
+            "visible": False,
+            "tags": {},
+            "nodes": [],
+        },
+    ]
+    exploded = explode_way_tags([dict(w, tags=dict(w["tags"])) for w in ways])
+    store = WayStore.from_records(exploded)
+
+    assert len(store) == 2
+    assert store.records() == exploded
+    assert list(store) == exploded
+    assert store.record(0) == exploded[0]
+    assert list(store.records([1])) == [exploded[1]]
+    assert [list(r) for r in store.records()] == [list(r) for r in exploded]
+    # Tag strings are interned once in the store's tables
+    assert "building" in store.key_names and "id_tag" in store.key_names
+    assert store.refs.tolist() == [1, 2, 3]
+    assert store.refs_off.tolist() == [0, 3, 3]
+
+
+def test_way_store_matches_record_filtering(test_pbf):
+    """Filtering the columnar way store gives the same ways as filtering the
+    equivalent list of way records."""
+    from pyrosm import OSM
+    from pyrosm.data_manager import _get_osm_ways_and_relations
+    from pyrosm.config import Conf
+
+    osm = OSM(filepath=test_pbf)
+    osm._read_pbf()
+    store = osm._way_records
+    records = list(store)
+    for custom_filter, keep_all in [({"highway": True}, False), ({}, True)]:
+        osm_keys = list(custom_filter)
+        args = (
+            osm._relations,
+            osm_keys,
+            list(Conf.tags.highway),
+            custom_filter,
+            "keep",
+            True,
+            None,
+            keep_all,
+        )
+        from_store = _get_osm_ways_and_relations(store, *args)
+        from_records = _get_osm_ways_and_relations(records, *args)
+        assert from_store[0]["id"].tolist() == from_records[0]["id"].tolist()
+        assert from_store[0].keys() == from_records[0].keys()
+
+
+def test_threaded_block_decode_matches_serial(helsinki_pbf):
+    """Decoding the blocks on a thread pool yields the same blocks, in file order, as
+    the single-threaded read."""
+    import numpy as np
+    from pyrosm.pbfreader import iter_primitive_blocks
+
+    serial = list(iter_primitive_blocks(helsinki_pbf, 1))
+    threaded = list(iter_primitive_blocks(helsinki_pbf, 3))
+    assert len(serial) == len(threaded) > 1
+    for s_block, t_block in zip(serial, threaded):
+        s_table, s_header, *s_elements = s_block
+        t_table, t_header, *t_elements = t_block
+        assert s_table == t_table
+        assert s_header == t_header
+        for s, t in zip(s_elements, t_elements):
+            assert (s is None) == (t is None)
+            if s is not None:
+                assert s.keys() == t.keys()
+                for key in s:
+                    assert np.array_equal(s[key], t[key])
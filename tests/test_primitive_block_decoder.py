@@ -257,6 +257,46 @@ def test_decoder_matches_protobuf(fixture, request):
     assert n_blocks > 0 and n_nodes > 0 and n_ways > 0 and n_rels > 0
 
 
+def test_plain_nodes_decode_like_dense(tmp_path):
+    """Plain (non-dense) ``Node`` groups are returned in the dense-node layout."""
+    osmium = pytest.importorskip("osmium")
+    src = get_data("test_pbf")
+    nondense = str(tmp_path / "nondense.osm.pbf")
+    with osmium.SimpleWriter(
+        osmium.io.File(nondense, "pbf,pbf_dense_nodes=false")
+    ) as writer:
+        for obj in osmium.FileProcessor(src):
+            writer.add(obj)
+
+    n_nodes = 0
+    for raw in _iter_block_bytes(nondense):
+        st, _, nodes, _, _ = decode_primitive_block(raw)
+        pb = PrimitiveBlock()
+        pb.ParseFromString(raw)
+        ref = [node for g in pb.primitivegroup for node in g.nodes]
+        assert (nodes is None) == (len(ref) == 0)
+        if nodes is None:
+            continue
+        n_nodes += len(ref)
+        np.testing.assert_array_equal(nodes["id"], [n.id for n in ref])
+        np.testing.assert_array_equal(nodes["lat"], [n.lat for n in ref])
+        np.testing.assert_array_equal(nodes["lon"], [n.lon for n in ref])
+        np.testing.assert_array_equal(nodes["version"], [n.info.version for n in ref])
+        np.testing.assert_array_equal(
+            nodes["timestamp"], [n.info.timestamp for n in ref]
+        )
+        expected_kv = []
+        for n in ref:
+            for k, v in zip(n.keys, n.vals):
+                expected_kv += [k, v]
+            expected_kv.append(0)
+        if len(nodes["keys_vals"]) > 0:
+            np.testing.assert_array_equal(nodes["keys_vals"], expected_kv)
+        else:
+            assert not any(len(n.keys) for n in ref)
+    assert n_nodes > 0
+
+
 def test_keep_metadata_false_omits_metadata(helsinki_pbf):
     meta = {"version", "timestamp", "changeset", "uid", "user_sid", "visible"}
     saw_ways = False
@@ -274,3 +314,31 @@ def test_empty_block_returns_empty(helsinki_pbf):
     st, header, nodes, ways, relations = decode_primitive_block(b"")
     assert st == [] and nodes is None and ways is None and relations is None
     assert header["granularity"] == 100
+
+
+def test_required_keys_prefilter(helsinki_pbf):
+    # A block holding none of the required keys skips its ways and relations and decodes
+    # its nodes without metadata; a block holding one decodes in full.
+    meta = {"version", "timestamp", "changeset", "uid", "user_sid", "visible"}
+    skipped = kept = 0
+    for raw in _iter_block_bytes(helsinki_pbf):
+        full = decode_primitive_block(raw)
+        for key in (b"building", b"no-such-key"):
+            st, _, nodes, ways, relations = decode_primitive_block(
+                raw, required_keys=[key]
+            )
+            assert st == full[0]
+            if key in st:
+                kept += 1
+                for mine, ref in zip((nodes, ways, relations), full[2:]):
+                    assert (mine is None) == (ref is None)
+                    if mine is not None:
+                        _assert_arrays(mine, ref, key)
+            else:
+                skipped += 1
+                assert ways is None and relations is None
+                if nodes is not None:
+                    assert meta.isdisjoint(nodes.keys())
+                    for name in ("id", "lat", "lon", "keys_vals"):
+                        assert np.array_equal(nodes[name], full[2][name])
+    assert skipped > 0 and kept > 0